@@ -1,9 +1,14 @@
 # app.py
 
 from translate import create_zip, create_zip_with_structure, _get_translate_client
-from translation_runner import translate_single_file
+from translation_runner import translate_single_file, translate_single_file_multi, translate_file_group
 from llm_models import get_models, get_model_info
 from cost_estimator import estimate_cost, format_cost_summary
+import checkpoint
+import cost_calibration
+from job_queue import JobQueue, JobConflict, JobForbidden
+from usage_report import UsageRecorder, usage_report_name
+from circuit_breaker import OPEN, breaker_states
 from flask import Flask, request, render_template, send_from_directory, flash, redirect, jsonify
 import logging
 import re
@@ -13,10 +18,11 @@ import os
 import uuid
 import shutil
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 import datetime
-from flask_socketio import SocketIO, emit
-from time import sleep
+from flask_socketio import SocketIO, emit, join_room
+import threading
 from config import SECRET_KEY, TRANSLATION_ENGINE, ALLOWED_EXTENSIONS
 import config
 from google.auth.exceptions import RefreshError
@@ -51,18 +57,51 @@ class AllTranslationsFailed(Exception):
     """全部语言/文件翻译失败 —— 映射到 HTTP 500（区别于坏输入的 400）。"""
 
 
-def _emit_progress(data, socket_sid=None):
+def _emit_progress(data, job_id=None):
     """发送进度事件。
 
-    socket_sid 存在时定向发送给发起请求的客户端（前端把 socket.id 放进 FormData）；
-    缺失时退回原有全局广播行为（namespace 不变 /test）。
+    job_id 存在时发到该任务的房间 job:<job_id>（客户端 emit join_job 加入；刷新页面 / 重连后
+    重新加入即可继续收），并同步到任务队列的进度快照（GET /api/jobs/<job_id> 可读）；
+    缺失时退回全局广播（namespace 不变 /test）。
     """
-    if socket_sid:
-        socketio.emit("progress", data, namespace="/test", to=socket_sid)
+    if job_id:
+        socketio.emit("progress", {**data, "job_id": job_id}, namespace="/test", to=f"job:{job_id}")
+        if _job_queue is not None:
+            _job_queue.report(job_id, data.get("progress"), data.get("message") or data.get("error"))
     else:
         socketio.emit("progress", data, namespace="/test")
 
 
+# 后台任务队列（懒加载单例；测试可 monkeypatch _job_queue 为隔离实例）
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def _request_owner():
+    """当前请求的提交方标识（客户端 IP）：任务归属与公平调度共用。"""
+    return request.remote_addr or ""
+
+
+def _owned_job(job_id):
+    """当前提交方自己的任务快照（不含 owner 字段）；不存在返回 None，属于他人抛 JobForbidden。"""
+    job = _get_job_queue().get(job_id)
+    if job is None:
+        return None
+    if job.pop("owner") != _request_owner():
+        raise JobForbidden(f"任务 {job_id} 不属于当前提交方")
+    return job
+
+
+def _get_job_queue():
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                config.JOB_QUEUE_PATH, _run_translation_job, config.JOB_WORKERS
+            ).start()
+        return _job_queue
+
+
 def _safe_remove(path):
     """尽力删除单个文件，失败仅告警不抛错。"""
     try:
@@ -85,8 +124,8 @@ def _needs_review_sidecar(output_file_path):
     """若翻译产出了 QA 待复审 sidecar（LLM/JSON 引擎在主输出旁写的
     `<base>_<lang>.needs_review.json`），返回其路径，否则 None。
 
-    命名由 translate_llm.translate_json_file_llm 决定：主输出 `foo_zh-TW.json`
-    对应 sidecar `foo_zh-TW.needs_review.json`。Google/JS 引擎不写 sidecar，
+    命名由 translate_llm._write_needs_review 决定：主输出 `foo_zh-TW.json`（或 `.js`）
+    对应 sidecar `foo_zh-TW.needs_review.json`。Google 引擎不写 sidecar，
     此时文件不存在，返回 None（无副作用）。以"文件是否存在"判定，与引擎无关。
     """
     sidecar = os.path.splitext(output_file_path)[0] + ".needs_review.json"
@@ -262,9 +301,31 @@ def get_llm_models_api():
         return jsonify({"success": False, "error": str(e), "models": []})
 
 
-def process_zip_archive(zip_path, target_languages, translation_engine, ai_model, output_dir, base_name, timestamp, unique_id, socket_sid=None):
+@app.route("/api/health")
+def health_route():
+    """健康检查：进程存活 + 各模型熔断器状态（见 circuit_breaker）。
+
+    {success, status, circuit_breaker: {enabled, models: [{model, state, requests, failures,
+    failure_rate, trips, retry_after}]}}；任一模型断开时 status 为 "degraded"（HTTP 仍为 200）。
+    """
+    models = breaker_states()
+    degraded = any(m["state"] == OPEN for m in models)
+    return jsonify({
+        "success": True,
+        "status": "degraded" if degraded else "ok",
+        "circuit_breaker": {"enabled": bool(config.CIRCUIT_BREAKER), "models": models},
+    })
+
+
+def process_zip_archive(zip_path, target_languages, translation_engine, ai_model, output_dir, base_name, timestamp, unique_id, job_id=None, checkpoint_job=None, usage=None):
     """
     处理 ZIP 压缩包：解压、翻译所有文件、保持目录结构打包
+    (文件, 语言) 任务彼此独立：先建全量任务表，再在有界线程池（config.ZIP_TASK_JOBS）上并发执行；
+    LLM 请求另受 llm_client 的全进程在途上限约束。进度为各任务进度的平均值。
+    config.ZIP_CROSS_FILE_BATCHING 且为 LLM 引擎时，同一语言的全部文件合并成一个任务跨文件分批。
+    job_id: 后台任务 ID（进度事件发到该任务房间）
+    checkpoint_job: 断点续传检查点 ID；各文件以包内相对路径为检查点标识（重传同一 ZIP 可续传）
+    usage: 用量记录（usage_report.UsageRecorder）；给出时报告 <base_name>.usage.json 打进 ZIP 根目录
     返回: (zip_name, zip_path, errors) —— errors 为部分失败任务的消息列表（全部成功时为空）
     坏 ZIP / 空 ZIP / ZIP 炸弹 → ValueError；全部任务失败 → AllTranslationsFailed。
     """
@@ -279,104 +340,132 @@ def process_zip_archive(zip_path, target_languages, translation_engine, ai_model
         if not valid_files:
             raise ValueError("ZIP 文件中没有找到有效的 .json 或 .js 文件")
 
-        total_files = len(valid_files)
-        total_languages = len(target_languages)
-        total_tasks = total_files * total_languages
-
-        # 存储翻译结果：{语言: [(相对路径, 输出文件路径), ...]}
-        translated_files = []
-        errors = []  # 部分失败任务的可读消息（"<相对路径> (<语言>): <原因>"）
-        completed_tasks = 0
-
-        for lang_index, target_language in enumerate(target_languages):
-            # 为每种语言创建输出子目录
-            lang_output_dir = os.path.join(output_dir, target_language)
-            os.makedirs(lang_output_dir, exist_ok=True)
+        # 合并模式（仅 LLM）：同一语言的全部文件叶子进一个池统一分批，碎片化语言包的请求数
+        # 按总量而非文件数计；否则每个 (文件, 语言) 一个任务
+        pooled = translation_engine == "openrouter" and config.ZIP_CROSS_FILE_BATCHING
+        # 全量任务表 [(语言, [(相对路径, 完整路径), ...])]：语言在外、文件在内
+        # （结果 / 错误按此顺序汇总，与并发完成顺序无关）
+        if pooled:
+            tasks = [(target_language, list(valid_files)) for target_language in target_languages]
+        else:
+            tasks = [
+                (target_language, [entry])
+                for target_language in target_languages
+                for entry in valid_files
+            ]
+
+        lock = threading.Lock()
+        pct_by_task = [0.0] * len(tasks)
+
+        def report(index, pct, message=None, error=None):
+            with lock:
+                pct_by_task[index] = pct
+                overall = sum(pct_by_task) / len(tasks)
+            data = {"progress": overall}
+            if error is not None:
+                data["error"] = error
+            else:
+                data["message"] = message
+            _emit_progress(data, job_id)
+
+        def deliver(index, relative_path, result, error):
+            """单个 (文件, 语言) 的结果 → (交付文件列表 [(包内相对路径, 文件路径)], 错误消息 | None)。"""
+            target_language = tasks[index][0]
+            if error is not None:
+                error_msg = str(error)
+                logger.error(f"翻译失败 {relative_path} ({target_language}): {error_msg}")
+                report(
+                    index, pct_by_task[index],
+                    error=f"⚠️ {relative_path} ({target_language}) 翻译失败: {error_msg}",
+                )
+                return [], f"{relative_path} ({target_language}): {error_msg}"
 
-            _emit_progress(
-                {
-                    "progress": (completed_tasks / total_tasks) * 100,
-                    "message": f"开始翻译到 {target_language}...",
-                },
-                socket_sid,
+            # 计算输出文件的相对路径（保持原始目录结构）
+            output_file_name, output_file_path = result
+            output_relative_path = os.path.join(
+                target_language, os.path.dirname(relative_path), output_file_name
             )
+            delivered = [(output_relative_path, output_file_path)]
 
-            for file_index, (relative_path, full_path) in enumerate(valid_files):
-                try:
-                    # 计算进度
-                    task_start = completed_tasks / total_tasks * 100
-                    task_end = (completed_tasks + 1) / total_tasks * 100
-
-                    # 创建保持目录结构的输出路径
-                    relative_dir = os.path.dirname(relative_path)
-                    if relative_dir:
-                        file_output_dir = os.path.join(lang_output_dir, relative_dir)
-                        os.makedirs(file_output_dir, exist_ok=True)
-                    else:
-                        file_output_dir = lang_output_dir
-
-                    # 进度回调（闭包捕获 task_start/task_end/target_language/relative_path/socket_sid）
-                    def progress_callback(item_progress, message):
-                        total_progress = task_start + (item_progress / 100) * (task_end - task_start)
-                        _emit_progress(
-                            {
-                                "progress": total_progress,
-                                "message": f"{target_language} - {os.path.basename(relative_path)}: {message}",
-                            },
-                            socket_sid,
-                        )
-
-                    _emit_progress(
-                        {
-                            "progress": task_start,
-                            "message": f"翻译 {relative_path} 到 {target_language}...",
-                        },
-                        socket_sid,
+            # QA 复审 sidecar 与主文件同目录、同名换后缀，纳入 ZIP 保持目录结构
+            sidecar = _needs_review_sidecar(output_file_path)
+            if sidecar:
+                sidecar_rel = os.path.join(
+                    os.path.dirname(output_relative_path), os.path.basename(sidecar)
+                )
+                delivered.append((sidecar_rel, sidecar))
+                logger.info(f"复审 sidecar 纳入交付: {sidecar_rel}")
+
+            logger.info(f"翻译完成: {relative_path} -> {output_relative_path}")
+            return delivered, None
+
+        def run_task(index):
+            """执行一个任务（单文件或合并池），返回各文件的 deliver 结果（顺序同任务内文件）。"""
+            target_language, files = tasks[index]
+            subject = files[0][0] if len(files) == 1 else f"{len(files)} 个文件"
+            label = f"{target_language} - {os.path.basename(subject)}"
+            callback = lambda pct, message: report(index, pct, f"{label}: {message}")
+            # 创建保持目录结构的输出路径
+            file_output_dirs = [
+                os.path.join(output_dir, target_language, os.path.dirname(relative_path))
+                for relative_path, _full_path in files
+            ]
+            try:
+                for file_output_dir in file_output_dirs:
+                    os.makedirs(file_output_dir, exist_ok=True)
+                report(index, 0.0, f"翻译 {subject} 到 {target_language}...")
+                if pooled:
+                    checkpoint_kwargs = (
+                        {"job_id": checkpoint_job, "checkpoint_name": "zip-pool"}
+                        if checkpoint_job else {}
                     )
-
-                    # 翻译文件
-                    output_file_name, output_file_path = translate_single_file(
-                        full_path, target_language, translation_engine, ai_model,
-                        file_output_dir, progress_callback
+                    outcomes = translate_file_group(
+                        [(full_path, d) for (_rel, full_path), d in zip(files, file_output_dirs)],
+                        target_language, ai_model, callback, usage=usage, **checkpoint_kwargs
                     )
-
-                    # 计算输出文件的相对路径（保持原始目录结构）
-                    if relative_dir:
-                        output_relative_path = os.path.join(target_language, relative_dir, output_file_name)
-                    else:
-                        output_relative_path = os.path.join(target_language, output_file_name)
-
-                    translated_files.append((output_relative_path, output_file_path))
-
-                    # QA 复审 sidecar 与主文件同目录、同名换后缀，纳入 ZIP 保持目录结构
-                    sidecar = _needs_review_sidecar(output_file_path)
-                    if sidecar:
-                        sidecar_rel = os.path.join(
-                            os.path.dirname(output_relative_path), os.path.basename(sidecar)
-                        )
-                        translated_files.append((sidecar_rel, sidecar))
-                        logger.info(f"复审 sidecar 纳入交付: {sidecar_rel}")
-
-                    logger.info(f"翻译完成: {relative_path} -> {output_relative_path}")
-
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.error(f"翻译失败 {relative_path} ({target_language}): {error_msg}")
-                    errors.append(f"{relative_path} ({target_language}): {error_msg}")
-                    _emit_progress(
-                        {
-                            "progress": task_end,
-                            "error": f"⚠️ {relative_path} ({target_language}) 翻译失败: {error_msg}",
-                        },
-                        socket_sid,
+                else:
+                    relative_path, full_path = files[0]
+                    checkpoint_kwargs = (
+                        {"job_id": checkpoint_job, "checkpoint_name": relative_path}
+                        if checkpoint_job else {}
                     )
-
-                completed_tasks += 1
+                    if usage is not None:
+                        checkpoint_kwargs.update(usage=usage, checkpoint_name=relative_path)
+                    outcomes = [(translate_single_file(
+                        full_path, target_language, translation_engine, ai_model,
+                        file_output_dirs[0], callback, **checkpoint_kwargs
+                    ), None)]
+            except Exception as e:
+                outcomes = [(None, e)] * len(files)
+
+            delivered = [
+                deliver(index, relative_path, result, error)
+                for (relative_path, _full_path), (result, error) in zip(files, outcomes)
+            ]
+            report(index, 100.0, f"{label}: 完成")
+            return delivered
+
+        workers = max(1, min(config.ZIP_TASK_JOBS, len(tasks)))
+        if workers == 1:
+            results = [run_task(i) for i in range(len(tasks))]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run_task, range(len(tasks))))
+        results = [outcome for task_results in results for outcome in task_results]
+
+        # 存储翻译结果：[(包内相对路径, 输出文件路径), ...]；errors 为 "<相对路径> (<语言>): <原因>"
+        translated_files = [item for delivered, _error in results for item in delivered]
+        errors = [error for _delivered, error in results if error is not None]
 
         if not translated_files:
             # 全部任务失败 → 500（而非坏输入的 400）
             raise AllTranslationsFailed("ZIP 内所有文件翻译都失败了，请检查错误信息并重试")
 
+        if usage is not None:
+            translated_files.append(
+                (usage_report_name(base_name), usage.write(output_dir, base_name))
+            )
+
         # 创建输出 ZIP（保持目录结构）
         zip_name = f"translations_{base_name}_{timestamp}_{unique_id}.zip"
         zip_path_output = os.path.join(OUTPUT_FOLDER, zip_name)
@@ -397,16 +486,18 @@ def process_zip_archive(zip_path, target_languages, translation_engine, ai_model
 
 @app.route("/translate", methods=["POST"])
 def translate_file_route():
-    """处理翻译请求。仅被前端 AJAX fetch 调用，一律返回 JSON（不再 flash+redirect）。
+    """受理翻译请求：校验 + 落盘 + 入后台队列，立即返回。仅被前端 AJAX fetch 调用，一律返回 JSON。
 
     契约：
-      客户端错误（文件类型/未选语言/未知模型/无效引擎）→ 400 + {success:false, error}
-      服务端错误（翻译全部失败/未捕获异常）           → 500 + {success:false, error}
-      成功                                             → 200 + {success:true, zip_path, redirect_url}
-                                                        部分语言失败额外带 errors 数组（仍算成功）
+      客户端错误（文件类型/未选语言/未知模型/无效引擎/无效任务 ID）→ 400 + {success:false, error}
+      resume_job_id 属于其他提交方（owner = 客户端 IP，同公平调度） → 403 + {success:false, error}
+      同一 resume_job_id 仍在排队 / 运行                          → 409 + {success:false, error}
+      已受理                                                       → 202 + {success:true, job_id, status_url}
+    翻译在 job_queue 工作线程里执行；状态 / 结果查 GET /api/jobs/<job_id>，实时进度经 Socket.IO
+    发到房间 job:<job_id>（客户端 emit join_job 加入）。
+    断点续传（仅 openrouter）：job_id 同时是检查点 ID；失败后重传同一文件并带表单字段
+    resume_job_id，已完成的批次 / 语言直接复用检查点。
     """
-    # 前端把 socket.id 放进 FormData（可能缺失/undefined）；用于把进度事件定向发给本客户端
-    socket_sid = request.form.get("socket_sid") or None
     saved_file_path = None
     output_dir = None
     try:
@@ -435,6 +526,16 @@ def translate_file_route():
         if translation_engine == "openrouter" and get_model_info(ai_model) is None:
             return jsonify({"success": False, "error": f"未知的 AI 模型: {ai_model}"}), 400
 
+        resume_job_id = request.form.get("resume_job_id") or None
+        if resume_job_id:
+            if translation_engine != "openrouter":
+                return jsonify({"success": False, "error": "断点续传仅支持 OpenRouter 引擎"}), 400
+            try:
+                checkpoint.validate_job_id(resume_job_id)
+            except ValueError as e:
+                return jsonify({"success": False, "error": str(e)}), 400
+        job_id = resume_job_id or checkpoint.new_job_id()
+
         # ---------- 落盘 ----------
         original_filename = secure_filename(file.filename)
         timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -450,174 +551,212 @@ def translate_file_route():
         output_dir = os.path.join(OUTPUT_FOLDER, f"{base_name}_{timestamp}_{unique_id}")
         os.makedirs(output_dir, exist_ok=True)
 
-        # ========== ZIP 文件处理 ==========
-        if is_zip_file(original_filename):
-            try:
-                zip_name, _zip_path, errors = process_zip_archive(
-                    saved_file_path, target_languages, translation_engine,
-                    ai_model, output_dir, base_name, timestamp, unique_id, socket_sid
-                )
-            except AllTranslationsFailed as e:
-                # 全部任务失败 → 服务端错误 500
-                _safe_remove(saved_file_path)
-                _safe_rmtree(output_dir)
-                return jsonify({"success": False, "error": str(e)}), 500
-            except ValueError as e:
-                # 坏 ZIP / 空 ZIP / ZIP 炸弹 → 客户端输入错误 400
-                _safe_remove(saved_file_path)
-                _safe_rmtree(output_dir)
-                return jsonify({"success": False, "error": f"ZIP 处理失败: {e}"}), 400
-
-            # 清理临时文件
+        # ---------- 入队 ----------
+        params = {
+            "saved_file_path": saved_file_path,
+            "output_dir": output_dir,
+            "original_filename": original_filename,
+            "target_languages": target_languages,
+            "translation_engine": translation_engine,
+            "ai_model": ai_model,
+            "base_name": base_name,
+            "timestamp": timestamp,
+            "unique_id": unique_id,
+        }
+        try:
+            _get_job_queue().submit(job_id, params, owner=_request_owner())
+        except (JobConflict, JobForbidden) as e:
             _safe_remove(saved_file_path)
             _safe_rmtree(output_dir)
+            status = 403 if isinstance(e, JobForbidden) else 409
+            return jsonify({"success": False, "error": str(e)}), status
 
-            redirect_url = f"/success?zip_path=/output/{zip_name}"
-            _emit_progress(
-                {
-                    "progress": 100,
-                    "message": "ZIP 压缩包翻译全部完成！",
-                    "complete": True,
-                    "redirect_url": redirect_url,
-                },
-                socket_sid,
-            )
-            sleep(0.5)
-
-            resp = {"success": True, "zip_path": f"/output/{zip_name}", "redirect_url": redirect_url}
-            if errors:
-                resp["errors"] = errors
-            return jsonify(resp), 200
+        return jsonify({
+            "success": True, "job_id": job_id, "status_url": f"/api/jobs/{job_id}",
+        }), 202
 
-        # ========== 单文件处理 ==========
-        output_files = []
-        errors = []  # 部分失败语言的可读消息（"<语言>: <原因>"）
-        total_languages = len(target_languages)
+    except Exception as e:
+        # 未捕获异常 → 服务端错误 500
+        logger.error(f"受理翻译请求时发生未捕获异常: {e}")
+        _safe_remove(saved_file_path)
+        _safe_rmtree(output_dir)
+        return jsonify({"success": False, "error": f"翻译过程发生错误: {e}"}), 500
 
-        for index, target_language in enumerate(target_languages):
-            try:
-                # 计算当前语言的进度范围
-                language_start_progress = (index / total_languages) * 100
-                language_end_progress = ((index + 1) / total_languages) * 100
-
-                _emit_progress(
-                    {
-                        "progress": language_start_progress,
-                        "message": f"开始翻译到 {target_language}...",
-                    },
-                    socket_sid,
-                )
 
-                # 进度回调（闭包捕获 language_start/end_progress、target_language、socket_sid）
-                def progress_callback(item_progress, message):
-                    total_progress = language_start_progress + (item_progress / 100) * (
-                        language_end_progress - language_start_progress
-                    )
-                    _emit_progress(
-                        {
-                            "progress": total_progress,
-                            "message": f"{target_language}: {message}",
-                        },
-                        socket_sid,
-                    )
+@app.route("/api/jobs/<job_id>")
+def job_status_route(job_id):
+    """任务状态 / 结果：{success:true, job:{id, status, progress, message, result?, error?}}。
 
-                output_file_name, output_file_path = translate_single_file(
-                    saved_file_path, target_language, translation_engine,
-                    ai_model, output_dir, progress_callback
-                )
-                output_files.append(output_file_path)
-                # QA 未过项的复审 sidecar 一并纳入交付 ZIP（否则随 output_dir 被清掉，用户看不到）
-                sidecar = _needs_review_sidecar(output_file_path)
-                if sidecar:
-                    output_files.append(sidecar)
-                    logger.info(f"[{target_language}] 复审 sidecar 纳入交付: {os.path.basename(sidecar)}")
-                logger.info(f"Translation to {target_language} completed: {output_file_name}")
-
-                _emit_progress(
-                    {
-                        "progress": language_end_progress,
-                        "message": f"{target_language} 翻译完成！",
-                    },
-                    socket_sid,
-                )
+    status ∈ queued / running / succeeded / failed；succeeded 时 result 含
+    {zip_path, redirect_url, errors}（errors 为部分失败的语言 / 文件，仍算成功）。
+    只能查询自己提交的任务（按客户端 IP 归属），他人的任务返回 403。
+    """
+    try:
+        job = _owned_job(job_id)
+    except JobForbidden as e:
+        return jsonify({"success": False, "error": str(e)}), 403
+    if job is None:
+        return jsonify({"success": False, "error": f"任务不存在: {job_id}"}), 404
+    return jsonify({"success": True, "job": job})
 
-            except Exception as e:
-                error_msg = str(e)
-                logger.error(f"Translation failed for {target_language}: {error_msg}")
-                errors.append(f"{target_language}: {error_msg}")
-
-                _emit_progress(
-                    {
-                        "progress": (index + 1) / total_languages * 100,
-                        "error": f"⚠️ {target_language} 翻译失败: {error_msg}，继续处理其他语言...",
-                    },
-                    socket_sid,
-                )
 
-                # 记录错误但继续处理其他语言（不要中断整个流程）
-                if "速率限制" in error_msg or "Rate Limit" in error_msg:
-                    logger.warning(f"{target_language}: API速率限制，跳过此语言继续处理")
-                elif "配额" in error_msg or "quota" in error_msg:
-                    logger.warning(f"{target_language}: API配额问题，跳过此语言继续处理")
-                continue
+def _run_translation_job(job_id, params):
+    """job_queue 工作线程里执行一个翻译任务（/translate 入队的 params）。
 
-        # 全部语言翻译都失败 → 服务端错误 500（不得让前端误判成功）
-        if not output_files:
-            _safe_remove(saved_file_path)
-            _safe_rmtree(output_dir)
-            return jsonify({"success": False, "error": "所有语言翻译都失败了，请检查错误信息并重试"}), 500
+    返回 {zip_path, redirect_url, errors, usage}；全部失败 / 坏 ZIP 等抛异常（任务记为 failed）。
+    usage 为实际用量合计（LLM 引擎；逐批明细在交付 ZIP 的 <base_name>.usage.json 里）。
+    无论成败都清理上传文件与临时输出目录；进程被杀时二者保留，重启后任务重新入队续传。
+    """
+    saved_file_path = params["saved_file_path"]
+    output_dir = params["output_dir"]
+    target_languages = params["target_languages"]
+    translation_engine = params["translation_engine"]
+    ai_model = params["ai_model"]
+    base_name = params["base_name"]
+    timestamp = params["timestamp"]
+    unique_id = params["unique_id"]
+    # 断点续传检查点与任务共用 ID（Google 引擎无批次，不做检查点）
+    checkpoint_job = job_id if translation_engine == "openrouter" else None
+    usage = UsageRecorder(job_id) if translation_engine == "openrouter" else None
 
-        zip_name = f"translations_{base_name}_{timestamp}_{unique_id}.zip"
-        zip_path_temp = os.path.join(output_dir, zip_name)
-        create_zip(output_files, zip_path_temp)
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        if is_zip_file(params["original_filename"]):
+            try:
+                zip_name, _zip_path, errors = process_zip_archive(
+                    saved_file_path, target_languages, translation_engine,
+                    ai_model, output_dir, base_name, timestamp, unique_id, job_id, checkpoint_job,
+                    usage,
+                )
+            except AllTranslationsFailed:
+                raise
+            except ValueError as e:
+                # 坏 ZIP / 空 ZIP / ZIP 炸弹
+                raise ValueError(f"ZIP 处理失败: {e}") from e
+        else:
+            zip_name, errors = _translate_single_upload(params, job_id, checkpoint_job, usage)
+    except Exception as e:
+        _emit_progress({"error": f"❌ {e}", "failed": True}, job_id)
+        raise
+    finally:
+        _safe_remove(saved_file_path)
+        _safe_rmtree(output_dir)
 
-        successful_count = len(output_files)
-        if successful_count < total_languages:
-            logger.info(f"翻译完成：{successful_count} 个成功，{total_languages - successful_count} 个失败")
+    # 全部成功才清检查点（部分失败可带 job_id 重传续传）
+    if checkpoint_job and not errors:
+        checkpoint.discard_job(checkpoint_job)
+
+    usage_report = usage.report() if usage is not None else None
+    if usage_report is not None:
+        cost_calibration.record_usage(usage_report)  # 供 /api/estimate-cost 自校准
+
+    redirect_url = f"/success?zip_path=/output/{zip_name}"
+    _emit_progress(
+        {
+            "progress": 100,
+            "message": "ZIP 压缩包翻译全部完成！" if is_zip_file(params["original_filename"])
+            else "翻译全部完成！",
+            "complete": True,
+            "redirect_url": redirect_url,
+        },
+        job_id,
+    )
+    return {
+        "zip_path": f"/output/{zip_name}",
+        "redirect_url": redirect_url,
+        "errors": errors,
+        "usage": usage_report["totals"] if usage_report is not None else None,
+    }
+
+
+def _translate_single_upload(params, job_id, checkpoint_job, usage=None):
+    """单文件 → 多语言并发翻译并打包。返回 (zip_name, errors)；全部语言失败抛 AllTranslationsFailed。
+
+    源文件只解析一次，语言数受 config.LANGUAGE_JOBS、LLM 请求受全进程上限约束。
+    """
+    saved_file_path = params["saved_file_path"]
+    output_dir = params["output_dir"]
+    target_languages = params["target_languages"]
+    output_files = []
+    errors = []  # 部分失败语言的可读消息（"<语言>: <原因>"）
+    total_languages = len(target_languages)
 
-        # Move ZIP to main output folder
-        zip_path = os.path.join(OUTPUT_FOLDER, zip_name)
-        shutil.move(zip_path_temp, zip_path)
+    last_progress = [0.0]  # 最近一次整体进度；语言结束事件沿用它（前端每个事件都读 progress）
 
-        # 清理临时文件
-        _safe_rmtree(output_dir)
-        _safe_remove(saved_file_path)
+    def progress_callback(overall_progress, message):
+        last_progress[0] = overall_progress
+        _emit_progress({"progress": overall_progress, "message": message}, job_id)
 
-        redirect_url = f"/success?zip_path=/output/{zip_name}"
+    def on_language_result(target_language, result, error):
+        if error is None:
+            _emit_progress(
+                {"progress": last_progress[0], "message": f"{target_language} 翻译完成！"},
+                job_id,
+            )
+            return
+        error_msg = str(error)
         _emit_progress(
             {
-                "progress": 100,
-                "message": "翻译全部完成！",
-                "complete": True,
-                "redirect_url": redirect_url,
+                "progress": last_progress[0],
+                "error": f"⚠️ {target_language} 翻译失败: {error_msg}，继续处理其他语言...",
             },
-            socket_sid,
+            job_id,
         )
-        sleep(0.5)
-
-        resp = {"success": True, "zip_path": f"/output/{zip_name}", "redirect_url": redirect_url}
-        if errors:
-            resp["errors"] = errors
-        return jsonify(resp), 200
-
-    except Exception as e:
-        # 未捕获异常 → 服务端错误 500
-        logger.error(f"翻译过程发生未捕获异常: {e}")
-        _safe_remove(saved_file_path)
-        _safe_rmtree(output_dir)
-        return jsonify({"success": False, "error": f"翻译过程发生错误: {e}"}), 500
+        # 记录错误但继续处理其他语言（不要中断整个流程）
+        if "速率限制" in error_msg or "Rate Limit" in error_msg:
+            logger.warning(f"{target_language}: API速率限制，跳过此语言继续处理")
+        elif "配额" in error_msg or "quota" in error_msg:
+            logger.warning(f"{target_language}: API配额问题，跳过此语言继续处理")
+
+    results = translate_single_file_multi(
+        saved_file_path, target_languages, params["translation_engine"], params["ai_model"],
+        output_dir, progress_callback, on_result=on_language_result,
+        job_id=checkpoint_job, checkpoint_name=params["original_filename"], usage=usage,
+    )
+
+    for target_language, result, error in results:
+        if error is not None:
+            errors.append(f"{target_language}: {error}")
+            continue
+        output_file_name, output_file_path = result
+        output_files.append(output_file_path)
+        # QA 未过项的复审 sidecar 一并纳入交付 ZIP（否则随 output_dir 被清掉，用户看不到）
+        sidecar = _needs_review_sidecar(output_file_path)
+        if sidecar:
+            output_files.append(sidecar)
+            logger.info(f"[{target_language}] 复审 sidecar 纳入交付: {os.path.basename(sidecar)}")
+        logger.info(f"Translation to {target_language} completed: {output_file_name}")
+
+    # 全部语言翻译都失败 → 任务失败（不得让前端误判成功）
+    if not output_files:
+        raise AllTranslationsFailed("所有语言翻译都失败了，请检查错误信息并重试")
+
+    if usage is not None:
+        output_files.append(usage.write(output_dir, params["base_name"]))
+
+    zip_name = f"translations_{params['base_name']}_{params['timestamp']}_{params['unique_id']}.zip"
+    zip_path_temp = os.path.join(output_dir, zip_name)
+    create_zip(output_files, zip_path_temp)
+
+    successful_count = total_languages - len(errors)
+    if successful_count < total_languages:
+        logger.info(f"翻译完成：{successful_count} 个成功，{total_languages - successful_count} 个失败")
+
+    # Move ZIP to main output folder
+    shutil.move(zip_path_temp, os.path.join(OUTPUT_FOLDER, zip_name))
+    return zip_name, errors
 
 
 @app.route("/api/estimate-cost", methods=["POST"])
 def estimate_cost_route():
-    """估算翻译成本（字符数估算，仅 OpenRouter 引擎）"""
+    """估算翻译成本（按历史用量校准，样本不足的语言退回字符数估算；仅 OpenRouter 引擎）"""
     try:
         if "file" not in request.files:
             return jsonify({"error": "未上传文件"}), 400
 
         file = request.files["file"]
-        if not file or not allowed_file(file.filename):
-            return jsonify({"error": "无效的文件类型"}), 400
+        if not file or not allowed_file(file.filename) or is_zip_file(file.filename):
+            return jsonify({"error": "无效的文件类型（费用预估支持 .json / .js）"}), 400
 
         target_languages = request.form.getlist("languages")
         translation_engine = request.form.get("translation_engine", "openrouter")
@@ -636,12 +775,14 @@ def estimate_cost_route():
 
         # 保存临时文件并估算 —— try/finally 保证 estimate_cost 抛异常时也清理临时文件（F: 修泄漏）
         import tempfile
-        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
+        # 保留原扩展名：估算器按扩展名选 JSON / JS 解析
+        suffix = "." + file.filename.rsplit(".", 1)[1].lower()
+        tmp_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
         tmp_path = tmp_file.name
         tmp_file.close()
         try:
             file.save(tmp_path)
-            token_info = estimate_cost(tmp_path, target_languages, ai_model)
+            token_info = estimate_cost(tmp_path, target_languages, ai_model, calibrated=True)
         finally:
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
@@ -672,6 +813,23 @@ def test_disconnect():
     print("Client disconnected")
 
 
+@socketio.on("join_job", namespace="/test")
+def join_job(data):
+    """订阅任务进度：加入房间 job:<job_id>，并立即补发当前快照（错过的进度不重放）。
+
+    只能订阅自己提交的任务（同 /api/jobs 的归属校验），他人的任务静默忽略。
+    """
+    job_id = (data or {}).get("job_id")
+    try:
+        job = _owned_job(job_id) if job_id else None
+    except JobForbidden:
+        return
+    if job is None:
+        return
+    join_room(f"job:{job_id}")
+    emit("job_status", job)
+
+
 if __name__ == "__main__":
     import errno
     import sys
@@ -688,6 +846,10 @@ if __name__ == "__main__":
     print(f"🔌 监听地址: http://127.0.0.1:{PORT}")
     print("=" * 50)
 
+    # 重启后立即恢复中断的任务（debug reloader 只在子进程里启动，避免两份工作线程）
+    if not config.DEBUG or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        _get_job_queue()
+
     try:
         app.run(debug=config.DEBUG, host="127.0.0.1", port=PORT)
     except OSError as e:
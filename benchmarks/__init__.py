@@ -0,0 +1 @@
+"""离线压测工具：mock OpenRouter 服务 + 合成语言包压测（见 run_benchmarks.py）。"""
@@ -0,0 +1,245 @@
+"""
+QA 检测微基准 —— 单遍标记引擎（translation_postprocess.qa_flags）对比旧的逐消费者重扫（离线、纯 CPU）
+
+用法（仓库根目录）:
+    python -m benchmarks.bench_qa                    # 默认 100k 字符串
+    python -m benchmarks.bench_qa --size 20000 --repeat 5 --json qa.json
+
+设计:
+- 语料按 --seed 确定性生成，混合真实译文的各种形态：繁体（大多数）、简体残留、英文漏翻、
+  CJK 句内嵌品牌 / 术语、西语等拉丁系译文、占位符 / 单位 / 型号；按 --duplicate-ratio 混入重复值
+- legacy = 引擎之前的实现：每个关键词一条正则、每次调用现编占位符 / 单位正则、每个消费者各扫一遍；
+  一个 zh-TW 文件走完管线的检测调用为 post_process 严格验证（英文 + 简体）、批级英文闸（关键词）、
+  QA 回灌检出（英文 + 简体）、TM 回写过滤（关键词）
+- engine 冷启动（清空记忆）与热（同一批值再被后续消费者读取）各量一次；两种实现的检测结果须逐条一致
+- 另测 CJK 为主的非繁中目标（日文语料）：这类语言只过关键词闸（批级英文闸 + TM 回写过滤），
+  引擎不得因此付简体检测（OpenCC 转换）的代价
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+
+import translation_postprocess as pp
+from translation_config import QUALITY_CHECK_RULES
+
+DEFAULT_SIZE = 100_000
+
+_TRADITIONAL = (
+    "確認", "取消", "儲存", "刪除", "編輯", "設定", "帳戶", "密碼", "登入", "訂單",
+    "支付", "餘額", "儲值", "通知", "訊息", "搜尋", "上傳", "下載", "分享", "詳情",
+    "請稍後重試", "網路異常", "載入中", "暫無資料", "已複製", "請輸入", "驗證碼", "交易記錄",
+)
+_SIMPLIFIED = ("确认", "删除", "设置", "账户", "订单", "余额", "网络异常", "加载中", "验证码", "交易记录")
+_ENGLISH = (
+    "Please enter your password", "Confirm", "Select a payment method", "Upload failed",
+    "Withdrawal in progress", "Save changes", "Error", "Copy link", "merchant verification",
+)
+_SPANISH = (
+    "Confirmar pedido", "cancelar", "Guardar cambios", "Eliminar cuenta", "Error de red",
+    "Seleccione un método de pago", "Retiro en curso", "Contraseña incorrecta",
+)
+_EMBEDDED = ("Oracle", "USDT", "iOS", "Android", "H5", "2MB", "1920x1080", "75px", "App Store")
+_PLACEHOLDERS = ("{count}", "{name}", "${amount}", "{time}")
+_JAPANESE = (
+    "確認", "キャンセル", "保存", "削除", "編集", "設定", "アカウント", "パスワード", "ログイン",
+    "注文", "支払い", "残高", "通知", "メッセージ", "検索", "アップロード", "ダウンロード",
+    "しばらくしてから再試行してください", "ネットワークエラー", "読み込み中", "データがありません",
+    "コピーしました", "入力してください", "認証コード", "取引履歴", "个人设置",
+)
+
+
+def make_corpus(size, seed=0, duplicate_ratio=0.2):
+    """确定性生成 size 条译文字符串。"""
+    rng = random.Random(seed)
+    corpus, seen = [], []
+    for _ in range(size):
+        if seen and rng.random() < duplicate_ratio:
+            corpus.append(rng.choice(seen))
+            continue
+        roll = rng.random()
+        if roll < 0.55:
+            words = rng.choices(_TRADITIONAL, k=rng.randint(1, 6))
+        elif roll < 0.65:
+            words = rng.choices(_TRADITIONAL, k=rng.randint(1, 4)) + [rng.choice(_SIMPLIFIED)]
+        elif roll < 0.75:
+            words = [rng.choice(_ENGLISH)]
+        elif roll < 0.9:
+            words = [rng.choice(_SPANISH), rng.choice(_SPANISH).lower()]
+        else:
+            words = rng.choices(_TRADITIONAL, k=rng.randint(2, 5)) + [rng.choice(_EMBEDDED)]
+        if rng.random() < 0.2:
+            words.insert(rng.randint(0, len(words)), rng.choice(_PLACEHOLDERS))
+        rng.shuffle(words)
+        value = " ".join(words) if 0.65 <= roll < 0.9 else "".join(words)
+        seen.append(value)
+        corpus.append(value)
+    return corpus
+
+
+def make_cjk_corpus(size, seed=0, duplicate_ratio=0.2):
+    """确定性生成 size 条日文译文（CJK 为主，少量嵌入英文漏翻 / 占位符）。"""
+    rng = random.Random(seed)
+    corpus, seen = [], []
+    for _ in range(size):
+        if seen and rng.random() < duplicate_ratio:
+            corpus.append(rng.choice(seen))
+            continue
+        words = rng.choices(_JAPANESE, k=rng.randint(1, 8))
+        if rng.random() < 0.05:
+            words.append(rng.choice(_ENGLISH))
+        if rng.random() < 0.2:
+            words.insert(rng.randint(0, len(words)), rng.choice(_PLACEHOLDERS))
+        value = "".join(words)
+        seen.append(value)
+        corpus.append(value)
+    return corpus
+
+
+# ── legacy：引擎之前的逐关键词正则 + 现编正则 ──
+_LEGACY_KEYWORD_PATTERNS = [
+    re.compile(rf'\b{re.escape(k)}\b', re.IGNORECASE)
+    for k in QUALITY_CHECK_RULES['english_keywords']
+]
+
+
+def _legacy_keywords(text):
+    return any(pattern.search(text) for pattern in _LEGACY_KEYWORD_PATTERNS)
+
+
+def _legacy_english(text):
+    t = re.sub(r'\$?\{[^}]*\}', '', text)
+    t = re.sub(r'(?<=\d)[A-Za-z]+|[A-Za-z]+(?=\d)', '', t)
+    suspects = [
+        tok for tok in re.findall(r'[A-Za-z]+', t)
+        if any(c.islower() for c in tok) and tok.lower() not in pp._LATIN_ALLOW
+    ]
+    if not suspects:
+        return False
+    cjk = len(pp._CJK_RE.findall(t))
+    latin_len = sum(len(tok) for tok in suspects)
+    return not (cjk and cjk / (cjk + latin_len) >= 0.3)
+
+
+def _legacy_simplified(text):
+    if pp._S2TW is None:
+        return False
+    converted = pp._S2TW.convert(text)
+    if converted == text:
+        return False
+    if len(converted) != len(text):
+        return True
+    return any(a != b and a not in pp._TRAD_VARIANT_OK for a, b in zip(text, converted))
+
+
+def legacy_pass(corpus):
+    """旧实现下一个 zh-TW 文件的全部检测调用；返回每条的 FLAG_* 位掩码（供核对）。"""
+    out = []
+    for value in corpus:
+        english = _legacy_english(value)           # post_process 严格验证
+        simplified = not english and _legacy_simplified(value)
+        keywords = _legacy_keywords(value)         # 批级英文闸
+        english = _legacy_english(value)           # QA 回灌检出
+        simplified = not english and _legacy_simplified(value)
+        keywords = _legacy_keywords(value)         # TM 回写过滤
+        out.append(
+            (pp.FLAG_ENGLISH_KEYWORD if keywords else 0)
+            | (pp.FLAG_SUSPECT_LATIN if english else 0)
+            | (pp.FLAG_SIMPLIFIED if simplified else 0)
+        )
+    return out
+
+
+_REASON_FLAGS = {"英文未翻译": pp.FLAG_SUSPECT_LATIN, "简体残留": pp.FLAG_SIMPLIFIED}
+
+
+def engine_pass(corpus):
+    """引擎下同样的检测调用：各消费者只取自己要的位，读同一份按值记忆。"""
+    data = dict(enumerate(corpus))
+    pp.flag_reasons(data, "zh-TW")                                 # post_process 严格验证
+    pp.scan_flags(corpus, pp.FLAG_ENGLISH_KEYWORD)                  # 批级英文闸
+    reasons = dict(pp.flag_reasons(data, "zh-TW"))                 # QA 回灌检出
+    keywords = pp.scan_flags(corpus, pp.FLAG_ENGLISH_KEYWORD)       # TM 回写过滤
+    return [flags | _REASON_FLAGS.get(reasons.get(i), 0) for i, flags in enumerate(keywords)]
+
+
+def legacy_keyword_pass(corpus):
+    """旧实现下非繁中目标（ja）的检测调用：批级英文闸 + TM 回写过滤，各扫一遍关键词。"""
+    out = []
+    for value in corpus:
+        _legacy_keywords(value)
+        out.append(_legacy_keywords(value))
+    return out
+
+
+def engine_keyword_pass(corpus):
+    return [pp.contains_english_keywords(v) and pp.contains_english_keywords(v) for v in corpus]
+
+
+def _timed(fn, corpus, repeat, before=None):
+    best, result = None, None
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        result = fn(corpus)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def run(size=DEFAULT_SIZE, seed=0, duplicate_ratio=0.2, repeat=3):
+    """跑三组计时（取 repeat 次最小值），核对两种实现逐条一致。"""
+    corpus = make_corpus(size, seed=seed, duplicate_ratio=duplicate_ratio)
+    legacy_s, legacy = _timed(legacy_pass, corpus, repeat)
+    cold_s, cold = _timed(engine_pass, corpus, repeat, before=pp.clear_qa_cache)
+    warm_s, warm = _timed(engine_pass, corpus, repeat)
+    cjk = make_cjk_corpus(size, seed=seed, duplicate_ratio=duplicate_ratio)
+    cjk_legacy_s, cjk_legacy = _timed(legacy_keyword_pass, cjk, repeat)
+    cjk_cold_s, cjk_cold = _timed(engine_keyword_pass, cjk, repeat, before=pp.clear_qa_cache)
+    return {
+        "strings": size,
+        "unique": len(set(corpus)),
+        "legacy_s": round(legacy_s, 4),
+        "engine_cold_s": round(cold_s, 4),
+        "engine_warm_s": round(warm_s, 4),
+        "speedup_cold": round(legacy_s / cold_s, 2) if cold_s else None,
+        "speedup_warm": round(legacy_s / warm_s, 2) if warm_s else None,
+        "flagged": sum(1 for f in legacy if f),
+        "cjk_keyword_legacy_s": round(cjk_legacy_s, 4),
+        "cjk_keyword_engine_s": round(cjk_cold_s, 4),
+        "cjk_keyword_speedup": round(cjk_legacy_s / cjk_cold_s, 2) if cjk_cold_s else None,
+        "consistent": legacy == cold == warm and cjk_legacy == cjk_cold,
+    }
+
+
+def format_result(result):
+    width = max(len(key) for key in result)
+    return "\n".join(f"{key.rjust(width)}  {value}" for key, value in result.items())
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="QA 检测微基准（单遍标记引擎 vs 逐消费者重扫，离线）")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="语料字符串条数")
+    parser.add_argument("--seed", type=int, default=0, help="语料随机种子")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.2, help="重复值比例")
+    parser.add_argument("--repeat", type=int, default=3, help="每组计时重复次数（取最小值）")
+    parser.add_argument("--json", dest="json_path", help="结果另存为 JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    result = run(args.size, seed=args.seed, duplicate_ratio=args.duplicate_ratio, repeat=args.repeat)
+    print(format_result(result))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "result": result}, f, ensure_ascii=False, indent=2)
+    return 0 if result["consistent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+离线 mock OpenRouter —— 本地 OpenAI 兼容的 /chat/completions，供压测与集成测试（不打真 API、不花钱）
+
+设计:
+- stdlib ThreadingHTTPServer（HTTP/1.1 keep-alive）；llm_client 经 config.OPENROUTER_BASE_URL
+  （环境变量 OPENROUTER_BASE_URL）指向 base_url 即可，客户端代码路径与生产完全一致
+- "翻译"为确定性伪译：原文逐字映射到西里尔字母，占位符 / HTML 标签原样保留 —— 译文既无英文也无简体字，
+  不会触发英文过多重试 / QA 回灌，压测量到的是管线本身的开销
+- 可复现：每个请求的随机数由 (seed, 请求体哈希, 该请求体第几次出现) 派生，与线程调度顺序无关 ——
+  同一 seed 的两次运行，注入的错误与延迟逐请求相同
+- 可配置: 延迟分布（对数正态：中位数 + sigma，另加每输出 token 耗时）、429（带 Retry-After）/ 5xx
+  注入率、条数不符注入率（少返回一项）；超出 max_tokens 时截断并报 finish_reason=length
+- usage: prompt / completion tokens 用 token_estimator 估算；system 前缀达到 min_cache_tokens 且
+  此前出现过时计入 prompt_tokens_details.cached_tokens（模拟 provider 前缀缓存）
+- 支持 stream=True（SSE 分块 + stream_options.include_usage 末块）与多语言单次调用
+  （按 response_format 里的语言代码返回 {"translations": {"es": [...], ...}}）
+- stats() 为服务端计数（请求 / 各类注入次数 / tokens），压测报告据此核对客户端口径
+"""
+
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from token_estimator import estimate_tokens
+
+# 伪译字母表（西里尔）：不含拉丁 / CJK 字符，过得了英文残留与简体残留两道检测
+_ALPHABET = "абвгдежзийклмнопрстуфхцчшщыэюя"
+# 伪译时原样保留的片段：i18n 占位符、printf 占位符、HTML 标签
+_PROTECTED_RE = re.compile(r"(\$?\{[^}]*\}|%\d*\$?[sd]|<[^>]+>)")
+# 从 llm_client 的 system prompt 里取目标语言代码（"... to Spanish (es) — NEVER ..."）
+_LANG_CODE_RE = re.compile(r"\(([^()\s]+)\) — NEVER")
+# 每条消息的固定开销（role / 分隔符），与 OpenAI 计费口径同量级
+_MESSAGE_OVERHEAD_TOKENS = 4
+# 流式响应每块的字符数
+_STREAM_CHUNK_CHARS = 32
+_SERVER_ERROR_CODES = (500, 502, 503)
+
+
+def pseudo_translate(text, lang_code=""):
+    """确定性伪译：逐字映射到西里尔字母（按语言代码错位，各语言译文不同），保留占位符 / 标签 / 空白 / 数字。"""
+    shift = sum(map(ord, lang_code))
+    out = []
+    for i, part in enumerate(_PROTECTED_RE.split(text)):
+        if i % 2:
+            out.append(part)
+            continue
+        out.append("".join(
+            c if c.isspace() or c.isdigit() else _ALPHABET[(ord(c) + shift) % len(_ALPHABET)]
+            for c in part
+        ))
+    return "".join(out)
+
+
+def _message_text(message):
+    """消息内容 → 纯文本（兼容带 cache_control 的内容块列表）。"""
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return content
+
+
+def parse_request_values(user_text):
+    """从 llm_client 的 user 消息里取出待译数组（_build_user_prompt 的格式）。无法识别返回 None。"""
+    _head, sep, rest = user_text.partition("items):\n")
+    if not sep:
+        return None
+    body = rest.rsplit("\n\nReturn exactly", 1)[0]
+    try:
+        values = json.loads(body)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+        return None
+    return values
+
+
+class MockOpenRouter:
+    """本地 mock 服务。start() 后 base_url 可直接作为 OpenAI 兼容 API 地址使用。
+
+    Args:
+        seed: 随机种子（延迟 / 错误注入全由它决定）
+        latency_ms: 每请求延迟的中位数（毫秒）；0 = 不等待
+        latency_sigma: 对数正态 sigma；0 = 固定延迟
+        ms_per_output_token: 每个输出 token 的额外耗时（模拟生成速度，大批次更慢）
+        rate_429 / rate_5xx: 注入 429 / 5xx 的概率
+        mismatch_rate: 成功响应少返回一项（条数不符）的概率
+        retry_after: 429 响应的 Retry-After 秒数
+        min_cache_tokens: system 前缀达到此长度才模拟缓存命中
+    """
+
+    def __init__(
+        self, host="127.0.0.1", port=0, seed=0, latency_ms=0.0, latency_sigma=0.0,
+        ms_per_output_token=0.0, rate_429=0.0, rate_5xx=0.0, mismatch_rate=0.0,
+        retry_after=1.0, min_cache_tokens=1024,
+    ):
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_output_token = ms_per_output_token
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.mismatch_rate = mismatch_rate
+        self.retry_after = retry_after
+        self.min_cache_tokens = min_cache_tokens
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = None
+        self.reset()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock-openrouter", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset(self):
+        """清空计数、请求出现次数与缓存前缀（压测场景之间调用，互不影响）。"""
+        with self._lock:
+            self._occurrences = {}
+            self._cached_prefixes = set()
+            self._stats = {
+                "requests": 0, "succeeded": 0, "throttled": 0, "server_errors": 0,
+                "mismatches": 0, "truncated": 0, "bad_requests": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0,
+            }
+            self._latencies = []
+
+    def stats(self):
+        """服务端计数快照（latencies 为每个成功请求的注入延迟，秒）。"""
+        with self._lock:
+            return {**self._stats, "latencies": list(self._latencies)}
+
+    # ---------- 请求处理 ----------
+
+    def _rng(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            nth = self._occurrences[digest] = self._occurrences.get(digest, 0) + 1
+            self._stats["requests"] += 1
+        return random.Random(f"{self.seed}:{digest}:{nth}")
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._stats[name] += delta
+
+    def _latency(self, rng, completion_tokens):
+        base = self.latency_ms
+        if base > 0 and self.latency_sigma > 0:
+            base = rng.lognormvariate(math.log(base), self.latency_sigma)
+        return (base + completion_tokens * self.ms_per_output_token) / 1000
+
+    def handle(self, body):
+        """处理一次 /chat/completions 请求体。返回 (status, headers, payload, latency)：
+        payload 为 dict（JSON 响应）或 list[dict]（流式 SSE 块，按序发送）；latency 为应注入的延迟秒数。"""
+        rng = self._rng(body)
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+            system = "".join(_message_text(m) for m in messages if m.get("role") == "system")
+            values = parse_request_values(_message_text(messages[-1]))
+        except (ValueError, KeyError, TypeError, IndexError):
+            values = None
+        if values is None:
+            self._count(bad_requests=1)
+            return 400, {}, _error(400, "mock: unrecognized translation request"), 0.0
+
+        roll = rng.random()
+        if roll < self.rate_429:
+            self._count(throttled=1)
+            headers = {"Retry-After": f"{self.retry_after:g}"}
+            return 429, headers, _error(429, "mock: rate limited"), 0.0
+        if roll < self.rate_429 + self.rate_5xx:
+            self._count(server_errors=1)
+            status = rng.choice(_SERVER_ERROR_CODES)
+            return status, {}, _error(status, "mock: upstream error"), 0.0
+
+        codes = _multi_language_codes(request)
+        mismatch = rng.random() < self.mismatch_rate
+        if codes is None:
+            match = _LANG_CODE_RE.search(system)
+            translations = [pseudo_translate(v, match.group(1) if match else "") for v in values]
+            if mismatch:
+                translations = translations[:-1]
+        else:
+            translations = {code: [pseudo_translate(v, code) for v in values] for code in codes}
+            if mismatch:
+                translations[codes[-1]] = translations[codes[-1]][:-1]
+        content = json.dumps({"translations": translations}, ensure_ascii=False)
+
+        completion_tokens = estimate_tokens(content)
+        finish_reason = "stop"
+        max_tokens = request.get("max_tokens")
+        if max_tokens and completion_tokens > max_tokens:
+            content = content[: len(content) * max_tokens // completion_tokens]
+            completion_tokens, finish_reason = max_tokens, "length"
+
+        usage = self._usage(request.get("model", ""), system, messages, completion_tokens)
+        latency = self._latency(rng, completion_tokens)
+        self._count(
+            succeeded=1, mismatches=int(mismatch), truncated=int(finish_reason == "length"),
+            **{name: usage[name] for name in ("prompt_tokens", "completion_tokens")},
+            cached_tokens=usage["prompt_tokens_details"]["cached_tokens"],
+        )
+        with self._lock:
+            self._latencies.append(latency)
+
+        meta = {
+            "id": f"mock-{hashlib.sha256(body).hexdigest()[:12]}",
+            "created": int(time.time()),
+            "model": request.get("model", ""),
+        }
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            return 200, {}, _stream_chunks(
+                meta, content, finish_reason, usage if include_usage else None
+            ), latency
+        return 200, {}, {
+            **meta,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": finish_reason,
+            }],
+            "usage": usage,
+        }, latency
+
+    def _usage(self, model, system, messages, completion_tokens):
+        prompt_tokens = sum(
+            estimate_tokens(_message_text(m)) + _MESSAGE_OVERHEAD_TOKENS for m in messages
+        )
+        system_tokens = estimate_tokens(system)
+        cached = 0
+        if system_tokens >= self.min_cache_tokens:
+            key = (model, hashlib.sha256(system.encode("utf-8")).hexdigest())
+            with self._lock:
+                if key in self._cached_prefixes:
+                    cached = system_tokens
+                self._cached_prefixes.add(key)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached},
+        }
+
+
+def _multi_language_codes(request):
+    """多语言单次调用（translations 为按语言代码分组的对象）→ 语言代码列表；单语言返回 None。"""
+    try:
+        schema = request["response_format"]["json_schema"]["schema"]["properties"]["translations"]
+    except (KeyError, TypeError):
+        return None
+    if schema.get("type") != "object":
+        return None
+    return list(schema.get("properties", {}))
+
+
+def _error(status, message):
+    return {"error": {"code": status, "message": message}}
+
+
+def _stream_chunks(meta, content, finish_reason, usage):
+    base = {**meta, "object": "chat.completion.chunk"}
+    chunks = [
+        {**base, "choices": [{"index": 0, "delta": {"content": content[i:i + _STREAM_CHUNK_CHARS]},
+                              "finish_reason": None}]}
+        for i in range(0, len(content), _STREAM_CHUNK_CHARS)
+    ]
+    chunks.append({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+    if usage is not None:
+        chunks.append({**base, "choices": [], "usage": usage})
+    return chunks
+
+
+def _make_handler(mock):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {}, _error(404, "mock: not found"))
+                return
+            status, headers, payload, latency = mock.handle(body)
+            if isinstance(payload, list):
+                self._send_stream(latency, payload)
+            else:
+                time.sleep(latency)
+                self._send_json(status, headers, payload)
+
+        def _send_json(self, status, headers, payload):
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, latency, chunks):
+            """SSE（chunked 编码）；注入延迟均摊到各块之间，模拟逐 token 生成。"""
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            pause = latency / len(chunks)
+            for chunk in chunks:
+                time.sleep(pause)
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def log_message(self, format, *args):
+            pass  # 压测时每请求一行访问日志只是噪音
+
+    return Handler
@@ -0,0 +1,233 @@
+"""
+翻译管线压测 —— 合成语言包 × 本地 mock OpenRouter，量化分批 / 并发 / 限流改动的效果（离线、零费用）
+
+用法（仓库根目录）:
+    python -m benchmarks.run_benchmarks                          # 默认矩阵: 1k/10k/100k 叶子 × 1/10/30 种语言
+    python -m benchmarks.run_benchmarks --leaves 1000 --languages 1 10 --latency-ms 50
+    python -m benchmarks.run_benchmarks --rate-429 0.05 --rate-5xx 0.02 --mismatch-rate 0.01 --json out.json
+
+设计:
+- 合成语言包按 --seed 确定性生成：中文 UI 词汇拼句、部分含占位符、按 --duplicate-ratio 混入重复值
+  （走到去重路径），嵌套 模块 → 分组 → key
+- 所有场景共用一个 mock（benchmarks/mock_openrouter.py），场景开始前清零其计数与缓存；
+  llm_client 经 config.OPENROUTER_BASE_URL 指向它，API key 换成占位值（真 key 不会发出去）
+- 走生产入口 translation_runner.translate_single_file_multi：多语言并发、去重、分批、限流、
+  重试 / 二分、QA 全在路径上；翻译记忆关闭，限流器状态不跨场景，场景间互不影响
+- 报告: 请求数（客户端用量记录 / mock 服务端）、重试、墙钟时间、批次延迟 p50 / p95、
+  tokens（含缓存命中）与按模型定价折算的费用
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+import config
+import llm_client
+import rate_limiter
+import translation_runner
+from benchmarks.mock_openrouter import MockOpenRouter
+from usage_report import QA_BATCH, UsageRecorder
+
+DEFAULT_LEAVES = (1_000, 10_000, 100_000)
+DEFAULT_LANGUAGE_COUNTS = (1, 10, 30)
+
+# 目标语言池：按顺序取前 N 种（30 种覆盖拉丁 / 西里尔 / CJK / RTL / 印度系文字）
+BENCHMARK_LANGUAGES = (
+    "en", "es", "fr", "de", "ja", "ko", "pt", "ru", "ar", "hi",
+    "it", "nl", "pl", "tr", "vi", "th", "id", "ms", "zh-TW", "uk",
+    "cs", "sv", "da", "fi", "nb", "el", "he", "ro", "hu", "bn",
+)
+
+# 合成原文词汇（中文 UI 常见词），拼成 1~6 个词的短语
+_VOCABULARY = (
+    "确认", "取消", "保存", "删除", "编辑", "设置", "账户", "密码", "登录", "退出",
+    "订单", "支付", "余额", "充值", "提现", "通知", "消息", "搜索", "筛选", "排序",
+    "上传", "下载", "分享", "收藏", "评论", "详情", "列表", "首页", "个人中心", "帮助",
+    "失败", "成功", "请稍后重试", "网络异常", "加载中", "暂无数据", "已复制", "请输入",
+    "手机号", "验证码", "有效期", "交易记录", "安全中心", "绑定", "解绑", "实名认证",
+    "客服", "反馈", "版本", "更新", "语言", "主题", "隐私政策", "用户协议", "邀请好友",
+)
+_PLACEHOLDERS = ("{count}", "{name}", "{amount}", "{time}")
+_KEYS_PER_SECTION = 20
+_SECTIONS_PER_MODULE = 10
+
+
+def make_locale_pack(leaves, seed=0, duplicate_ratio=0.15):
+    """确定性生成 leaves 个字符串叶子的嵌套语言包（模块 → 分组 → key）。
+
+    duplicate_ratio 比例的叶子复用此前出现过的值，检验去重；约 1/5 的新值带占位符。
+    """
+    rng = random.Random(seed)
+    pack, seen = {}, []
+    for i in range(leaves):
+        if seen and rng.random() < duplicate_ratio:
+            value = rng.choice(seen)
+        else:
+            words = rng.choices(_VOCABULARY, k=rng.randint(1, 6))
+            if rng.random() < 0.2:
+                words.insert(rng.randint(0, len(words)), rng.choice(_PLACEHOLDERS))
+            value = "".join(words)
+            seen.append(value)
+        module, rest = divmod(i, _KEYS_PER_SECTION * _SECTIONS_PER_MODULE)
+        section, key = divmod(rest, _KEYS_PER_SECTION)
+        pack.setdefault(f"module_{module}", {}).setdefault(f"section_{section}", {})[f"key_{key}"] = value
+    return pack
+
+
+def percentile(values, pct):
+    """最近秩百分位数；空列表返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def configure_client(mock, stream=False, multi_language=False):
+    """把 llm_client 指向 mock，关闭翻译记忆（否则第二个场景起全部命中缓存）。"""
+    config.OPENROUTER_BASE_URL = mock.base_url
+    config.TRANSLATION_MEMORY_DIR = ""
+    config.LLM_STREAM_RESPONSES = stream
+    config.MULTI_LANGUAGE_CALLS = multi_language
+    llm_client.OPENROUTER_API_KEY = "mock-key"
+    llm_client._async_client = None
+
+
+def run_scenario(mock, leaves, languages, model, seed=0, duplicate_ratio=0.15, language_jobs=None):
+    """跑一个场景（leaves 个叶子 → languages 种语言），返回指标 dict。"""
+    mock.reset()
+    rate_limiter._limiters.clear()  # AIMD 从初始速率起步，不继承上一场景爬升到的速率
+    pack = make_locale_pack(leaves, seed, duplicate_ratio)
+    recorder = UsageRecorder(job_id=f"bench-{leaves}x{len(languages)}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        source = os.path.join(workdir, "bench.json")
+        with open(source, "w", encoding="utf-8") as f:
+            json.dump(pack, f, ensure_ascii=False)
+        started = time.monotonic()
+        results = translation_runner.translate_single_file_multi(
+            source, languages, "openrouter", model, workdir,
+            max_workers=language_jobs, usage=recorder,
+        )
+        wall = time.monotonic() - started
+
+    report = recorder.report()
+    totals = report["totals"]
+    batch_latencies = [
+        batch["latency_seconds"]
+        for entry in report["files"] for batch in entry["batches"]
+        if batch["batch"] != QA_BATCH and batch["requests"]
+    ]
+    server = mock.stats()
+    return {
+        "leaves": leaves,
+        "languages": len(languages),
+        "failed_languages": [lang for lang, _result, error in results if error is not None],
+        "requests": totals["requests"],
+        "server_requests": server["requests"],
+        "retries": totals["retries"],
+        "injected_429": server["throttled"],
+        "injected_5xx": server["server_errors"],
+        "injected_mismatch": server["mismatches"],
+        "wall_seconds": round(wall, 3),
+        "batch_latency_p50": round(percentile(batch_latencies, 50), 3),
+        "batch_latency_p95": round(percentile(batch_latencies, 95), 3),
+        "prompt_tokens": totals["prompt_tokens"],
+        "cached_tokens": totals["cached_tokens"],
+        "completion_tokens": totals["completion_tokens"],
+        "cost_usd": totals["cost_usd"],
+    }
+
+
+_COLUMNS = (
+    ("leaves", "leaves"), ("languages", "langs"), ("requests", "requests"),
+    ("server_requests", "server"), ("retries", "retries"), ("wall_seconds", "wall_s"),
+    ("batch_latency_p50", "p50_s"), ("batch_latency_p95", "p95_s"),
+    ("prompt_tokens", "prompt_tok"), ("cached_tokens", "cached_tok"),
+    ("completion_tokens", "output_tok"), ("cost_usd", "cost_usd"),
+)
+
+
+def format_results(rows):
+    """结果表（等宽列）。"""
+    table = [[label for _key, label in _COLUMNS]]
+    for row in rows:
+        table.append([
+            "-" if row[key] is None else f"{row[key]:.4f}" if key == "cost_usd" else str(row[key])
+            for key, _label in _COLUMNS
+        ])
+    widths = [max(len(line[i]) for line in table) for i in range(len(_COLUMNS))]
+    lines = ["  ".join(cell.rjust(width) for cell, width in zip(line, widths)) for line in table]
+    for row in rows:
+        if row["failed_languages"]:
+            lines.append(
+                f"! {row['leaves']}×{row['languages']}: 失败语言 {', '.join(row['failed_languages'])}"
+            )
+    return "\n".join(lines)
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description="翻译管线压测（本地 mock OpenRouter，离线）")
+    parser.add_argument("--leaves", type=int, nargs="+", default=list(DEFAULT_LEAVES),
+                        help="语言包叶子数（可多个）")
+    parser.add_argument("--languages", type=int, nargs="+", default=list(DEFAULT_LANGUAGE_COUNTS),
+                        help=f"目标语言数（可多个，≤{len(BENCHMARK_LANGUAGES)}）")
+    parser.add_argument("--model", default=config.DEFAULT_MODEL, help="模型 slug（决定分批上限与定价）")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子（语言包与 mock 注入共用）")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.15, help="重复值比例")
+    parser.add_argument("--language-jobs", type=int, default=None,
+                        help="同时翻译的语言数（默认 config.LANGUAGE_JOBS）")
+    parser.add_argument("--stream", action="store_true", help="走流式响应解析")
+    parser.add_argument("--multi-language", action="store_true",
+                        help="相近语言一次请求合译（config.MULTI_LANGUAGE_CALLS）")
+    mock = parser.add_argument_group("mock 服务")
+    mock.add_argument("--latency-ms", type=float, default=300.0, help="请求延迟中位数（毫秒）")
+    mock.add_argument("--latency-sigma", type=float, default=0.5, help="延迟对数正态 sigma")
+    mock.add_argument("--ms-per-output-token", type=float, default=0.0, help="每输出 token 额外耗时")
+    mock.add_argument("--rate-429", type=float, default=0.0, help="429 注入概率")
+    mock.add_argument("--rate-5xx", type=float, default=0.0, help="5xx 注入概率")
+    mock.add_argument("--mismatch-rate", type=float, default=0.0, help="条数不符注入概率")
+    mock.add_argument("--retry-after", type=float, default=1.0, help="429 的 Retry-After 秒数")
+    parser.add_argument("--json", dest="json_path", help="结果另存为 JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出翻译管线日志")
+    args = parser.parse_args(argv)
+    if max(args.languages) > len(BENCHMARK_LANGUAGES):
+        parser.error(f"--languages 最多 {len(BENCHMARK_LANGUAGES)} 种")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    # 注入的错误本就是预期内的，逐条日志只是噪音 —— 次数见结果表 / JSON
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL)
+
+    rows = []
+    with MockOpenRouter(
+        seed=args.seed, latency_ms=args.latency_ms, latency_sigma=args.latency_sigma,
+        ms_per_output_token=args.ms_per_output_token, rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx, mismatch_rate=args.mismatch_rate, retry_after=args.retry_after,
+    ) as mock:
+        configure_client(mock, stream=args.stream, multi_language=args.multi_language)
+        for leaves in args.leaves:
+            for count in args.languages:
+                print(f"→ {leaves} 叶子 × {count} 种语言 ...", file=sys.stderr)
+                rows.append(run_scenario(
+                    mock, leaves, list(BENCHMARK_LANGUAGES[:count]), args.model,
+                    seed=args.seed, duplicate_ratio=args.duplicate_ratio,
+                    language_jobs=args.language_jobs,
+                ))
+
+    print(format_results(rows))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": rows}, f, ensure_ascii=False, indent=2)
+    return 1 if any(row["failed_languages"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+断点续传 —— 每个 (任务, 文件, 语言) 一个 JSONL 检查点，批次完成即落盘
+
+设计:
+- 目录: config.CHECKPOINT_DIR/<job_id>/<文件名>_<语言>.jsonl；job_id 由 CLI / Web 生成并回显，
+  中断后用同一 job_id（cli --resume / Web 表单 resume_job_id）重跑即续传
+- 首行 header 记录指纹（模型 + prompt 指纹）：prompt / 规则 / 模型变了，旧检查点作废重写
+- 每批成功后追加 {"batch": n, "translations": {原文: 译文}}（按原文记，与同值去重的翻译单元一致；
+  失败项不记，续传时自动重试）；翻译完成（无失败批）后追加 {"final": [...], "needs_review": [...]}，
+  续传时该语言直接用 final 重建输出，不再调 API
+- 追加写 + flush + fsync：进程被杀最多丢正在写的那一行，读取时跳过不完整的尾行
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import uuid
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def new_job_id():
+    return uuid.uuid4().hex[:12]
+
+
+def validate_job_id(job_id):
+    """job_id 会拼进路径：只允许字母数字 / - / _，否则 ValueError。"""
+    if not isinstance(job_id, str) or not _JOB_ID_RE.match(job_id):
+        raise ValueError(f"无效的任务 ID: {job_id!r}")
+    return job_id
+
+
+def job_dir(job_id):
+    return os.path.join(config.CHECKPOINT_DIR, validate_job_id(job_id))
+
+
+def job_exists(job_id):
+    return os.path.isdir(job_dir(job_id))
+
+
+def discard_job(job_id):
+    """任务整体成功后删除其全部检查点。"""
+    path = job_dir(job_id)
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"[Checkpoint] 任务 {job_id} 完成，已清理检查点")
+
+
+def _encode_path(path):
+    return list(path)
+
+
+def _decode_path(path):
+    return tuple(path)
+
+
+class Checkpoint:
+    """单个 (文件, 语言) 的检查点。线程安全（同一文件的批次可能并发完成）。"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def restore(self, fingerprint):
+        """读取已完成的批次 / 最终结果。返回 ({原文: 译文}, final | None)。
+
+        final: {"translations": {path: 译文}, "sources": {path: 原文}, "needs_review": [(path, 值, 原因)]}。
+        指纹不符（或文件不存在）→ 重写 header，返回空。
+        """
+        translations, final, header = {}, None, None
+        if os.path.isfile(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # 不完整的尾行（写到一半被中断）
+                    if header is None:
+                        header = record
+                        if header.get("fingerprint") != fingerprint:
+                            break
+                    elif "translations" in record:
+                        translations.update(record["translations"])
+                    elif "final" in record:
+                        final = {
+                            "translations": {_decode_path(p): v for p, _s, v in record["final"]},
+                            "sources": {_decode_path(p): s for p, s, _v in record["final"]},
+                            "needs_review": [
+                                (_decode_path(p), v, r) for p, v, r in record["needs_review"]
+                            ],
+                        }
+        if header is None or header.get("fingerprint") != fingerprint:
+            if header is not None:
+                logger.info(f"[Checkpoint] 指纹变化，作废旧检查点 {self.path}")
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with self._lock, open(self.path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"fingerprint": fingerprint}) + "\n")
+            return {}, None
+        return translations, final
+
+    def record_batch(self, batch_num, translations):
+        """追加一批已完成的 {原文: 译文}。"""
+        if translations:
+            self._append({"batch": batch_num, "translations": translations})
+
+    def record_final(self, translations_by_path, source_by_path, needs_review):
+        """追加最终结果（术语表 / QA 之后、写输出之前）。"""
+        self._append({
+            "final": [
+                [_encode_path(p), source_by_path.get(p), v]
+                for p, v in translations_by_path.items()
+            ],
+            "needs_review": [[_encode_path(p), v, r] for p, v, r in needs_review],
+        })
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def open_checkpoint(job_id, name, target_language):
+    """返回 (任务, 文件, 语言) 的检查点。name 为任务内稳定的文件标识（如 ZIP 内相对路径）。"""
+    base = re.sub(r"[^A-Za-z0-9_.-]", "_", os.path.basename(name)) or "file"
+    digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+    lang = re.sub(r"[^A-Za-z0-9_-]", "_", target_language)
+    return Checkpoint(os.path.join(job_dir(job_id), f"{base}.{digest}_{lang}.jsonl"))
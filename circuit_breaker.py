@@ -0,0 +1,184 @@
+"""
+熔断器 —— 按模型 slug 全进程共享，provider 持续 5xx / 429 时让请求立即失败而不是各自耗尽重试
+
+设计:
+- 每个模型一个 CircuitBreaker（get_circuit_breaker 懒建），与 rate_limiter 一样在 llm_client 发请求处接入：
+  所有任务 / 语言 / 批次共享同一份状态，一个任务打出的失败会让其他任务的请求一起快速失败
+- 三态: closed（正常，统计最近 CIRCUIT_BREAKER_WINDOW 秒的失败率）→ open（请求不发出，抛
+  CircuitOpenError）→ 冷却 CIRCUIT_BREAKER_COOLDOWN 秒后 half_open（只放行一个探测请求：
+  成功 closed、失败重新 open）
+- 失败 = 429 / 5xx / 连接错误与超时（由 llm_client 分类）；4xx 参数错误、形状错误不算 ——
+  它们不说明 provider 不可用
+- 在途请求照常等结果；排队中的请求（等在途槽位 / 限流令牌）与之后的批次在发出前检查，立即失败。
+  translate_llm 开启故障转移时改走链上的下一个模型，否则该批直接保留原文（不再重试、不 sleep）
+- config.CIRCUIT_BREAKER 关闭时只统计不断开（/api/health 照样能看到各模型失败率）
+- 状态由共享事件循环写、Web 线程读（/api/health），用一把锁保护
+"""
+
+import collections
+import logging
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """该模型熔断中，请求未发出。retry_after 为距下次探测的秒数（探测进行中为 0）。"""
+
+    def __init__(self, model, retry_after):
+        super().__init__(f"{model} 熔断中，{retry_after:.0f}s 后探测恢复")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """单模型熔断器（滑动时间窗失败率）。线程安全。"""
+
+    def __init__(self, model, window=None, min_requests=None, failure_rate=None, cooldown=None,
+                 clock=time.monotonic):
+        self.model = model
+        self.window = float(window if window is not None else config.CIRCUIT_BREAKER_WINDOW)
+        self.min_requests = int(
+            min_requests if min_requests is not None else config.CIRCUIT_BREAKER_MIN_REQUESTS
+        )
+        self.failure_rate = float(
+            failure_rate if failure_rate is not None else config.CIRCUIT_BREAKER_FAILURE_RATE
+        )
+        self.cooldown = float(cooldown if cooldown is not None else config.CIRCUIT_BREAKER_COOLDOWN)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._events = collections.deque()  # (时刻, 是否失败)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self.trips = 0
+
+    def _current(self, now):
+        """open 冷却结束即转 half_open（惰性转换，无需定时器）。"""
+        if self._state == OPEN and now - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probing = False
+            logger.info(f"[CircuitBreaker] {self.model} 冷却结束，半开探测")
+        return self._state
+
+    def _prune(self, now):
+        while self._events and self._events[0][0] < now - self.window:
+            self._events.popleft()
+
+    def _retry_after(self, now):
+        if self._state == OPEN:
+            return max(0.0, self.cooldown - (now - self._opened_at))
+        return 0.0
+
+    def _blocked(self, now):
+        state = self._current(now)
+        return state == OPEN or (state == HALF_OPEN and self._probing)
+
+    def raise_if_open(self):
+        """排队前检查（不占探测名额）：断开中 / 探测进行中抛 CircuitOpenError。"""
+        if not config.CIRCUIT_BREAKER:
+            return
+        with self._lock:
+            now = self._clock()
+            if self._blocked(now):
+                raise CircuitOpenError(self.model, self._retry_after(now))
+
+    def before_request(self):
+        """请求发出前调用：断开中抛 CircuitOpenError；半开时占用唯一的探测名额。
+
+        调用后必须以 record_success / record_failure / release 之一结束。
+        """
+        if not config.CIRCUIT_BREAKER:
+            return
+        with self._lock:
+            now = self._clock()
+            if self._blocked(now):
+                raise CircuitOpenError(self.model, self._retry_after(now))
+            if self._state == HALF_OPEN:
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            now = self._clock()
+            if self._current(now) == HALF_OPEN:
+                self._state = CLOSED
+                self._probing = False
+                self._events.clear()
+                logger.info(f"[CircuitBreaker] {self.model} 探测成功，恢复")
+                return
+            self._events.append((now, False))
+            self._prune(now)
+
+    def record_failure(self):
+        with self._lock:
+            now = self._clock()
+            state = self._current(now)
+            if state == HALF_OPEN:
+                self._trip(now, "探测失败")
+                return
+            self._events.append((now, True))
+            self._prune(now)
+            if state == CLOSED and config.CIRCUIT_BREAKER:
+                failures = sum(1 for _t, failed in self._events if failed)
+                if (len(self._events) >= self.min_requests
+                        and failures / len(self._events) >= self.failure_rate):
+                    self._trip(now, f"最近 {self.window:.0f}s 失败 {failures}/{len(self._events)}")
+
+    def release(self):
+        """请求以不计成败的方式结束（4xx / 取消等）：归还探测名额。"""
+        with self._lock:
+            self._probing = False
+
+    def _trip(self, now, reason):
+        self._state = OPEN
+        self._opened_at = now
+        self._probing = False
+        self.trips += 1
+        logger.warning(
+            f"[CircuitBreaker] {self.model} 熔断（{reason}），{self.cooldown:.0f}s 后探测"
+        )
+
+    def snapshot(self):
+        """当前状态（/api/health）。"""
+        with self._lock:
+            now = self._clock()
+            state = self._current(now)
+            self._prune(now)
+            failures = sum(1 for _t, failed in self._events if failed)
+            return {
+                "model": self.model,
+                "state": state,
+                "requests": len(self._events),
+                "failures": failures,
+                "failure_rate": round(failures / len(self._events), 3) if self._events else 0.0,
+                "trips": self.trips,
+                "retry_after": round(self._retry_after(now), 1),
+            }
+
+
+# 懒加载注册表：模型 slug → 熔断器（事件循环建、Web 线程读，加锁）
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(model):
+    """返回该模型的共享熔断器（首次调用时创建）。"""
+    with _breakers_lock:
+        breaker = _breakers.get(model)
+        if breaker is None:
+            breaker = _breakers[model] = CircuitBreaker(model)
+        return breaker
+
+
+def breaker_states():
+    """全部已用过的模型的熔断状态，按模型名排序。"""
+    with _breakers_lock:
+        breakers = sorted(_breakers.values(), key=lambda b: b.model)
+    return [breaker.snapshot() for breaker in breakers]
@@ -4,15 +4,24 @@
 示例:
   ./venv/bin/python cli.py uploads/zh-CN.json --langs zh-TW,es,fr
   ./venv/bin/python cli.py strings.js --langs ja --model openai/gpt-5.4 --out out/
+  ./venv/bin/python cli.py zh-CN.json --langs es,fr,de,it,pt,ar --jobs 6
+  ./venv/bin/python cli.py zh-CN.json --langs es,fr \
+      --previous-source old/zh-CN.json --previous-output old/out/   # 增量：只译新增/改动
+  ./venv/bin/python cli.py zh-CN.json --langs es,fr --resume 3f9a1c2b7d4e     # 续传中断的任务
+  ./venv/bin/python cli.py zh-CN.json --langs es,fr --estimate                # 只估算费用（按历史用量校准）
   ./venv/bin/python cli.py --list-models
 """
 import argparse
 import os
 import sys
 
+import checkpoint
 import config
+import cost_calibration
+from cost_estimator import estimate_cost, format_cost_summary
 from llm_models import get_models
-from translation_runner import translate_single_file
+from translation_runner import translate_single_file_multi
+from usage_report import UsageRecorder
 
 
 def _stdout_progress(pct, message):
@@ -34,6 +43,26 @@ def build_parser():
         help="翻译引擎（默认 openrouter）",
     )
     p.add_argument("--out", default="output", help="输出目录（默认 output/）")
+    p.add_argument(
+        "--jobs", type=int, default=config.LANGUAGE_JOBS,
+        help=f"同时翻译的语言数（默认 {config.LANGUAGE_JOBS}；1 = 逐语言顺序）",
+    )
+    p.add_argument(
+        "--previous-source",
+        help="增量模式：上一版源文件；与 --previous-output 同用，只重译新增/改动的叶子",
+    )
+    p.add_argument(
+        "--previous-output",
+        help="增量模式：上一版译文目录（内含 <源文件名>_<语言>.json/.js）",
+    )
+    p.add_argument(
+        "--resume", metavar="JOB_ID",
+        help="续传中断的任务：复用该任务已完成批次的检查点，从第一个未完成批次继续（仅 openrouter）",
+    )
+    p.add_argument(
+        "--estimate", action="store_true",
+        help="只估算费用并退出（按历史用量校准，给出置信区间；仅 openrouter）",
+    )
     p.add_argument(
         "--list-models", action="store_true", help="列出可用模型并退出",
     )
@@ -62,19 +91,75 @@ def main(argv=None):
         print("❌ --langs 为空", file=sys.stderr)
         return 1
 
-    os.makedirs(args.out, exist_ok=True)
+    if args.estimate:
+        if args.engine != "openrouter":
+            parser.error("--estimate 仅支持 openrouter 引擎（Google 费用见 Cloud Console）")
+        info = estimate_cost(args.source, langs, args.model, calibrated=True)
+        print(format_cost_summary(info))
+        return 1 if "error" in info else 0
+
+    if args.jobs < 1:
+        print("❌ --jobs 须 >= 1", file=sys.stderr)
+        return 1
 
-    failures = 0
-    for lang in langs:
-        print(f"→ {args.source} → {lang} ({args.engine}/{args.model})")
+    if bool(args.previous_source) != bool(args.previous_output):
+        parser.error("--previous-source 与 --previous-output 须同时给出")
+    if args.previous_source:
+        if args.engine != "openrouter":
+            parser.error("增量模式仅支持 openrouter 引擎")
+        if not os.path.isfile(args.previous_source):
+            print(f"❌ 文件不存在: {args.previous_source}", file=sys.stderr)
+            return 1
+        if not os.path.isdir(args.previous_output):
+            print(f"❌ 目录不存在: {args.previous_output}", file=sys.stderr)
+            return 1
+
+    if args.resume:
+        if args.engine != "openrouter":
+            parser.error("--resume 仅支持 openrouter 引擎")
         try:
-            _name, path = translate_single_file(
-                args.source, lang, args.engine, args.model, args.out, _stdout_progress
-            )
-            print(f"  ✅ {path}")
-        except Exception as e:
-            failures += 1
-            print(f"  ❌ {lang} 失败: {e}", file=sys.stderr)
+            resumable = checkpoint.job_exists(args.resume)
+        except ValueError as e:
+            parser.error(str(e))
+        if not resumable:
+            print(f"❌ 找不到任务检查点: {args.resume}", file=sys.stderr)
+            return 1
+
+    os.makedirs(args.out, exist_ok=True)
+
+    job_id = usage = None
+    if args.engine == "openrouter":
+        job_id = args.resume or checkpoint.new_job_id()
+        usage = UsageRecorder(job_id)
+        print(f"任务 ID: {job_id}（中断后可用 --resume {job_id} 续传）")
+
+    def _report(lang, result, error):
+        if error is None:
+            print(f"  ✅ {lang}: {result[1]}")
+        else:
+            print(f"  ❌ {lang} 失败: {error}", file=sys.stderr)
+
+    print(f"→ {args.source} → {', '.join(langs)} ({args.engine}/{args.model}, jobs={args.jobs})")
+    results = translate_single_file_multi(
+        args.source, langs, args.engine, args.model, args.out,
+        _stdout_progress, max_workers=args.jobs, on_result=_report,
+        previous_source=args.previous_source, previous_output_dir=args.previous_output,
+        job_id=job_id, usage=usage,
+    )
+    failures = sum(1 for _lang, _res, err in results if err is not None)
+    if job_id and not failures:
+        checkpoint.discard_job(job_id)
+
+    if usage is not None:
+        source_base = os.path.splitext(os.path.basename(args.source))[0]
+        report_path = usage.write(args.out, source_base)
+        report = usage.report()
+        cost_calibration.record_usage(report)
+        totals = report["totals"]
+        cost = "未知" if totals["cost_usd"] is None else f"${totals['cost_usd']:.4f}"
+        print(f"用量: {totals['requests']} 次请求，输入 {totals['prompt_tokens']:,} tokens"
+              f"（缓存命中 {totals['cached_tokens']:,}），输出 {totals['completion_tokens']:,} tokens，"
+              f"费用 {cost} → {report_path}")
 
     print(f"\n完成: {len(langs) - failures}/{len(langs)} 成功 → {args.out}/")
     return 1 if failures else 0
@@ -36,9 +36,28 @@ GOOGLE_CREDENTIALS_FILENAMES = ("google-credentials.json", "serviceKey.json")
 # OpenRouter API Key —— 走 shell env，来源 ~/.config/secrets.env
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY", "")
 
+# OpenAI 兼容 API 地址 —— 默认 OpenRouter；压测时指向本地 mock（benchmarks/mock_openrouter.py）
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
 # 默认 LLM 模型（见 llm_models.AVAILABLE_MODELS）
 DEFAULT_MODEL = os.environ.get("DEFAULT_MODEL", "anthropic/claude-sonnet-5")
 
+# 翻译记忆（TM）目录 —— 设了才启用：跨运行复用未变字符串的译文，只把 cache miss 送 LLM。
+# 例: export TRANSLATION_MEMORY_DIR=~/.cache/translation-app（见 translation_memory.py）
+TRANSLATION_MEMORY_DIR = os.path.expanduser(os.environ.get("TRANSLATION_MEMORY_DIR", ""))
+
+# 断点续传检查点目录（checkpoint.py）：每个任务一个子目录，任务整体成功后自动清理
+CHECKPOINT_DIR = os.path.expanduser(os.environ.get("CHECKPOINT_DIR", "checkpoints"))
+
+# Web 后台任务队列（job_queue.py）：SQLite 持久化文件，进程重启后中断的任务自动重新入队
+JOB_QUEUE_PATH = os.path.expanduser(os.environ.get("JOB_QUEUE_PATH", "jobs/jobs.sqlite3"))
+
+# 费用估算自校准样本库（cost_calibration.py）：每个 LLM 任务结束后记录实际用量，
+# /api/estimate-cost 与 cli --estimate 据此给出校准后的估算与置信区间；设为空串关闭
+COST_CALIBRATION_PATH = os.path.expanduser(
+    os.environ.get("COST_CALIBRATION_PATH", "jobs/cost_calibration.sqlite3")
+)
+
 # 上传大小上限 —— 已接线为 Flask MAX_CONTENT_LENGTH（app.py）；>此值的上传返回 413。
 # 50MB 容得下大 ZIP 多语言包（实测最大单包 ru.json ~79KB，远低于此）。
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
@@ -50,10 +69,90 @@ BATCH_SIZE = 3
 REQUEST_DELAY = 1.0
 MAX_RETRIES = 3
 
+# 并发：多语言同时翻译的语言数（cli --jobs 默认值 / Web 单文件多语言），
+# 以及全进程同时在途的 LLM 请求上限（所有语言 × 批次共享，防多语言并发冲垮 provider）
+LANGUAGE_JOBS = 4
+MAX_CONCURRENT_REQUESTS = 8
+# ZIP 压缩包内 (文件, 语言) 任务的并发数（每个后台任务内；LLM 请求仍受上面的全进程上限约束）
+ZIP_TASK_JOBS = 4
+# ZIP 跨文件合并翻译（仅 LLM）：同一语言的全部文件叶子进一个池统一分批，
+# 碎片化语言包（大量 5–20 条的小文件）请求数按总量而非文件数计。opt-in：合并后每种语言只有一个任务，
+# 大 ZIP 失去按文件的并行、一个坏文件会拖住整个语言
+ZIP_CROSS_FILE_BATCHING = False
+# Web 后台任务工作线程数：同时执行的翻译任务（上传）数，超出的排队，按提交方公平调度
+JOB_WORKERS = 2
+
+# OpenRouter HTTP 连接池（llm_client 全进程共享一个 AsyncOpenAI + httpx pool，所有语言 / 文件复用）。
+# 连接上限应 ≥ MAX_CONCURRENT_REQUESTS，否则在途请求会在池上排队；装了 h2 时自动启用 HTTP/2
+HTTP_MAX_CONNECTIONS = 16
+HTTP_MAX_KEEPALIVE = 16
+HTTP_KEEPALIVE_EXPIRY = 30.0   # 秒：空闲连接保留时长（批次间隔内复用 TLS 连接）
+HTTP_TIMEOUT = 300.0           # 秒：单请求总超时（大批次 + 慢模型）
+
+# 自适应限流（rate_limiter.py，按模型共享）：令牌桶速率（请求/秒）AIMD 调整 ——
+# 成功 +STEP，429 ×BACKOFF 并按 Retry-After 暂停；速率夹在 [MIN, MAX]
+RATE_LIMIT_INITIAL_RPS = 2.0
+RATE_LIMIT_MIN_RPS = 0.2
+RATE_LIMIT_MAX_RPS = 20.0
+RATE_LIMIT_STEP = 0.1
+RATE_LIMIT_BACKOFF = 0.5
+
+# 流式响应（llm_client）：边收边解析 translations 数组 —— 大批次也有批内进度，
+# 断流 / 截断时保留已收到的前缀、只重请求剩余项。默认关闭（opt-in）
+LLM_STREAM_RESPONSES = False
+
+# 多语言单次调用（translation_runner）：相近语言（translation_config.MULTI_LANGUAGE_GROUPS）
+# 的同一批原文一个请求译成多种语言，每组最多 MULTI_LANGUAGE_MAX_GROUP 种；默认关闭（opt-in）
+MULTI_LANGUAGE_CALLS = False
+MULTI_LANGUAGE_MAX_GROUP = 4
+
+# 模型故障转移（translate_llm）：同一批在一个模型上失败 MODEL_FAILOVER_AFTER 次后改用链上的下一个；
+# 链 = 请求的模型 + MODEL_FAILOVER_CHAIN（空 = 按 llm_models 目录档位 质量 → 备选 → 经济）。默认关闭（opt-in）
+MODEL_FAILOVER = False
+MODEL_FAILOVER_AFTER = 2
+MODEL_FAILOVER_CHAIN = []
+# 对冲请求（llm_client）：一批耗时超过该模型近期批次的 p{HEDGE_PERCENTILE}（样本 ≥ HEDGE_MIN_SAMPLES）
+# 仍未返回，向链上的下一个模型并发同一批，取先返回的有效结果。默认关闭（opt-in）
+HEDGE_REQUESTS = False
+HEDGE_PERCENTILE = 95
+HEDGE_MIN_SAMPLES = 20
+
+# 熔断（circuit_breaker.py，按模型全进程共享）：最近 CIRCUIT_BREAKER_WINDOW 秒内请求数 ≥ MIN_REQUESTS
+# 且失败率（429 / 5xx / 连接超时）≥ FAILURE_RATE 即断开 —— 该模型的请求不再发出、立即失败
+# （开启故障转移时改走下一个模型），COOLDOWN 秒后放一个探测请求。默认关闭（opt-in，关闭时只统计不断开）
+CIRCUIT_BREAKER = False
+CIRCUIT_BREAKER_WINDOW = 60.0
+CIRCUIT_BREAKER_MIN_REQUESTS = 10
+CIRCUIT_BREAKER_FAILURE_RATE = 0.5
+CIRCUIT_BREAKER_COOLDOWN = 30.0
+
 try:
     from translation_config import BATCH_CONFIG
     BATCH_SIZE = BATCH_CONFIG.get('size', BATCH_SIZE)
     REQUEST_DELAY = BATCH_CONFIG.get('request_delay', REQUEST_DELAY)
     MAX_RETRIES = BATCH_CONFIG.get('max_retries', MAX_RETRIES)
+    LANGUAGE_JOBS = BATCH_CONFIG.get('language_jobs', LANGUAGE_JOBS)
+    MAX_CONCURRENT_REQUESTS = BATCH_CONFIG.get('max_concurrent_requests', MAX_CONCURRENT_REQUESTS)
+    JOB_WORKERS = BATCH_CONFIG.get('job_workers', JOB_WORKERS)
+    ZIP_TASK_JOBS = BATCH_CONFIG.get('zip_task_jobs', ZIP_TASK_JOBS)
+    ZIP_CROSS_FILE_BATCHING = BATCH_CONFIG.get('zip_cross_file_batching', ZIP_CROSS_FILE_BATCHING)
+    HTTP_MAX_CONNECTIONS = BATCH_CONFIG.get('http_max_connections', HTTP_MAX_CONNECTIONS)
+    HTTP_MAX_KEEPALIVE = BATCH_CONFIG.get('http_max_keepalive', HTTP_MAX_KEEPALIVE)
+    RATE_LIMIT_INITIAL_RPS = BATCH_CONFIG.get('rate_limit_initial_rps', RATE_LIMIT_INITIAL_RPS)
+    RATE_LIMIT_MAX_RPS = BATCH_CONFIG.get('rate_limit_max_rps', RATE_LIMIT_MAX_RPS)
+    LLM_STREAM_RESPONSES = BATCH_CONFIG.get('stream_responses', LLM_STREAM_RESPONSES)
+    MULTI_LANGUAGE_CALLS = BATCH_CONFIG.get('multi_language_calls', MULTI_LANGUAGE_CALLS)
+    MULTI_LANGUAGE_MAX_GROUP = BATCH_CONFIG.get('multi_language_max_group', MULTI_LANGUAGE_MAX_GROUP)
+    MODEL_FAILOVER = BATCH_CONFIG.get('model_failover', MODEL_FAILOVER)
+    MODEL_FAILOVER_AFTER = BATCH_CONFIG.get('model_failover_after', MODEL_FAILOVER_AFTER)
+    MODEL_FAILOVER_CHAIN = BATCH_CONFIG.get('model_failover_chain', MODEL_FAILOVER_CHAIN)
+    HEDGE_REQUESTS = BATCH_CONFIG.get('hedge_requests', HEDGE_REQUESTS)
+    HEDGE_PERCENTILE = BATCH_CONFIG.get('hedge_percentile', HEDGE_PERCENTILE)
+    HEDGE_MIN_SAMPLES = BATCH_CONFIG.get('hedge_min_samples', HEDGE_MIN_SAMPLES)
+    CIRCUIT_BREAKER = BATCH_CONFIG.get('circuit_breaker', CIRCUIT_BREAKER)
+    CIRCUIT_BREAKER_WINDOW = BATCH_CONFIG.get('circuit_breaker_window', CIRCUIT_BREAKER_WINDOW)
+    CIRCUIT_BREAKER_MIN_REQUESTS = BATCH_CONFIG.get('circuit_breaker_min_requests', CIRCUIT_BREAKER_MIN_REQUESTS)
+    CIRCUIT_BREAKER_FAILURE_RATE = BATCH_CONFIG.get('circuit_breaker_failure_rate', CIRCUIT_BREAKER_FAILURE_RATE)
+    CIRCUIT_BREAKER_COOLDOWN = BATCH_CONFIG.get('circuit_breaker_cooldown', CIRCUIT_BREAKER_COOLDOWN)
 except ImportError:
     pass
@@ -4,7 +4,17 @@ flat layout：生产模块在仓库根，测试在 tests/。pytest 默认只把
 （tests/）加进 sys.path，根模块（translation_postprocess 等）会 import 不到。
 这里显式把根插到 sys.path 最前，稳过 import（不依赖 pytest import-mode 细节）。
 """
+import collections
 import os
 import sys
 
+import pytest
+
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_qa_cache(monkeypatch):
+    """QA 重译缓存是进程级的：每个测试用空缓存，避免前一个测试的假译文串到后一个。"""
+    import translate_llm
+    monkeypatch.setattr(translate_llm, "_qa_cache", collections.OrderedDict())
@@ -0,0 +1,171 @@
+"""
+费用估算自校准 —— 从实际用量（usage_report）学习每 (模型, 目标语言, 源文字系统) 的系数
+
+设计:
+- 每个任务结束后把用量报告里的每个 (文件, 语言) 记为一条样本：实际送 LLM 的原文字符数 +
+  实际 prompt / 缓存命中 / completion tokens（含重试、二分、QA 回灌 —— 都是真实花费）
+- 系数 = 每原文字符的 token 数（输入 / 缓存命中 / 输出三项）；模板开销按批摊进输入系数 ——
+  批次大小由配置决定、相对稳定，无需单独建模
+- 同一键下取最近 MAX_SAMPLES 条，逐条换算成"每字符费用"（按当前定价），以样本均值 ± 预测区间
+  给出区间；样本不足 MIN_SAMPLES 的键由调用方退回静态估算
+- SQLite 单文件（stdlib），位于 config.COST_CALIBRATION_PATH；为空 = 关闭（不记录也不校准）
+"""
+
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# 样本数达到此值才启用校准（更少时方差估计不可信）
+MIN_SAMPLES = 3
+# 每个键只用最近的这么多条（模型 / prompt 变化后旧样本逐渐淘汰）
+MAX_SAMPLES = 50
+# 区间的置信水平与对应的正态分位数
+CONFIDENCE_LEVEL = 0.9
+_Z = 1.645
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    id                INTEGER PRIMARY KEY AUTOINCREMENT,
+    model             TEXT NOT NULL,
+    target_language   TEXT NOT NULL,
+    source_script     TEXT NOT NULL,
+    source_chars      INTEGER NOT NULL,
+    requests          INTEGER NOT NULL,
+    prompt_tokens     INTEGER NOT NULL,
+    cached_tokens     INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    created_at        REAL NOT NULL
+)
+"""
+_INDEX = (
+    "CREATE INDEX IF NOT EXISTS samples_key "
+    "ON samples (model, target_language, source_script, id)"
+)
+
+
+class CalibrationStore:
+    """用量样本库。线程安全。"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_INDEX)
+
+    def add_report(self, report):
+        """把 usage_report 报告的每个 (文件, 语言) 记为样本；跳过没有请求 / 原文的条目与多语言单次调用
+        的组条目（tokens 无法拆到单个语言，键也不会被估算查到）。返回记录条数。"""
+        now = time.time()
+        rows = [
+            (entry["model"], entry["language"], entry["source_script"], entry["source_chars"],
+             entry["requests"], entry["prompt_tokens"], entry["cached_tokens"],
+             entry["completion_tokens"], now)
+            for entry in report.get("files", [])
+            if entry.get("requests") and entry.get("source_chars") and entry.get("prompt_tokens")
+            and not entry.get("multi_language")
+        ]
+        if rows:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT INTO samples (model, target_language, source_script, source_chars, "
+                    "requests, prompt_tokens, cached_tokens, completion_tokens, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+        return len(rows)
+
+    def samples(self, model, target_language, source_script):
+        """最近 MAX_SAMPLES 条样本的每字符系数 [(输入, 缓存命中, 输出)]（tokens / 原文字符）。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT source_chars, prompt_tokens, cached_tokens, completion_tokens FROM samples "
+                "WHERE model = ? AND target_language = ? AND source_script = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (model, target_language, source_script, MAX_SAMPLES),
+            ).fetchall()
+        return [
+            (prompt / chars, cached / chars, completion / chars)
+            for chars, prompt, cached, completion in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def calibrate(samples, model_info, source_chars):
+    """按样本估算一种语言的 tokens 与费用。样本不足 MIN_SAMPLES 返回 None。
+
+    Returns:
+        {samples, input_tokens, cached_input_tokens, output_tokens, cost_usd, cost_low_usd, cost_high_usd}
+        区间为单次新任务的预测区间：均值 ± z·s·√(1 + 1/n)（每字符费用，再乘字符数）。
+    """
+    n = len(samples)
+    if n < MIN_SAMPLES:
+        return None
+    per_char_cost = [
+        ((prompt - cached) * model_info["input_price_per_m"]
+         + cached * model_info["cache_read_price_per_m"]
+         + completion * model_info["output_price_per_m"]) / 1_000_000
+        for prompt, cached, completion in samples
+    ]
+    mean = sum(per_char_cost) / n
+    variance = sum((c - mean) ** 2 for c in per_char_cost) / (n - 1)
+    margin = _Z * math.sqrt(variance) * math.sqrt(1 + 1 / n)
+    return {
+        "samples": n,
+        "input_tokens": round(sum(s[0] for s in samples) / n * source_chars),
+        "cached_input_tokens": round(sum(s[1] for s in samples) / n * source_chars),
+        "output_tokens": round(sum(s[2] for s in samples) / n * source_chars),
+        "cost_usd": mean * source_chars,
+        "cost_low_usd": max(0.0, mean - margin) * source_chars,
+        "cost_high_usd": (mean + margin) * source_chars,
+    }
+
+
+# 懒加载单例：按路径缓存（测试 / CLI 可切换）
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_calibration_store():
+    """返回进程级 CalibrationStore；config.COST_CALIBRATION_PATH 为空时返回 None（关闭）。"""
+    global _store
+    path = config.COST_CALIBRATION_PATH
+    if not path:
+        return None
+    with _store_lock:
+        if _store is None or _store.path != path:
+            if _store is not None:
+                _store.close()
+            _store = CalibrationStore(path)
+        return _store
+
+
+def record_usage(report):
+    """任务结束后记录用量样本。校准只是辅助功能，失败只记日志、不影响任务结果。"""
+    if not any(entry.get("requests") for entry in report.get("files", [])):
+        return 0
+    try:
+        store = get_calibration_store()
+        if store is None:
+            return 0
+        count = store.add_report(report)
+    except Exception as e:
+        logger.warning(f"[Calibration] 记录用量样本失败: {e}")
+        return 0
+    if count:
+        logger.info(f"[Calibration] 记录 {count} 条用量样本")
+    return count
@@ -1,23 +1,30 @@
 """
-翻译费用估算 —— 字符数估算（不再依赖 Anthropic count_tokens API）
+翻译费用估算 —— 本地 dry-run（不调 API，不再依赖 Anthropic count_tokens API）
 
 变更:
 - 删除 Anthropic beta count_tokens API 依赖（OpenRouter 不代理）
 - 扩展到多 provider 定价（源于 llm_models.AVAILABLE_MODELS）
+- 复用翻译管线做 dry-run（translate_llm.plan_translation）：与真实翻译同样的展平（嵌套 JSON /
+  JS 语言包）→ 翻译记忆命中 → 同值去重 → 按 token 预算分批，请求数与每批 prompt 按实际渲染估算
 - UI 应明确标注"估算值"，典型误差 20-30%
+- calibrated 模式：按 cost_calibration 从实际用量学到的每 (模型, 语言, 源文字系统) 系数估算，
+  给出置信区间；样本不足的语言退回静态估算
 """
 
-import json
 import logging
+import math
+import os
 
 from llm_models import get_model_info, get_default_model_id
-from config import BATCH_SIZE
+from cost_calibration import CONFIDENCE_LEVEL, MIN_SAMPLES, calibrate, get_calibration_store
+from token_estimator import dominant_script, estimate_tokens
+from translate_llm import _flatten, load_js_source, load_json_source, plan_translation
 
 logger = logging.getLogger(__name__)
 
 USD_TO_CNY = 7.3
 
-# 中文源文本 → 目标语的长度相对系数（tokens 数量变化）
+# 译文相对原文的 token 数系数（按目标语查表，lang[:2]）；静态估算用，calibrated 模式由实测系数取代
 OUTPUT_LENGTH_MULTIPLIER = {
     'zh': 0.4,  # 中文最紧凑，一个 'zh' 键覆盖 zh/zh-TW/zh-CN（查表用 lang[:2]）
     'en': 0.5,  'ja': 0.7,  'ko': 0.8,
@@ -31,22 +38,65 @@ OUTPUT_LENGTH_MULTIPLIER = {
 }
 DEFAULT_MULTIPLIER = 0.85
 
-# JSON 内容 tokens 估算常数：1 token ≈ 3 characters
-CHARS_PER_TOKEN = 3
-# 每批次的 prompt 模板开销（schema 说明 + capitalization rule）
-PROMPT_OVERHEAD_TOKENS = 600
+# 输出 JSON 的结构开销：每项引号 / 逗号，每批 {"translations": [...]} 外壳
+_OUTPUT_ITEM_TOKENS = 2
+_OUTPUT_WRAPPER_TOKENS = 8
 
+# 静态估算（未校准语言）的相对误差带
+STATIC_ERROR = 0.3
 
-def estimate_cost(file_path, target_languages, model_id=None):
-    """估算翻译费用。
+
+def _price(model_info, input_tokens, cached_tokens, output_tokens):
+    """按模型定价计费（USD）：未命中缓存的输入 / 缓存命中 / 输出分别计价。"""
+    return (
+        (input_tokens - cached_tokens) * model_info['input_price_per_m']
+        + cached_tokens * model_info['cache_read_price_per_m']
+        + output_tokens * model_info['output_price_per_m']
+    ) / 1_000_000
+
+
+def _cached_prompt_tokens(model_info, prefix_tokens, num_requests):
+    """预计命中 provider prompt cache 的输入 tokens。
+
+    system 前缀每 (语言, 模型) 固定：首个请求写入缓存，其后请求命中。前缀短于模型的
+    min_cache_tokens 时 provider 不缓存 —— 当前模板（各语言约 200-500 tokens）低于三家的
+    1024 门槛，故现阶段为 0；前缀将来变长（如注入术语表）后自动计入。
+    首次写入的溢价（Anthropic +25%）忽略不计。
+    """
+    if prefix_tokens < model_info['min_cache_tokens'] or num_requests < 2:
+        return 0
+    return prefix_tokens * (num_requests - 1)
+
+
+def _output_tokens(values, multiplier):
+    """一批译文的估算输出 tokens：逐项原文 tokens × 语言系数 + JSON 结构开销。"""
+    return _OUTPUT_WRAPPER_TOKENS + sum(
+        math.ceil(estimate_tokens(value) * multiplier) + _OUTPUT_ITEM_TOKENS for value in values
+    )
+
+
+def _load_leaves(file_path):
+    """按扩展名读源文件并展平成 [(path, 原文)] —— 与翻译器送翻译的叶子一致。"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".json":
+        return _flatten(load_json_source(file_path))
+    if extension == ".js":
+        return [((key,), value) for key, value in load_js_source(file_path).items()]
+    raise ValueError(f"不支持的文件类型: {extension}")
+
+
+def estimate_cost(file_path, target_languages, model_id=None, calibrated=False):
+    """估算翻译费用（dry-run 真实分批，不调 API）。
 
     Args:
-        file_path: JSON 语言包路径
+        file_path: .json（可任意嵌套）/ .js 语言包路径
         target_languages: 目标语言代码列表
         model_id: OpenRouter 模型 slug（默认用 AVAILABLE_MODELS 的 default）
+        calibrated: True 时按历史用量校准（cost_calibration）：有足够样本的语言用学到的
+            每字符系数并给出置信区间，其余语言退回静态估算（区间按 ±STATIC_ERROR）
 
     Returns:
-        dict with model info, token estimates, cost breakdown
+        dict with model info, token estimates, cost breakdown（languages 为逐语言明细）
         or {'error': ...} on failure
     """
     model_id = model_id or get_default_model_id()
@@ -55,59 +105,107 @@ def estimate_cost(file_path, target_languages, model_id=None):
         return {"error": f"未知模型: {model_id}"}
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        leaves = _load_leaves(file_path)
+        file_size = os.path.getsize(file_path)
     except Exception as e:
         return {"error": f"读取文件失败: {e}"}
 
-    total_items = len(data)
-    num_batches = max(1, (total_items + BATCH_SIZE - 1) // BATCH_SIZE)
-    num_languages = len(target_languages)
-
-    # JSON 序列化后字符数（LLM 实际看到的输入大小）
-    json_str = json.dumps(data, ensure_ascii=False, indent=2)
-    json_chars = len(json_str)
-    json_tokens = json_chars // CHARS_PER_TOKEN
-    avg_batch_tokens = max(1, json_tokens // num_batches)
+    unique_values = list(dict.fromkeys(value for _path, value in leaves))
+    source_script = dominant_script(unique_values)
+    store = get_calibration_store() if calibrated else None
 
-    input_tokens_per_batch = avg_batch_tokens + PROMPT_OVERHEAD_TOKENS
-
-    # 每种语言的输出 tokens（基于长度乘数）
-    output_tokens_per_lang = []
+    # 每种语言 dry-run 一次：TM 命中与分批预算（prompt 开销含大写规则）都因语言而异
+    languages = []
     for lang in target_languages:
-        lang_code = lang[:2].lower()
-        mult = OUTPUT_LENGTH_MULTIPLIER.get(lang_code, DEFAULT_MULTIPLIER)
-        lang_output = int(avg_batch_tokens * mult * num_batches)
-        output_tokens_per_lang.append(lang_output)
-
-    total_input_tokens = input_tokens_per_batch * num_batches * num_languages
-    total_output_tokens = sum(output_tokens_per_lang)
+        plan = plan_translation(leaves, lang, model_id)
+        batches = plan["batches"]
+        mult = OUTPUT_LENGTH_MULTIPLIER.get(lang[:2].lower(), DEFAULT_MULTIPLIER)
+        input_tokens = sum(batch["prompt_tokens"] for batch in batches)
+        output_tokens = sum(_output_tokens(batch["values"], mult) for batch in batches)
+        cached_tokens = _cached_prompt_tokens(model_info, plan["system_tokens"], len(batches))
+        cost = _price(model_info, input_tokens, cached_tokens, output_tokens)
+        entry = {
+            "language": lang,
+            "requests": len(batches),
+            "memory_hits": plan["memory_hits"],
+            "units": plan["units"],
+            "calibrated": False,
+            "samples": 0,
+            "input_tokens": input_tokens,
+            "cached_input_tokens": cached_tokens,
+            "output_tokens": output_tokens,
+            "cost_usd": cost,
+            "cost_low_usd": cost * (1 - STATIC_ERROR),
+            "cost_high_usd": cost * (1 + STATIC_ERROR),
+        }
+        # 校准样本按"实际送 LLM 的原文字符数"记录，这里同样只算 TM / 去重之后的部分
+        sent_chars = sum(len(value) for batch in batches for value in batch["values"])
+        if store is not None and sent_chars:
+            learned = calibrate(
+                store.samples(model_id, lang, source_script), model_info, sent_chars
+            )
+            if learned:
+                entry.update(learned, calibrated=True)
+        languages.append(entry)
 
-    input_cost = (total_input_tokens / 1_000_000) * model_info['input_price_per_m']
-    output_cost = (total_output_tokens / 1_000_000) * model_info['output_price_per_m']
+    num_languages = len(target_languages)
+    total_input_tokens = sum(entry["input_tokens"] for entry in languages)
+    total_output_tokens = sum(entry["output_tokens"] for entry in languages)
+    cached_input_tokens = sum(entry["cached_input_tokens"] for entry in languages)
+    num_requests = sum(entry["requests"] for entry in languages)
+
+    input_cost = _price(model_info, total_input_tokens, cached_input_tokens, 0)
+    output_cost = _price(model_info, 0, 0, total_output_tokens)
+    cache_savings = cached_input_tokens / 1_000_000 * (
+        model_info['input_price_per_m'] - model_info['cache_read_price_per_m']
+    )
     total_cost = input_cost + output_cost
 
-    return {
+    result = {
         "model": model_info['id'],
         "model_name": model_info['name'],
-        "file_size": json_chars,
-        "num_keys": total_items,
+        "file_size": file_size,
+        "num_keys": len(leaves),
+        "unique_strings": len(unique_values),
         "num_languages": num_languages,
-        "num_batches": num_batches,
-        "batch_size": BATCH_SIZE,
+        "num_requests": num_requests,
         "estimated_input_tokens": total_input_tokens,
+        "estimated_cached_input_tokens": cached_input_tokens,
         "estimated_output_tokens": total_output_tokens,
         "estimated_total_tokens": total_input_tokens + total_output_tokens,
         "input_cost_usd": round(input_cost, 4),
         "output_cost_usd": round(output_cost, 4),
         "total_cost_usd": round(total_cost, 4),
         "total_cost_cny": round(total_cost * USD_TO_CNY, 4),
+        "cache_savings_usd": round(cache_savings, 4),
         "pricing": {
             "input_per_million": model_info['input_price_per_m'],
             "output_per_million": model_info['output_price_per_m'],
+            "cache_read_per_million": model_info['cache_read_price_per_m'],
         },
-        "estimation_note": "字符数估算，典型误差 20-30%",
+        "languages": [
+            {**entry, **{k: round(entry[k], 6) for k in ("cost_usd", "cost_low_usd", "cost_high_usd")}}
+            for entry in languages
+        ],
+        "estimation_note": "按实际分批 dry-run 估算 tokens，典型误差 20-30%",
     }
+    if calibrated:
+        calibrated_count = sum(1 for entry in languages if entry["calibrated"])
+        # 区间按语言直接相加（视各语言误差完全相关，偏保守）
+        low = sum(entry["cost_low_usd"] for entry in languages)
+        high = sum(entry["cost_high_usd"] for entry in languages)
+        result.update({
+            "calibrated_languages": calibrated_count,
+            "source_script": source_script,
+            "confidence_level": CONFIDENCE_LEVEL,
+            "cost_interval_usd": [round(low, 4), round(high, 4)],
+            "estimation_note": (
+                f"{calibrated_count}/{num_languages} 种语言按历史用量校准，其余按 dry-run 估算"
+                if calibrated_count else
+                f"无足够历史用量（每语言需 ≥{MIN_SAMPLES} 次），按 dry-run 估算，区间 ±{int(STATIC_ERROR * 100)}%"
+            ),
+        })
+    return result
 
 
 def format_cost_summary(info):
@@ -115,20 +213,28 @@ def format_cost_summary(info):
     if "error" in info:
         return f"❌ 错误: {info['error']}"
 
+    interval = ""
+    if "cost_interval_usd" in info:
+        low, high = info["cost_interval_usd"]
+        interval = (
+            f"\n   {int(info['confidence_level'] * 100)}% 区间: ${low:.4f} – ${high:.4f}"
+            f"（已校准 {info['calibrated_languages']}/{info['num_languages']} 种语言）"
+        )
+
     return f"""
-📊 费用估算（字符数估算，典型误差 20-30%）
+📊 费用估算（{info['estimation_note']}）
 ━━━━━━━━━━━━━━━━━━━━━━
 📁 文件信息:
-   键值对: {info['num_keys']}
+   待译字符串: {info['num_keys']}（去重后 {info['unique_strings']}）
    文件大小: {info['file_size']:,} 字节
    目标语言: {info['num_languages']}
-   批次数: {info['num_batches']} × 每批 {info['batch_size']} 项
+   请求数: {info['num_requests']}（全部语言合计，已扣除翻译记忆命中）
 
 🤖 模型: {info['model_name']}
    ${info['pricing']['input_per_million']}/M 输入 | ${info['pricing']['output_per_million']}/M 输出
 
 📈 Token 预估:
-   输入: {info['estimated_input_tokens']:,}
+   输入: {info['estimated_input_tokens']:,}（其中缓存命中 {info['estimated_cached_input_tokens']:,}）
    输出: {info['estimated_output_tokens']:,}
    合计: {info['estimated_total_tokens']:,}
 
@@ -136,6 +242,7 @@ def format_cost_summary(info):
    输入: ${info['input_cost_usd']:.4f}
    输出: ${info['output_cost_usd']:.4f}
    合计: ${info['total_cost_usd']:.4f} (≈ ¥{info['total_cost_cny']:.4f})
+   缓存节省: ${info['cache_savings_usd']:.4f}{interval}
 ━━━━━━━━━━━━━━━━━━━━━━
 """
 
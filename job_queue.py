@@ -0,0 +1,261 @@
+"""
+后台翻译任务队列 —— 进程内工作线程池 + SQLite 持久队列（无外部 broker）
+
+设计:
+- /translate 只做校验 + 落盘 + submit，立即返回 job_id；翻译在工作线程里跑，HTTP 线程不被占住
+- 任务记录（参数 / 状态 / 结果）存 SQLite（stdlib）：进程重启后 running 的任务重新入队，
+  配合断点续传检查点（checkpoint.py，job_id 共用）从中断处继续
+- 公平调度：取任务时优先"当前在跑任务最少的提交方（owner）"，同级按提交先后 ——
+  一个用户连投多个大 ZIP 不会饿死其他用户
+- 进度（高频）只存内存快照，状态迁移（queued → running → succeeded / failed）才落库；
+  快照只为排队 / 运行中的任务保留，任务结束即丢弃（终态已在库里），长跑的服务不随任务数增长
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+# 已结束任务的记录保留时长（启动时清理更早的）
+FINISHED_RETENTION_SECONDS = 7 * 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    id         TEXT NOT NULL UNIQUE,
+    owner      TEXT NOT NULL,
+    status     TEXT NOT NULL,
+    params     TEXT NOT NULL,
+    result     TEXT,
+    error      TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class JobConflict(Exception):
+    """同一 job_id 的任务仍在排队 / 运行，不能重复提交。"""
+
+
+class JobForbidden(Exception):
+    """job_id 已属于其他提交方（owner），不能续传 / 覆盖。"""
+
+
+class JobQueue:
+    """持久任务队列 + 工作线程池。
+
+    handler(job_id, params) 在工作线程里执行一个任务：返回结果 dict（JSON 可序列化）
+    即成功，抛异常即失败（str(异常) 记为 error）。执行中可调 report(job_id, progress, message)
+    更新进度快照（供 get / 状态接口读取）。
+    """
+
+    def __init__(self, db_path, handler, workers=2):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_path = db_path
+        self._handler = handler
+        self._workers = max(1, int(workers))
+        self._cond = threading.Condition()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._threads = []
+        self._stopping = False
+        self._live = {}  # 排队 / 运行中的 job_id → {"progress", "message"}
+        with self._cond, self._conn:
+            self._conn.execute(_SCHEMA)
+            # 上次进程退出时仍在跑的任务：重新入队（检查点保证从中断处继续）
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING),
+            )
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*FINISHED, time.time() - FINISHED_RETENTION_SECONDS),
+            )
+        if cur.rowcount:
+            logger.info(f"[Jobs] 恢复 {cur.rowcount} 个中断的任务")
+
+    # ---------- 生命周期 ----------
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return self
+            self._stopping = False
+            for i in range(self._workers):
+                t = threading.Thread(target=self._worker, name=f"job-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+        logger.info(f"[Jobs] 启动 {self._workers} 个工作线程（{self.db_path}）")
+        return self
+
+    def stop(self, timeout=None):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads, self._threads = self._threads, []
+        for t in threads:
+            t.join(timeout)
+
+    def close(self):
+        self.stop()
+        with self._cond:
+            self._conn.close()
+
+    # ---------- 提交 / 查询 ----------
+
+    def submit(self, job_id, params, owner=""):
+        """入队。job_id 已存在且已结束 → 以新参数重新入队（续传）；仍在排队 / 运行 → JobConflict；
+        已存在但 owner 不同 → JobForbidden（不得覆盖他人的任务记录 / 复用其检查点）。"""
+        now = time.time()
+        owner = owner or ""
+        with self._cond:
+            row = self._conn.execute(
+                "SELECT status, owner FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row and row[1] != owner:
+                raise JobForbidden(f"任务 {job_id} 不属于当前提交方")
+            if row and row[0] not in FINISHED:
+                raise JobConflict(f"任务 {job_id} 仍在{'排队' if row[0] == QUEUED else '运行'}中")
+            with self._conn:
+                if row:
+                    self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+                self._conn.execute(
+                    "INSERT INTO jobs (id, owner, status, params, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (job_id, owner, QUEUED, json.dumps(params, ensure_ascii=False), now, now),
+                )
+            self._live[job_id] = {"progress": 0.0, "message": "排队中"}
+            self._cond.notify()
+        return job_id
+
+    def get(self, job_id):
+        """任务快照 dict（含提交方 owner，供调用方做归属校验）；不存在返回 None。"""
+        with self._cond:
+            row = self._conn.execute(
+                "SELECT id, status, result, error, created_at, updated_at, owner FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            live = dict(self._live.get(job_id, {}))
+            position = None
+            if row and row[1] == QUEUED:
+                position = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ? AND seq < "
+                    "(SELECT seq FROM jobs WHERE id = ?)",
+                    (QUEUED, job_id),
+                ).fetchone()[0]
+        if row is None:
+            return None
+        job_id, status, result, error, created_at, updated_at, owner = row
+        job = {
+            "id": job_id,
+            "owner": owner,
+            "status": status,
+            "progress": 100.0 if status == SUCCEEDED else live.get("progress", 0.0),
+            "message": live.get("message", ""),
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+        if position is not None:
+            job["queue_position"] = position
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def wait(self, job_id, timeout=None):
+        """阻塞到任务结束（测试 / CLI 用），返回快照；超时返回当前快照。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is None or row[0] in FINISHED:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        return self.get(job_id)
+
+    # ---------- 工作线程 ----------
+
+    def _claim_next(self):
+        """公平取下一个任务（调用方持锁）：当前在跑任务最少的 owner 优先，同级按提交序。"""
+        row = self._conn.execute(
+            "SELECT j.id, j.params FROM jobs j WHERE j.status = ? "
+            "ORDER BY (SELECT COUNT(*) FROM jobs r WHERE r.status = ? AND r.owner = j.owner), j.seq "
+            "LIMIT 1",
+            (QUEUED, RUNNING),
+        ).fetchone()
+        if row is None:
+            return None
+        with self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                (RUNNING, time.time(), row[0]),
+            )
+        return row[0], json.loads(row[1])
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                claimed = None
+                while not self._stopping:
+                    claimed = self._claim_next()
+                    if claimed:
+                        break
+                    self._cond.wait()
+                if claimed is None:
+                    return
+            job_id, params = claimed
+            self._run(job_id, params)
+
+    def report(self, job_id, progress=None, message=None):
+        """更新任务进度快照（内存，不落库）；progress / message 为 None 时保留原值。
+
+        只更新排队 / 运行中的任务；已结束任务的迟到回报直接丢弃。
+        """
+        with self._cond:
+            live = self._live.get(job_id)
+            if live is None:
+                return
+            if progress is not None:
+                live["progress"] = progress
+            if message is not None:
+                live["message"] = message
+
+    def _run(self, job_id, params):
+        logger.info(f"[Jobs] 开始任务 {job_id}")
+        with self._cond:
+            # 重启后重新入队的任务没有提交时建的快照，这里补上
+            self._live[job_id] = {"progress": 0.0, "message": "开始处理"}
+
+        result, error = None, None
+        try:
+            result = self._handler(job_id, params)
+            status = SUCCEEDED
+        except Exception as e:
+            logger.error(f"[Jobs] 任务 {job_id} 失败: {e}")
+            status, error = FAILED, str(e)
+        with self._cond:
+            with self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (status, None if result is None else json.dumps(result, ensure_ascii=False),
+                     error, time.time(), job_id),
+                )
+            self._live.pop(job_id, None)
+            self._cond.notify_all()
+        logger.info(f"[Jobs] 任务 {job_id} {status}")
@@ -2,22 +2,58 @@
 LLM 翻译客户端 —— OpenRouter + OpenAI SDK + structured output (json_schema)
 
 核心设计:
-- 单一 OpenAI client，base_url 指向 OpenRouter
+- 单一 AsyncOpenAI client，base_url 指向 OpenRouter；底层 httpx 连接池显式配置
+  （连接上限 / keep-alive / 装了 h2 时启用 HTTP/2），全进程所有语言、文件共享
+- client 与连接池绑定在一个后台事件循环线程上：在途请求是协程而非 OS 线程，
+  并发上限由循环内的 asyncio.Semaphore（config.MAX_CONCURRENT_REQUESTS）控制
+- translate_batch_async 为主入口；同步 translate_batch 是薄包装（现有调用方不变）
+- 每次请求先从该模型的共享自适应限流器（rate_limiter）取令牌；成功/429 的响应头回馈限流器。
+  SDK 内建重试关闭（max_retries=0）—— 否则 429 会在 SDK 内部被吞掉重试，限流器看不到
+- 每次请求前后同时经过该模型的共享熔断器（circuit_breaker）：断开时请求不发出，抛 CircuitOpenError
 - 使用 response_format=json_schema 强制返回 {"translations": [...]} 格式
+- 可选多语言单次调用（translate_batch_multi）：一批原文一个请求译成一组相近语言，
+  schema 为 {"translations": {"es": [...], "fr": [...]}}，原文 tokens 与往返只付一次
+- prompt 拆成稳定的 system 前缀（每 (语言, 模型) 固定）+ 每批变化的 user 消息，让 provider 侧
+  prompt cache 可命中；需显式标记的 provider 加 cache_control，命中数（cached_tokens）记入日志
+- 可选对冲请求（config.HEDGE_REQUESTS）：一批耗时超过该模型近期批次耗时的 p95 仍未返回时，
+  向调用方给的备用模型（hedge_model）并发同一批，取先返回的有效结果、取消另一个
+- 可选流式模式（config.LLM_STREAM_RESPONSES）：边收边增量解析 translations 数组，每完成一项
+  回调 on_item（批内进度）；断流 / 截断时保留已收到的前缀，只重请求剩余项。on_item 不在共享循环里
+  执行（调用方回调可能 emit / 抢锁，会卡住所有在途请求）：同步入口由调用线程从队列取出执行，
+  协程入口投递到调用方自己的循环
+- QA 回灌重译（qa_reason）走专用 prompt：system 追加按检出原因的纠错指令，user 附上被驳回的
+  上一版译文；不走流式 / 对冲（批小、求准不求快）
 - 这取代了原 Claude 直连里脆弱的 regex JSON 清理 (clean_json_response)
 - API key 来源: shell env OPENROUTER_API_KEY (SoT: ~/.config/secrets.env)
 """
 
+import asyncio
+import collections
+import hashlib
+import importlib.util
 import json
 import logging
-from typing import Optional
-from openai import OpenAI, APIError
+import math
+import queue
+import re
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+from openai import AsyncOpenAI, APIConnectionError, APIError, APIStatusError
+
+import config
+from circuit_breaker import CircuitOpenError, get_circuit_breaker
 from config import OPENROUTER_API_KEY
 from llm_models import get_model_info
+from rate_limiter import get_rate_limiter
+from token_estimator import estimate_tokens
 
 logger = logging.getLogger(__name__)
 
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# 单次请求输出上限（translate_batch 默认 max_tokens；translate_llm 按它给每批留 completion 预算）
+DEFAULT_MAX_TOKENS = 8192
 
 # OpenRouter 推荐但非强制的 headers（用于 leaderboard / usage attribution）
 _ATTRIBUTION_HEADERS = {
@@ -25,15 +61,70 @@ _ATTRIBUTION_HEADERS = {
     "X-OpenRouter-Title": "Translation App",
 }
 
-# 懒加载 client 单例
-_client: Optional[OpenAI] = None
+class BatchShapeError(ValueError):
+    """返回结构与输入对不上：数量不匹配 / 输出被截断（finish_reason=length 或 JSON 不完整）。
+
+    与限流、网络等错误不同，原样重试同一批大概率再错 —— 调用方应拆小批次重试
+    （见 translate_llm._translate_items 的二分恢复）。
+    """
+
+
+# 懒加载单例：后台事件循环 + 绑定其上的 client / 在途槽位
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_async_client: Optional[AsyncOpenAI] = None
+# 全进程在途请求上限：多语言 × 多批并发时，所有调用方共享这一组槽位（只在 _loop 上创建/使用）
+_request_slots: Optional[asyncio.Semaphore] = None
+# 对冲阈值的样本：模型 → 最近成功批次的耗时（秒）；只在 _loop 上读写
+_LATENCY_WINDOW = 200
+_batch_latencies: dict[str, collections.deque] = {}
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """返回共享事件循环（首次调用时在 daemon 线程里启动）。"""
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="openrouter-loop", daemon=True
+            ).start()
+            _loop = loop
+        return _loop
+
+
+def _http2_available() -> bool:
+    """HTTP/2 需要可选依赖 h2（httpx[http2]）；未安装时退回 HTTP/1.1 keep-alive。"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """显式配置的 httpx 连接池（trust_env 保留：SOCKS / HTTPS_PROXY 照常生效）。"""
+    limits = httpx.Limits(
+        max_connections=config.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY,
+    )
+    http2 = _http2_available()
+    logger.info(
+        f"[OpenRouter] HTTP 连接池: max={config.HTTP_MAX_CONNECTIONS} "
+        f"keepalive={config.HTTP_MAX_KEEPALIVE} http2={'on' if http2 else 'off'}"
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=10.0),
+        http2=http2,
+    )
 
 
-def _get_client() -> OpenAI:
-    """返回 OpenAI client（指向 OpenRouter）。Fail fast if key missing."""
-    global _client
-    if _client is not None:
-        return _client
+def _get_async_client() -> AsyncOpenAI:
+    """返回 AsyncOpenAI client（指向 config.OPENROUTER_BASE_URL，默认 OpenRouter）。Fail fast if key missing.
+
+    只应在 _get_loop() 的循环上调用：连接池里的连接绑定创建它们的事件循环。
+    """
+    global _async_client
+    if _async_client is not None:
+        return _async_client
 
     if not OPENROUTER_API_KEY:
         raise ValueError(
@@ -45,8 +136,21 @@ def _get_client() -> OpenAI:
             "详见 ~/claude-soul/protocols/secrets-management.md"
         )
 
-    _client = OpenAI(base_url=OPENROUTER_BASE_URL, api_key=OPENROUTER_API_KEY)
-    return _client
+    _async_client = AsyncOpenAI(
+        base_url=config.OPENROUTER_BASE_URL,
+        api_key=OPENROUTER_API_KEY,
+        http_client=_build_http_client(),
+        max_retries=0,
+    )
+    return _async_client
+
+
+def _get_request_slots() -> asyncio.Semaphore:
+    """在途槽位（懒创建于共享循环上；循环单线程，无竞争）。"""
+    global _request_slots
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(max(1, config.MAX_CONCURRENT_REQUESTS))
+    return _request_slots
 
 
 # JSON Schema: 强制 LLM 返回 {"translations": ["...", "..."]}
@@ -77,9 +181,15 @@ def translate_batch(
     model: str,
     temperature: float = 0.1,
     capitalization_rule: str = "",
-    max_tokens: int = 8192,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    on_item: Optional[Callable[[int, str], None]] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    hedge_model: Optional[str] = None,
+    on_model: Optional[Callable[[str], None]] = None,
+    qa_reason: Optional[str] = None,
+    rejected: Optional[list[str]] = None,
 ) -> list[str]:
-    """翻译一批字符串到目标语言，返回同序数组。
+    """翻译一批字符串到目标语言，返回同序数组（同步薄包装，见 translate_batch_async）。
 
     Args:
         values: 待翻译的字符串列表
@@ -89,49 +199,233 @@ def translate_batch(
         temperature: 采样温度（模型目录标记不支持时自动省略，如 Claude Sonnet 5）
         capitalization_rule: 语言特定大写规则说明（直接注入 prompt）
         max_tokens: 输出上限
+        on_item: 可选 (下标, 译文) 回调 —— 流式模式下每收到完整一项调用一次，在调用方线程内执行
+            （不占共享循环；非流式模式不调用）；重请求剩余项时下标沿用整批下标
+        on_usage: 可选用量回调 —— 每个成功的 HTTP 请求结束时以 {model, prompt_tokens, completion_tokens,
+            cached_tokens, latency_seconds} 调用一次（流式续请求各算一次；共享循环线程内调用）
+        hedge_model: 可选对冲模型 —— config.HEDGE_REQUESTS 开启且本批超过 model 的 p95 耗时仍未返回时，
+            向它并发同一批，先返回有效结果者胜（对冲请求不回调 on_item）
+        on_model: 可选回调 —— 成功时以实际产出译文的模型 slug 调用一次（对冲胜出时为 hedge_model）
+        qa_reason: QA 回灌重译的检出原因（如 "英文未翻译" / "简体残留"）—— 给出时改用纠错 prompt
+            （见 _build_qa_messages），忽略 on_item / hedge_model
+        rejected: 与 values 同序的被驳回译文（仅 qa_reason 时使用）
 
     Returns:
         翻译后的字符串列表，长度与 values 一致
 
     Raises:
-        ValueError: 返回数量不匹配 / API key 缺失
+        BatchShapeError: 返回数量不匹配 / 输出被截断（ValueError 子类）
+        ValueError: API key 缺失 / 空响应
         APIError: 上游 provider 错误（rate limit / 模型不支持 structured output 等）
+        CircuitOpenError: 该模型熔断中，请求未发出（见 circuit_breaker）
     """
     if not values:
         return []
+    loop = _get_loop()
+    if _running_loop() is loop:
+        raise RuntimeError("translate_batch 不能在共享事件循环内调用，请 await translate_batch_async")
+    if qa_reason:
+        coro = _translate_batch_qa(
+            values, rejected, qa_reason, target_lang_name, target_lang_code, model,
+            temperature, capitalization_rule, max_tokens, on_usage,
+        )
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    if on_item is None:
+        coro = _translate_batch_hedged(
+            values, target_lang_name, target_lang_code, model,
+            temperature, capitalization_rule, max_tokens, None, on_usage, hedge_model, on_model,
+        )
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    # 共享循环只把逐项结果放进队列，on_item 在本线程里执行
+    items = queue.SimpleQueue()
+    coro = _translate_batch_hedged(
+        values, target_lang_name, target_lang_code, model,
+        temperature, capitalization_rule, max_tokens,
+        lambda index, value: items.put((index, value)), on_usage, hedge_model, on_model,
+    )
+    future = asyncio.run_coroutine_threadsafe(coro, loop)
+    # 完成回调在所有逐项 put 之后执行，哨兵之前的项都已入队
+    future.add_done_callback(lambda _future: items.put(None))
+    try:
+        while (entry := items.get()) is not None:
+            on_item(*entry)
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
 
-    prompt = _build_prompt(values, target_lang_name, target_lang_code, capitalization_rule)
 
-    logger.info(f"[OpenRouter] 调用 {model} 翻译 {len(values)} 项 → {target_lang_name}")
+async def translate_batch_async(
+    values: list[str],
+    target_lang_name: str,
+    target_lang_code: str,
+    model: str,
+    temperature: float = 0.1,
+    capitalization_rule: str = "",
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    on_item: Optional[Callable[[int, str], None]] = None,
+    on_usage: Optional[Callable[[dict], None]] = None,
+    hedge_model: Optional[str] = None,
+    on_model: Optional[Callable[[str], None]] = None,
+    qa_reason: Optional[str] = None,
+    rejected: Optional[list[str]] = None,
+) -> list[str]:
+    """translate_batch 的协程版本（参数 / 返回 / 异常同上）。
 
-    # Claude Sonnet 5 / Opus 4.7+ 拒绝非默认 temperature（400）——按目录标记条件传参；
-    # 目录外的未知模型按支持处理
-    info = get_model_info(model)
-    sampling_kwargs = {}
-    if info is None or info["supports_temperature"]:
-        sampling_kwargs["temperature"] = temperature
+    可在任意事件循环里 await：请求总是在共享循环上发出（复用同一连接池与在途槽位），
+    调用方循环只等待结果。
+    """
+    if not values:
+        return []
+    loop = _get_loop()
+    caller = _running_loop()
+    if qa_reason:
+        coro = _translate_batch_qa(
+            values, rejected, qa_reason, target_lang_name, target_lang_code, model,
+            temperature, capitalization_rule, max_tokens, on_usage,
+        )
     else:
-        logger.debug(f"[OpenRouter] {model} 不支持 temperature，已省略该参数")
+        if on_item is not None and caller is not loop:
+            # on_item 投递回调用方的循环执行，不占共享循环
+            user_on_item = on_item
+            on_item = lambda index, value: caller.call_soon_threadsafe(user_on_item, index, value)
+        coro = _translate_batch_hedged(
+            values, target_lang_name, target_lang_code, model,
+            temperature, capitalization_rule, max_tokens, on_item, on_usage, hedge_model, on_model,
+        )
+    if caller is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
 
-    response = _get_client().chat.completions.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=max_tokens,
-        response_format=_TRANSLATION_SCHEMA,
-        extra_headers=_ATTRIBUTION_HEADERS,
-        **sampling_kwargs,
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _sampling_kwargs(model, temperature):
+    """Claude Sonnet 5 / Opus 4.7+ 拒绝非默认 temperature（400）——按目录标记条件传参；
+    目录外的未知模型按支持处理。"""
+    info = get_model_info(model)
+    if info is None or info["supports_temperature"]:
+        return {"temperature": temperature}
+    logger.debug(f"[OpenRouter] {model} 不支持 temperature，已省略该参数")
+    return {}
+
+
+def _record_batch_latency(model, seconds):
+    window = _batch_latencies.get(model)
+    if window is None:
+        window = _batch_latencies[model] = collections.deque(maxlen=_LATENCY_WINDOW)
+    window.append(seconds)
+
+
+def _hedge_delay(model) -> Optional[float]:
+    """该模型的对冲阈值：最近成功批次耗时的 HEDGE_PERCENTILE 分位（最近秩）；样本不足返回 None。"""
+    window = _batch_latencies.get(model)
+    if not window or len(window) < max(1, config.HEDGE_MIN_SAMPLES):
+        return None
+    ordered = sorted(window)
+    rank = max(1, math.ceil(len(ordered) * config.HEDGE_PERCENTILE / 100))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _timed_batch(values, target_lang_name, target_lang_code, model,
+                       temperature, capitalization_rule, max_tokens, on_item, on_usage):
+    """_translate_batch + 记录成功批次的耗时（对冲阈值的样本）。"""
+    started = time.monotonic()
+    translations = await _translate_batch(
+        values, target_lang_name, target_lang_code, model,
+        temperature, capitalization_rule, max_tokens, on_item, on_usage,
     )
+    _record_batch_latency(model, time.monotonic() - started)
+    return translations
 
-    raw = response.choices[0].message.content
-    if not raw:
-        raise ValueError(f"{model} 返回空响应")
 
-    # structured output 保证是 valid JSON object 符合 schema，无需 regex 清理
-    parsed = json.loads(raw)
-    translations = parsed["translations"]
+async def _translate_batch_hedged(
+    values, target_lang_name, target_lang_code, model, temperature, capitalization_rule,
+    max_tokens, on_item=None, on_usage=None, hedge_model=None, on_model=None,
+) -> list[str]:
+    """一批的请求入口（只在共享循环上运行）：按需对冲，返回先完成的有效结果。
+
+    未开启对冲 / 无备用模型 / 该模型样本不足时等同 _translate_batch。对冲后两路都失败则抛主请求的错误
+    （BatchShapeError 仍交调用方二分）；胜出后另一路立即取消。
+    """
+    def start(slug, item_callback):
+        return asyncio.ensure_future(_timed_batch(
+            values, target_lang_name, target_lang_code, slug,
+            temperature, capitalization_rule, max_tokens, item_callback, on_usage,
+        ))
+
+    delay = None
+    if config.HEDGE_REQUESTS and hedge_model and hedge_model != model:
+        delay = _hedge_delay(model)
+    if delay is None:
+        translations = await _timed_batch(
+            values, target_lang_name, target_lang_code, model,
+            temperature, capitalization_rule, max_tokens, on_item, on_usage,
+        )
+        if on_model:
+            on_model(model)
+        return translations
+
+    primary = start(model, on_item)
+    tasks = {primary: model}
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done:
+            logger.warning(
+                f"[OpenRouter] {model} 本批已超过 p{config.HEDGE_PERCENTILE} 耗时 {delay:.2f}s，"
+                f"对冲请求 → {hedge_model}"
+            )
+            hedge = start(hedge_model, None)
+            tasks[hedge] = hedge_model
+            pending.add(hedge)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # 同时完成时主请求优先
+            for task in sorted(done, key=lambda t: t is not primary):
+                if task.exception() is None:
+                    if tasks[task] != model:
+                        logger.info(f"[OpenRouter] 对冲请求胜出: {hedge_model} 先于 {model} 返回")
+                    if on_model:
+                        on_model(tasks[task])
+                    return task.result()
+        raise primary.exception()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _translate_batch(
+    values, target_lang_name, target_lang_code, model,
+    temperature, capitalization_rule, max_tokens, on_item=None, on_usage=None,
+) -> list[str]:
+    """实际请求（只在共享循环上运行）。"""
+    logger.info(f"[OpenRouter] 调用 {model} 翻译 {len(values)} 项 → {target_lang_name}")
+
+    sampling_kwargs = _sampling_kwargs(model, temperature)
+    if config.LLM_STREAM_RESPONSES:
+        return await _translate_batch_streaming(
+            values, target_lang_name, target_lang_code, model,
+            capitalization_rule, max_tokens, sampling_kwargs, on_item, on_usage,
+        )
+
+    messages = _build_messages(
+        values, target_lang_name, target_lang_code, capitalization_rule, model
+    )
+    translations = await _request_translations(
+        model, messages, max_tokens, sampling_kwargs, _TRANSLATION_SCHEMA, len(values), on_usage
+    )
 
     if len(translations) != len(values):
-        raise ValueError(
+        raise BatchShapeError(
             f"翻译数量不匹配: 输入 {len(values)} 项，返回 {len(translations)} 项"
         )
 
@@ -139,36 +433,557 @@ def translate_batch(
     return translations
 
 
-def _build_prompt(
+async def _translate_batch_qa(
+    values, rejected, reason, target_lang_name, target_lang_code, model,
+    temperature, capitalization_rule, max_tokens, on_usage=None,
+) -> list[str]:
+    """QA 回灌重译一批（只在共享循环上运行；非流式、不对冲）。"""
+    logger.info(f"[OpenRouter] QA 重译（{reason}）: {model} {len(values)} 项 → {target_lang_name}")
+    messages = _build_qa_messages(
+        values, rejected or [], reason, target_lang_name, target_lang_code, capitalization_rule, model
+    )
+    translations = await _request_translations(
+        model, messages, max_tokens, _sampling_kwargs(model, temperature),
+        _TRANSLATION_SCHEMA, len(values), on_usage,
+    )
+    if len(translations) != len(values):
+        raise BatchShapeError(
+            f"翻译数量不匹配: 输入 {len(values)} 项，返回 {len(translations)} 项"
+        )
+    return translations
+
+
+async def _request_translations(
+    model, messages, max_tokens, sampling_kwargs, response_format, item_count, on_usage=None,
+):
+    """发一次非流式请求（限流 / 在途槽位 / 用量回报），返回解析出的 translations 字段。
+
+    截断（finish_reason=length / JSON 不完整）抛 BatchShapeError；条数校验由调用方按形状做。
+    """
+    client = _get_async_client()
+    limiter = get_rate_limiter(model)
+    get_circuit_breaker(model).raise_if_open()
+    async with _get_request_slots():
+        await limiter.acquire()
+        started = time.monotonic()
+        raw_response = await _send_request(
+            client, model, limiter,
+            messages=messages,
+            max_tokens=max_tokens,
+            response_format=response_format,
+            **sampling_kwargs,
+        )
+    response = raw_response.parse()
+    _report_usage(model, getattr(response, "usage", None), started, on_usage)
+
+    choice = response.choices[0]
+    if getattr(choice, "finish_reason", None) == "length":
+        raise BatchShapeError(
+            f"{model} 输出被截断 (finish_reason=length): 输入 {item_count} 项"
+        )
+    raw = choice.message.content
+    if not raw:
+        raise ValueError(f"{model} 返回空响应")
+
+    # structured output 保证是 valid JSON object 符合 schema，无需 regex 清理；
+    # 解析失败只可能是输出中途被截断
+    try:
+        parsed = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise BatchShapeError(f"{model} 返回 JSON 不完整（疑似截断）: {e}") from e
+    return parsed["translations"]
+
+
+def _is_provider_failure(exc) -> bool:
+    """熔断器计入的失败：429 / 5xx / 连接错误与超时（其余错误不说明 provider 不可用）。"""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return isinstance(exc, APIConnectionError)
+
+
+async def _send_request(client, model, limiter, **kwargs):
+    """经熔断器发出一次请求（调用方已占在途槽位、取到限流令牌），返回 raw response。
+
+    429 回馈限流器；成败回馈熔断器（流式请求以建立连接为准，之后的断流由调用方处理）。
+    """
+    breaker = get_circuit_breaker(model)
+    breaker.before_request()
+    try:
+        raw_response = await client.chat.completions.with_raw_response.create(
+            model=model, extra_headers=_ATTRIBUTION_HEADERS, **kwargs,
+        )
+    except BaseException as e:
+        if isinstance(e, APIStatusError) and e.status_code == 429:
+            limiter.on_throttle(e.response.headers)
+        if _is_provider_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.release()
+        raise
+    limiter.on_success(raw_response.headers)
+    breaker.record_success()
+    return raw_response
+
+
+# ---------- 多语言单次调用 ----------
+
+def _multi_translation_schema(codes):
+    """{"translations": {"es": [...], "fr": [...]}} —— 每个语言代码一个必填字符串数组。"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "translations",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {
+                    "translations": {
+                        "type": "object",
+                        "properties": {
+                            code: {"type": "array", "items": {"type": "string"}} for code in codes
+                        },
+                        "required": list(codes),
+                        "additionalProperties": False,
+                    }
+                },
+                "required": ["translations"],
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def translate_batch_multi(
     values: list[str],
+    targets: list[tuple[str, str, str]],
+    model: str,
+    temperature: float = 0.1,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    on_usage: Optional[Callable[[dict], None]] = None,
+) -> dict[str, list[str]]:
+    """一批字符串在一个请求里同时译成多种语言，返回 {语言代码: 同序数组}。
+
+    原文只发送一次，相近语言（es/pt/it/fr、zh-TW/zh-Hant）共用输入 tokens 与往返。
+    总是非流式（增量解析只认单语言数组）；限流 / 在途槽位 / 用量回调与 translate_batch 相同。
+
+    Args:
+        targets: [(语言全名, 语言代码, 大写规则)]，代码即返回 dict 的 key
+        其余同 translate_batch
+
+    Raises:
+        BatchShapeError: 任一语言数量不匹配 / 缺语言 / 输出被截断
+        ValueError / APIError: 同 translate_batch
+    """
+    if not values:
+        return {code: [] for _name, code, _rule in targets}
+    loop = _get_loop()
+    if _running_loop() is loop:
+        raise RuntimeError("translate_batch_multi 不能在共享事件循环内调用")
+    future = asyncio.run_coroutine_threadsafe(
+        _translate_batch_multi(values, targets, model, temperature, max_tokens, on_usage),
+        loop,
+    )
+    return future.result()
+
+
+async def _translate_batch_multi(values, targets, model, temperature, max_tokens, on_usage=None):
+    codes = [code for _name, code, _rule in targets]
+    logger.info(f"[OpenRouter] 调用 {model} 翻译 {len(values)} 项 → {', '.join(codes)}（单次多语言）")
+    translations = await _request_translations(
+        model, _build_multi_messages(values, targets, model), max_tokens,
+        _sampling_kwargs(model, temperature), _multi_translation_schema(codes), len(values),
+        on_usage,
+    )
+    if not isinstance(translations, dict):
+        raise BatchShapeError(f"{model} 多语言返回结构不符: translations 不是对象")
+    for code in codes:
+        got = translations.get(code)
+        if not isinstance(got, list) or len(got) != len(values):
+            raise BatchShapeError(
+                f"翻译数量不匹配 ({code}): 输入 {len(values)} 项，"
+                f"返回 {len(got) if isinstance(got, list) else 0} 项"
+            )
+    logger.info(f"[OpenRouter] {model} 成功返回 {len(values)} 项 × {len(codes)} 种语言")
+    return {code: translations[code] for code in codes}
+
+
+# ---------- 流式模式 ----------
+
+_ARRAY_START_RE = re.compile(r'"translations"\s*:\s*\[')
+
+
+class _TranslationArrayParser:
+    """增量解析 {"translations": ["...", ...]}：feed 文本片段，返回本次新完成的字符串项。
+
+    只认 schema 规定的形状（字符串数组）；数组里出现非字符串 → BatchShapeError。
+    未闭合的字符串留在缓冲区等下一片，断流时自然不会被当成完整项。
+    """
+
+    def __init__(self):
+        self._buf = ""
+        self._pos = None  # 数组内下一个待解析位置；None = 尚未见到数组起点
+        self.closed = False
+
+    def feed(self, chunk):
+        self._buf += chunk
+        if self._pos is None:
+            match = _ARRAY_START_RE.search(self._buf)
+            if match is None:
+                return []
+            self._pos = match.end()
+
+        buf, items = self._buf, []
+        while not self.closed:
+            i = self._pos
+            while i < len(buf) and buf[i] in " \t\r\n,":
+                i += 1
+            self._pos = i
+            if i >= len(buf):
+                break
+            if buf[i] == "]":
+                self.closed = True
+                break
+            if buf[i] != '"':
+                raise BatchShapeError(f"流式输出不是字符串数组: {buf[i:i + 20]!r}")
+            end = _string_end(buf, i)
+            if end is None:
+                break
+            items.append(json.loads(buf[i:end]))
+            self._pos = end
+        return items
+
+
+def _string_end(buf, start):
+    """buf[start] 为开引号；返回闭引号之后的下标，字符串尚未收全返回 None。"""
+    i = start + 1
+    while i < len(buf):
+        ch = buf[i]
+        if ch == "\\":
+            i += 2
+        elif ch == '"':
+            return i + 1
+        else:
+            i += 1
+    return None
+
+
+async def _stream_request(model, messages, max_tokens, sampling_kwargs, on_item, on_usage=None):
+    """发一次流式请求并逐项解析。返回 (items, closed, finish_reason, error)。
+
+    连接建立前的错误（含 429，已回馈限流器）照常抛出；流开始后的断流不抛，
+    以 error 返回，连同已收全的前缀 items 交给调用方决定是否续请求。
+    """
+    client = _get_async_client()
+    limiter = get_rate_limiter(model)
+    parser = _TranslationArrayParser()
+    items, finish_reason, usage = [], None, None
+    get_circuit_breaker(model).raise_if_open()
+    async with _get_request_slots():
+        await limiter.acquire()
+        started = time.monotonic()
+        raw_response = await _send_request(
+            client, model, limiter,
+            messages=messages,
+            max_tokens=max_tokens,
+            response_format=_TRANSLATION_SCHEMA,
+            stream=True,
+            stream_options={"include_usage": True},
+            **sampling_kwargs,
+        )
+        try:
+            async for chunk in raw_response.parse():
+                if getattr(chunk, "usage", None) is not None:
+                    usage = chunk.usage  # include_usage：末尾单独一块，choices 为空
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                content = getattr(choice.delta, "content", None) if choice.delta else None
+                if content:
+                    for value in parser.feed(content):
+                        if on_item:
+                            on_item(len(items), value)
+                        items.append(value)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        except (httpx.HTTPError, APIError) as e:
+            _report_usage(model, usage, started, on_usage)
+            return items, parser.closed, finish_reason, e
+    _report_usage(model, usage, started, on_usage)
+    return items, parser.closed, finish_reason, None
+
+
+async def _translate_batch_streaming(
+    values, target_lang_name, target_lang_code, model,
+    capitalization_rule, max_tokens, sampling_kwargs, on_item, on_usage=None,
+) -> list[str]:
+    """流式翻译一批：断流 / 截断时保留已收全的前缀，只对剩余项重发请求。
+
+    没有任何进展的一轮照常失败（断流抛原错误交调用方重试；截断 / 不完整抛 BatchShapeError
+    交调用方二分），故循环必然终止。
+    """
+    received = []
+    while True:
+        remaining = values[len(received):]
+        offset = len(received)
+        messages = _build_messages(
+            remaining, target_lang_name, target_lang_code, capitalization_rule, model
+        )
+        items, closed, finish_reason, error = await _stream_request(
+            model, messages, max_tokens, sampling_kwargs,
+            (lambda i, value: on_item(offset + i, value)) if on_item else None,
+            on_usage,
+        )
+        if len(items) > len(remaining) or (closed and len(items) != len(remaining)):
+            raise BatchShapeError(
+                f"翻译数量不匹配: 输入 {len(remaining)} 项，返回 {len(items)} 项"
+            )
+        received.extend(items)
+        if len(received) == len(values):
+            logger.info(f"[OpenRouter] {model} 成功返回 {len(received)} 项翻译（流式）")
+            return received
+
+        reason = error or f"finish_reason={finish_reason}"
+        if not items:
+            if error is not None:
+                raise error
+            raise BatchShapeError(
+                f"{model} 输出不完整 ({reason}): 输入 {len(remaining)} 项"
+            )
+        logger.warning(
+            f"[OpenRouter] {model} 流中断 ({reason})：保留已收到 {len(received)}/{len(values)} 项，"
+            f"重请求剩余 {len(values) - len(received)} 项"
+        )
+
+
+def _build_system_prompt(
     target_lang_name: str,
     target_lang_code: str,
     capitalization_rule: str,
 ) -> str:
-    """构建翻译 prompt。
+    """静态指令（要求 + 大写规则段）：同一 (语言, 模型) 的所有批次逐字相同。
+
+    不含任何随批次变化的内容（条数、待译字符串）—— 保证它能作为 provider 侧
+    prompt cache 的稳定前缀。
 
     相比旧版 Claude prompt，删除了所有 JSON 格式化说明（"output only JSON, no markdown"
     之类）—— structured output 强制 schema，无需再告诉模型输出什么结构。
     """
-    json_input = json.dumps(values, ensure_ascii=False, indent=2)
-
     cap_section = ""
     if capitalization_rule:
         cap_section = f"\nCAPITALIZATION RULES for {target_lang_name}:\n{capitalization_rule}\n"
 
-    return f"""Translate each string in the following array to {target_lang_name}.
+    return f"""Translate each string in the user's array to {target_lang_name}.
 
 REQUIREMENTS:
 1. Translate each string to {target_lang_name} ({target_lang_code}) — NEVER return English for non-English target
-2. Return exactly {len(values)} translations in the same order as input
+2. Return exactly one translation per input string, in the same order as input
 3. Preserve placeholders (like {{{{0}}}}, %s, {{name}}), HTML tags, and special formatting
 4. Keep the meaning and tone appropriate for UI / application strings
 5. These are UI labels/strings — translate ONLY the given text, literally and at the same scope. Do NOT expand a short label into a sentence, and do NOT add explanations, descriptions, or marketing copy.
 {cap_section}
-Input strings ({len(values)} items):
+Return the translations as the `translations` field of a JSON object."""
+
+
+def _build_user_prompt(values: list[str]) -> str:
+    """每批变化的部分：待译字符串 + 条数。"""
+    json_input = json.dumps(values, ensure_ascii=False, indent=2)
+    return f"""Input strings ({len(values)} items):
 {json_input}
 
-Return the translations as the `translations` field of a JSON object."""
+Return exactly {len(values)} translations in the same order."""
+
+
+# QA 纠错指令：按 translate_llm._detect_flagged 的检出原因选用（未知原因用通用指令）
+_QA_REASON_RULES = {
+    "英文未翻译": (
+        "The previous translation was rejected because it left English text untranslated. "
+        "Translate EVERY word into {name} — the only Latin-script text allowed is placeholders, "
+        "HTML tags, brand names and acronyms such as API, URL, ID."
+    ),
+    "简体残留": (
+        "The previous translation was rejected because it contained Simplified Chinese characters. "
+        "Write ONLY Traditional Chinese characters (Taiwan standard usage) and check every character "
+        "(e.g. 这→這, 说→說, 时→時, 发→發, 网→網)."
+    ),
+}
+_QA_GENERIC_RULE = "The previous translation was rejected by quality checks. Translate again carefully into {name}."
+
+
+def _build_qa_system_prompt(target_lang_name, target_lang_code, capitalization_rule, reason) -> str:
+    """QA 纠错 prompt：常规指令 + 按原因的纠错段（同一 (语言, 原因, 模型) 逐字相同，可被缓存）。"""
+    rule = _QA_REASON_RULES.get(reason, _QA_GENERIC_RULE).format(name=target_lang_name)
+    base = _build_system_prompt(target_lang_name, target_lang_code, capitalization_rule)
+    return f"""{base}
+
+CORRECTION PASS:
+{rule}
+The user message lists the rejected translations in the same order as the input — do NOT repeat them."""
+
+
+def _build_qa_messages(values, rejected, reason, target_lang_name, target_lang_code,
+                       capitalization_rule, model) -> list[dict]:
+    """QA 纠错请求的 messages：user 先列被驳回的译文，再是与常规批次同格式的待译数组。"""
+    system = _build_qa_system_prompt(target_lang_name, target_lang_code, capitalization_rule, reason)
+    rejected_json = json.dumps(rejected, ensure_ascii=False, indent=2)
+    user = f"Rejected translations, same order (do NOT repeat them):\n{rejected_json}\n\n" + _build_user_prompt(values)
+    return [_system_message(system, model), {"role": "user", "content": user}]
+
+
+def _build_multi_system_prompt(targets: list[tuple[str, str, str]]) -> str:
+    """多语言单次调用的静态指令：各语言的大写规则段依次拼入；同一语言组的所有批次逐字相同。"""
+    languages = ", ".join(f"{name} ({code})" for name, code, _rule in targets)
+    cap_sections = "".join(
+        f"\nCAPITALIZATION RULES for {name} ({code}):\n{rule}\n"
+        for name, code, rule in targets if rule
+    )
+    return f"""Translate each string in the user's array into EACH of these languages: {languages}.
+
+REQUIREMENTS:
+1. Translate each string into every listed language — NEVER return English for a non-English target
+2. For every language code, return exactly one translation per input string, in the same order as input
+3. Preserve placeholders (like {{{{0}}}}, %s, {{name}}), HTML tags, and special formatting
+4. Keep the meaning and tone appropriate for UI / application strings
+5. These are UI labels/strings — translate ONLY the given text, literally and at the same scope. Do NOT expand a short label into a sentence, and do NOT add explanations, descriptions, or marketing copy.
+6. Translate every language independently from the source string — do NOT derive one language from another
+{cap_sections}
+Return the translations as the `translations` field of a JSON object, keyed by language code."""
+
+
+def _build_multi_user_prompt(values: list[str]) -> str:
+    """多语言调用的 user 消息：与单语言同格式的待译数组，末句说明按语言各返回一组。"""
+    json_input = json.dumps(values, ensure_ascii=False, indent=2)
+    return f"""Input strings ({len(values)} items):
+{json_input}
+
+Return exactly {len(values)} translations per language code, in the same order."""
+
+
+def _build_prompt(
+    values: list[str],
+    target_lang_name: str,
+    target_lang_code: str,
+    capitalization_rule: str,
+) -> str:
+    """完整 prompt 文本（system + user 拼接）。供指纹 / 开销估算 / 测试使用，请求走 _build_messages。"""
+    return (
+        _build_system_prompt(target_lang_name, target_lang_code, capitalization_rule)
+        + "\n\n"
+        + _build_user_prompt(values)
+    )
+
+
+def _build_messages(
+    values: list[str],
+    target_lang_name: str,
+    target_lang_code: str,
+    capitalization_rule: str,
+    model: str,
+) -> list[dict]:
+    """请求 messages：稳定的 system 前缀 + 每批变化的 user 消息。
+
+    需要显式标记的 provider（模型目录 prompt_cache == "explicit"，如 Anthropic）在 system
+    内容块上加 cache_control 断点，OpenRouter 原样透传；自动缓存的 provider（OpenAI / Gemini）
+    只要前缀稳定即可命中，加标记反而可能被拒，故只给纯字符串。
+    """
+    system = _build_system_prompt(target_lang_name, target_lang_code, capitalization_rule)
+    return [_system_message(system, model), {"role": "user", "content": _build_user_prompt(values)}]
+
+
+def _build_multi_messages(values, targets, model) -> list[dict]:
+    """多语言单次调用的 messages（缓存标记规则同 _build_messages）。"""
+    return [
+        _system_message(_build_multi_system_prompt(targets), model),
+        {"role": "user", "content": _build_multi_user_prompt(values)},
+    ]
+
+
+def _system_message(system, model) -> dict:
+    info = get_model_info(model)
+    if info is not None and info["prompt_cache"] == "explicit":
+        content = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+    else:
+        content = system
+    return {"role": "system", "content": content}
+
+
+def _cached_tokens(usage) -> int:
+    """usage.prompt_tokens_details.cached_tokens（provider 未返回时为 0）。"""
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(details, "cached_tokens", None) or 0
+
+
+def _report_usage(model, usage, started, on_usage=None):
+    """记录一次请求的 token 用量（含 prompt cache 命中数）与耗时，并回调 on_usage。
+
+    provider 未返回 usage（如流中途断开）时 token 记 0，耗时照记。
+    """
+    record = {
+        "model": model,
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "cached_tokens": _cached_tokens(usage),
+        "latency_seconds": time.monotonic() - started,
+    }
+    if usage is not None:
+        logger.info(
+            f"[OpenRouter] {model} 用量: 输入 {record['prompt_tokens']} tokens"
+            f"（缓存命中 {record['cached_tokens']}），输出 {record['completion_tokens']} tokens，"
+            f"耗时 {record['latency_seconds']:.2f}s"
+        )
+    if on_usage:
+        on_usage(record)
+
+
+def prompt_fingerprint(
+    target_lang_name: str,
+    target_lang_code: str,
+    capitalization_rule: str,
+    *extra,
+) -> str:
+    """prompt 指纹：渲染后的 prompt 模板 + 规则（+ 调用方给的术语表/温度等）的短哈希。
+
+    用探针值渲染 _build_prompt，模板任何改动（措辞/要求/大写规则段）都会改变指纹，
+    无需手工维护版本号。供翻译记忆做失效键。
+    """
+    probe = _build_prompt(["\u0000"], target_lang_name, target_lang_code, capitalization_rule)
+    h = hashlib.sha256(probe.encode("utf-8"))
+    for item in extra:
+        h.update(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def prompt_overhead_tokens(
+    target_lang_name: str,
+    target_lang_code: str,
+    capitalization_rule: str,
+) -> int:
+    """每批固定的 prompt 开销 token（模板 + 要求 + 大写规则段，不含待译字符串）。
+
+    用空输入渲染 _build_prompt 再估算 —— 模板改动自动反映到分批预算，无需手工维护常数。
+    """
+    return estimate_tokens(
+        _build_prompt([], target_lang_name, target_lang_code, capitalization_rule)
+    )
+
+
+def multi_prompt_overhead_tokens(targets: list[tuple[str, str, str]]) -> int:
+    """多语言单次调用每批固定的 prompt 开销 token（语言越多，大写规则段越长）。"""
+    return estimate_tokens(
+        _build_multi_system_prompt(targets) + "\n\n" + _build_multi_user_prompt([])
+    )
+
+
+def estimate_request_tokens(
+    values: list[str],
+    target_lang_name: str,
+    target_lang_code: str,
+    capitalization_rule: str,
+) -> tuple[int, int]:
+    """一批请求的估算输入 tokens：(system 前缀, system + user 合计)。不调 API，供费用估算 dry-run。"""
+    system_tokens = estimate_tokens(
+        _build_system_prompt(target_lang_name, target_lang_code, capitalization_rule)
+    )
+    return system_tokens, system_tokens + estimate_tokens(_build_user_prompt(values))
 
 
 def test_connectivity(model: str = "anthropic/claude-sonnet-5") -> bool:
@@ -21,6 +21,9 @@ class ModelInfo(TypedDict):
     context_length: int
     default: bool
     supports_temperature: bool  # Claude Sonnet 5 / Opus 4.7+ 拒绝非默认 temperature（400）
+    prompt_cache: Literal["explicit", "implicit"]  # explicit = 需 cache_control 断点才缓存
+    cache_read_price_per_m: float  # USD per 1M 命中缓存的输入 tokens
+    min_cache_tokens: int  # 可缓存前缀的最小长度（更短的前缀 provider 不缓存）
 
 
 # 模型目录（2026-07-18 校准自 https://openrouter.ai/api/v1/models）
@@ -29,6 +32,10 @@ class ModelInfo(TypedDict):
 #    llm_client.translate_batch() 按 supports_temperature 标记条件化传参 —— 新增此类模型时
 #    把 supports_temperature 设为 False 即可，语言温度调优由 prompt 规则（如
 #    translate_llm._TRADITIONAL_CHINESE_TW_RULE）+ 验证重试兜底。
+#
+# prompt cache: Anthropic 需在消息块上显式加 cache_control（llm_client._build_messages 按
+#    prompt_cache == "explicit" 加），OpenAI / Gemini 自动缓存稳定前缀；三家都要求前缀
+#    ≥ min_cache_tokens 才缓存。命中部分按 cache_read_price_per_m 计费（约为输入价 1/10）。
 AVAILABLE_MODELS: list[ModelInfo] = [
     {
         "id": "anthropic/claude-sonnet-5",
@@ -40,6 +47,9 @@ AVAILABLE_MODELS: list[ModelInfo] = [
         "context_length": 1_000_000,
         "default": True,
         "supports_temperature": False,
+        "prompt_cache": "explicit",
+        "cache_read_price_per_m": 0.20,
+        "min_cache_tokens": 1024,
     },
     {
         "id": "openai/gpt-5.4",
@@ -51,6 +61,9 @@ AVAILABLE_MODELS: list[ModelInfo] = [
         "context_length": 1_050_000,
         "default": False,
         "supports_temperature": True,
+        "prompt_cache": "implicit",
+        "cache_read_price_per_m": 0.25,
+        "min_cache_tokens": 1024,
     },
     {
         "id": "google/gemini-3.1-flash-lite-preview",
@@ -62,6 +75,9 @@ AVAILABLE_MODELS: list[ModelInfo] = [
         "context_length": 1_048_576,
         "default": False,
         "supports_temperature": True,
+        "prompt_cache": "implicit",
+        "cache_read_price_per_m": 0.025,
+        "min_cache_tokens": 1024,
     },
 ]
 
@@ -87,6 +103,23 @@ def get_model_info(model_id: str) -> ModelInfo | None:
     return None
 
 
+_TIER_ORDER = ("quality", "alternative", "economy")
+
+
+def failover_chain(model_id: str, configured: list[str] | None = None) -> list[str]:
+    """故障转移 / 对冲的模型链：model_id 在首，其后为 configured（为空则按档位 质量 → 备选 → 经济
+    排列目录内模型），去掉重复。"""
+    if not configured:
+        configured = [
+            m["id"] for m in sorted(AVAILABLE_MODELS, key=lambda m: _TIER_ORDER.index(m["tier"]))
+        ]
+    chain = [model_id]
+    for slug in configured:
+        if slug not in chain:
+            chain.append(slug)
+    return chain
+
+
 if __name__ == "__main__":
     print(f"可用 AI 模型（共 {len(AVAILABLE_MODELS)} 个）:\n")
     for m in AVAILABLE_MODELS:
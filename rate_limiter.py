@@ -0,0 +1,149 @@
+"""
+自适应限流器 —— 按模型 slug 共享的令牌桶 + AIMD，取代固定 request_delay 批间 sleep
+
+设计:
+- 每个模型一个 AdaptiveRateLimiter（get_rate_limiter 懒建），全进程所有调用方共享：
+  translate_with_llm / qa_retranslate / JS 路径最终都走 llm_client._translate_batch，
+  在那里 acquire —— 多语言并发时不会各自为政地冲垮 provider
+- 令牌桶速率 rate（请求/秒）按 AIMD 调整：每次成功 +RATE_LIMIT_STEP（加性增），
+  429 时 ×RATE_LIMIT_BACKOFF（乘性减）并暂停到 Retry-After 指定时刻
+- 读 OpenRouter 响应头 X-RateLimit-Remaining / X-RateLimit-Reset：额度用尽时主动暂停到重置，
+  不等 429
+- 只在 llm_client 的共享事件循环上使用（单线程，无需锁）
+"""
+
+import asyncio
+import email.utils
+import logging
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(headers, now=None):
+    """从响应头解析需等待的秒数；无可用信息返回 None。
+
+    依次识别: retry-after-ms / retry-after（秒数或 HTTP-date）/ x-ratelimit-reset（毫秒 epoch）。
+    """
+    if not headers:
+        return None
+    now = time.time() if now is None else now
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return max(0.0, float(value) / 1000)
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - now)
+            except (TypeError, ValueError):
+                pass
+
+    return _reset_wait(headers, now)
+
+
+def _reset_wait(headers, now):
+    """X-RateLimit-Reset（OpenRouter 为毫秒 epoch）→ 距重置的秒数。"""
+    value = headers.get("x-ratelimit-reset")
+    if not value:
+        return None
+    try:
+        reset = float(value)
+    except ValueError:
+        return None
+    if reset > 1e11:  # 毫秒 epoch
+        reset /= 1000
+    return max(0.0, reset - now)
+
+
+def is_throttle_error(exc):
+    """是否为 provider 限流（HTTP 429）—— 此类错误的等待由限流器负责，调用方无需再 sleep。"""
+    return getattr(exc, "status_code", None) == 429
+
+
+class AdaptiveRateLimiter:
+    """单模型令牌桶（桶容量 = max(1, rate)）+ AIMD 速率调整。"""
+
+    def __init__(self, model, rate=None, min_rate=None, max_rate=None,
+                 step=None, backoff=None, clock=time.monotonic):
+        self.model = model
+        self.rate = float(rate if rate is not None else config.RATE_LIMIT_INITIAL_RPS)
+        self.min_rate = float(min_rate if min_rate is not None else config.RATE_LIMIT_MIN_RPS)
+        self.max_rate = float(max_rate if max_rate is not None else config.RATE_LIMIT_MAX_RPS)
+        self.step = float(step if step is not None else config.RATE_LIMIT_STEP)
+        self.backoff = float(backoff if backoff is not None else config.RATE_LIMIT_BACKOFF)
+        self._clock = clock
+        self._tokens = 1.0
+        self._updated = clock()
+        self._paused_until = 0.0
+
+    def _refill(self, now):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(max(1.0, self.rate), self._tokens + elapsed * self.rate)
+        self._updated = max(self._updated, now)
+
+    def try_acquire(self):
+        """尝试取一个令牌：成功返回 0，否则返回建议等待秒数（不取令牌）。"""
+        now = self._clock()
+        if now < self._paused_until:
+            return self._paused_until - now
+        self._refill(now)
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return 0.0
+        return (1.0 - self._tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def on_success(self, headers=None):
+        """成功响应：加性增速；若响应头显示额度已用尽，暂停到重置时刻。"""
+        self.rate = min(self.max_rate, self.rate + self.step)
+        if headers and headers.get("x-ratelimit-remaining") == "0":
+            wait = _reset_wait(headers, time.time())
+            if wait:
+                self._pause(wait)
+                logger.info(f"[RateLimit] {self.model} 额度用尽，暂停 {wait:.1f}s 至重置")
+
+    def on_throttle(self, headers=None):
+        """429：乘性减速，并暂停到 Retry-After（缺省按新速率的一个间隔）。"""
+        self.rate = max(self.min_rate, self.rate * self.backoff)
+        wait = parse_retry_after(headers)
+        if wait is None:
+            wait = 1.0 / self.rate
+        self._pause(wait)
+        logger.warning(
+            f"[RateLimit] {self.model} 被限流(429)：暂停 {wait:.1f}s，速率降至 {self.rate:.2f} req/s"
+        )
+
+    def _pause(self, seconds):
+        now = self._clock()
+        self._paused_until = max(self._paused_until, now + seconds)
+        # 暂停期间不积攒令牌：恢复后从空桶起步
+        self._tokens = 0.0
+        self._updated = self._paused_until
+
+
+# 懒加载注册表：模型 slug → 限流器
+_limiters = {}
+
+
+def get_rate_limiter(model):
+    """返回该模型的共享限流器（首次调用时创建）。"""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        limiter = _limiters[model] = AdaptiveRateLimiter(model)
+    return limiter
@@ -618,96 +618,101 @@ async function processQueue() {
 }
 
 // 翻译单个文件
-// 新契约：完成/失败一律以 /translate 的 fetch 响应 JSON 为准；socket progress 只更新进度条。
+// 契约：/translate 只受理入队（202 + job_id），完成/失败一律以 GET /api/jobs/<job_id> 的任务状态为准；
+// socket progress（房间 job:<job_id>）只更新进度条。
+const JOB_POLL_INTERVAL = 2000;
+
 async function translateFile(fileItem) {
-    return new Promise((resolve, reject) => {
-        const formData = new FormData();
-        formData.append('file', fileItem.file);
+    const formData = new FormData();
+    formData.append('file', fileItem.file);
 
-        // 添加选中的语言
-        selectedLanguages.forEach(code => {
-            formData.append('languages', code);
-        });
+    // 添加选中的语言
+    selectedLanguages.forEach(code => {
+        formData.append('languages', code);
+    });
 
-        // 添加翻译引擎选择
-        const selectedEngine = document.querySelector('input[name="translation_engine"]:checked').value;
-        formData.append('translation_engine', selectedEngine);
+    // 添加翻译引擎选择
+    const selectedEngine = document.querySelector('input[name="translation_engine"]:checked').value;
+    formData.append('translation_engine', selectedEngine);
 
-        // 如果选择了 OpenRouter AI，添加模型选择
-        if (selectedEngine === 'openrouter') {
-            const aiModel = document.getElementById('aiModel').value;
-            formData.append('ai_model', aiModel);
-        }
+    // 如果选择了 OpenRouter AI，添加模型选择
+    if (selectedEngine === 'openrouter') {
+        const aiModel = document.getElementById('aiModel').value;
+        formData.append('ai_model', aiModel);
+    }
 
-        // 新契约：带上当前 socket sid，后端据此定向 emit 进度（sid 缺失时后端退回全局广播）
-        formData.append('socket_sid', socket.id || '');
+    // 断点续传：重试时带上次的任务 ID，后端复用已完成批次 / 语言的检查点
+    if (fileItem.jobId) {
+        formData.append('resume_job_id', fileItem.jobId);
+    }
 
-        let timeoutTimer = null;
+    const response = await fetch('/translate', { method: 'POST', body: formData });
+    let data = null;
+    try {
+        data = await response.json();
+    } catch (parseErr) {
+        throw new Error('服务器返回了无法解析的响应');
+    }
+    if (!response.ok || !data || !data.success) {
+        throw new Error((data && data.error) ? data.error : '翻译失败');
+    }
 
-        // 进度事件只更新进度条/状态文本，不再写 fileItem.result，也不作为完成依据
-        // （消除多客户端进度串台对本文件完成判定的影响）
-        const progressHandler = (data) => {
-            fileItem.progress = data.progress || 0;
-            updateFileQueueUI();
-        };
+    const jobId = data.job_id;
+    fileItem.jobId = jobId;
 
-        socket.on('progress', progressHandler);
+    // 进度事件按 job_id 过滤，只更新进度条/状态文本，不作为完成依据
+    const progressHandler = (event) => {
+        if (event.job_id !== jobId) {
+            return;
+        }
+        fileItem.progress = event.progress || 0;
+        updateFileQueueUI();
+    };
+    // 断线重连后 socket.id 会变，需重新加入任务房间
+    const joinHandler = () => socket.emit('join_job', { job_id: jobId });
 
-        // 统一清理：解绑进度监听 + 清除超时兜底计时器。所有完成/失败路径都必须调用。
-        const cleanup = () => {
-            socket.off('progress', progressHandler);
-            if (timeoutTimer) {
-                clearTimeout(timeoutTimer);
-                timeoutTimer = null;
-            }
-        };
-
-        // 超时兜底 (10分钟)：作为最后防线，任何正常路径都会先经 cleanup 清除它
-        timeoutTimer = setTimeout(() => {
-            cleanup();
-            reject(new Error('翻译超时'));
-        }, 600000);
-
-        // 使用 AJAX 提交，以响应 JSON 判定成功/失败
-        fetch('/translate', {
-            method: 'POST',
-            body: formData
-        })
-        .then(async (response) => {
-            let data = null;
-            try {
-                data = await response.json();
-            } catch (parseErr) {
-                // JSON 解析失败：给通用错误
-                cleanup();
-                reject(new Error('服务器返回了无法解析的响应'));
-                return;
-            }
+    socket.on('progress', progressHandler);
+    socket.on('connect', joinHandler);
+    joinHandler();
 
-            if (response.ok && data && data.success) {
-                // 成功：用响应里的 redirect_url / zip_path 填充结果，供下载按钮 / 单文件自动下载使用
-                fileItem.result = data.redirect_url
-                    || (data.zip_path ? `/success?zip_path=${data.zip_path}` : null);
-                fileItem.progress = 100;
-                // 部分语言失败仍算成功，保存警告用于展示
-                fileItem.warnings = (Array.isArray(data.errors) && data.errors.length > 0)
-                    ? data.errors
-                    : null;
-                cleanup();
-                resolve();
-            } else {
-                // 失败：优先展示后端返回的中文错误消息
-                const message = (data && data.error) ? data.error : '翻译失败';
-                cleanup();
-                reject(new Error(message));
-            }
-        })
-        .catch((error) => {
-            // 网络错误等
-            cleanup();
-            reject(error);
-        });
-    });
+    try {
+        const job = await waitForJob(data.status_url || `/api/jobs/${jobId}`);
+        if (job.status !== 'succeeded') {
+            throw new Error(job.error || '翻译失败');
+        }
+        const result = job.result || {};
+        // 成功：用任务结果里的 redirect_url / zip_path 填充结果，供下载按钮 / 单文件自动下载使用
+        fileItem.result = result.redirect_url
+            || (result.zip_path ? `/success?zip_path=${result.zip_path}` : null);
+        fileItem.progress = 100;
+        // 部分语言失败仍算成功，保存警告用于展示
+        fileItem.warnings = (Array.isArray(result.errors) && result.errors.length > 0)
+            ? result.errors
+            : null;
+    } finally {
+        socket.off('progress', progressHandler);
+        socket.off('connect', joinHandler);
+    }
+}
+
+// 轮询任务状态直到结束（succeeded / failed）；排队中 / 运行中继续等
+async function waitForJob(statusUrl) {
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+        const response = await fetch(statusUrl);
+        let data = null;
+        try {
+            data = await response.json();
+        } catch (parseErr) {
+            throw new Error('服务器返回了无法解析的响应');
+        }
+        if (!response.ok || !data || !data.success) {
+            throw new Error((data && data.error) ? data.error : '查询任务状态失败');
+        }
+        if (data.job.status === 'succeeded' || data.job.status === 'failed') {
+            return data.job;
+        }
+    }
 }
 
 // 翻译引擎选择函数
@@ -750,16 +755,16 @@ async function estimateCost() {
 
     costEstimation.style.display = 'block';
 
-    // 后端费用预估仅支持 .json 文件（.js / .zip 无法估算），从队列筛出可估文件
+    // 后端费用预估支持 .json / .js 语言包（.zip 无法估算），从队列筛出可估文件
     const jsonItems = fileQueue.filter(item => {
         const ext = '.' + item.file.name.split('.').pop().toLowerCase();
-        return ext === '.json';
+        return ext === '.json' || ext === '.js';
     });
 
     if (jsonItems.length === 0) {
-        // 队列里没有可估算的 JSON 文件，给出明确提示（不发请求）
+        // 队列里没有可估算的语言包，给出明确提示（不发请求）
         estimationContent.textContent =
-            '⚠️ 费用预估仅支持 .json 文件，当前队列中没有可估算的 JSON 文件（.js / .zip 暂不支持预估）。';
+            '⚠️ 费用预估支持 .json / .js 文件，当前队列中没有可估算的文件（.zip 暂不支持预估）。';
         return;
     }
 
@@ -781,7 +786,7 @@ async function estimateCost() {
         let totalOutputTokens = 0;
         let successCount = 0;
 
-        // 逐个 JSON 文件请求并汇总（串行即可）
+        // 逐个文件请求并汇总（串行即可）
         for (const item of jsonItems) {
             const formData = new FormData();
             formData.append('file', item.file);
@@ -818,7 +823,7 @@ async function estimateCost() {
         const parts = [];
         if (successCount > 1) {
             parts.push(
-                `📦 汇总（${successCount} 个 JSON 文件）\n` +
+                `📦 汇总（${successCount} 个文件）\n` +
                 `━━━━━━━━━━━━━━━━━━━━━━\n` +
                 `📈 总 Token: 输入 ${totalInputTokens.toLocaleString()} / 输出 ${totalOutputTokens.toLocaleString()}\n` +
                 `💰 总费用: $${totalCostUsd.toFixed(4)} (≈ ¥${totalCostCny.toFixed(4)})`
@@ -21,3 +21,11 @@ def test_max_content_length_wired_to_50mb():
     """D4: MAX_FILE_SIZE 已接线为 Flask MAX_CONTENT_LENGTH，上限 50MB。"""
     assert config.MAX_FILE_SIZE == 50 * 1024 * 1024
     assert app.app.config["MAX_CONTENT_LENGTH"] == config.MAX_FILE_SIZE
+
+
+def test_zip_cross_file_batching_is_opt_in():
+    """ZIP 跨文件合并默认关闭：默认走按 (文件, 语言) 并行的任务表。"""
+    from translation_config import BATCH_CONFIG
+
+    assert BATCH_CONFIG["zip_cross_file_batching"] is False
+    assert config.ZIP_CROSS_FILE_BATCHING is False
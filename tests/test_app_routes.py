@@ -1,31 +1,40 @@
-"""Flask 路由契约测试 —— /success 白名单、/translate JSON 契约、/api/llm-models 形状。
+"""Flask 路由契约测试 —— /success 白名单、/translate 受理 + /api/jobs 结果契约、/api/llm-models 形状。
 
-全程 monkeypatch 掉真实翻译函数与 socketio.emit，不打任何 API，不落仓库文件
-（UPLOAD/OUTPUT 指向临时目录）。
+全程 monkeypatch 掉真实翻译函数（单文件走 translation_runner 的多语言调度，故替换
+translation_runner.translate_single_file）与 socketio.emit，不打任何 API，不落仓库文件
+（UPLOAD/OUTPUT/任务队列库指向临时目录）。
 """
 import io
 import os
+import threading
+import zipfile
 
 import pytest
 
 import app as app_module
 import config
+import translation_runner
+from job_queue import JobQueue
 
 
 @pytest.fixture
 def client(monkeypatch, tmp_path):
-    """隔离的 test client：临时上传/输出目录 + 静默 socketio/sleep。"""
+    """隔离的 test client：临时上传/输出目录 + 临时任务队列 + 静默 socketio。"""
     upload = tmp_path / "uploads"
     output = tmp_path / "output"
     upload.mkdir()
     output.mkdir()
     monkeypatch.setitem(app_module.app.config, "UPLOAD_FOLDER", str(upload))
     monkeypatch.setattr(app_module, "OUTPUT_FOLDER", str(output))
-    # 进度事件与收尾等待在测试里都无意义，置空加速并避免真实广播
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "checkpoints"))
+    monkeypatch.setattr(config, "COST_CALIBRATION_PATH", str(tmp_path / "calibration.sqlite3"))
+    # 进度事件在测试里无意义，置空避免真实广播
     monkeypatch.setattr(app_module.socketio, "emit", lambda *a, **k: None)
-    monkeypatch.setattr(app_module, "sleep", lambda *a, **k: None)
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), app_module._run_translation_job, workers=1)
+    monkeypatch.setattr(app_module, "_job_queue", queue.start())
     app_module.app.config["TESTING"] = True
-    return app_module.app.test_client()
+    yield app_module.app.test_client()
+    queue.close()
 
 
 # ---------------- /success 白名单 ----------------
@@ -60,6 +69,17 @@ def _post_translate(client, filename="strings.json", content=b'{"a":"b"}', **for
     return client.post("/translate", data=data, content_type="multipart/form-data")
 
 
+def _wait_job(client, resp):
+    """/translate 受理（202）后等任务结束，返回 /api/jobs/<id> 的任务快照。"""
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body["success"] is True and body["status_url"] == f"/api/jobs/{body['job_id']}"
+    app_module._job_queue.wait(body["job_id"], timeout=10)
+    status = client.get(body["status_url"])
+    assert status.status_code == 200
+    return status.get_json()["job"]
+
+
 def test_translate_bad_extension_returns_400_json(client):
     resp = _post_translate(client, filename="notes.txt", content=b"hello", languages="es")
     assert resp.status_code == 400
@@ -96,7 +116,7 @@ def test_translate_empty_model_falls_back_to_default(client, monkeypatch):
     """空 ai_model 应落回 config.DEFAULT_MODEL（捕获传入 translate_single_file 的实参断言）。"""
     captured = {}
 
-    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None):
+    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None, **kwargs):
         captured["ai_model"] = ai_model
         captured["engine"] = engine
         out_name = f"out_{target_language}.json"
@@ -105,24 +125,24 @@ def test_translate_empty_model_falls_back_to_default(client, monkeypatch):
             f.write("{}")
         return out_name, out_path
 
-    monkeypatch.setattr(app_module, "translate_single_file", fake_translate_single_file)
+    monkeypatch.setattr(translation_runner, "translate_single_file", fake_translate_single_file)
     # create_zip 只需产出一个占位 zip 文件，避免依赖真实打包
     monkeypatch.setattr(app_module, "create_zip", lambda files, out: open(out, "w").close())
 
     resp = _post_translate(
         client, languages="es", translation_engine="openrouter", ai_model=""
     )
-    assert resp.status_code == 200
-    body = resp.get_json()
-    assert body["success"] is True
+    job = _wait_job(client, resp)
+    assert job["status"] == "succeeded"
+    body = job["result"]
     assert body["zip_path"].startswith("/output/") and body["zip_path"].endswith(".zip")
     assert body["redirect_url"].startswith("/success?zip_path=/output/")
     assert captured["ai_model"] == config.DEFAULT_MODEL
 
 
 def test_translate_partial_failure_returns_errors_array(client, monkeypatch):
-    """部分语言失败仍算成功，成功响应带 errors 数组。"""
-    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None):
+    """部分语言失败仍算成功，任务结果带 errors 数组。"""
+    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None, **kwargs):
         if target_language == "fr":
             raise RuntimeError("模拟 fr 翻译失败")
         out_name = f"out_{target_language}.json"
@@ -131,7 +151,7 @@ def test_translate_partial_failure_returns_errors_array(client, monkeypatch):
             f.write("{}")
         return out_name, out_path
 
-    monkeypatch.setattr(app_module, "translate_single_file", fake_translate_single_file)
+    monkeypatch.setattr(translation_runner, "translate_single_file", fake_translate_single_file)
     monkeypatch.setattr(app_module, "create_zip", lambda files, out: open(out, "w").close())
 
     data = {
@@ -141,26 +161,88 @@ def test_translate_partial_failure_returns_errors_array(client, monkeypatch):
         "ai_model": config.DEFAULT_MODEL,
     }
     resp = client.post("/translate", data=data, content_type="multipart/form-data")
-    assert resp.status_code == 200
-    body = resp.get_json()
-    assert body["success"] is True
-    assert "errors" in body and any("fr" in e for e in body["errors"])
+    job = _wait_job(client, resp)
+    assert job["status"] == "succeeded"
+    assert any("fr" in e for e in job["result"]["errors"])
 
 
-def test_translate_all_failure_returns_500_json(client, monkeypatch):
-    """所有语言都失败 → 500，success:false（不得让前端误判成功）。"""
+def test_translate_all_failure_marks_job_failed(client, monkeypatch):
+    """所有语言都失败 → 任务 failed 并带错误消息（不得让前端误判成功）。"""
     def always_fail(*a, **k):
         raise RuntimeError("模拟全部失败")
 
-    monkeypatch.setattr(app_module, "translate_single_file", always_fail)
+    monkeypatch.setattr(translation_runner, "translate_single_file", always_fail)
 
     resp = _post_translate(
         client, languages="es", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL
     )
-    assert resp.status_code == 500
-    body = resp.get_json()
-    assert body["success"] is False
-    assert body.get("error")
+    job = _wait_job(client, resp)
+    assert job["status"] == "failed"
+    assert job.get("error") and "result" not in job
+
+
+def test_job_status_unknown_returns_404(client):
+    resp = client.get("/api/jobs/nope")
+    assert resp.status_code == 404
+    assert resp.get_json()["success"] is False
+
+
+def test_translate_resume_conflict_returns_409(client, monkeypatch):
+    """同一 resume_job_id 仍在排队 / 运行时重复提交 → 409，且不留下上传文件。"""
+    app_module._job_queue.stop()  # 不消费：任务停在 queued
+    form = dict(languages="es", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL)
+    assert _post_translate(client, resume_job_id="job1", **form).status_code == 202
+    resp = _post_translate(client, resume_job_id="job1", **form)
+    assert resp.status_code == 409
+    assert len(os.listdir(app_module.app.config["UPLOAD_FOLDER"])) == 1
+
+
+def test_translate_resume_other_owner_returns_403(client):
+    """resume_job_id 属于其他提交方（IP）→ 403，不覆盖其任务记录，也不留下上传文件。"""
+    app_module._job_queue.stop()
+    form = dict(languages="es", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL)
+    assert _post_translate(client, resume_job_id="job1", **form).status_code == 202
+    data = {"file": (io.BytesIO(b'{"a":"b"}'), "strings.json"), "resume_job_id": "job1", **form}
+    resp = client.post(
+        "/translate", data=data, content_type="multipart/form-data",
+        environ_base={"REMOTE_ADDR": "10.0.0.9"},
+    )
+    assert resp.status_code == 403 and resp.get_json()["success"] is False
+    assert len(os.listdir(app_module.app.config["UPLOAD_FOLDER"])) == 1
+
+
+def test_job_status_other_owner_returns_403(client):
+    """/api/jobs/<id> 只对提交方开放：他人查询 → 403；本人的快照不带 owner 字段。"""
+    app_module._job_queue.stop()
+    form = dict(languages="es", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL)
+    job_id = _post_translate(client, **form).get_json()["job_id"]
+    resp = client.get(f"/api/jobs/{job_id}", environ_base={"REMOTE_ADDR": "10.0.0.9"})
+    assert resp.status_code == 403 and resp.get_json()["success"] is False
+    own = client.get(f"/api/jobs/{job_id}")
+    assert own.status_code == 200 and "owner" not in own.get_json()["job"]
+
+
+def test_join_job_ignores_other_owner(client, monkeypatch):
+    """join_job 同样校验归属：他人的任务不入房间、不收快照；本人订阅收到不带 owner 的快照。"""
+    app_module._job_queue.stop()
+    # fixture 置空了 socketio.emit；这里要看回执，恢复真实实现（队列已停，不会有进度广播）
+    monkeypatch.setattr(app_module.socketio, "emit", type(app_module.socketio).emit.__get__(app_module.socketio))
+    form = dict(languages="es", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL)
+    data = {"file": (io.BytesIO(b'{"a":"b"}'), "strings.json"), **form}
+    other = client.post(
+        "/translate", data=data, content_type="multipart/form-data",
+        environ_base={"REMOTE_ADDR": "10.0.0.9"},
+    ).get_json()["job_id"]
+    mine = _post_translate(client, **form).get_json()["job_id"]
+    sio = app_module.socketio.test_client(app_module.app, namespace="/test", flask_test_client=client)
+    sio.get_received("/test")
+    sio.emit("join_job", {"job_id": other}, namespace="/test")
+    assert sio.get_received("/test") == []
+    sio.emit("join_job", {"job_id": mine}, namespace="/test")
+    received = sio.get_received("/test")
+    assert [r["name"] for r in received] == ["job_status"]
+    assert received[0]["args"][0]["id"] == mine and "owner" not in received[0]["args"][0]
+    sio.disconnect("/test")
 
 
 # ---------------- /api/llm-models 形状 ----------------
@@ -196,7 +278,7 @@ def test_translate_includes_needs_review_sidecar(client, monkeypatch):
     """单文件翻译产出的复审 sidecar 必须进入交付文件列表（不再随 output_dir 被清掉）。"""
     captured = {}
 
-    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None):
+    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None, **kwargs):
         out_name = f"strings_{target_language}.json"
         out_path = os.path.join(output_dir, out_name)
         with open(out_path, "w", encoding="utf-8") as f:
@@ -207,7 +289,7 @@ def test_translate_includes_needs_review_sidecar(client, monkeypatch):
             f.write('[{"key":"x","value":"y","reason":"english"}]')
         return out_name, out_path
 
-    monkeypatch.setattr(app_module, "translate_single_file", fake_translate_single_file)
+    monkeypatch.setattr(translation_runner, "translate_single_file", fake_translate_single_file)
     # 捕获传给 create_zip 的文件清单（这是"交付"的真相），并产出占位 zip
     monkeypatch.setattr(
         app_module, "create_zip",
@@ -217,9 +299,101 @@ def test_translate_includes_needs_review_sidecar(client, monkeypatch):
     resp = _post_translate(
         client, languages="zh-TW", translation_engine="openrouter", ai_model=config.DEFAULT_MODEL
     )
-    assert resp.status_code == 200
-    assert resp.get_json()["success"] is True
+    assert _wait_job(client, resp)["status"] == "succeeded"
     zipped = captured.get("files", [])
     assert any(f.endswith("strings_zh-TW.json") for f in zipped), "主翻译文件应在交付列表"
     assert any(f.endswith("strings_zh-TW.needs_review.json") for f in zipped), \
         "复审 sidecar 必须纳入交付 ZIP"
+    assert any(f.endswith("strings.usage.json") for f in zipped), "LLM 引擎的用量报告应纳入交付 ZIP"
+
+
+def test_estimate_cost_accepts_js_and_rejects_zip(client):
+    resp = client.post("/api/estimate-cost", data={
+        "file": (io.BytesIO(b'export default {\n  ok: "OK"\n}'), "strings.js"),
+        "languages": ["es"],
+        "ai_model": config.DEFAULT_MODEL,
+    }, content_type="multipart/form-data")
+    assert resp.status_code == 200 and resp.get_json()["estimation"]["num_keys"] == 1
+
+    resp = client.post("/api/estimate-cost", data={
+        "file": (io.BytesIO(b"PK"), "pack.zip"), "languages": ["es"],
+    }, content_type="multipart/form-data")
+    assert resp.status_code == 400
+
+
+# ---------------- ZIP (文件, 语言) 任务并发 ----------------
+
+def _zip_bytes(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def test_zip_tasks_run_concurrently_and_keep_layout(client, monkeypatch):
+    """(文件, 语言) 任务并发执行；交付列表按任务表顺序、保持包内目录结构，失败任务进 errors。"""
+    monkeypatch.setattr(config, "ZIP_TASK_JOBS", 2)
+    barrier = threading.Barrier(2, timeout=5)
+    captured = {}
+
+    def fake_translate_single_file(file_path, target_language, engine, ai_model, output_dir, cb=None, **kwargs):
+        barrier.wait()  # 两个任务必须同时在途才能通过（顺序执行会超时）
+        if target_language == "fr" and file_path.endswith("b.json"):
+            raise RuntimeError("模拟失败")
+        cb(50, "翻译中")
+        name = os.path.basename(file_path).replace(".json", f"_{target_language}.json")
+        path = os.path.join(output_dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{}")
+        return name, path
+
+    monkeypatch.setattr(app_module, "translate_single_file", fake_translate_single_file)
+    monkeypatch.setattr(
+        app_module, "create_zip_with_structure",
+        lambda files, out: (captured.__setitem__("files", list(files)), open(out, "w").close())
+    )
+
+    content = _zip_bytes([("a.json", '{"k":"v"}'), ("sub/b.json", '{"k":"v"}')])
+    resp = client.post("/translate", data={
+        "file": (io.BytesIO(content), "pack.zip"),
+        "languages": ["es", "fr"],
+        "translation_engine": "google",
+    }, content_type="multipart/form-data")
+    job = _wait_job(client, resp)
+    assert job["status"] == "succeeded"
+    assert job["result"]["errors"] == [f"{os.path.join('sub', 'b.json')} (fr): 模拟失败"]
+    assert [rel for rel, _ in captured["files"]] == [
+        os.path.join("es", "a_es.json"),
+        os.path.join("es", "sub", "b_es.json"),
+        os.path.join("fr", "a_fr.json"),
+    ]
+
+
+def test_zip_openrouter_pools_files_per_language(client, monkeypatch):
+    """LLM 引擎 + 合并模式：每种语言一个任务，包内全部文件一起交给 translate_file_group。"""
+    monkeypatch.setattr(config, "ZIP_CROSS_FILE_BATCHING", True)
+    groups = []
+
+    def fake_group(files, target_language, ai_model, cb=None, **kwargs):
+        groups.append((target_language, [os.path.basename(p) for p, _d in files]))
+        outcomes = []
+        for file_path, output_dir in files:
+            name = os.path.basename(file_path).replace(".json", f"_{target_language}.json")
+            with open(os.path.join(output_dir, name), "w", encoding="utf-8") as f:
+                f.write("{}")
+            outcomes.append(((name, os.path.join(output_dir, name)), None))
+        return outcomes
+
+    monkeypatch.setattr(app_module, "translate_file_group", fake_group)
+    monkeypatch.setattr(app_module, "create_zip_with_structure", lambda files, out: open(out, "w").close())
+
+    content = _zip_bytes([("a.json", '{"k":"v"}'), ("sub/b.json", '{"k":"v"}')])
+    resp = client.post("/translate", data={
+        "file": (io.BytesIO(content), "pack.zip"),
+        "languages": ["es", "fr"],
+        "translation_engine": "openrouter",
+        "ai_model": config.DEFAULT_MODEL,
+    }, content_type="multipart/form-data")
+    assert _wait_job(client, resp)["status"] == "succeeded"
+    assert sorted(groups) == [("es", ["a.json", "b.json"]), ("fr", ["a.json", "b.json"])]
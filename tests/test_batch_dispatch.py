@@ -0,0 +1,72 @@
+"""并发批次窗口 —— max_in_flight > 1 时输出与顺序模式逐字节一致（monkeypatch，不打真 API）。"""
+import json
+import random
+import time
+
+import pytest
+
+import translate_llm
+from translation_config import BATCH_CONFIG
+
+
+def _source():
+    """够多批次的嵌套语言包；部分值会被假引擎译成含英文残留 → 触发 QA sidecar。"""
+    data = {f"sec{i}": {f"k{j}": f"文本{i}-{j}" for j in range(7)} for i in range(6)}
+    data["list"] = [f"项{i}" for i in range(9)]
+    return data
+
+
+def _fake_translate_with_llm(items, lang, model):
+    # 乱序完成：随机短暂停顿，让线程池的完成顺序 ≠ 提交顺序
+    time.sleep(random.uniform(0, 0.005))
+    out = {}
+    for k, v in items.items():
+        out[k] = "abc" if v.endswith("3") else f"譯{v}"
+    return out
+
+
+def _run(tmp_path, monkeypatch, max_in_flight):
+    monkeypatch.setitem(BATCH_CONFIG, "max_in_flight", max_in_flight)
+    monkeypatch.setitem(BATCH_CONFIG, "token_max_batch_size", 5)   # 小批 → 多批并发
+    monkeypatch.setattr(translate_llm, "translate_with_llm", _fake_translate_with_llm)
+    out_dir = tmp_path / f"out{max_in_flight}"
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps(_source(), ensure_ascii=False), encoding="utf-8")
+    name = translate_llm.translate_json_file_llm(str(src), "zh-TW", None, "m", str(out_dir))
+    review = out_dir / name.replace(".json", ".needs_review.json")
+    return (out_dir / name).read_bytes(), review.read_bytes()
+
+
+def test_concurrent_output_byte_identical_to_sequential(tmp_path, monkeypatch):
+    seq_out, seq_review = _run(tmp_path, monkeypatch, 1)
+    par_out, par_review = _run(tmp_path, monkeypatch, 4)
+    assert par_out == seq_out
+    assert par_review == seq_review
+
+
+def test_concurrent_failed_batch_keeps_source(tmp_path, monkeypatch):
+    """并发模式下单批重试耗尽 → 该批保留原文，其余批正常合并。"""
+    monkeypatch.setitem(BATCH_CONFIG, "max_in_flight", 3)
+    monkeypatch.setattr(translate_llm.time, "sleep", lambda *_: None)
+
+    def flaky(items, lang, model):
+        if any(v == "坏" for v in items.values()):
+            raise RuntimeError("boom")
+        return {k: v.upper() for k, v in items.items()}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", flaky)
+    batches = [{("a",): "x"}, {("b",): "坏"}, {("c",): "y"}]
+    messages = []
+    translations, failed = translate_llm._run_batches(
+        batches, "en", "m", 3, lambda pct, msg: messages.append(msg)
+    )
+    assert list(translations) == [("a",), ("b",), ("c",)]   # 按批次序合并
+    assert translations[("b",)] == "坏"
+    assert [f["batch_num"] for f in failed] == [2]
+    assert any("批次 2 失败" in m for m in messages)
+
+
+@pytest.mark.parametrize("value", [0, 1])
+def test_max_in_flight_le_one_is_sequential(monkeypatch, value):
+    monkeypatch.setitem(BATCH_CONFIG, "max_in_flight", value)
+    assert translate_llm._max_in_flight() == 1
@@ -0,0 +1,62 @@
+"""形状错误二分恢复 —— 数量不匹配 / 截断时拆半重试，只有问题串保留原文（monkeypatch，不打真 API）。"""
+import pytest
+
+import translate_llm
+from llm_client import BatchShapeError
+
+
+@pytest.fixture
+def shape_engine(monkeypatch):
+    """含 "坏" 的批次总是数量不匹配；记录每次调用的批大小。"""
+    calls = []
+    monkeypatch.setattr(translate_llm.time, "sleep", lambda *_: None)
+
+    def fake(items, lang, model):
+        calls.append(len(items))
+        if "坏" in items.values():
+            raise BatchShapeError(f"翻译数量不匹配: 输入 {len(items)} 项，返回 {len(items) - 1} 项")
+        return {k: f"T-{v}" for k, v in items.items()}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    return calls
+
+
+def test_single_bad_item_does_not_sink_neighbours(shape_engine):
+    items = {(f"k{i}",): ("坏" if i == 5 else f"v{i}") for i in range(16)}
+    translated, failure = translate_llm._translate_batch_with_retry(1, items, "en", "m")
+
+    assert list(translated) == list(items)                  # 原顺序
+    assert translated[("k5",)] == "坏"                      # 仅问题串保留原文
+    assert all(v == f"T-v{i}" for i, ((k,), v) in enumerate(translated.items()) if i != 5)
+    assert failure["paths"] == [("k5",)]
+    assert failure["item_count"] == 1
+    assert "数量不匹配" in failure["error"]
+    # 16 → 8 → 4 → 2 → 1 逐层二分，单项再按 max_retries 重试；远少于整批重试 × 4
+    max_retries = translate_llm._max_retries()
+    assert shape_engine.count(16) == 1
+    assert shape_engine.count(1) == 2 + max_retries
+
+
+def test_other_errors_still_retry_whole_batch(monkeypatch):
+    monkeypatch.setattr(translate_llm.time, "sleep", lambda *_: None)
+    calls = []
+
+    def boom(items, lang, model):
+        calls.append(len(items))
+        raise RuntimeError("502")
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", boom)
+    items = {("a",): "x", ("b",): "y"}
+    translated, failure = translate_llm._translate_batch_with_retry(3, items, "en", "m")
+    assert calls == [2] * (translate_llm._max_retries() + 1)
+    assert translated == items
+    assert failure == {"batch_num": 3, "error": "502", "item_count": 2, "paths": [("a",), ("b",)]}
+
+
+def test_partial_failure_counts_only_failed_paths(tmp_path, shape_engine, monkeypatch):
+    """文件级：失败计数 / TM 排除只针对二分后真正失败的路径（含扇出）。"""
+    leaves = [(("a",), "好"), (("b",), "坏"), (("c",), "坏"), (("d",), "也好")]
+    translations, failed, fresh, _ctx = translate_llm._translate_leaves(leaves, "en", "m")
+    assert translations == {("a",): "T-好", ("b",): "坏", ("c",): "坏", ("d",): "T-也好"}
+    assert [f["item_count"] for f in failed] == [2]
+    assert set(fresh) == {("a",), ("d",)}
@@ -0,0 +1,104 @@
+"""断点续传 —— 批次级检查点落盘 / 中断后续传只送未完成部分 / final 直接复用（不打真 API）。"""
+import json
+
+import pytest
+
+import checkpoint
+import cli
+import config
+import translate_llm
+import translation_runner
+from translation_config import BATCH_CONFIG
+
+
+class _Crash(BaseException):
+    """模拟进程中途被杀（不被批次重试的 except Exception 吞掉）。"""
+
+
+@pytest.fixture
+def job_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "ckpt"))
+    monkeypatch.setitem(BATCH_CONFIG, "token_max_batch_size", 2)
+    monkeypatch.setitem(BATCH_CONFIG, "max_in_flight", 1)
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": "一", "b": {"c": "二", "d": "三"}, "e": ["四", "五", "六"]},
+                              ensure_ascii=False), encoding="utf-8")
+    return src
+
+
+def _engine(monkeypatch, crash_on_call=None):
+    sent = []
+
+    def fake(values, **kwargs):
+        if crash_on_call is not None and len(sent) == crash_on_call:
+            raise _Crash()
+        sent.append(list(values))
+        return [f"T{v}" for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake)
+    return sent
+
+
+def _run(src, out, job_id="job1"):
+    return translation_runner.translate_single_file(
+        str(src), "en", "openrouter", "m", str(out), job_id=job_id,
+    )
+
+
+def test_resume_continues_from_first_incomplete_batch(tmp_path, job_env, monkeypatch):
+    sent = _engine(monkeypatch, crash_on_call=2)
+    with pytest.raises(_Crash):
+        _run(job_env, tmp_path / "out")
+    assert sent == [["一", "二"], ["三", "四"]]
+
+    sent = _engine(monkeypatch)
+    messages = []
+    translation_runner.translate_single_file(
+        str(job_env), "en", "openrouter", "m", str(tmp_path / "out"),
+        lambda pct, msg: messages.append(msg), job_id="job1",
+    )
+    assert sent == [["五", "六"]]
+    assert "断点续传: 恢复 4 项，待翻译 2 项" in messages
+    result = json.loads((tmp_path / "out" / "s_en.json").read_text(encoding="utf-8"))
+    assert result == {"a": "T一", "b": {"c": "T二", "d": "T三"}, "e": ["T四", "T五", "T六"]}
+
+
+def test_completed_language_reuses_final_without_calls(tmp_path, job_env, monkeypatch):
+    _engine(monkeypatch)
+    _run(job_env, tmp_path / "out1")
+    sent = _engine(monkeypatch)
+    _run(job_env, tmp_path / "out2")
+    assert sent == []
+    assert (tmp_path / "out1" / "s_en.json").read_bytes() == (tmp_path / "out2" / "s_en.json").read_bytes()
+
+
+def test_prompt_change_invalidates_checkpoint(tmp_path, job_env, monkeypatch):
+    _engine(monkeypatch)
+    _run(job_env, tmp_path / "out")
+    monkeypatch.setitem(translate_llm.CAPITALIZATION_RULES, "en", "- a brand new rule")
+    sent = _engine(monkeypatch)
+    _run(job_env, tmp_path / "out")
+    assert sum(len(b) for b in sent) == 6
+
+
+def test_truncated_tail_line_is_ignored(tmp_path):
+    ckpt = checkpoint.Checkpoint(str(tmp_path / "x.jsonl"))
+    assert ckpt.restore("fp") == ({}, None)
+    ckpt.record_batch(1, {"一": "one"})
+    with open(ckpt.path, "a", encoding="utf-8") as f:
+        f.write('{"batch": 2, "translations": {"二": "tw')
+    assert ckpt.restore("fp") == ({"一": "one"}, None)
+
+
+def test_invalid_job_id_rejected():
+    with pytest.raises(ValueError):
+        checkpoint.job_dir("../etc")
+
+
+def test_cli_resume_unknown_job(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "ckpt"))
+    src = tmp_path / "s.json"
+    src.write_text('{"k": "v"}', encoding="utf-8")
+    rc = cli.main([str(src), "--langs", "es", "--out", str(tmp_path / "o"), "--resume", "nope"])
+    assert rc == 1
+    assert "找不到任务检查点" in capsys.readouterr().err
@@ -0,0 +1,172 @@
+"""按模型熔断器 —— 三态转换 / llm_client 快速失败 / 故障转移改道 / /api/health（假 client，不打真 API）。"""
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import app as app_module
+import circuit_breaker
+import config
+import llm_client
+import rate_limiter
+import translate_llm
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(config, "CIRCUIT_BREAKER", True)
+    monkeypatch.setattr(circuit_breaker, "_breakers", {})
+
+
+def _breaker(clock):
+    return CircuitBreaker("m", window=10, min_requests=4, failure_rate=0.5, cooldown=5, clock=clock)
+
+
+def test_trips_on_failure_rate_and_probes_after_cooldown(enabled):
+    clock = _Clock()
+    breaker = _breaker(clock)
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == CLOSED  # 请求数不足 min_requests，不判定
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == OPEN and breaker.trips == 1
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+    clock.now += 5
+    breaker.before_request()  # 冷却结束：放行唯一的探测请求
+    assert breaker.snapshot()["state"] == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.raise_if_open()  # 探测进行中，其余请求仍快速失败
+    breaker.record_success()
+    assert breaker.snapshot() == {
+        "model": "m", "state": CLOSED, "requests": 0, "failures": 0,
+        "failure_rate": 0.0, "trips": 1, "retry_after": 0.0,
+    }
+
+
+def test_failed_probe_reopens_and_window_expires(enabled):
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 5
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.snapshot()["state"] == OPEN and breaker.trips == 2
+
+    # 窗口外的旧失败不计入
+    healthy = _breaker(clock)
+    for _ in range(3):
+        healthy.record_failure()
+    clock.now += 11
+    healthy.record_failure()
+    assert healthy.snapshot()["requests"] == 1 and healthy.snapshot()["state"] == CLOSED
+
+
+def test_neutral_outcome_releases_probe(enabled):
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now += 5
+    breaker.before_request()
+    breaker.release()
+    breaker.before_request()  # 名额已归还，下一个请求可以探测
+
+
+def test_disabled_breaker_only_counts(monkeypatch):
+    monkeypatch.setattr(config, "CIRCUIT_BREAKER", False)
+    breaker = _breaker(_Clock())
+    for _ in range(10):
+        breaker.record_failure()
+    breaker.before_request()
+    assert breaker.snapshot()["state"] == CLOSED and breaker.snapshot()["failures"] == 10
+
+
+def _server_error():
+    response = httpx.Response(503, request=httpx.Request("POST", "http://x"))
+    return openai.InternalServerError("unavailable", response=response, body=None)
+
+
+def test_llm_client_fails_fast_once_tripped(enabled, monkeypatch):
+    calls = []
+
+    async def create(**kwargs):
+        calls.append(kwargs["model"])
+        raise _server_error()
+
+    completions = SimpleNamespace(create=create)
+    completions.with_raw_response = completions
+    monkeypatch.setattr(llm_client, "_async_client", SimpleNamespace(chat=SimpleNamespace(completions=completions)))
+    monkeypatch.setattr(llm_client, "_request_slots", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 1000.0)
+    monkeypatch.setattr(config, "CIRCUIT_BREAKER_MIN_REQUESTS", 2)
+
+    for _ in range(2):
+        with pytest.raises(openai.InternalServerError):
+            llm_client.translate_batch(["a"], "French", "fr", "m")
+    with pytest.raises(CircuitOpenError):
+        llm_client.translate_batch(["a"], "French", "fr", "m")
+    assert calls == ["m", "m"]  # 断开后请求不再发出
+    assert circuit_breaker.breaker_states()[0]["state"] == OPEN
+
+
+def _open(model):
+    breaker = circuit_breaker.get_circuit_breaker(model)
+    breaker._trip(breaker._clock(), "test")
+
+
+def test_open_breaker_fails_batch_without_retries(enabled, monkeypatch):
+    sleeps, calls = [], []
+    monkeypatch.setattr(translate_llm.time, "sleep", sleeps.append)
+
+    def fake(items, lang, model, **kwargs):
+        calls.append(model)
+        circuit_breaker.get_circuit_breaker(model).raise_if_open()
+        return dict(items)
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    _open("primary")
+    translated, failed, error = translate_llm._translate_items(1, {"k": "确认"}, "ja", "primary")
+    assert calls == ["primary"] and sleeps == []
+    assert failed == ["k"] and "熔断" in error
+
+
+def test_open_breaker_reroutes_with_failover(enabled, monkeypatch):
+    monkeypatch.setattr(config, "MODEL_FAILOVER", True)
+    monkeypatch.setattr(config, "MODEL_FAILOVER_CHAIN", ["primary", "backup"])
+    calls = []
+
+    def fake(items, lang, model, **kwargs):
+        calls.append(model)
+        circuit_breaker.get_circuit_breaker(model).raise_if_open()
+        return {k: f"{model}:{v}" for k, v in items.items()}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    _open("primary")
+    translated, failed, _error = translate_llm._translate_items(1, {"k": "确认"}, "ja", "primary")
+    assert calls == ["primary", "backup"]
+    assert translated == {"k": "backup:确认"} and failed == []
+
+
+def test_health_endpoint_reports_breakers(enabled):
+    circuit_breaker.get_circuit_breaker("ok/model").record_success()
+    _open("bad/model")
+    body = app_module.app.test_client().get("/api/health").get_json()
+    assert body["success"] is True and body["status"] == "degraded"
+    assert body["circuit_breaker"]["enabled"] is True
+    states = {m["model"]: m["state"] for m in body["circuit_breaker"]["models"]}
+    assert states == {"bad/model": OPEN, "ok/model": CLOSED}
@@ -2,6 +2,7 @@
 import pytest
 
 import cli
+import translation_runner
 
 
 def test_parser_basic():
@@ -28,11 +29,34 @@ def test_orchestrates_per_lang(monkeypatch, tmp_path):
     src.write_text('{"k": "v"}', encoding="utf-8")
     calls = []
 
-    def fake(path, lang, engine, model, out, cb):
-        calls.append(lang)
+    def fake(path, lang, engine, model, out, cb, source_data=None, **kwargs):
+        calls.append((lang, source_data))
         return (f"s_{lang}.json", f"{out}/s_{lang}.json")
 
-    monkeypatch.setattr(cli, "translate_single_file", fake)
-    rc = cli.main([str(src), "--langs", "zh-TW,es,fr", "--out", str(tmp_path / "o")])
+    monkeypatch.setattr(translation_runner, "translate_single_file", fake)
+    rc = cli.main([str(src), "--langs", "zh-TW,es,fr", "--out", str(tmp_path / "o"), "--jobs", "1"])
     assert rc == 0
-    assert calls == ["zh-TW", "es", "fr"]
+    # 源文件只解析一次，各语言拿到同一份预解析数据
+    assert [lang for lang, _ in calls] == ["zh-TW", "es", "fr"]
+    assert all(data == {"k": "v"} for _, data in calls)
+
+
+def test_jobs_parallel_reports_failures(monkeypatch, tmp_path, capsys):
+    src = tmp_path / "s.json"
+    src.write_text('{"k": "v"}', encoding="utf-8")
+
+    def fake(path, lang, engine, model, out, cb, source_data=None, **kwargs):
+        if lang == "fr":
+            raise RuntimeError("boom")
+        return (f"s_{lang}.json", f"{out}/s_{lang}.json")
+
+    monkeypatch.setattr(translation_runner, "translate_single_file", fake)
+    rc = cli.main([str(src), "--langs", "zh-TW,es,fr", "--out", str(tmp_path / "o"), "--jobs", "3"])
+    assert rc == 1
+    assert "2/3 成功" in capsys.readouterr().out
+
+
+def test_jobs_must_be_positive(tmp_path):
+    src = tmp_path / "s.json"
+    src.write_text('{"k": "v"}', encoding="utf-8")
+    assert cli.main([str(src), "--langs", "es", "--jobs", "0"]) == 1
@@ -0,0 +1,119 @@
+"""费用估算自校准 —— 样本入库 / 预测区间 / 未校准语言退回静态估算（临时 SQLite，不打 API）。"""
+import json
+
+import pytest
+
+import cli
+import config
+import cost_calibration
+from cost_calibration import CalibrationStore, calibrate
+from cost_estimator import estimate_cost
+from llm_models import get_model_info
+from token_estimator import dominant_script
+from usage_report import UsageRecorder
+
+MODEL = "anthropic/claude-sonnet-5"
+
+
+def _report(language, source_chars, prompt, completion, cached=0, script="latin", requests=2):
+    return {"files": [{
+        "file": "s.json", "language": language, "model": MODEL,
+        "source_chars": source_chars, "source_script": script, "requests": requests,
+        "prompt_tokens": prompt, "cached_tokens": cached, "completion_tokens": completion,
+    }]}
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "COST_CALIBRATION_PATH", str(tmp_path / "calibration.sqlite3"))
+    return cost_calibration.get_calibration_store()
+
+
+def test_dominant_script_weighs_by_tokens():
+    assert dominant_script(["设置", "确定 {0}"]) == "cjk"
+    assert dominant_script(["Settings", "OK"]) == "latin"
+    assert dominant_script(["Настройки"]) == "other"
+
+
+def test_store_skips_entries_without_requests(tmp_path):
+    store = CalibrationStore(str(tmp_path / "c.sqlite3"))
+    assert store.add_report(_report("es", 100, 0, 0, requests=0)) == 0
+    assert store.add_report(_report("es", 100, 300, 120)) == 1
+    assert store.samples(MODEL, "es", "latin") == [(3.0, 0.0, 1.2)]
+    assert store.samples(MODEL, "es", "cjk") == []
+
+
+def test_calibrate_needs_min_samples_and_brackets_mean():
+    info = get_model_info(MODEL)
+    assert calibrate([(3.0, 0.0, 1.0)] * 2, info, 1000) is None
+    learned = calibrate([(3.0, 0.0, 1.0), (3.3, 0.0, 1.1), (2.7, 0.0, 0.9)], info, 1000)
+    assert learned["samples"] == 3
+    assert (learned["input_tokens"], learned["output_tokens"]) == (3000, 1000)
+    assert learned["cost_usd"] == pytest.approx((3000 * 2 + 1000 * 10) / 1e6)
+    assert learned["cost_low_usd"] < learned["cost_usd"] < learned["cost_high_usd"]
+
+
+def test_estimate_uses_calibration_per_language(tmp_path, store):
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": "Hello", "b": {"c": "World"}, "d": "Hello"}), encoding="utf-8")
+    for ratio in (3.0, 3.2, 2.8):
+        cost_calibration.record_usage(_report("es", 100, int(100 * ratio), 100))
+
+    info = estimate_cost(str(src), ["es", "fr"], MODEL, calibrated=True)
+    es, fr = info["languages"]
+    assert info["source_script"] == "latin"
+    assert es["calibrated"] and es["samples"] == 3 and es["input_tokens"] == 30  # 同值去重后 10 字符
+    assert not fr["calibrated"] and fr["cost_low_usd"] == pytest.approx(fr["cost_usd"] * 0.7, rel=1e-3)
+    assert info["calibrated_languages"] == 1
+    low, high = info["cost_interval_usd"]
+    assert low < info["total_cost_usd"] < high
+
+
+def test_static_mode_unchanged_without_calibrated_flag(tmp_path, store):
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": "Hello"}), encoding="utf-8")
+    info = estimate_cost(str(src), ["es"], MODEL)
+    assert "cost_interval_usd" not in info and not info["languages"][0]["calibrated"]
+
+
+def test_cli_estimate_prints_summary(tmp_path, store, capsys):
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": "Hello"}), encoding="utf-8")
+    assert cli.main([str(src), "--langs", "es", "--model", MODEL, "--estimate"]) == 0
+    out = capsys.readouterr().out
+    assert "90% 区间" in out and "无足够历史用量" in out
+
+
+def test_rerouted_sources_calibrate_the_producing_model(tmp_path):
+    """故障转移产出的批：原文字符数随译文转到实际模型，样本 tokens / 字符出自同一模型。"""
+    recorder = UsageRecorder()
+    scope = recorder.scope("s.json", "es", MODEL)
+    scope.record_source(["Settings", "Cancel"])
+    call = {"prompt_tokens": 300, "completion_tokens": 40, "cached_tokens": 0, "latency_seconds": 1.0}
+    scope.record_call(1, {**call, "model": MODEL})
+    scope.record_output("openai/gpt-5.4", ["Cancel"])
+    scope.record_call(2, {**call, "model": "openai/gpt-5.4"})
+    chars = {entry["model"]: entry["source_chars"] for entry in recorder.report()["files"]}
+    assert chars == {MODEL: 8, "openai/gpt-5.4": 6}
+
+    store = CalibrationStore(str(tmp_path / "c.sqlite3"))
+    assert store.add_report(recorder.report()) == 2
+    assert store.samples("openai/gpt-5.4", "es", "latin") == [(50.0, 0.0, 40 / 6)]
+
+
+def test_multi_language_group_entries_are_not_calibrated(tmp_path):
+    """多语言单次调用组（"es+fr"）只计费：条目标 multi_language，不入校准库。"""
+    recorder = UsageRecorder()
+    call = {"prompt_tokens": 300, "completion_tokens": 40, "cached_tokens": 0, "latency_seconds": 1.0}
+    group = recorder.scope("s.json", "es+fr", MODEL, multi_language=True)
+    group.record_source(["Settings"])
+    group.record_call(1, call)
+    single = recorder.scope("s.json", "de", MODEL)
+    single.record_source(["Settings"])
+    single.record_call(1, call)
+    report = recorder.report()
+    assert {e["language"]: e["multi_language"] for e in report["files"]} == {"es+fr": True, "de": False}
+
+    store = CalibrationStore(str(tmp_path / "c.sqlite3"))
+    assert store.add_report(report) == 1
+    assert store.samples(MODEL, "es+fr", "latin") == []
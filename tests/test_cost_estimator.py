@@ -17,3 +17,46 @@ def test_zh_tw_multiplier_below_default():
     assert _lookup("zh-TW") < DEFAULT_MULTIPLIER
     # 同一个 'zh' 键覆盖全部中文变体
     assert _lookup("zh-CN") == _lookup("zh-TW") == OUTPUT_LENGTH_MULTIPLIER["zh"]
+
+
+def test_cache_credit_only_above_min_prefix():
+    """前缀短于 min_cache_tokens 不计缓存命中；超过时首个请求之后的请求按缓存价计。"""
+    import cost_estimator
+    info = {"min_cache_tokens": 1024}
+    assert cost_estimator._cached_prompt_tokens(info, 500, 5) == 0
+    assert cost_estimator._cached_prompt_tokens(info, 2000, 5) == 2000 * 4
+    assert cost_estimator._cached_prompt_tokens(info, 2000, 1) == 0
+
+
+def test_dry_run_matches_real_batches(tmp_path, monkeypatch):
+    """嵌套 JSON：估算的请求数 = 真实翻译发出的请求数（展平 + 同值去重 + 同一分批器）。"""
+    import json
+    import translate_llm
+    from cost_estimator import estimate_cost
+
+    data = {"a": {"b": ["one", "two", {"c": "one"}]}, "d": "three", "n": 5}
+    src = tmp_path / "nested.json"
+    src.write_text(json.dumps(data), encoding="utf-8")
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "dynamic_batching", False)
+    monkeypatch.setattr(translate_llm, "BATCH_SIZE", 2)
+
+    sent = []
+    monkeypatch.setattr(
+        translate_llm, "translate_batch", lambda values, **kw: sent.append(values) or list(values)
+    )
+    translate_llm.translate_json_file_llm(str(src), "en", model="m", output_dir=str(tmp_path))
+
+    info = estimate_cost(str(src), ["en"], "openai/gpt-5.4")
+    assert info["num_keys"] == 4 and info["unique_strings"] == 3
+    assert info["num_requests"] == len(sent) == 2
+    assert info["languages"][0]["units"] == 3
+    assert info["estimated_input_tokens"] > info["estimated_output_tokens"] > 0
+
+
+def test_js_locale_is_estimated(tmp_path):
+    from cost_estimator import estimate_cost
+    src = tmp_path / "strings.js"
+    src.write_text('export default {\n  ok: "OK",\n  cancel: "Cancel"\n}', encoding="utf-8")
+    info = estimate_cost(str(src), ["es", "fr"], "openai/gpt-5.4")
+    assert "error" not in info
+    assert info["num_keys"] == 2 and [e["language"] for e in info["languages"]] == ["es", "fr"]
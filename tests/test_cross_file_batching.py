@@ -0,0 +1,73 @@
+"""跨文件合并翻译 —— 多个小文件叶子合并分批、按文件拆回输出（monkeypatch，不打真 API）。"""
+import json
+
+import pytest
+
+import translate_llm
+import translation_runner
+
+
+@pytest.fixture
+def upper_engine(monkeypatch):
+    calls = []
+
+    def fake_translate_batch(values, **kwargs):
+        calls.append(list(values))
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    return calls
+
+
+def _write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_small_files_share_one_request_and_split_back(tmp_path, upper_engine):
+    src = tmp_path / "src"
+    out = tmp_path / "out"
+    files = [
+        (_write(src / "a.json", json.dumps({"t": "hello", "n": 1})), str(out)),
+        (_write(src / "sub" / "b.json", json.dumps({"x": ["bye", "hello"]})), str(out / "sub")),
+        (_write(src / "c.js", 'export default {\n  k: "yes"\n}'), str(out)),
+    ]
+    results = translation_runner.translate_file_group(files, "en", "m")
+
+    assert len(upper_engine) == 1                      # 三个文件合成一个请求
+    assert sorted(upper_engine[0]) == ["bye", "hello", "yes"]  # 跨文件同值去重
+    assert [r[0] for r, _e in results] == ["a_en.json", "b_en.json", "c_en.js"]
+    assert all(error is None for _r, error in results)
+    assert json.loads((out / "a_en.json").read_text(encoding="utf-8")) == {"t": "HELLO", "n": 1}
+    assert json.loads((out / "sub" / "b_en.json").read_text(encoding="utf-8")) == {"x": ["BYE", "HELLO"]}
+    assert '"k": "YES"' in (out / "c_en.js").read_text(encoding="utf-8")
+
+
+def test_unparseable_file_fails_alone(tmp_path, upper_engine):
+    good = _write(tmp_path / "good.json", json.dumps({"a": "ok"}))
+    bad = _write(tmp_path / "bad.json", "{not json")
+    results = translate_llm.translate_files_llm(
+        [(bad, str(tmp_path), None), (good, str(tmp_path), None)], "en", model="m"
+    )
+    assert results[0][0] is None and isinstance(results[0][1], ValueError)
+    assert results[1] == ("good_en.json", None)
+
+
+def test_needs_review_split_per_file(tmp_path, monkeypatch):
+    """QA 未过项按文件拆回各自的 sidecar，key 去掉文件序号前缀。"""
+    monkeypatch.setattr(translate_llm, "translate_batch", lambda values, **kw: list(values))
+    monkeypatch.setattr(
+        translate_llm, "_finalize_translations",
+        lambda t, s, lang, model, fresh, ctx, cb=None, carried=None: (
+            t, [(p, v, "english") for p, v in t.items() if p[0] == 1]
+        ),
+    )
+    a = _write(tmp_path / "a.json", json.dumps({"x": "one"}))
+    b = _write(tmp_path / "b.json", json.dumps({"y": {"z": "two"}}))
+    translate_llm.translate_files_llm(
+        [(a, str(tmp_path), None), (b, str(tmp_path), None)], "zh-TW", model="m"
+    )
+    assert not (tmp_path / "a_zh-TW.needs_review.json").exists()
+    review = json.loads((tmp_path / "b_zh-TW.needs_review.json").read_text(encoding="utf-8"))
+    assert review == [{"key": "y.z", "value": "two", "reason": "english"}]
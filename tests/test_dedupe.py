@@ -0,0 +1,63 @@
+"""同值去重 —— 相同原文每语言只送一次，译文扇出回全部路径（monkeypatch，不打真 API）。"""
+import json
+
+import pytest
+
+import translate_llm
+
+
+@pytest.fixture
+def upper_engine(monkeypatch):
+    sent = []
+
+    def fake_translate_batch(values, **kwargs):
+        sent.extend(values)
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    return sent
+
+
+def test_dedupe_leaves_keeps_first_path_and_members():
+    leaves = [(("a",), "ok"), (("b", 0), "no"), (("c",), "ok"), (("d",), "ok")]
+    units, members = translate_llm._dedupe_leaves(leaves)
+    assert units == [(("a",), "ok"), (("b", 0), "no")]
+    assert members == {("a",): [("a",), ("c",), ("d",)], ("b", 0): [("b", 0)]}
+
+
+def test_json_duplicates_sent_once_and_fanned_out(tmp_path, upper_engine):
+    data = {"x": {"ok": "save", "cancel": "no"}, "y": ["save", "save"], "z": "no"}
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps(data), encoding="utf-8")
+    messages = []
+    out = translate_llm.translate_json_file_llm(
+        str(src), "en", lambda pct, msg: messages.append(msg), "m", str(tmp_path)
+    )
+    result = json.loads((tmp_path / out).read_text(encoding="utf-8"))
+    assert sorted(upper_engine) == ["no", "save"]
+    assert result == {"x": {"ok": "SAVE", "cancel": "NO"}, "y": ["SAVE", "SAVE"], "z": "NO"}
+    assert any(m.startswith("去重: 唯一 2 / 共 5 项") for m in messages)
+
+
+def test_js_duplicates_sent_once(tmp_path, upper_engine):
+    src = tmp_path / "s.js"
+    src.write_text('export default {\n  a: "same",\n  b: "same",\n  c: "other"\n}', encoding="utf-8")
+    out = translate_llm.translate_js_file_llm(str(src), "en", None, "m", str(tmp_path))
+    text = (tmp_path / out).read_text(encoding="utf-8")
+    assert sorted(upper_engine) == ["other", "same"]
+    assert '  "a": "SAME",\n  "b": "SAME",\n  "c": "OTHER",\n' in text
+
+
+def test_failed_unit_counts_every_fanned_path(monkeypatch):
+    """失败批的 item_count 按扇出后的路径数计（完成消息里"N 项保留原文"准确）。"""
+    monkeypatch.setattr(translate_llm.time, "sleep", lambda *_: None)
+
+    def boom(items, lang, model):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", boom)
+    leaves = [(("a",), "同"), (("b",), "同"), (("c",), "同")]
+    translations, failed, fresh, _ctx = translate_llm._translate_leaves(leaves, "en", "m")
+    assert translations == {("a",): "同", ("b",): "同", ("c",): "同"}
+    assert [f["item_count"] for f in failed] == [3]
+    assert fresh == []
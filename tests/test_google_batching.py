@@ -0,0 +1,79 @@
+"""Google 引擎批量路径 —— 列表请求装批 / 标签拆分拼回 / 按批重试（假 client，不打真 API）。"""
+import json
+
+import pytest
+from google.api_core.exceptions import TooManyRequests
+
+import translate
+
+
+class _FakeClient:
+    def __init__(self, fail_first=0):
+        self.calls = []
+        self.fail_first = fail_first
+
+    def translate(self, values, target_language):
+        self.calls.append(values)
+        if self.fail_first:
+            self.fail_first -= 1
+            raise TooManyRequests("slow down")
+        if isinstance(values, str):  # 逐条路径（safe_translate_text）
+            return {"translatedText": values.upper()}
+        return [{"translatedText": v.upper().replace("&", "&amp;")} for v in values]
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(translate, "_get_translate_client", lambda: client)
+    monkeypatch.setattr(translate.time, "sleep", lambda s: None)
+    return client
+
+
+def test_tag_fragments_batched_and_reassembled(fake_client):
+    texts = ["a [color-red]b[/color-red] c", "x\\ny", "  ", "a & b", "b"]
+    result = translate.translate_texts(texts, "fr")
+    assert result == ["A [color-red]B[/color-red] C", "X\nY", "  ", "A & B", "B"]
+    assert len(fake_client.calls) == 1
+    # 标签拆出的片段与其它值同批；同文片段只送一次；标签 / 纯空白不送
+    assert fake_client.calls[0] == ["a ", "b", " c", "x<NEWLINE>y", "a & b"]
+
+
+def test_matches_per_string_translate_text(fake_client):
+    text = "[color-1] [/color-1]pre [color-2]in[/color-2]"
+    expected = translate.translate_text(text, "fr")
+    assert translate.translate_texts([text], "fr") == [expected]
+
+
+def test_batches_respect_item_and_char_limits(fake_client, monkeypatch):
+    monkeypatch.setattr(translate, "BATCH_MAX_ITEMS", 2)
+    monkeypatch.setattr(translate, "BATCH_MAX_CHARS", 5)
+    translate.translate_texts(["aa", "bb", "cc", "dddddd", "e"], "fr")
+    assert fake_client.calls == [["aa", "bb"], ["cc"], ["dddddd"], ["e"]]
+
+
+def test_rate_limit_retried_per_batch(fake_client):
+    fake_client.fail_first = 1
+    assert translate.translate_texts(["a", "b"], "fr") == ["A", "B"]
+    assert fake_client.calls == [["a", "b"], ["a", "b"]]
+
+
+def test_json_file_single_request(fake_client, tmp_path):
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": " hi ", "b": {"c": ["x", 1, ""]}}), encoding="utf-8")
+    out = translate.translate_json_file(str(src), "fr", None, str(tmp_path))
+    assert json.loads((tmp_path / out).read_text(encoding="utf-8")) == {
+        "a": "HI", "b": {"c": ["X", 1, ""]},
+    }
+    assert len(fake_client.calls) == 1
+
+
+def test_js_failed_batch_keeps_original(fake_client, monkeypatch, tmp_path):
+    monkeypatch.setattr(translate, "BATCH_MAX_ITEMS", 1)
+    monkeypatch.setattr(translate, "MAX_RETRIES", 0)
+    fake_client.fail_first = 1
+    src = tmp_path / "s.js"
+    src.write_text('export default {\n  a: "one",\n  b: "two"\n}', encoding="utf-8")
+    out = translate.translate_locale_file(str(src), "fr", None, str(tmp_path))
+    text = (tmp_path / out).read_text(encoding="utf-8")
+    assert '"a": "one"' in text and '"b": "TWO"' in text
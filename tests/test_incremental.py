@@ -0,0 +1,94 @@
+"""增量重译 —— 按路径比对上一版源文件，只译新增 / 改动叶子（monkeypatch，不打真 API）。"""
+import json
+
+import pytest
+
+import cli
+import config
+import translate_llm
+
+
+@pytest.fixture
+def upper_engine(monkeypatch):
+    sent = []
+
+    def fake_translate_batch(values, **kwargs):
+        sent.extend(values)
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    return sent
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_json_only_added_and_changed_leaves_sent(tmp_path, upper_engine):
+    old_src = {"a": "one", "b": {"c": "two", "gone": "bye"}, "d": "same"}
+    old_out = {"a": "Uno", "b": {"c": "Dos", "gone": "Adios"}, "d": "same"}  # d 上次失败保留原文
+    new_src = {"a": "one", "b": {"c": "TWO changed"}, "d": "same", "e": "new"}
+    src = _write(tmp_path / "s.json", new_src)
+    out = translate_llm.translate_json_file_llm(
+        src, "en", None, "m", str(tmp_path / "o"), previous=(old_src, old_out),
+    )
+    result = json.loads((tmp_path / "o" / out).read_text(encoding="utf-8"))
+    assert sorted(upper_engine) == ["TWO changed", "new", "same"]
+    # 未变沿用、改动重译、新增翻译、删除丢弃；键序跟新源
+    assert list(result) == ["a", "b", "d", "e"]
+    assert result == {"a": "Uno", "b": {"c": "TWO CHANGED"}, "d": "SAME", "e": "NEW"}
+
+
+def test_js_incremental_by_key(tmp_path, upper_engine):
+    src = tmp_path / "s.js"
+    src.write_text('export default {\n  a: "keep",\n  b: "new"\n}', encoding="utf-8")
+    out = translate_llm.translate_js_file_llm(
+        str(src), "en", None, "m", str(tmp_path), previous=({"a": "keep"}, {"a": "Kept"}),
+    )
+    text = (tmp_path / out).read_text(encoding="utf-8")
+    assert upper_engine == ["new"]
+    assert '  "a": "Kept",\n  "b": "NEW",\n' in text
+
+
+def test_carried_flagged_items_reported_not_retranslated(tmp_path, monkeypatch):
+    """沿用的旧译文若 QA 未过：进 sidecar，但不回灌重译。"""
+    calls = []
+    monkeypatch.setattr(
+        translate_llm, "translate_with_llm",
+        lambda items, lang, model: calls.append(dict(items)) or {k: "確定" for k in items},
+    )
+    src = _write(tmp_path / "s.json", {"old": "确认", "new": "确定"})
+    out = translate_llm.translate_json_file_llm(
+        src, "zh-TW", None, "m", str(tmp_path),
+        previous=({"old": "确认"}, {"old": "abc"}),
+    )
+    assert calls == [{("new",): "确定"}]
+    review = json.loads(
+        (tmp_path / out.replace(".json", ".needs_review.json")).read_text(encoding="utf-8")
+    )
+    assert review == [{"key": "old", "value": "abc", "reason": "英文未翻译"}]
+
+
+def test_cli_previous_flags(tmp_path, upper_engine, monkeypatch):
+    monkeypatch.setattr(config, "CHECKPOINT_DIR", str(tmp_path / "ckpt"))
+    old_dir = tmp_path / "old"
+    old_dir.mkdir()
+    prev_src = _write(old_dir / "s.json", {"a": "one"})
+    _write(old_dir / "s_en.json", {"a": "Uno"})
+    src = _write(tmp_path / "s.json", {"a": "one", "b": "two"})
+    rc = cli.main([
+        src, "--langs", "en,es", "--out", str(tmp_path / "o"), "--jobs", "1",
+        "--previous-source", prev_src, "--previous-output", str(old_dir),
+    ])
+    assert rc == 0
+    en = json.loads((tmp_path / "o" / "s_en.json").read_text(encoding="utf-8"))
+    assert en == {"a": "Uno", "b": "TWO"}
+    # es 无旧译文 → 全量
+    assert sorted(upper_engine) == ["one", "two", "two"]
+
+
+def test_cli_previous_flags_must_pair(tmp_path):
+    src = _write(tmp_path / "s.json", {"a": "one"})
+    with pytest.raises(SystemExit):
+        cli.main([src, "--langs", "es", "--previous-source", src])
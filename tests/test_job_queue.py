@@ -0,0 +1,109 @@
+"""后台任务队列 —— 公平调度 / 持久化恢复 / 重复提交 / 成败状态（临时 SQLite，不打 API）。"""
+import threading
+
+import pytest
+
+from job_queue import JobConflict, JobForbidden, JobQueue
+
+
+def _queue(tmp_path, handler=lambda job_id, params: {"ok": params}, workers=1):
+    return JobQueue(str(tmp_path / "jobs.sqlite3"), handler, workers=workers)
+
+
+def test_handler_result_and_failure(tmp_path):
+    def handler(job_id, params):
+        if params["fail"]:
+            raise RuntimeError("boom")
+        return {"echo": job_id}
+
+    queue = _queue(tmp_path, handler).start()
+    try:
+        queue.submit("good", {"fail": False})
+        queue.submit("bad", {"fail": True})
+        good = queue.wait("good", timeout=5)
+        bad = queue.wait("bad", timeout=5)
+    finally:
+        queue.close()
+    assert good["status"] == "succeeded" and good["result"] == {"echo": "good"}
+    assert good["progress"] == 100.0
+    assert bad["status"] == "failed" and bad["error"] == "boom" and "result" not in bad
+
+
+def test_fair_claim_prefers_idle_owner(tmp_path):
+    """A 连投三个任务、B 后投一个：第二个工作线程应先取 B，而不是 A 的第二个。"""
+    queue = _queue(tmp_path)
+    for job_id in ("a1", "a2", "a3"):
+        queue.submit(job_id, {}, owner="A")
+    queue.submit("b1", {}, owner="B")
+    assert queue.get("b1")["queue_position"] == 3
+
+    claimed = [queue._claim_next()[0] for _ in range(3)]
+    queue.close()
+    assert claimed == ["a1", "b1", "a2"]
+
+
+def test_running_jobs_requeued_after_restart(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit("j1", {"n": 1}, owner="A")
+    assert queue._claim_next()[0] == "j1"
+    assert queue.get("j1")["status"] == "running"
+    queue.close()  # 模拟进程在任务执行中退出
+
+    done = threading.Event()
+
+    def handler(job_id, params):
+        done.set()
+        return params
+
+    restarted = _queue(tmp_path, handler)
+    assert restarted.get("j1")["status"] == "queued"
+    restarted.start()
+    try:
+        job = restarted.wait("j1", timeout=5)
+    finally:
+        restarted.close()
+    assert done.is_set() and job["result"] == {"n": 1}
+
+
+def test_resubmit_conflicts_until_finished(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit("j1", {"n": 1})
+    with pytest.raises(JobConflict):
+        queue.submit("j1", {"n": 2})
+
+    queue.start()
+    try:
+        assert queue.wait("j1", timeout=5)["result"] == {"ok": {"n": 1}}
+        queue.submit("j1", {"n": 2})  # 已结束 → 以新参数重新入队（续传）
+        assert queue.wait("j1", timeout=5)["result"] == {"ok": {"n": 2}}
+    finally:
+        queue.close()
+
+
+def test_report_updates_snapshot(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit("j1", {})
+    queue.report("j1", 42.0, "翻译中")
+    job = queue.get("j1")
+    queue.close()
+    assert job["progress"] == 42.0 and job["message"] == "翻译中"
+
+
+def test_resubmit_by_other_owner_forbidden(tmp_path):
+    queue = _queue(tmp_path)
+    queue.submit("j1", {"n": 1}, owner="A")
+    with pytest.raises(JobForbidden):
+        queue.submit("j1", {"n": 2}, owner="B")
+    queue.close()
+
+
+def test_live_snapshot_dropped_when_finished(tmp_path):
+    queue = _queue(tmp_path).start()
+    try:
+        queue.submit("j1", {})
+        job = queue.wait("j1", timeout=5)
+        queue.report("j1", 50.0, "迟到的进度")  # 结束后的回报不再建快照
+    finally:
+        queue.close()
+    assert job["status"] == "succeeded" and job["progress"] == 100.0
+    assert queue._live == {}
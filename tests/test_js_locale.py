@@ -143,7 +143,8 @@ def _assert_valid_js_syntax(dump_text):
 def test_translate_locale_file_uses_shared_js_path(monkeypatch, tmp_path):
     """translate.translate_locale_file 走共用 js_locale，双引号 key 不再 ""key""。"""
     import translate
-    monkeypatch.setattr(translate, "translate_text", lambda text, lang: text)  # identity，不打 Google
+    # identity，不打 Google（批量路径：一次传一个字符串列表）
+    monkeypatch.setattr(translate, "safe_translate_batch", lambda texts, lang: list(texts))
     src = tmp_path / "s.js"
     src.write_text(
         'export default {\n  "滑动验证": "拖动",\n  greeting: "你好"\n}',
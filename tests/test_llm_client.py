@@ -0,0 +1,131 @@
+"""llm_client 异步路径 —— 共享循环 / 同步薄包装 / 在途上限（假 AsyncOpenAI，不打真 API）。"""
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import llm_client
+import rate_limiter
+
+
+class _FakeCompletions:
+    def __init__(self, reply=None, delay=0.0):
+        self.calls = []
+        self.reply = reply
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.loops = set()
+        self.headers = {}
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.loops.add(asyncio.get_running_loop())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        prompt = kwargs["messages"][-1]["content"]
+        body = prompt.split("items):\n", 1)[1]
+        values = json.loads(body.rsplit("\n\nReturn exactly", 1)[0])
+        translations = self.reply if self.reply is not None else [v.upper() for v in values]
+        message = SimpleNamespace(content=json.dumps({"translations": translations}))
+        usage = SimpleNamespace(
+            prompt_tokens=7, completion_tokens=3,
+            prompt_tokens_details=SimpleNamespace(cached_tokens=4),
+        )
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        return SimpleNamespace(headers=self.headers, parse=lambda: response)
+
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    completions = _FakeCompletions()
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_client, "_async_client", client)
+    monkeypatch.setattr(llm_client, "_request_slots", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 1000.0)
+    return completions
+
+
+def test_sync_wrapper_returns_translations(fake_client):
+    assert llm_client.translate_batch(["a", "b"], "French", "fr", "m") == ["A", "B"]
+    assert fake_client.calls[0]["temperature"] == 0.1
+    assert fake_client.loops == {llm_client._get_loop()}
+
+
+def test_on_usage_reports_tokens_and_cache_hits(fake_client):
+    calls = []
+    llm_client.translate_batch(["a"], "French", "fr", "m", on_usage=calls.append)
+    assert len(calls) == 1
+    assert (calls[0]["prompt_tokens"], calls[0]["completion_tokens"], calls[0]["cached_tokens"]) == (7, 3, 4)
+    assert calls[0]["latency_seconds"] >= 0
+
+
+def test_async_from_foreign_loop_runs_on_shared_loop(fake_client):
+    result = asyncio.run(llm_client.translate_batch_async(["x"], "French", "fr", "m"))
+    assert result == ["X"]
+    assert fake_client.loops == {llm_client._get_loop()}
+
+
+def test_empty_values_skip_request(fake_client):
+    assert llm_client.translate_batch([], "French", "fr", "m") == []
+    assert fake_client.calls == []
+
+
+def test_count_mismatch_raises(fake_client):
+    fake_client.reply = ["only one"]
+    with pytest.raises(llm_client.BatchShapeError, match="翻译数量不匹配"):
+        llm_client.translate_batch(["a", "b"], "French", "fr", "m")
+
+
+def test_truncated_output_raises_shape_error(fake_client, monkeypatch):
+    original = fake_client.create
+
+    async def truncated(**kwargs):
+        raw = await original(**kwargs)
+        response = raw.parse()
+        response.choices[0].finish_reason = "length"
+        return raw
+
+    monkeypatch.setattr(fake_client, "create", truncated)
+    with pytest.raises(llm_client.BatchShapeError, match="截断"):
+        llm_client.translate_batch(["a", "b"], "French", "fr", "m")
+
+
+def test_temperature_omitted_when_model_rejects_it(fake_client):
+    llm_client.translate_batch(["a"], "French", "fr", "anthropic/claude-sonnet-5")
+    assert "temperature" not in fake_client.calls[0]
+
+
+def test_in_flight_capped_across_threads(fake_client, monkeypatch):
+    """多线程同步调用共享同一组在途槽位（config.MAX_CONCURRENT_REQUESTS）。"""
+    monkeypatch.setattr(config, "MAX_CONCURRENT_REQUESTS", 2)
+    fake_client.delay = 0.02
+    threads = [
+        threading.Thread(target=llm_client.translate_batch, args=([f"v{i}"], "French", "fr", "m"))
+        for i in range(6)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(fake_client.calls) == 6
+    assert fake_client.peak == 2
+
+
+def test_http_pool_uses_config_limits(monkeypatch):
+    monkeypatch.setattr(config, "HTTP_MAX_CONNECTIONS", 3)
+    monkeypatch.setattr(llm_client, "_http2_available", lambda: False)
+    client = llm_client._build_http_client()
+    try:
+        assert client._transport._pool._max_connections == 3
+    finally:
+        asyncio.run(client.aclose())
@@ -0,0 +1,150 @@
+"""离线 mock OpenRouter + 压测工具 —— 真 llm_client 经 base URL 打本地 mock（loopback，不打真 API）。"""
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import config
+import llm_client
+import rate_limiter
+from benchmarks import run_benchmarks
+from benchmarks.mock_openrouter import MockOpenRouter, pseudo_translate
+from translation_postprocess import contains_english, contains_simplified
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    """起一个 mock，并让 llm_client 指向它（新建 client，测试结束还原）。"""
+    servers = []
+
+    def start(**kwargs):
+        server = MockOpenRouter(**kwargs).start()
+        servers.append(server)
+        monkeypatch.setattr(config, "OPENROUTER_BASE_URL", server.base_url)
+        monkeypatch.setattr(config, "TRANSLATION_MEMORY_DIR", "")
+        monkeypatch.setattr(llm_client, "OPENROUTER_API_KEY", "mock-key")
+        monkeypatch.setattr(llm_client, "_async_client", None)
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def _post(server, values, lang="es"):
+    messages = llm_client._build_messages(values, "Spanish", lang, "", "mock/model")
+    body = json.dumps({"model": "mock/model", "messages": messages}).encode("utf-8")
+    request = urllib.request.Request(
+        server.base_url + "/chat/completions", data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_pseudo_translation_passes_language_checks():
+    text = "请输入{name}的验证码，共 3 次"
+    out = pseudo_translate(text, "zh-TW")
+    assert "{name}" in out and " 3 " in out
+    assert not contains_english(out) and not contains_simplified(out)
+    assert out != pseudo_translate(text, "es")
+    assert pseudo_translate("<b>确认</b>%s").startswith("<b>")
+
+
+def test_translate_batch_through_mock(mock_server):
+    server = mock_server()
+    calls = []
+    out = llm_client.translate_batch(
+        ["确认", "取消{count}"], "Spanish", "es", "mock/model", on_usage=calls.append
+    )
+    assert out == [pseudo_translate("确认", "es"), pseudo_translate("取消{count}", "es")]
+    assert calls[0]["prompt_tokens"] > 0 and calls[0]["completion_tokens"] > 0
+    stats = server.stats()
+    assert stats["requests"] == stats["succeeded"] == 1
+    assert stats["prompt_tokens"] == calls[0]["prompt_tokens"]
+
+
+def test_streaming_through_mock(mock_server, monkeypatch):
+    mock_server()
+    monkeypatch.setattr(config, "LLM_STREAM_RESPONSES", True)
+    items, calls = [], []
+    values = [f"设置{i}" for i in range(12)]
+    out = llm_client.translate_batch(
+        values, "German", "de", "mock/model",
+        on_item=lambda i, v: items.append(i), on_usage=calls.append,
+    )
+    assert out == [pseudo_translate(v, "de") for v in values]
+    assert items == list(range(12))
+    assert calls and calls[0]["completion_tokens"] > 0
+
+
+def test_mismatch_injection_raises_batch_shape_error(mock_server):
+    mock_server(mismatch_rate=1.0)
+    with pytest.raises(llm_client.BatchShapeError):
+        llm_client.translate_batch(["一", "二"], "Spanish", "es", "mock/model")
+
+
+def test_throttle_and_server_errors():
+    with MockOpenRouter(rate_429=1.0, retry_after=2) as server:
+        status, headers, body = _post(server, ["一"])
+    assert status == 429 and headers["Retry-After"] == "2"
+    assert body["error"]["code"] == 429
+
+    with MockOpenRouter(rate_5xx=1.0) as server:
+        status, _headers, _body = _post(server, ["一"])
+        assert status in (500, 502, 503) and server.stats()["server_errors"] == 1
+
+
+def test_injection_is_deterministic_per_seed():
+    """同一 seed、同一请求序列 → 逐请求相同的注入结果（与调度顺序无关）。"""
+    def statuses(seed):
+        with MockOpenRouter(seed=seed, rate_429=0.3, rate_5xx=0.3) as server:
+            return [_post(server, [f"项{i % 3}"])[0] for i in range(12)]
+
+    assert statuses(7) == statuses(7)
+    assert len(set(statuses(7))) > 1
+
+
+def test_prefix_cache_simulated_above_minimum():
+    with MockOpenRouter(min_cache_tokens=1) as server:
+        first = _post(server, ["一"])[2]["usage"]
+        second = _post(server, ["二"])[2]["usage"]
+    assert first["prompt_tokens_details"]["cached_tokens"] == 0
+    assert second["prompt_tokens_details"]["cached_tokens"] > 0
+
+
+def test_locale_pack_is_deterministic():
+    pack = run_benchmarks.make_locale_pack(450, seed=3)
+    assert pack == run_benchmarks.make_locale_pack(450, seed=3)
+    leaves = [v for module in pack.values() for section in module.values() for v in section.values()]
+    assert len(leaves) == 450
+    assert len(set(leaves)) < len(leaves)  # 含重复值
+
+
+def test_run_scenario_reports_metrics(mock_server):
+    server = mock_server(mismatch_rate=0.2, seed=1)
+    row = run_benchmarks.run_scenario(server, 60, ["es", "ja"], "mock/model", seed=1)
+    assert row["failed_languages"] == []
+    assert row["requests"] >= 2 and row["server_requests"] >= row["requests"]
+    assert row["prompt_tokens"] > 0 and row["completion_tokens"] > 0
+    assert row["batch_latency_p95"] >= row["batch_latency_p50"]
+    assert "60" in run_benchmarks.format_results([row])
+
+
+def test_percentile_nearest_rank():
+    assert run_benchmarks.percentile([], 95) == 0.0
+    assert run_benchmarks.percentile([3, 1, 2, 4], 50) == 2
+    assert run_benchmarks.percentile(list(range(1, 101)), 95) == 95
+
+
+def test_multi_language_call_through_mock(mock_server):
+    mock_server()
+    out = llm_client.translate_batch_multi(
+        ["确认", "取消"], [("Spanish", "es", ""), ("Portuguese", "pt", "")], "mock/model"
+    )
+    assert out == {code: [pseudo_translate(v, code) for v in ("确认", "取消")] for code in ("es", "pt")}
@@ -0,0 +1,146 @@
+"""模型故障转移链 + 对冲请求 + 产出模型审计（假 client / monkeypatch，不打真 API）。"""
+import asyncio
+import collections
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import llm_client
+import llm_models
+import rate_limiter
+import translate_llm
+from usage_report import UsageRecorder
+
+
+def test_failover_chain_defaults_to_tier_order():
+    assert llm_models.failover_chain("openai/gpt-5.4") == [
+        "openai/gpt-5.4", "anthropic/claude-sonnet-5", "google/gemini-3.1-flash-lite-preview",
+    ]
+    assert llm_models.failover_chain("custom/m", ["a/x", "custom/m", "b/y"]) == ["custom/m", "a/x", "b/y"]
+
+
+@pytest.fixture
+def failover(monkeypatch):
+    monkeypatch.setattr(config, "MODEL_FAILOVER", True)
+    monkeypatch.setattr(config, "MODEL_FAILOVER_AFTER", 2)
+    monkeypatch.setattr(config, "MODEL_FAILOVER_CHAIN", ["primary", "backup", "cheap"])
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "max_retries", 1)
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "retry_delays", [0])
+
+
+def test_batch_fails_over_after_n_errors(failover, monkeypatch):
+    calls = []
+
+    def fake(items, lang, model, **kwargs):
+        calls.append(model)
+        if model != "cheap":
+            raise RuntimeError(f"{model} 503")
+        return {k: f"{model}:{v}" for k, v in items.items()}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    recorder = UsageRecorder()
+    scope = recorder.scope("f", "ja", "primary")
+    translated, failed, error = translate_llm._translate_items(1, {"k": "确认"}, "ja", "primary", usage=scope)
+
+    # 每个模型轮到 N=2 次；重试上限放宽到整条链都轮得到（max_retries=1 也不提前放弃）
+    assert calls == ["primary", "primary", "backup", "backup", "cheap"]
+    assert translated == {"k": "cheap:确认"} and failed == [] and error is None
+    assert recorder.report()["rerouted"] == [
+        {"file": "f", "language": "ja", "requested_model": "primary", "model": "cheap", "source": "确认"},
+    ]
+
+
+def test_failover_off_keeps_single_model(monkeypatch):
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "max_retries", 1)
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "retry_delays", [0])
+    calls = []
+
+    def boom(items, lang, model, **kwargs):
+        calls.append(model)
+        raise RuntimeError("503")
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", boom)
+    translated, failed, error = translate_llm._translate_items(1, {"k": "确认"}, "ja", "primary")
+    assert calls == ["primary", "primary"]
+    assert translated == {"k": "确认"} and failed == ["k"] and "503" in error
+
+
+def test_usage_priced_per_actual_model():
+    recorder = UsageRecorder()
+    scope = recorder.scope("f", "ja", "anthropic/claude-sonnet-5")
+    call = {"prompt_tokens": 10, "completion_tokens": 5, "cached_tokens": 0, "latency_seconds": 1.0}
+    scope.record_call(1, {**call, "model": "anthropic/claude-sonnet-5"})
+    scope.record_call(2, {**call, "model": "google/gemini-3.1-flash-lite-preview"})
+    models = {entry["model"]: entry["requests"] for entry in recorder.report()["files"]}
+    assert models == {"anthropic/claude-sonnet-5": 1, "google/gemini-3.1-flash-lite-preview": 1}
+
+
+class _PerModelCompletions:
+    """按模型设延迟，返回 "<模型>:<原文>"。"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.started, self.cancelled = [], []
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        model = kwargs["model"]
+        self.started.append(model)
+        try:
+            await asyncio.sleep(self.delays.get(model, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+        body = kwargs["messages"][-1]["content"].split("items):\n", 1)[1]
+        values = json.loads(body.rsplit("\n\nReturn exactly", 1)[0])
+        message = SimpleNamespace(content=json.dumps({"translations": [f"{model}:{v}" for v in values]}))
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+@pytest.fixture
+def hedging(monkeypatch):
+    def make(delays, history=0.01):
+        completions = _PerModelCompletions(delays)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(llm_client, "_async_client", client)
+        monkeypatch.setattr(llm_client, "_request_slots", None)
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+        monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 1000.0)
+        monkeypatch.setattr(config, "HEDGE_REQUESTS", True)
+        monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 5)
+        monkeypatch.setattr(llm_client, "_batch_latencies", {
+            "slow": collections.deque([history] * 5, maxlen=llm_client._LATENCY_WINDOW),
+        })
+        return completions
+    return make
+
+
+def test_hedge_fires_after_p95_and_takes_first_result(hedging):
+    completions = hedging({"slow": 2.0, "fast": 0.0})
+    produced = []
+    out = llm_client.translate_batch(
+        ["确认"], "Japanese", "ja", "slow", hedge_model="fast", on_model=produced.append,
+    )
+    assert out == ["fast:确认"] and produced == ["fast"]
+    assert completions.started == ["slow", "fast"]
+    assert completions.cancelled == ["slow"]  # 胜出后另一路取消
+
+
+def test_no_hedge_when_primary_within_p95(hedging):
+    completions = hedging({"slow": 0.0}, history=1.0)
+    produced = []
+    out = llm_client.translate_batch(
+        ["确认"], "Japanese", "ja", "slow", hedge_model="fast", on_model=produced.append,
+    )
+    assert out == ["slow:确认"] and produced == ["slow"]
+    assert completions.started == ["slow"]
+
+
+def test_no_hedge_without_enough_samples(hedging, monkeypatch):
+    completions = hedging({"slow": 0.05})
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 50)
+    assert llm_client.translate_batch(["a"], "Japanese", "ja", "slow", hedge_model="fast") == ["slow:a"]
+    assert completions.started == ["slow"]
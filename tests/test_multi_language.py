@@ -0,0 +1,150 @@
+"""多语言单次调用 —— 合并 schema / 语言分组 / 预翻译 + 单语言补译（假 client / monkeypatch，不打真 API）。"""
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+import llm_client
+import rate_limiter
+import translate_llm
+import translation_runner
+
+
+class _FakeMultiCompletions:
+    """按 response_format 里的语言代码返回 "<代码>:<原文>"；drop 为少返回一项的语言代码。"""
+
+    def __init__(self, drop=None):
+        self.calls = []
+        self.drop = drop
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        body = kwargs["messages"][-1]["content"].split("items):\n", 1)[1]
+        values = json.loads(body.rsplit("\n\nReturn exactly", 1)[0])
+        schema = kwargs["response_format"]["json_schema"]["schema"]["properties"]["translations"]
+        out = {code: [f"{code}:{v}" for v in values] for code in schema["properties"]}
+        if self.drop:
+            out[self.drop] = out[self.drop][:-1]
+        message = SimpleNamespace(content=json.dumps({"translations": out}))
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+@pytest.fixture
+def fake_multi(monkeypatch):
+    def make(**kwargs):
+        completions = _FakeMultiCompletions(**kwargs)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(llm_client, "_async_client", client)
+        monkeypatch.setattr(llm_client, "_request_slots", None)
+        monkeypatch.setattr(rate_limiter, "_limiters", {})
+        monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 1000.0)
+        return completions
+    return make
+
+
+def test_translate_batch_multi_schema_and_prompt(fake_multi):
+    completions = fake_multi()
+    targets = [("Spanish", "es", "es rule"), ("French", "fr", "fr rule")]
+    out = llm_client.translate_batch_multi(["a", "b"], targets, "m")
+    assert out == {"es": ["es:a", "es:b"], "fr": ["fr:a", "fr:b"]}
+
+    call = completions.calls[0]
+    schema = call["response_format"]["json_schema"]["schema"]["properties"]["translations"]
+    assert schema["required"] == ["es", "fr"]
+    system = call["messages"][0]["content"]
+    assert "Spanish (es), French (fr)" in system
+    assert "CAPITALIZATION RULES for Spanish (es):\nes rule" in system
+    assert "CAPITALIZATION RULES for French (fr):\nfr rule" in system
+
+
+def test_translate_batch_multi_count_mismatch(fake_multi):
+    fake_multi(drop="fr")
+    with pytest.raises(llm_client.BatchShapeError, match="fr"):
+        llm_client.translate_batch_multi(["a", "b"], [("Spanish", "es", ""), ("French", "fr", "")], "m")
+
+
+def test_group_languages_by_family_and_cap(monkeypatch):
+    monkeypatch.setattr(config, "MULTI_LANGUAGE_MAX_GROUP", 3)
+    langs = ["en", "es", "de", "pt", "zh-TW", "it", "fr", "zh-Hant", "ja"]
+    groups = translation_runner.group_languages(langs, "m", ["确认", "取消"])
+    assert groups == [["es", "pt", "it"], ["zh-TW", "zh-Hant"]]  # fr 单独剩下，不成组
+
+
+def test_group_languages_respects_output_cap(monkeypatch):
+    """长文本：合并后一批装不下足够条数 → 不分组（退回逐语言）。"""
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "multi_language_min_batch", 10)
+    long_values = ["很长的说明文字" * 60]
+    assert translation_runner.group_languages(["es", "fr"], "m", long_values) == []
+    assert translation_runner.group_languages(["es", "fr"], "m", ["确认"]) == [["es", "fr"]]
+
+
+@pytest.fixture
+def multi_engine(monkeypatch):
+    """假引擎：合并调用返回 "<语言>:<原文>"，单语言调用返回 "<语言>~<原文>"。"""
+    calls = {"multi": [], "single": []}
+
+    def fake_multi(values, targets, model, **kwargs):
+        codes = [code for _name, code, _rule in targets]
+        calls["multi"].append((codes, list(values)))
+        return {code: [f"{code}:{v}" for v in values] for code in codes}
+
+    def fake_single(values, target_lang_code, **kwargs):
+        calls["single"].append((target_lang_code, list(values)))
+        return [f"{target_lang_code}~{v}" for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch_multi", fake_multi)
+    monkeypatch.setattr(
+        translate_llm, "translate_batch",
+        lambda values, target_lang_name, target_lang_code, **kw: fake_single(values, target_lang_code),
+    )
+    monkeypatch.setattr(config, "MULTI_LANGUAGE_CALLS", True)
+    monkeypatch.setattr(config, "TRANSLATION_MEMORY_DIR", "")
+    return calls
+
+
+def _run(tmp_path, langs, data):
+    src = tmp_path / "pack.json"
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    results = translation_runner.translate_single_file_multi(
+        str(src), langs, "openrouter", "m", str(tmp_path)
+    )
+    assert all(error is None for _lang, _res, error in results)
+    return {
+        lang: json.loads((tmp_path / f"pack_{lang}.json").read_text(encoding="utf-8"))
+        for lang in langs
+    }
+
+
+def test_grouped_languages_share_one_call(tmp_path, multi_engine):
+    data = {"a": "确认", "b": {"c": "取消", "d": "确认"}}
+    outputs = _run(tmp_path, ["es", "fr", "ja"], data)
+
+    assert multi_engine["multi"] == [(["es", "fr"], ["确认", "取消"])]  # 去重后一次合并请求
+    assert multi_engine["single"] == [("ja", ["确认", "取消"])]        # 不在组内的语言照常
+    assert outputs["es"] == {"a": "es:确认", "b": {"c": "es:取消", "d": "es:确认"}}
+    assert outputs["fr"]["b"]["c"] == "fr:取消"
+    assert outputs["ja"]["a"] == "ja~确认"
+
+
+def test_failed_multi_call_falls_back_per_language(tmp_path, multi_engine, monkeypatch):
+    def broken(values, targets, model, **kwargs):
+        raise llm_client.BatchShapeError("翻译数量不匹配")
+
+    monkeypatch.setattr(translate_llm, "translate_batch_multi", broken)
+    outputs = _run(tmp_path, ["es", "pt"], {"a": "确认"})
+    assert sorted(lang for lang, _values in multi_engine["single"]) == ["es", "pt"]
+    assert outputs["pt"] == {"a": "pt~确认"}
+
+
+def test_english_leak_drops_only_that_language(tmp_path, multi_engine, monkeypatch):
+    def leaky(values, targets, model, **kwargs):
+        return {code: ["Cancel" if code == "pt" else f"{code}:{v}" for v in values]
+                for _name, code, _rule in targets}
+
+    monkeypatch.setattr(translate_llm, "translate_batch_multi", leaky)
+    outputs = _run(tmp_path, ["es", "pt"], {"a": "取消"})
+    assert outputs["es"] == {"a": "es:取消"}
+    assert outputs["pt"] == {"a": "pt~取消"}  # 英文混入 → 该语言由单语言管线补译
@@ -21,3 +21,21 @@ def test_prompt_still_has_core_requirements():
 def test_capitalization_section_injected_when_provided():
     p = llm_client._build_prompt(["x"], "German", "de", "RULE-MARKER-XYZ")
     assert "RULE-MARKER-XYZ" in p
+
+
+def test_system_prefix_stable_across_batches():
+    """system 前缀不随批次内容 / 条数变化 —— provider 侧 prompt cache 才能命中。"""
+    a = llm_client._build_messages(["x"], "German", "de", "R", "openai/gpt-5.4")
+    b = llm_client._build_messages(["y", "z", "w"], "German", "de", "R", "openai/gpt-5.4")
+    assert [m["role"] for m in a] == ["system", "user"]
+    assert a[0] == b[0]
+    assert "RULE" not in a[1]["content"] and '"y"' in b[1]["content"]
+
+
+def test_cache_control_only_for_explicit_cache_models():
+    explicit = llm_client._build_messages(["x"], "German", "de", "", "anthropic/claude-sonnet-5")
+    implicit = llm_client._build_messages(["x"], "German", "de", "", "openai/gpt-5.4")
+    unknown = llm_client._build_messages(["x"], "German", "de", "", "vendor/unknown")
+    block = explicit[0]["content"][0]
+    assert block["cache_control"] == {"type": "ephemeral"}
+    assert block["text"] == implicit[0]["content"] == unknown[0]["content"]
@@ -1,6 +1,7 @@
 """D.7 回灌重译闭环 —— qa_retranslate + translate_json_file_llm sidecar（monkeypatch，不打真 API）。"""
 import json
 
+import llm_client
 import translate_llm
 
 
@@ -8,7 +9,7 @@ def test_qa_retranslate_fixes_flagged(monkeypatch):
     """第一轮含英文残留 → 重译修好 → remaining 空。"""
     translated = {"k1": "確定", "k2": "Confirm"}   # k2 英文未翻
     source = {"k1": "确定", "k2": "确认"}
-    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda to_fix, lang, model: {k: "確認" for k in to_fix})
+    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda to_fix, lang, model, **kw: {k: "確認" for k in to_fix})
     out, remaining = translate_llm.qa_retranslate(translated, source, "zh-TW", "m", max_rounds=1)
     assert out["k2"] == "確認"
     assert remaining == []
@@ -16,7 +17,7 @@ def test_qa_retranslate_fixes_flagged(monkeypatch):
 
 def test_qa_retranslate_residual_goes_to_review(monkeypatch):
     """重译后仍英文 → 进 remaining（人工队列）。"""
-    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda to_fix, lang, model: {k: "Still English" for k in to_fix})
+    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda to_fix, lang, model, **kw: {k: "Still English" for k in to_fix})
     out, remaining = translate_llm.qa_retranslate({"k": "Confirm"}, {"k": "确认"}, "zh-TW", "m", max_rounds=1)
     assert len(remaining) == 1
     assert remaining[0][0] == "k"
@@ -40,10 +41,95 @@ def test_translate_json_file_writes_needs_review(monkeypatch, tmp_path):
     """
     src = tmp_path / "s.json"
     src.write_text('{"k": "确认"}', encoding="utf-8")
-    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda items, lang, model: {k: "abc" for k in items})
+    monkeypatch.setattr(translate_llm, "translate_with_llm", lambda items, lang, model, **kw: {k: "abc" for k in items})
     out_name = translate_llm.translate_json_file_llm(str(src), "zh-TW", None, "m", str(tmp_path))
     review = tmp_path / out_name.replace(".json", ".needs_review.json")
     assert review.exists()
     data = json.loads(review.read_text(encoding="utf-8"))
     assert data[0]["key"] == "k"
     assert data[0]["reason"] == "英文未翻译"
+
+
+def test_qa_uses_reason_prompt_and_dedupes_sources(monkeypatch):
+    """按原因分组、同一原文只送一次；纠错参数（原因 + 被驳回译文）传给翻译层。"""
+    calls = []
+
+    def fake(to_fix, lang, model, **kw):
+        calls.append((dict(to_fix), kw["qa_reason"], kw["rejected"]))
+        return {k: "確認" for k in to_fix}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    translated = {"a": "Confirm", "b": "Confirm", "c": "确认"}
+    source = {"a": "确认", "b": "确认", "c": "确认2"}
+    out, remaining = translate_llm.qa_retranslate(translated, source, "zh-TW", "m")
+    assert sorted(call[1] for call in calls) == ["简体残留", "英文未翻译"]
+    english = next(call for call in calls if call[1] == "英文未翻译")
+    assert list(english[0].values()) == ["确认"] and english[2] == ["Confirm"]
+    assert out == {"a": "確認", "b": "確認", "c": "確認"} and remaining == []
+
+
+def test_qa_cache_reused_across_files(monkeypatch):
+    calls = []
+
+    def fake(to_fix, lang, model, **kw):
+        calls.append(list(to_fix.values()))
+        return {k: "確認" for k in to_fix}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    translate_llm.qa_retranslate({"k": "Confirm"}, {"k": "确认"}, "zh-TW", "m")
+    out, remaining = translate_llm.qa_retranslate({"x": "Confirm"}, {"x": "确认"}, "zh-TW", "m")
+    assert calls == [["确认"]]  # 第二个文件命中缓存，不再请求
+    assert out == {"x": "確認"} and remaining == []
+
+
+def test_qa_stops_when_round_repeats_output(monkeypatch):
+    """重译结果与上一版相同 → 提前结束，不耗尽 max_rounds。"""
+    calls = []
+    monkeypatch.setattr(
+        translate_llm, "translate_with_llm",
+        lambda to_fix, lang, model, **kw: calls.append(1) or {k: "Still English" for k in to_fix},
+    )
+    out, remaining = translate_llm.qa_retranslate(
+        {"k": "Confirm"}, {"k": "确认"}, "zh-TW", "m", max_rounds=5
+    )
+    assert len(calls) == 2  # 第 2 轮（带上第 1 轮被驳回的译文）仍得到同样结果 → 停
+    assert remaining == [("k", "Still English", "英文未翻译")]
+
+
+def test_qa_prompt_feeds_back_reason_and_rejected():
+    messages = llm_client._build_qa_messages(
+        ["确认"], ["確认"], "简体残留", "Chinese (Traditional)", "zh-TW", "", "m"
+    )
+    assert "CORRECTION PASS" in messages[0]["content"] and "Simplified" in messages[0]["content"]
+    user = messages[1]["content"]
+    assert user.index('"確认"') < user.index("Input strings (1 items)")
+
+
+def test_qa_cache_skips_results_that_still_fail(monkeypatch):
+    """重译结果仍不合格 → 不进缓存，下一个文件照常请求。"""
+    calls = []
+
+    def fake(to_fix, lang, model, **kw):
+        calls.append(1)
+        return {k: "Still English" for k in to_fix}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    translate_llm.qa_retranslate({"k": "Confirm"}, {"k": "确认"}, "zh-TW", "m")
+    translate_llm.qa_retranslate({"x": "Confirm"}, {"x": "确认"}, "zh-TW", "m")
+    assert len(calls) == 2 and not translate_llm._qa_cache
+
+
+def test_qa_cache_keyed_by_prompt_fingerprint(monkeypatch):
+    """术语表 / prompt 变了（指纹不同）→ 旧修复不再命中。"""
+    calls = []
+
+    def fake(to_fix, lang, model, **kw):
+        calls.append(1)
+        return {k: "確認" for k in to_fix}
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", fake)
+    monkeypatch.setattr(translate_llm, "_prompt_fingerprint", lambda lang: "v1")
+    translate_llm.qa_retranslate({"k": "Confirm"}, {"k": "确认"}, "zh-TW", "m")
+    monkeypatch.setattr(translate_llm, "_prompt_fingerprint", lambda lang: "v2")
+    translate_llm.qa_retranslate({"x": "Confirm"}, {"x": "确认"}, "zh-TW", "m")
+    assert len(calls) == 2
@@ -0,0 +1,106 @@
+"""自适应限流器 —— 令牌桶 / AIMD / Retry-After / 429 回馈（假时钟 + 假 client，不打真 API）。"""
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+import config
+import llm_client
+import rate_limiter
+import translate_llm
+from rate_limiter import AdaptiveRateLimiter, parse_retry_after
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _limiter(**kwargs):
+    clock = _Clock()
+    params = dict(rate=2.0, min_rate=0.5, max_rate=4.0, step=1.0, backoff=0.5, clock=clock)
+    params.update(kwargs)
+    return AdaptiveRateLimiter("m", **params), clock
+
+
+def test_bucket_paces_at_rate():
+    limiter, clock = _limiter()
+    assert limiter.try_acquire() == 0
+    assert limiter.try_acquire() == pytest.approx(0.5)   # 2 req/s → 下一个令牌 0.5s 后
+    clock.now += 0.5
+    assert limiter.try_acquire() == 0
+
+
+def test_aimd_increase_and_backoff():
+    limiter, clock = _limiter()
+    limiter.on_success({})
+    limiter.on_success({})
+    limiter.on_success({})
+    assert limiter.rate == 4.0                             # 加性增，封顶 max_rate
+    limiter.on_throttle({"retry-after": "3"})
+    assert limiter.rate == 2.0                             # 乘性减
+    assert limiter.try_acquire() == pytest.approx(3.0)     # 暂停到 Retry-After
+    clock.now += 3.0
+    assert limiter.try_acquire() == pytest.approx(0.5)     # 暂停期间不积攒令牌
+    for _ in range(5):
+        limiter.on_throttle({"retry-after": "0"})
+    assert limiter.rate == 0.5                             # 下限 min_rate
+
+
+def test_exhausted_quota_header_pauses_until_reset():
+    limiter, clock = _limiter()
+    reset_ms = (time.time() + 2.0) * 1000
+    limiter.on_success({"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(reset_ms)})
+    assert limiter.try_acquire() == pytest.approx(2.0, abs=0.1)
+
+
+def test_parse_retry_after_variants():
+    assert parse_retry_after({"retry-after-ms": "1500"}) == 1.5
+    assert parse_retry_after({"retry-after": "4"}) == 4.0
+    assert parse_retry_after({"retry-after": "Thu, 01 Jan 1970 00:00:10 GMT"}, now=4.0) == 6.0
+    assert parse_retry_after({"x-ratelimit-reset": "1700000002000"}, now=1700000000.0) == 2.0
+    assert parse_retry_after({}) is None
+
+
+def _rate_limit_error(headers):
+    response = httpx.Response(429, headers=headers, request=httpx.Request("POST", "http://x"))
+    return openai.RateLimitError("slow down", response=response, body=None)
+
+
+def test_429_feeds_shared_limiter_and_reraises(monkeypatch):
+    async def create(**kwargs):
+        raise _rate_limit_error({"retry-after": "0"})
+
+    completions = SimpleNamespace(create=create)
+    completions.with_raw_response = completions
+    client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    monkeypatch.setattr(llm_client, "_async_client", client)
+    monkeypatch.setattr(llm_client, "_request_slots", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 8.0)
+
+    with pytest.raises(openai.RateLimitError):
+        llm_client.translate_batch(["a"], "French", "fr", "m")
+    assert rate_limiter.get_rate_limiter("m").rate == 8.0 * config.RATE_LIMIT_BACKOFF
+
+
+def test_retry_skips_fixed_sleep_on_throttle(monkeypatch):
+    """429 重试不再叠加固定延迟（等待交给限流器）；其它错误仍按 retry_delays 退避。"""
+    sleeps = []
+    monkeypatch.setattr(translate_llm.time, "sleep", sleeps.append)
+    errors = [_rate_limit_error({}), RuntimeError("502")]
+
+    def flaky(items, lang, model):
+        if errors:
+            raise errors.pop(0)
+        return dict(items)
+
+    monkeypatch.setattr(translate_llm, "translate_with_llm", flaky)
+    translated, failure = translate_llm._translate_batch_with_retry(1, {("a",): "x"}, "en", "m")
+    assert failure is None
+    assert sleeps == [translate_llm._get_retry_delay(2)]
@@ -11,9 +11,17 @@ MODULES = [
     "config",
     "translation_config",
     "translation_postprocess",
+    "translation_memory",
+    "token_estimator",
+    "rate_limiter",
+    "circuit_breaker",
+    "checkpoint",
+    "job_queue",
+    "usage_report",
     "js_locale",
     "llm_models",
     "llm_client",
+    "cost_calibration",
     "cost_estimator",
     "translate",
     "translate_llm",
@@ -0,0 +1,149 @@
+"""llm_client 流式模式 —— 增量解析 / 批内回调 / 断流只重请求剩余项（假流，不打真 API）。"""
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+import config
+import llm_client
+import rate_limiter
+import translate_llm
+from llm_client import BatchShapeError, _TranslationArrayParser
+
+
+def _prompt_values(kwargs):
+    body = kwargs["messages"][-1]["content"].split("items):\n", 1)[1]
+    return json.loads(body.rsplit("\n\nReturn exactly", 1)[0])
+
+
+def _chunk(content=None, finish_reason=None):
+    delta = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class _FakeStream:
+    """每次请求按 plan 的下一项决定：'ok' 完整返回；('break', n) 发完 n 项后断流；
+    ('length', n) 发完 n 项后 finish_reason=length。内容按 5 字符切片发送。"""
+
+    def __init__(self, plan):
+        self.plan = list(plan)
+        self.calls = []
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        assert kwargs["stream"] is True
+        values = _prompt_values(kwargs)
+        self.calls.append(values)
+        mode = self.plan.pop(0) if self.plan else "ok"
+        kind, count = (mode, len(values)) if mode == "ok" else mode
+        text = json.dumps({"translations": [v.upper() for v in values]})
+        if kind != "ok":
+            cut = json.dumps({"translations": [v.upper() for v in values[:count]]})[:-2]
+            text = cut + ', "PART'  # 半个未收全的字符串
+
+        async def chunks():
+            for i in range(0, len(text), 5):
+                yield _chunk(text[i:i + 5])
+            if kind == "break":
+                raise httpx.ReadError("connection reset")
+            yield _chunk(finish_reason="length" if kind == "length" else "stop")
+
+        return SimpleNamespace(headers={}, parse=chunks)
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    def install(plan=()):
+        completions = _FakeStream(plan)
+        client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        monkeypatch.setattr(llm_client, "_async_client", client)
+        return completions
+
+    monkeypatch.setattr(config, "LLM_STREAM_RESPONSES", True)
+    monkeypatch.setattr(llm_client, "_request_slots", None)
+    monkeypatch.setattr(rate_limiter, "_limiters", {})
+    monkeypatch.setattr(config, "RATE_LIMIT_INITIAL_RPS", 1000.0)
+    return install
+
+
+def test_parser_handles_split_strings_and_escapes():
+    parser = _TranslationArrayParser()
+    text = json.dumps({"translations": ['a "q"', "b\\né", "]c"]}, ensure_ascii=False)
+    items = []
+    for ch in text:
+        items.extend(parser.feed(ch))
+    assert items == ['a "q"', "b\\né", "]c"] and parser.closed
+
+
+def test_parser_rejects_non_string_items():
+    with pytest.raises(BatchShapeError):
+        _TranslationArrayParser().feed('{"translations": [1]}')
+
+
+def test_stream_reports_items_as_they_arrive(stream):
+    completions = stream()
+    seen = []
+    result = llm_client.translate_batch(
+        ["a", "b", "c"], "French", "fr", "m", on_item=lambda i, v: seen.append((i, v))
+    )
+    assert result == ["A", "B", "C"]
+    assert seen == [(0, "A"), (1, "B"), (2, "C")]
+    assert len(completions.calls) == 1
+
+
+def test_on_item_runs_outside_shared_loop(stream):
+    """on_item 在调用方线程 / 调用方循环里执行，慢回调不占共享事件循环。"""
+    stream()
+    caller = threading.get_ident()
+    threads = []
+    llm_client.translate_batch(
+        ["a", "b"], "French", "fr", "m", on_item=lambda i, v: threads.append(threading.get_ident())
+    )
+    assert threads == [caller, caller]
+
+    async def run():
+        seen = []
+        result = await llm_client.translate_batch_async(
+            ["a", "b"], "French", "fr", "m",
+            on_item=lambda i, v: seen.append((i, threading.get_ident())),
+        )
+        return result, seen
+
+    result, seen = asyncio.run(run())
+    assert result == ["A", "B"] and seen == [(0, caller), (1, caller)]
+
+
+@pytest.mark.parametrize("failure", ["break", "length"])
+def test_broken_stream_keeps_prefix_and_requests_rest(stream, failure):
+    completions = stream([(failure, 2)])
+    seen = []
+    result = llm_client.translate_batch(
+        ["a", "b", "c", "d"], "French", "fr", "m", on_item=lambda i, v: seen.append(i)
+    )
+    assert result == ["A", "B", "C", "D"]
+    assert completions.calls == [["a", "b", "c", "d"], ["c", "d"]]
+    assert seen == [0, 1, 2, 3]
+
+
+def test_broken_stream_without_progress_raises(stream):
+    stream([("break", 0)])
+    with pytest.raises(httpx.ReadError):
+        llm_client.translate_batch(["a", "b"], "French", "fr", "m")
+    stream([("length", 0)])
+    with pytest.raises(BatchShapeError, match="输出不完整"):
+        llm_client.translate_batch(["a", "b"], "French", "fr", "m")
+
+
+def test_run_batches_reports_in_batch_progress(stream, monkeypatch):
+    stream()
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "max_in_flight", 1)
+    messages = []
+    translated, failed = translate_llm._run_batches(
+        [{("a",): "x", ("b",): "y"}], "en", "m", 2, lambda pct, msg: messages.append((pct, msg)),
+    )
+    assert translated == {("a",): "X", ("b",): "Y"} and failed == []
+    assert (50.0, "批次 1/1 已接收 1/2 项") in messages
+    assert (100.0, "批次 1/1 已接收 2/2 项") in messages
@@ -0,0 +1,68 @@
+"""token 预算分批 —— 按文字系统估算 / 只算值不算 key / 受 completion 预算与模型 context 约束。"""
+import pytest
+
+import translate_llm
+from token_estimator import estimate_tokens
+from translation_config import BATCH_CONFIG
+
+
+def test_estimate_tokens_is_script_aware():
+    assert estimate_tokens("保存设置") == 4            # CJK ≈ 1 字/token
+    assert estimate_tokens("Save settings") == 4       # 拉丁 ≈ 4 字符/token
+    assert estimate_tokens("Сохранить") == 5           # 西里尔 ≈ 2 字符/token
+    assert estimate_tokens("") == 1
+
+
+def test_keys_do_not_count_toward_budget(monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, "token_max_batch_size", 1000)
+    short_keys = [((f"k{i}",), "确定") for i in range(50)]
+    long_keys = [((f"very.long.nested.key.path.{'x' * 200}.{i}",), "确定") for i in range(50)]
+    assert len(translate_llm._create_dynamic_batches(short_keys, True, "en", "m")) == \
+        len(translate_llm._create_dynamic_batches(long_keys, True, "en", "m"))
+
+
+def test_completion_budget_bounds_each_batch(monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, "token_max_batch_size", 1000)
+    monkeypatch.setitem(BATCH_CONFIG, "batch_token_budget", 10**6)
+    items = [((str(i),), "这是一段较长的界面说明文字，用于测试分批。" * 3) for i in range(400)]
+    batches = translate_llm._create_dynamic_batches(items, True, "de", "m")
+    _total, completion_budget, _overhead = translate_llm._batch_token_limits("de", "m")
+    assert len(batches) > 1
+    for batch in batches:
+        assert sum(translate_llm._item_tokens(v)[1] for v in batch.values()) <= completion_budget
+    # 顺序保持、无遗漏
+    assert [k for b in batches for k in b] == [k for k, _ in items]
+
+
+def test_model_context_caps_total_budget(monkeypatch):
+    monkeypatch.setitem(BATCH_CONFIG, "batch_token_budget", 10**7)
+    total, _completion, _overhead = translate_llm._batch_token_limits(
+        "en", "google/gemini-3.1-flash-lite-preview"
+    )
+    assert total == 1_048_576 - translate_llm.DEFAULT_MAX_TOKENS
+
+
+def test_fewer_batches_than_char_strategy(monkeypatch):
+    """短 UI 串：token 装箱比旧字符分批批次更少（更少往返 / 每批开销）。"""
+    items = [((f"section.key{i}",), f"按钮文字{i}") for i in range(200)]
+    token_batches = translate_llm._create_dynamic_batches(items, True, "en", "m")
+    monkeypatch.setitem(BATCH_CONFIG, "batch_strategy", "chars")
+    monkeypatch.setitem(BATCH_CONFIG, "max_batch_size", 25)
+    char_batches = translate_llm._create_dynamic_batches(items, True, "en", "m")
+    assert len(token_batches) < len(char_batches)
+
+
+@pytest.mark.parametrize("lang", ["en", "zh-TW", "ar"])
+def test_prompt_overhead_counted(lang):
+    _total, _completion, overhead = translate_llm._batch_token_limits(lang, "m")
+    assert overhead > 100
+
+
+def test_item_caps_are_per_strategy(monkeypatch):
+    """chars 策略沿用 max_batch_size（25）；tokens 策略用独立的 token_max_batch_size。"""
+    assert BATCH_CONFIG["max_batch_size"] == 25
+    items = [((f"k{i}",), "确定") for i in range(100)]
+    monkeypatch.setitem(BATCH_CONFIG, "token_max_batch_size", 40)
+    assert [len(b) for b in translate_llm._create_dynamic_batches(items, True, "en", "m")] == [40, 40, 20]
+    monkeypatch.setitem(BATCH_CONFIG, "batch_strategy", "chars")
+    assert [len(b) for b in translate_llm._create_dynamic_batches(items, True, "en", "m")] == [25] * 4
@@ -0,0 +1,92 @@
+"""翻译记忆（TM）—— 存取 / 指纹失效 / translate_json_file_llm 只送 cache miss（不打真 API）。"""
+import json
+
+import pytest
+
+import config
+import translate_llm
+import translation_memory
+from translation_memory import TranslationMemory
+
+
+@pytest.fixture
+def tm_dir(tmp_path, monkeypatch):
+    d = tmp_path / "tm"
+    monkeypatch.setattr(config, "TRANSLATION_MEMORY_DIR", str(d))
+    monkeypatch.setattr(translation_memory, "_memory", None)
+    return d
+
+
+@pytest.fixture
+def upper_engine(monkeypatch):
+    sent = []
+
+    def fake_translate_batch(values, **kwargs):
+        sent.extend(values)
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    return sent
+
+
+def _run(tmp_path, data, lang="en"):
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    out = translate_llm.translate_json_file_llm(str(src), lang, None, "m", str(tmp_path / "out"))
+    return json.loads((tmp_path / "out" / out).read_text(encoding="utf-8"))
+
+
+def test_store_lookup_and_invalidate(tmp_path):
+    tm = TranslationMemory(str(tmp_path))
+    tm.store({"保存": "Save", "取消": "Cancel"}, "en", "m", "fp1")
+    assert tm.lookup(["保存", "取消", "新"], "en", "m", "fp1") == {"保存": "Save", "取消": "Cancel"}
+    # 键的任一维不同都不命中
+    assert tm.lookup(["保存"], "es", "m", "fp1") == {}
+    assert tm.lookup(["保存"], "en", "other", "fp1") == {}
+    assert tm.lookup(["保存"], "en", "m", "fp2") == {}
+    # 指纹换代 → 旧条目清理
+    assert tm.invalidate_stale("en", "m", "fp2") == 2
+    assert tm.lookup(["保存"], "en", "m", "fp1") == {}
+    tm.close()
+
+
+def test_disabled_when_dir_empty(monkeypatch):
+    monkeypatch.setattr(config, "TRANSLATION_MEMORY_DIR", "")
+    assert translation_memory.get_translation_memory() is None
+
+
+def test_second_run_sends_only_misses(tmp_path, tm_dir, upper_engine):
+    first = _run(tmp_path, {"a": "one", "b": {"c": "two"}})
+    assert sorted(upper_engine) == ["one", "two"]
+    upper_engine.clear()
+
+    second = _run(tmp_path, {"a": "one", "b": {"c": "two"}, "d": "three"})
+    assert upper_engine == ["three"]
+    assert second == {"a": "ONE", "b": {"c": "TWO"}, "d": "THREE"}
+    assert first == {"a": "ONE", "b": {"c": "TWO"}}
+
+
+def test_prompt_change_invalidates(tmp_path, tm_dir, upper_engine, monkeypatch):
+    _run(tmp_path, {"a": "one"})
+    upper_engine.clear()
+    monkeypatch.setitem(translate_llm.CAPITALIZATION_RULES, "en", "- a brand new rule")
+    _run(tmp_path, {"a": "one"})
+    assert upper_engine == ["one"]
+
+
+def test_failed_and_glossary_paths_not_stored(tmp_path, tm_dir, monkeypatch):
+    """失败批（保留原文）不入 TM；叶子 key 命中术语表的路径不入 TM。"""
+    monkeypatch.setattr(translate_llm.time, "sleep", lambda *_: None)
+
+    def fake_translate_batch(values, **kwargs):
+        if "bad" in values:
+            raise RuntimeError("boom")
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    monkeypatch.setitem(translate_llm.BATCH_CONFIG, "token_max_batch_size", 1)
+    _run(tmp_path, {"确定": "ok", "x": "bad", "y": "fine"})
+
+    memory = translation_memory.get_translation_memory()
+    fp = translate_llm._prompt_fingerprint("en")
+    assert memory.lookup(["ok", "bad", "fine"], "en", "m", fp) == {"fine": "FINE"}
@@ -90,3 +90,48 @@ def test_strict_validation_no_destructive_marker():
     for value in out.values():
         assert "[需要重新翻译]" not in value
     assert out["USDT提現"] == "USDT提現"
+
+
+def test_qa_flags_match_per_check_detectors():
+    """单遍标记与逐条检测器逐位一致；flag_reasons 英文优先于简体、非字符串跳过。"""
+    texts = ENGLISH_NEGATIVES + ENGLISH_POSITIVES + SIMPLIFIED_POSITIVES + SIMPLIFIED_NEGATIVES
+    for text, flags in zip(texts, pp.scan_flags(texts)):
+        assert bool(flags & pp.FLAG_SUSPECT_LATIN) == pp.contains_english(text)
+        assert bool(flags & pp.FLAG_SIMPLIFIED) == pp.contains_simplified(text)
+        assert bool(flags & pp.FLAG_ENGLISH_KEYWORD) == pp.contains_english_keywords(text)
+    assert list(pp.scan_flags([1, None])) == [0, 0]
+    data = {"a": "Please confirm 设置", "b": "设置", "c": "設定", "d": 3}
+    assert pp.flag_reasons(data, "zh-TW") == [("a", "英文未翻译"), ("b", "简体残留")]
+    assert pp.flag_reasons(data, "en") == []
+
+
+def test_keyword_alternation_keeps_word_boundaries():
+    """一个交替式仍按词边界匹配：罗曼语同源词不命中，大小写不敏感。"""
+    assert pp.contains_english_keywords("cancelar pedido") is False
+    assert pp.contains_english_keywords("Error de red") is True
+    assert pp.contains_english_keywords("please wait") is True
+    assert pp.contains_english_keywords("Settingsx") is False
+
+
+def test_bench_qa_engine_matches_legacy():
+    """微基准的旧实现与引擎在合成语料上逐条一致（小语料，只验正确性不计时）。"""
+    from benchmarks import bench_qa
+
+    assert bench_qa.make_corpus(300, seed=2) == bench_qa.make_corpus(300, seed=2)
+    result = bench_qa.run(size=2000, seed=2, repeat=1)
+    assert result["consistent"] is True and result["flagged"] > 0
+
+
+def test_keyword_checks_skip_simplified_conversion(monkeypatch):
+    """关键词闸与非繁中目标的 QA 检出只算自己要的位，不跑 OpenCC 转换。"""
+    class _Exploding:
+        def convert(self, text):
+            raise AssertionError("不应做简体检测")
+
+    monkeypatch.setattr(pp, "_S2TW", _Exploding())
+    pp.clear_qa_cache()
+    text = "パスワードを入力してください设置"
+    assert pp.contains_english_keywords(text) is False
+    assert pp.flag_reasons({"k": text}, "ja") == []
+    assert pp.qa_flags(text, pp.FLAG_ENGLISH_KEYWORD | pp.FLAG_SUSPECT_LATIN) == 0
+    pp.clear_qa_cache()
@@ -33,3 +33,62 @@ def test_google_dispatch(monkeypatch):
 def test_unsupported_extension_raises():
     with pytest.raises(ValueError):
         runner.translate_single_file("a.txt", "es", "openrouter", "m", "out")
+
+
+# ---------- translate_single_file_multi：多语言调度 ----------
+
+def test_multi_parses_source_once_and_keeps_order(monkeypatch, tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text('{"k": "v"}', encoding="utf-8")
+    loads = []
+    real_load = runner.load_json_source
+    monkeypatch.setattr(runner, "load_json_source", lambda p: loads.append(p) or real_load(p))
+    seen = []
+
+    def fake_json(path, lang, cb, model, out, source_data=None):
+        seen.append(source_data)
+        cb(50, "half")
+        return f"a_{lang}.json"
+
+    monkeypatch.setattr(runner, "translate_json_file_llm", fake_json)
+    progress = []
+    results = runner.translate_single_file_multi(
+        str(src), ["es", "fr", "de"], "openrouter", "m", "out",
+        lambda pct, msg: progress.append((pct, msg)), max_workers=3,
+    )
+    assert [lang for lang, _, _ in results] == ["es", "fr", "de"]
+    assert all(err is None for _, _, err in results)
+    assert results[1][1][0] == "a_fr.json"
+    assert len(loads) == 1
+    assert seen == [{"k": "v"}] * 3
+    # 消息带语言前缀；整体进度为各语言平均，不超过 100
+    assert any(msg.startswith("fr: ") for _, msg in progress)
+    assert all(0 <= pct <= 100 for pct, _ in progress)
+
+
+def test_multi_isolates_language_failures(monkeypatch, tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text('{"k": "v"}', encoding="utf-8")
+
+    def fake_json(path, lang, cb, model, out, source_data=None):
+        if lang == "fr":
+            raise RuntimeError("boom")
+        return f"a_{lang}.json"
+
+    monkeypatch.setattr(runner, "translate_json_file_llm", fake_json)
+    done = []
+    results = runner.translate_single_file_multi(
+        str(src), ["es", "fr"], "openrouter", "m", "out",
+        on_result=lambda lang, res, err: done.append((lang, err is None)),
+    )
+    assert results[0][2] is None
+    assert isinstance(results[1][2], RuntimeError)
+    assert sorted(done) == [("es", True), ("fr", False)]
+
+
+def test_multi_bad_source_fails_every_language(tmp_path):
+    src = tmp_path / "a.json"
+    src.write_text("{not json", encoding="utf-8")
+    results = runner.translate_single_file_multi(str(src), ["es", "fr"], "openrouter", "m", "out")
+    assert [lang for lang, _, _ in results] == ["es", "fr"]
+    assert all(res is None and err is not None for _, res, err in results)
@@ -0,0 +1,74 @@
+"""实际用量记录 —— 逐批 / 文件 / 语言汇总、计价、重试计数（假 translate_batch，不打真 API）。"""
+import json
+
+import pytest
+
+import translate_llm
+from usage_report import QA_BATCH, UsageRecorder
+
+
+def _call(prompt=1000, completion=500, cached=0, latency=0.5):
+    return {"prompt_tokens": prompt, "completion_tokens": completion,
+            "cached_tokens": cached, "latency_seconds": latency}
+
+
+def test_aggregates_and_prices_with_model_catalog():
+    recorder = UsageRecorder("job1")
+    a = recorder.scope("a.json", "es", "anthropic/claude-sonnet-5")
+    a.record_call(2, _call(cached=400))
+    a.record_call(1, _call())
+    a.record_retry(1)
+    a.record_call(QA_BATCH, _call(prompt=100, completion=50))
+    recorder.scope("a.json", "fr", "vendor/unknown").record_call(1, _call())
+
+    report = recorder.report()
+    es = report["files"][0]
+    assert [b["batch"] for b in es["batches"]] == [1, 2, QA_BATCH]
+    assert es["batches"][0]["retries"] == 1 and es["requests"] == 3
+    # 600 未命中 × $2 + 400 命中 × $0.2 + 500 输出 × $10（每百万）
+    assert es["batches"][1]["cost_usd"] == pytest.approx((600 * 2 + 400 * 0.2 + 500 * 10) / 1e6)
+    assert report["by_language"]["es"]["cached_tokens"] == 400
+    assert report["by_language"]["fr"]["cost_usd"] is None      # 目录外模型不计价
+    assert report["by_file"]["a.json"]["cost_usd"] is None
+    assert report["totals"]["prompt_tokens"] == 3100 and report["job_id"] == "job1"
+
+
+def test_pipeline_records_calls_and_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(translate_llm, "_get_retry_delay", lambda *a, **k: 0)
+    attempts = []
+
+    def fake_translate_batch(values, on_usage=None, **kwargs):
+        attempts.append(values)
+        if len(attempts) == 1:
+            raise RuntimeError("upstream 502")
+        on_usage(_call(prompt=10 * len(values), completion=5 * len(values)))
+        return [v.upper() for v in values]
+
+    monkeypatch.setattr(translate_llm, "translate_batch", fake_translate_batch)
+    src = tmp_path / "s.json"
+    src.write_text(json.dumps({"a": "hi", "b": "yo"}), encoding="utf-8")
+
+    recorder = UsageRecorder()
+    translate_llm.translate_json_file_llm(
+        str(src), "en", model="m", output_dir=str(tmp_path),
+        usage=recorder.scope("s.json", "en", "m"),
+    )
+    path = recorder.write(str(tmp_path), "s")
+    report = json.loads(open(path, encoding="utf-8").read())
+    assert path.endswith("s.usage.json")
+    assert report["files"][0]["batches"] == [{
+        "batch": 1, "requests": 1, "retries": 1, "prompt_tokens": 20, "completion_tokens": 10,
+        "cached_tokens": 0, "latency_seconds": 0.5, "cost_usd": None,
+    }]
+
+
+def test_source_keeps_counts_not_texts():
+    """原文只留字符数与各文字系统计数，多次 record_source 累加后判主要文字系统。"""
+    recorder = UsageRecorder()
+    scope = recorder.scope("a.json", "es", "m")
+    scope.record_source(["设置", "确定 {0}"])
+    scope.record_source(["OK"])
+    assert recorder._sources[("a.json", "es", "m")] == [10, 6, 0, 4]
+    scope.record_call(1, _call())
+    (entry,) = recorder.report()["files"]
+    assert entry["source_chars"] == 10 and entry["source_script"] == "cjk"
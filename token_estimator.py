@@ -0,0 +1,93 @@
+"""
+Token 估算 —— 不调 API 的本地粗估，cost_estimator 与 translate_llm（分批 / 去重统计）共用
+
+单一来源：CHARS_PER_TOKEN 原在 cost_estimator，移到这里供翻译管线复用
+（translate_llm 不能 import cost_estimator —— 后者将来要反过来复用翻译管线的展平/分批）。
+
+estimate_tokens 按文字系统区分：主流 BPE tokenizer 下拉丁字母约 4 字符/token，
+西里尔 / 阿拉伯 / 天城文等约 2 字符/token，中日韩基本 1 字/token（常见字偶有 2 字 1 token，
+按 1 计偏保守）。对中文源语言包，整体按 3 字符/token 会把 CJK 低估约 3 倍。
+"""
+
+import math
+import unicodedata
+
+# JSON 内容 tokens 估算常数：1 token ≈ 3 characters（整文件粗估；逐串估算用 estimate_tokens）
+CHARS_PER_TOKEN = 3
+
+# 各文字系统每 token 的字符数
+_LATIN_CHARS_PER_TOKEN = 4.0
+_OTHER_CHARS_PER_TOKEN = 2.0
+_CJK_CHARS_PER_TOKEN = 1.0
+
+# CJK 统一表意文字 / 假名 / 韩文 / 全角标点的码位区间
+_CJK_RANGES = (
+    (0x3000, 0x30FF),   # CJK 标点 + 平假名 + 片假名
+    (0x3400, 0x4DBF),   # 扩展 A
+    (0x4E00, 0x9FFF),   # 基本区
+    (0xAC00, 0xD7AF),   # 韩文音节
+    (0xF900, 0xFAFF),   # 兼容表意文字
+    (0xFF00, 0xFFEF),   # 全角 / 半角形式
+    (0x20000, 0x2FA1F), # 扩展 B+
+)
+
+
+def _is_cjk(cp):
+    return any(lo <= cp <= hi for lo, hi in _CJK_RANGES)
+
+
+def _script_counts(text):
+    """按文字系统计字符数：(拉丁, 其它, CJK)。组合附加符号随前一字符计，不单独计数。"""
+    latin = other = cjk = 0
+    for ch in text:
+        cp = ord(ch)
+        if cp < 0x250:              # ASCII + 拉丁扩展（含数字、标点、空白）
+            latin += 1
+        elif _is_cjk(cp):
+            cjk += 1
+        elif unicodedata.category(ch).startswith("M"):
+            continue                # 组合附加符号随前一字符计
+        else:
+            other += 1
+    return latin, other, cjk
+
+
+def estimate_tokens(text):
+    """按文字系统估算一段文本的 token 数（至少 1）。"""
+    latin, other, cjk = _script_counts(text)
+    tokens = (
+        latin / _LATIN_CHARS_PER_TOKEN
+        + other / _OTHER_CHARS_PER_TOKEN
+        + cjk / _CJK_CHARS_PER_TOKEN
+    )
+    return max(1, math.ceil(tokens))
+
+
+def script_counts(texts):
+    """一组文本按文字系统的字符数合计：(拉丁, 其它, CJK)。"""
+    latin = other = cjk = 0
+    for text in texts:
+        counts = _script_counts(text)
+        latin += counts[0]
+        other += counts[1]
+        cjk += counts[2]
+    return latin, other, cjk
+
+
+def dominant_script(texts):
+    """一组文本的主要文字系统："latin" / "cjk" / "other"（按估算 token 数占比，空输入为 "latin"）。
+
+    按 token 而非字符比：中文 UI 串里夹的 ASCII 占位符 / 数字字符多但 token 少，不该把源判成拉丁。
+    """
+    return dominant_script_of(script_counts(texts))
+
+
+def dominant_script_of(counts):
+    """按 script_counts 的合计（可逐次累加）判主要文字系统，规则同 dominant_script。"""
+    latin, other, cjk = counts
+    weights = {
+        "latin": latin / _LATIN_CHARS_PER_TOKEN,
+        "other": other / _OTHER_CHARS_PER_TOKEN,
+        "cjk": cjk / _CJK_CHARS_PER_TOKEN,
+    }
+    return max(weights, key=weights.get)
@@ -46,7 +46,17 @@ def _get_translate_client():
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # 秒，重试延迟
 BATCH_SIZE = 10  # 每批处理的文本数量
-REQUEST_DELAY = 0.1  # 请求间隔（秒）
+REQUEST_DELAY = 0.1  # 请求间隔（秒），仅逐条路径（safe_translate_text）使用
+
+# 批量路径（translate_texts）：一次 translate() 传一个字符串列表。
+# v2 API 单请求上限 128 段，官方建议单请求总量 ≤ 5000 字符
+BATCH_MAX_ITEMS = 128
+BATCH_MAX_CHARS = 5000
+
+# 多行字符串的换行占位符（源文件里的字面 \n 在翻译前替换，翻译后还原为真实换行）
+NEWLINE_PLACEHOLDER = "<NEWLINE>"
+# 自定义颜色标签：标签原样保留，只翻译标签内外的文本
+COLOR_TAG_PATTERN = re.compile(r"(\[color-[^\]]+\])(.*?)(\[/color-[^\]]+\])", re.DOTALL)
 
 
 def safe_translate_text(text, target_language="en", retries=0):
@@ -60,17 +70,41 @@ def safe_translate_text(text, target_language="en", retries=0):
     if not text or not text.strip():
         return text
 
+    def request():
+        # 添加请求间隔，避免速率限制
+        time.sleep(REQUEST_DELAY)
+        result = _get_translate_client().translate(text, target_language=target_language)
+        # 解码 HTML 实体，修复如 &#39; 等编码问题
+        return html.unescape(result["translatedText"])
+
+    return _call_with_retries(request, retries)
+
+
+def safe_translate_batch(texts, target_language="en", retries=0):
+    """一次请求翻译一批字符串（v2 API 接受列表），重试语义与 safe_translate_text 相同（按批）。
+
+    不做请求前 sleep —— 批量后请求数已降一到两个量级，节奏交给限流重试分支。
+    """
+    if not texts:
+        return []
+
+    def request():
+        results = _get_translate_client().translate(list(texts), target_language=target_language)
+        if len(results) != len(texts):
+            raise Exception(f"返回 {len(results)} 条，期望 {len(texts)} 条")
+        return [html.unescape(result["translatedText"]) for result in results]
+
+    return _call_with_retries(request, retries)
+
+
+def _call_with_retries(request, retries=0):
+    """执行一次 Google 翻译请求，按错误类型退避重试（safe_translate_text / safe_translate_batch 共用）。"""
     # attempt 从入参 retries 起算（默认 0），循环内递增到 MAX_RETRIES 为止；
     # 尝试次数、延迟序列、日志计数均与原 `retries < MAX_RETRIES` 递归完全一致。
     attempt = retries
     while True:
         try:
-            # 添加请求间隔，避免速率限制
-            time.sleep(REQUEST_DELAY)
-
-            result = _get_translate_client().translate(text, target_language=target_language)
-            # 解码 HTML 实体，修复如 &#39; 等编码问题
-            return html.unescape(result["translatedText"])
+            return request()
 
         except TooManyRequests as e:
             logger.warning(f"Rate limit exceeded, attempt {attempt + 1}/{MAX_RETRIES}")
@@ -126,13 +160,11 @@ def translate_text(text, target_language="en"):
         return text
 
     # Define a placeholder for newlines to handle multiline strings properly.
-    newline_placeholder = "<NEWLINE>"
+    newline_placeholder = NEWLINE_PLACEHOLDER
     text = text.replace("\\n", newline_placeholder)
 
     # Regular expression to identify any custom color tags and their content
-    color_tag_pattern = re.compile(
-        r"(\[color-[^\]]+\])(.*?)(\[/color-[^\]]+\])", re.DOTALL
-    )
+    color_tag_pattern = COLOR_TAG_PATTERN
 
     translated_text = ""
     last_end = 0
@@ -181,6 +213,97 @@ def translate_text(text, target_language="en"):
     return translated_text.replace(newline_placeholder, "\n")
 
 
+def _split_segments(text):
+    """把一个值拆成 [(是否待译, 片段)]，切分规则与 translate_text 完全一致：
+    颜色标签原样保留，标签内外非空白文本各为一段，纯空白片段丢弃；无标签则整值一段。
+    """
+    text = text.replace("\\n", NEWLINE_PLACEHOLDER)
+    if not COLOR_TAG_PATTERN.search(text):
+        return [(True, text)]
+
+    pieces = []
+    last_end = 0
+    for match in COLOR_TAG_PATTERN.finditer(text):
+        start, end = match.span()
+        pre_tag_text = text[last_end:start]
+        if pre_tag_text.strip():
+            pieces.append((True, pre_tag_text))
+        opening_tag, inner_content, closing_tag = match.groups()
+        pieces.append((False, opening_tag))
+        if inner_content.strip():
+            pieces.append((True, inner_content))
+        pieces.append((False, closing_tag))
+        last_end = end
+    remaining_text = text[last_end:]
+    if remaining_text.strip():
+        pieces.append((True, remaining_text))
+    return pieces
+
+
+def _pack_segments(segments):
+    """按条数 / 字符数上限把待译片段装批（超长的单个片段独占一批）。"""
+    batches = []
+    current, current_chars = [], 0
+    for segment in segments:
+        if current and (len(current) >= BATCH_MAX_ITEMS
+                        or current_chars + len(segment) > BATCH_MAX_CHARS):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(segment)
+        current_chars += len(segment)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def translate_texts(texts, target_language="en", progress_callback=None, skip_failed=False):
+    """translate_text 的批量版：收集全部值的待译片段（含标签拆分出的片段，同文去重），
+    按 BATCH_MAX_ITEMS / BATCH_MAX_CHARS 装批，每批一次列表请求，再按原结构拼回。
+
+    Args:
+        texts: 待翻译的值列表；空串 / 纯空白原样返回
+        progress_callback: 可选 (pct, message)，每批完成后调用
+        skip_failed: False → 任一批失败即抛异常；True → 失败批涉及的值返回 None，其余照常
+
+    Returns:
+        与 texts 等长的译文列表
+    """
+    pieces_by_text = [_split_segments(text) if text and text.strip() else None for text in texts]
+    segments = list(dict.fromkeys(
+        segment for pieces in pieces_by_text if pieces for todo, segment in pieces if todo
+    ))
+    batches = _pack_segments(segments)
+    if batches:
+        logger.info(f"Google 批量翻译 → {target_language}: {len(segments)} 段，{len(batches)} 个请求")
+
+    translated = {}
+    failed = set()
+    for batch_num, batch in enumerate(batches, 1):
+        try:
+            translated.update(zip(batch, safe_translate_batch(batch, target_language)))
+        except Exception as e:
+            if not skip_failed:
+                raise
+            logger.error(f"批次 {batch_num} 翻译失败，{len(batch)} 段保留原文: {e}")
+            failed.update(batch)
+        if progress_callback:
+            progress_callback(
+                batch_num / len(batches) * 100,
+                f"批次 {batch_num}/{len(batches)} ({len(batch)} 段)",
+            )
+
+    results = []
+    for text, pieces in zip(texts, pieces_by_text):
+        if pieces is None:
+            results.append(text)
+        elif any(todo and segment in failed for todo, segment in pieces):
+            results.append(None)
+        else:
+            joined = "".join(translated[segment] if todo else segment for todo, segment in pieces)
+            results.append(joined.replace(NEWLINE_PLACEHOLDER, "\n"))
+    return results
+
+
 def translate_json_file(source_file_path, target_language="en", progress_callback=None, output_dir="output"):
     """翻译JSON文件，支持嵌套结构和批量处理
 
@@ -202,37 +325,35 @@ def translate_json_file(source_file_path, target_language="en", progress_callbac
     total_items = len(data)
     logger.info(f"文件包含 {total_items} 个项目")
 
-    def translate_value(value):
-        """递归翻译值，支持嵌套对象和数组"""
+    def collect(value, out):
+        """递归收集待译字符串（非空，strip 后送翻译），支持嵌套对象和数组"""
         if isinstance(value, str):
             if value.strip():  # 只翻译非空字符串
-                return translate_text(value.strip(), target_language)
-            return value
+                out.append(value.strip())
         elif isinstance(value, dict):
-            return {k: translate_value(v) for k, v in value.items()}
+            for v in value.values():
+                collect(v, out)
         elif isinstance(value, list):
-            return [translate_value(item) for item in value]
+            for item in value:
+                collect(item, out)
+
+    def rebuild(value, translated):
+        """按原结构回填译文（与 collect 同序消费）；数字、布尔值、空串等保持不变"""
+        if isinstance(value, str):
+            return next(translated) if value.strip() else value
+        elif isinstance(value, dict):
+            return {k: rebuild(v, translated) for k, v in value.items()}
+        elif isinstance(value, list):
+            return [rebuild(item, translated) for item in value]
         else:
-            return value  # 数字、布尔值等保持不变
+            return value
 
     try:
-        translated_data = {}
-        total_items = len(data)
-
-        for i, (key, value) in enumerate(data.items(), 1):
-            logger.info(f"翻译进度: {i}/{total_items} - {key}")
-            translated_data[key] = translate_value(value)
-
-            # 调用进度回调函数
-            if progress_callback:
-                progress = (i / total_items) * 100
-                progress_callback(progress, f"正在翻译: {key} ({i}/{total_items})")
-
-            # 每处理几个项目后稍作休息（可选）
-            # 注释掉休息功能，如果需要可以取消注释
-            # if i % BATCH_SIZE == 0:
-            #     logger.info(f"已处理 {i} 项，休息片刻...")
-            #     time.sleep(1)
+        # 全文件的待译字符串一次收集，按批列表请求（见 translate_texts），再按原结构回填
+        texts = []
+        collect(data, texts)
+        logger.info(f"待翻译 {len(texts)} 个字符串")
+        translated_data = rebuild(data, iter(translate_texts(texts, target_language, progress_callback)))
 
         # 输出文件名包含源文件名，避免多文件翻译时的命名冲突
         output_file_name = f"{source_base_name}_{target_language}.json"
@@ -270,37 +391,22 @@ def translate_locale_file(
     key_value_pairs = JS_KV_PATTERN.findall(content)
     logger.info(f"找到 {len(key_value_pairs)} 个键值对")
 
+    # 同时剥单/双引号（修双引号 key → ""key"" 非法 JS，对齐 7772f65）
+    cleaned_pairs = [
+        (key.strip().strip("\"'"), value.strip().strip("`\"'"))
+        for key, value in key_value_pairs
+    ]
+    # 全部值按批列表请求；失败批涉及的值保留原值（与原逐条失败保留原值一致）
+    translated_values = translate_texts(
+        [value for _key, value in cleaned_pairs], target_language, progress_callback,
+        skip_failed=True,
+    )
     translated_key_value_pairs = []
-    total_pairs = len(key_value_pairs)
-
-    for i, (key, value) in enumerate(key_value_pairs, 1):
-        key = key.strip().strip("\"'")  # 同时剥单/双引号（修双引号 key → ""key"" 非法 JS，对齐 7772f65）
-        logger.info(f"翻译进度: {i}/{total_pairs} - {key}")
-
-        try:
-            cleaned_value = value.strip().strip("`\"'")
-            if cleaned_value.strip():  # 只翻译非空值
-                translated_value = translate_text(cleaned_value, target_language)
-                translated_key_value_pairs.append((key, translated_value))
-            else:
-                translated_key_value_pairs.append((key, cleaned_value))
-
-            # 调用进度回调函数
-            if progress_callback:
-                progress = (i / total_pairs) * 100
-                progress_callback(progress, f"正在翻译: {key} ({i}/{total_pairs})")
-
-            # 批量处理间隔（可选）
-            # 注释掉休息功能，如果需要可以取消注释
-            # if i % BATCH_SIZE == 0:
-            #     logger.info(f"已处理 {i} 项，休息片刻...")
-            #     time.sleep(1)
-
-        except Exception as e:
-            logger.error(f"翻译键值对失败 {key}: {value}. 错误: {e}")
-            # 翻译失败时保留原值
-            cleaned_value = value.strip().strip("`\"'")
-            translated_key_value_pairs.append((key, cleaned_value))
+    for (key, cleaned_value), translated_value in zip(cleaned_pairs, translated_values):
+        if translated_value is None:
+            logger.error(f"翻译键值对失败 {key}: {cleaned_value}，保留原值")
+            translated_value = cleaned_value
+        translated_key_value_pairs.append((key, translated_value))
 
     # 输出文件名包含源文件名，避免多文件翻译时的命名冲突
     output_file_name = f"{source_base_name}_{target_language}.js"
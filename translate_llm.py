@@ -11,16 +11,36 @@ LLM 翻译引擎 —— 基于 OpenRouter 结构化输出
 
 import os
 import json
+import math
+import collections
 import time
 import logging
-
-from llm_client import translate_batch
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from llm_client import (
+    translate_batch,
+    translate_batch_multi,
+    prompt_fingerprint,
+    prompt_overhead_tokens,
+    multi_prompt_overhead_tokens,
+    estimate_request_tokens,
+    DEFAULT_MAX_TOKENS,
+    BatchShapeError,
+)
+from llm_models import get_model_info, failover_chain
+import config
 from config import BATCH_SIZE, REQUEST_DELAY, MAX_RETRIES, DEFAULT_MODEL
 # 英文关键词检测单一来源:直接复用 translation_postprocess 的 contains_english_keywords,
 # 不在本模块另编关键词/正则。(SoT: translation_config.QUALITY_CHECK_RULES['english_keywords'];
 #  translation_postprocess 只依赖 translation_config,方向无环)
 from translation_postprocess import contains_english_keywords
 from js_locale import parse_js_locale, dump_js_locale
+from translation_memory import get_translation_memory
+from token_estimator import estimate_tokens
+from usage_report import QA_BATCH
+from rate_limiter import is_throttle_error
+from circuit_breaker import CircuitOpenError
 
 try:
     from translation_config import (
@@ -138,7 +158,7 @@ def _contains_too_much_english(translations):
     """批级重试闸:>20% 的字符串项含英文 UI 关键词则判英文过多(触发整批重译)。
 
     关键词检测复用 translation_postprocess.contains_english_keywords(词边界匹配,
-    避免罗曼语系同源词误判)——单一来源,不在本模块另实现。
+    避免罗曼语系同源词误判)——单一来源,不在本模块另实现;结果按值记忆,重试/TM 过滤不重扫。
     """
     values = [v for v in translations.values() if isinstance(v, str)]
     if not values:
@@ -149,19 +169,14 @@ def _contains_too_much_english(translations):
 
 # ---------- 核心翻译函数（单批次） ----------
 
-def translate_with_llm(texts, target_language, model):
-    """翻译 {key: value} 字典，返回同 key 字典。
-
-    只发送 values 给 LLM，翻译后和原 keys zip 回来 —— key 不会被错译。
-    """
+def _language_params(target_language):
+    """目标语言 → (语言全名, 温度, 大写规则)。translate_with_llm 与 prompt 指纹共用。"""
     # 语言代码映射（zh-TW → zh-Hant 等）
     api_lang = target_language
     if USE_ADVANCED_CONFIG and target_language in LANGUAGE_CODE_MAPPING:
         api_lang = LANGUAGE_CODE_MAPPING[target_language]
 
     target_lang_name = LANGUAGE_NAMES.get(api_lang, api_lang)
-    original_keys = list(texts.keys())
-    values_only = list(texts.values())
 
     # 温度：语言特定优先
     temperature = 0.1
@@ -169,7 +184,33 @@ def translate_with_llm(texts, target_language, model):
         temperature = TEMPERATURE_BY_LANGUAGE[target_language]
 
     cap_rule = CAPITALIZATION_RULES.get(target_language, GENERIC_RULE)
+    return target_lang_name, temperature, cap_rule
 
+
+def translate_with_llm(texts, target_language, model, on_item=None, on_usage=None,
+                       hedge_model=None, on_model=None, qa_reason=None, rejected=None):
+    """翻译 {key: value} 字典，返回同 key 字典。
+
+    只发送 values 给 LLM，翻译后和原 keys zip 回来 —— key 不会被错译。
+    on_item: 流式模式下每收到一项的 (下标, 译文) 回调（见 llm_client.translate_batch）。
+    on_usage: 每个请求的用量回调（见 llm_client.translate_batch）。
+    hedge_model / on_model: 对冲备用模型与"实际产出模型"回调（见 llm_client.translate_batch）。
+    qa_reason / rejected: QA 回灌重译的检出原因与被驳回的译文（与 texts 同序）—— 改用纠错 prompt，
+        温度至少取 BATCH_CONFIG['qa_temperature']（同温度重发大概率得到同样的错误）。
+    """
+    target_lang_name, temperature, cap_rule = _language_params(target_language)
+    original_keys = list(texts.keys())
+    values_only = list(texts.values())
+
+    extra = {}
+    if hedge_model:
+        extra["hedge_model"] = hedge_model
+    if on_model:
+        extra["on_model"] = on_model
+    if qa_reason:
+        extra.update(qa_reason=qa_reason, rejected=list(rejected or []))
+        if USE_ADVANCED_CONFIG:
+            temperature = max(temperature, BATCH_CONFIG.get('qa_temperature', temperature))
     translated_values = translate_batch(
         values=values_only,
         target_lang_name=target_lang_name,
@@ -177,6 +218,9 @@ def translate_with_llm(texts, target_language, model):
         model=model,
         temperature=temperature,
         capitalization_rule=cap_rule,
+        on_item=on_item,
+        on_usage=on_usage,
+        **extra,
     )
 
     translated = dict(zip(original_keys, translated_values))
@@ -187,13 +231,51 @@ def translate_with_llm(texts, target_language, model):
     return translated
 
 
+def translate_with_llm_multi(texts, target_languages, model, on_usage=None):
+    """翻译 {key: value} 到一组语言（一个请求，见 llm_client.translate_batch_multi），
+    返回 {语言: {key: 译文}}。各语言的大写规则合入 prompt，后处理按语言分别做。
+
+    温度取组内最低（zh-TW 等要求低温的语言不被放宽）。
+    """
+    params = {lang: _language_params(lang) for lang in target_languages}
+    keys = list(texts.keys())
+    by_code = translate_batch_multi(
+        values=list(texts.values()),
+        targets=[(name, lang, cap_rule) for lang, (name, _temp, cap_rule) in params.items()],
+        model=model,
+        temperature=min(temp for _name, temp, _cap in params.values()),
+        on_usage=on_usage,
+    )
+    result = {}
+    for lang in target_languages:
+        translated = dict(zip(keys, by_code[lang]))
+        if USE_ADVANCED_CONFIG:
+            translated = post_process_translation(translated, lang)
+        result[lang] = translated
+    return result
+
+
 # ---------- 动态批次分割 ----------
 
-def _create_dynamic_batches(items, use_dynamic=True):
-    """智能批次：按字符数动态分，兼容固定大小 fallback。"""
+# completion 估算：译文相对原文的 token 膨胀上限（拉丁源 → CJK / 泰文等可达 ~2x；宁高估不截断）
+_COMPLETION_EXPANSION = 2.0
+# 每项在 JSON 数组里的结构开销（引号 / 逗号 / 缩进换行）
+_ITEM_JSON_TOKENS = 3
+
+
+def _use_dynamic_batching():
+    return USE_ADVANCED_CONFIG and BATCH_CONFIG.get('dynamic_batching', False)
+
+
+def _create_dynamic_batches(items, use_dynamic=True, target_language=None, model=None):
+    """智能批次：默认按 token 预算装箱（需给 target_language），
+    batch_strategy='chars' 走旧的字符数分批，兼容固定大小 fallback。"""
     if not use_dynamic or not USE_ADVANCED_CONFIG:
         return [dict(items[i:i + BATCH_SIZE]) for i in range(0, len(items), BATCH_SIZE)]
 
+    if target_language and BATCH_CONFIG.get('batch_strategy', 'tokens') == 'tokens':
+        return _create_token_batches(items, target_language, model)
+
     max_chars = BATCH_CONFIG.get('max_chars_per_batch', 3000)
     min_size = BATCH_CONFIG.get('min_batch_size', 2)
     max_size = BATCH_CONFIG.get('max_batch_size', 25)
@@ -220,56 +302,555 @@ def _create_dynamic_batches(items, use_dynamic=True):
     return batches
 
 
-def _get_retry_delay(attempt):
-    """指数退避或配置的渐进延迟。"""
+def _batch_token_limits(target_language, model):
+    """该语言 × 模型的分批预算。返回 (单批 prompt+completion 总预算, completion 预算, 单批固定开销)。
+
+    总预算取 batch_token_budget，并受模型 context_length - 输出上限 约束；
+    completion 只用输出上限（DEFAULT_MAX_TOKENS）的 batch_output_fill 比例，给估算误差留余量。
+    """
+    target_lang_name, _temperature, cap_rule = _language_params(target_language)
+    overhead = prompt_overhead_tokens(target_lang_name, target_language, cap_rule)
+    return (*_token_budgets(model), overhead)
+
+
+def _multi_batch_token_limits(target_languages, model):
+    """多语言单次调用的分批预算：同 _batch_token_limits，固定开销为合并 prompt（含各语言大写规则）。"""
+    targets = []
+    for lang in target_languages:
+        name, _temperature, cap_rule = _language_params(lang)
+        targets.append((name, lang, cap_rule))
+    return (*_token_budgets(model), multi_prompt_overhead_tokens(targets))
+
+
+def _token_budgets(model):
+    """(单批 prompt+completion 总预算, completion 预算)：模型 context_length 与输出上限共同约束。"""
+    total_budget = BATCH_CONFIG.get('batch_token_budget', 6000)
+    info = get_model_info(model) if model else None
+    if info:
+        total_budget = min(total_budget, info['context_length'] - DEFAULT_MAX_TOKENS)
+    completion_budget = int(DEFAULT_MAX_TOKENS * BATCH_CONFIG.get('batch_output_fill', 0.7))
+    return total_budget, completion_budget
+
+
+def _item_tokens(value):
+    """单项 (prompt tokens, completion tokens) 估算 —— 只算值（key 不发给模型）。"""
+    prompt_tokens = estimate_tokens(json.dumps(value, ensure_ascii=False)) + _ITEM_JSON_TOKENS
+    completion_tokens = math.ceil(estimate_tokens(value) * _COMPLETION_EXPANSION) + _ITEM_JSON_TOKENS
+    return prompt_tokens, completion_tokens
+
+
+def _create_token_batches(items, target_language, model):
+    """按 token 预算顺序装箱：批满（总预算 / completion 预算 / token_max_batch_size 任一）即切。
+
+    保持原顺序（不重排），单项超预算时独占一批。批越满，往返与每批 prompt 开销越少。
+    """
+    return _pack_token_batches(items, _batch_token_limits(target_language, model))
+
+
+def _create_multi_batches(items, target_languages, model):
+    """多语言单次调用的分批：每项的 completion 按语言数放大（每种语言各出一份译文）。"""
+    return _pack_token_batches(
+        items, _multi_batch_token_limits(target_languages, model), len(target_languages)
+    )
+
+
+def multi_language_fits(target_languages, model, values):
+    """一组语言能否合成一次调用：按 values 的平均项长，合并后一批至少装得下
+    multi_language_min_batch 项（completion 预算受模型输出上限约束，总预算受 context_length 约束）。"""
+    total_budget, completion_budget, overhead = _multi_batch_token_limits(target_languages, model)
+    sizes = [_item_tokens(value) for value in values] or [_item_tokens("")]
+    avg_prompt = sum(p for p, _c in sizes) / len(sizes)
+    avg_completion = sum(c for _p, c in sizes) / len(sizes)
+    min_items = BATCH_CONFIG.get('multi_language_min_batch', 10)
+    completion = min_items * avg_completion * len(target_languages)
+    return (completion <= completion_budget
+            and overhead + min_items * avg_prompt + completion <= total_budget)
+
+
+def _pack_token_batches(items, limits, completion_factor=1):
+    """按 (总预算, completion 预算, 固定开销) 顺序装箱；completion_factor 为每项译文份数。"""
+    total_budget, completion_budget, overhead = limits
+    max_size = BATCH_CONFIG.get('token_max_batch_size', 80)
+
+    batches = []
+    current = {}
+    prompt_tokens = overhead
+    completion_tokens = 0
+
+    for key, value in items:
+        item_prompt, item_completion = _item_tokens(value)
+        item_completion *= completion_factor
+        should_split = (
+            len(current) >= max_size
+            or completion_tokens + item_completion > completion_budget
+            or prompt_tokens + completion_tokens + item_prompt + item_completion > total_budget
+        )
+        if should_split and current:
+            batches.append(current)
+            current = {}
+            prompt_tokens = overhead
+            completion_tokens = 0
+        current[key] = value
+        prompt_tokens += item_prompt
+        completion_tokens += item_completion
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _get_retry_delay(attempt, error=None):
+    """指数退避或配置的渐进延迟。
+
+    限流错误（429）返回 0：llm_client 已让该模型的共享限流器按 Retry-After 暂停并降速，
+    重试请求会在 acquire 处自然等待，这里再 sleep 只会重复等待。
+    """
+    if error is not None and is_throttle_error(error):
+        return 0
     if USE_ADVANCED_CONFIG and 'retry_delays' in BATCH_CONFIG:
         delays = BATCH_CONFIG['retry_delays']
         return delays[min(attempt - 1, len(delays) - 1)]
     return REQUEST_DELAY * 2
 
 
+# ---------- 批次调度（顺序 / 并发窗口） ----------
+
+def _max_retries():
+    return BATCH_CONFIG.get('max_retries', MAX_RETRIES) if USE_ADVANCED_CONFIG else MAX_RETRIES
+
+
+def _max_in_flight():
+    """同时在途的批次数上限；<=1 即原顺序模式。"""
+    if not USE_ADVANCED_CONFIG:
+        return 1
+    return max(1, int(BATCH_CONFIG.get('max_in_flight', 1)))
+
+
+def _translate_batch_with_retry(batch_num, batch_items, target_language, model, on_item=None,
+                                usage=None):
+    """单批翻译 + 重试 + 英文混入检测 + 形状错误二分恢复。返回 (translations, failure)。
+
+    failure 为 None 表示全部成功（含"英文混入重试耗尽、保留最后一次结果"）；
+    否则为 {'batch_num', 'error', 'item_count', 'paths'}：paths 为最终保留原文的 key
+    （二分恢复后通常只是批内个别问题串），translations 中这些 key 为原文。
+    纯函数式返回、不碰共享状态 —— 顺序与并发两种调度共用同一份逻辑。
+    on_item: 流式模式的批内进度回调（透传给 translate_with_llm；二分恢复的子批不回调）。
+    usage: 用量记录（usage_report.UsageScope），请求与重试都记在本批次号下（含二分子批）。
+    """
+    translated, failed_paths, error = _translate_items(
+        batch_num, batch_items, target_language, model, on_item, usage
+    )
+    if not failed_paths:
+        return translated, None
+    failure = {
+        'batch_num': batch_num,
+        'error': error,
+        'item_count': len(failed_paths),
+        'paths': failed_paths,
+    }
+    return translated, failure
+
+
+def _model_chain(model):
+    """model 的故障转移 / 对冲链（见 llm_models.failover_chain 与 config.MODEL_FAILOVER_CHAIN）。"""
+    return failover_chain(model, config.MODEL_FAILOVER_CHAIN)
+
+
+def _record_producer(batch_num, items, model, producer, usage):
+    """译文不是请求的模型产出时（故障转移 / 对冲胜出）记入审计；其余译文默认由 model 产出。"""
+    if producer == model:
+        return
+    logger.info(f"批次 {batch_num} 由 {producer} 产出 {len(items)} 项（请求模型 {model}）")
+    if usage is not None:
+        usage.record_output(producer, items.values())
+
+
+def _translate_items(batch_num, items, target_language, model, on_item=None, usage=None):
+    """翻译 items 并重试；返回 (translations, 保留原文的 key 列表, 最后错误)。
+
+    BatchShapeError（数量不匹配 / 输出截断）且多于 1 项时不重试同一批，直接二分：
+    两半各自递归（同样的重试 / 二分规则），直到单项才按 max_retries 重试。
+
+    config.MODEL_FAILOVER 开启时，在一个模型上出错 MODEL_FAILOVER_AFTER 次后改用链上的下一个模型
+    （换模型不做退避等待；重试上限放宽到链上每个模型都轮得到）；config.HEDGE_REQUESTS 开启时
+    每次请求带上链上的下一个模型作对冲。模型熔断（CircuitOpenError）时立即改道下一个模型，
+    无模型可改则该批直接保留原文。
+    """
+    max_retries = _max_retries()
+    chain = _model_chain(model)
+    failover_after = max(1, int(config.MODEL_FAILOVER_AFTER))
+    if config.MODEL_FAILOVER:
+        max_retries = max(max_retries, failover_after * (len(chain) - 1))
+    extra = {"on_item": on_item} if on_item else {}
+    if usage is not None:
+        extra["on_usage"] = lambda call: usage.record_call(batch_num, call)
+    attempt = 0
+    errors = 0
+
+    def current_index():
+        if not config.MODEL_FAILOVER:
+            return 0
+        return min(errors // failover_after, len(chain) - 1)
+
+    while attempt <= max_retries:
+        index = current_index()
+        slug = chain[index]
+        produced = []
+        request = dict(extra)
+        if config.HEDGE_REQUESTS and index + 1 < len(chain):
+            request.update(hedge_model=chain[index + 1], on_model=produced.append)
+        try:
+            translated = translate_with_llm(items, target_language, slug, **request)
+            producer = produced[-1] if produced else slug
+
+            # 非英语目标：检测英文混入
+            if target_language != "en" and _contains_too_much_english(translated):
+                attempt += 1
+                logger.warning(f"批次 {batch_num} 英文混入过多，重试 {attempt}/{max_retries}")
+                if attempt > max_retries:
+                    # 保留最后一次结果（部分翻译总比无翻译好）
+                    _record_producer(batch_num, items, model, producer, usage)
+                    return translated, [], None
+                if usage is not None:
+                    usage.record_retry(batch_num)
+                time.sleep(_get_retry_delay(attempt))
+                continue
+
+            _record_producer(batch_num, items, model, producer, usage)
+            return translated, [], None
+
+        except Exception as e:
+            if isinstance(e, BatchShapeError) and len(items) > 1:
+                logger.warning(f"批次 {batch_num} {e}，二分 {len(items)} 项重试")
+                return _bisect_items(batch_num, items, target_language, model, usage)
+            if isinstance(e, CircuitOpenError):
+                # 熔断：不重试、不 sleep —— 有下一个模型就改道，否则该批保留原文
+                if config.MODEL_FAILOVER and index + 1 < len(chain):
+                    logger.warning(f"批次 {batch_num} {e}，改走 {chain[index + 1]}")
+                    errors = (index + 1) * failover_after
+                    continue
+                logger.error(f"批次 {batch_num} {e}，保留原文")
+                return dict(items), list(items), str(e)
+            attempt += 1
+            errors += 1
+            logger.error(f"批次 {batch_num} {slug} 失败 ({attempt}/{max_retries}): {e}")
+            if attempt > max_retries:
+                return dict(items), list(items), str(e)  # 保留原文（path → 原文）
+            if usage is not None:
+                usage.record_retry(batch_num)
+            if current_index() != index:
+                logger.warning(f"批次 {batch_num} {slug} 已失败 {errors} 次，切换到 {chain[current_index()]}")
+                continue
+            delay = _get_retry_delay(attempt, e)
+            if delay:
+                time.sleep(delay)
+
+
+def _bisect_items(batch_num, items, target_language, model, usage=None):
+    """对半拆分后分别 _translate_items，按原顺序合并。"""
+    pairs = list(items.items())
+    mid = len(pairs) // 2
+    translated = {}
+    failed_paths = []
+    error = None
+    for half in (dict(pairs[:mid]), dict(pairs[mid:])):
+        half_translated, half_failed, half_error = _translate_items(
+            batch_num, half, target_language, model, usage=usage
+        )
+        translated.update(half_translated)
+        failed_paths.extend(half_failed)
+        error = half_error or error
+    return translated, failed_paths, error
+
+
+def _run_batches(batches, target_language, model, total_items, progress_callback=None,
+                 on_batch_done=None, usage=None):
+    """调度全部批次，返回 (translations_by_path, failed_batches)。
+
+    on_batch_done: 可选 (batch_num, translations, failure)，每批结束即在调度线程内调用
+    （断点续传据此逐批落盘）。
+    usage: 用量记录（usage_report.UsageScope），透传到每批。
+
+    max_in_flight <= 1：逐批顺序执行。
+    max_in_flight > 1：线程池并发，最多 N 批在途。
+    两种模式都不做固定批间 sleep —— 请求节奏由 llm_client 里按模型共享的自适应限流器
+    （rate_limiter）决定，provider 有余量时提速、429 时退避。
+    两种模式都【按批次序】合并结果 —— translations_by_path 的插入序决定 QA 检出顺序
+    （进而决定 needs_review sidecar 的条目顺序），故并发模式输出与顺序模式逐字节一致。
+    """
+    total_batches = len(batches)
+    max_in_flight = min(_max_in_flight(), total_batches)
+    results = [None] * total_batches
+    processed = 0
+    # 流式模式批内进度：batch_num → 本批已收到项数（批结束即移出，计入 processed）
+    streamed = {}
+    streamed_lock = threading.Lock()
+
+    def _item_callback(batch_num):
+        if not (progress_callback and config.LLM_STREAM_RESPONSES):
+            return None
+        size = len(batches[batch_num - 1])
+
+        def on_item(index, _value):
+            with streamed_lock:
+                received = streamed[batch_num] = max(streamed.get(batch_num, 0), index + 1)
+                done = min(total_items, processed + sum(streamed.values()))
+            progress_callback((done / total_items) * 100,
+                              f"批次 {batch_num}/{total_batches} 已接收 {received}/{size} 项")
+        return on_item
+
+    def _finish_batch(batch_num):
+        nonlocal processed
+        with streamed_lock:
+            streamed.pop(batch_num, None)
+            processed += len(batches[batch_num - 1])
+
+    def _report_failure(batch_num):
+        if progress_callback:
+            failed_count = results[batch_num - 1][1]['item_count']
+            progress_callback((processed / total_items) * 100,
+                              f"⚠️ 批次 {batch_num} 失败，{failed_count} 项保留原文")
+
+    if max_in_flight <= 1:
+        for batch_num, batch_items in enumerate(batches, 1):
+            if progress_callback:
+                progress_callback((processed / total_items) * 100,
+                                  f"批次 {batch_num}/{total_batches} ({len(batch_items)} 项)")
+            results[batch_num - 1] = _translate_batch_with_retry(
+                batch_num, batch_items, target_language, model, _item_callback(batch_num), usage
+            )
+            if on_batch_done:
+                on_batch_done(batch_num, *results[batch_num - 1])
+            _finish_batch(batch_num)
+            if results[batch_num - 1][1]:
+                _report_failure(batch_num)
+    else:
+        logger.info(f"并发翻译 {total_batches} 批（最多 {max_in_flight} 批在途）→ {target_language}")
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            futures = {
+                pool.submit(_translate_batch_with_retry, batch_num, batch_items,
+                            target_language, model, _item_callback(batch_num), usage): batch_num
+                for batch_num, batch_items in enumerate(batches, 1)
+            }
+            for future in as_completed(futures):
+                batch_num = futures[future]
+                results[batch_num - 1] = future.result()
+                if on_batch_done:
+                    on_batch_done(batch_num, *results[batch_num - 1])
+                _finish_batch(batch_num)
+                if results[batch_num - 1][1]:
+                    _report_failure(batch_num)
+                elif progress_callback:
+                    progress_callback((processed / total_items) * 100,
+                                      f"批次 {batch_num}/{total_batches} 完成 "
+                                      f"({len(batches[batch_num - 1])} 项)")
+
+    translations_by_path = {}
+    failed_batches = []
+    for translated, failure in results:
+        translations_by_path.update(translated)
+        if failure:
+            failed_batches.append(failure)
+    return translations_by_path, failed_batches
+
+
+# ---------- 多语言单次调用（语言组预翻译） ----------
+
+def prefetch_multi_language(pending_by_language, model, progress_callback=None, usage=None):
+    """一组相近语言的待译原文合并分批，每批一个请求同时译成组内语言。
+
+    结果作为各语言单语言管线的 prefetched 输入（见 _translate_leaves）：命中的原文不再单独送 LLM，
+    术语表 / QA / TM 回写仍按语言各自做。失败批（重试耗尽 / 形状错误）与未过英文闸的语言
+    直接缺席，由单语言管线照常补译（含二分恢复）—— 这里不做二分，避免合并请求的失败放大。
+
+    pending_by_language: {语言: [原文, ...]}（见 pending_sources）
+    usage: 用量记录（usage_report.UsageScope，整组一个）
+
+    Returns: {语言: {原文: 译文}}
+    """
+    languages = list(pending_by_language)
+    needed = {lang: set(values) for lang, values in pending_by_language.items()}
+    units = list(dict.fromkeys(v for lang in languages for v in pending_by_language[lang]))
+    prefetched = {lang: {} for lang in languages}
+    if not units:
+        return prefetched
+    # key 用序号而非原文：post_process 的术语表按 key 整串匹配，原文作 key 会误触发
+    batches = _create_multi_batches(list(enumerate(units)), languages, model)
+    if usage is not None:
+        usage.record_source(units)
+    label = "+".join(languages)
+    logger.info(f"[{label}] 多语言单次调用: {len(units)} 项 → {len(batches)} 批")
+
+    def _run(batch_num, batch):
+        langs = [lang for lang in languages if not needed[lang].isdisjoint(batch.values())]
+        extra = {}
+        if usage is not None:
+            extra["on_usage"] = lambda call: usage.record_call(batch_num, call)
+        max_retries = _max_retries()
+        for attempt in range(1, max_retries + 2):
+            try:
+                result = translate_with_llm_multi(batch, langs, model, **extra)
+            except (BatchShapeError, CircuitOpenError) as e:
+                logger.warning(f"[{label}] 批次 {batch_num} {e}，交给单语言管线")
+                return {}
+            except Exception as e:
+                logger.error(f"[{label}] 批次 {batch_num} 失败 ({attempt}/{max_retries}): {e}")
+                if attempt > max_retries:
+                    return {}
+                if usage is not None:
+                    usage.record_retry(batch_num)
+                delay = _get_retry_delay(attempt, e)
+                if delay:
+                    time.sleep(delay)
+                continue
+            return {
+                lang: translated for lang, translated in result.items()
+                if lang == "en" or not _contains_too_much_english(translated)
+            }
+        return {}
+
+    done = 0
+    with ThreadPoolExecutor(max_workers=min(_max_in_flight(), len(batches))) as pool:
+        futures = {
+            pool.submit(_run, batch_num, batch): batch_num
+            for batch_num, batch in enumerate(batches, 1)
+        }
+        for future in as_completed(futures):
+            for lang, translated in future.result().items():
+                prefetched[lang].update(
+                    (units[index], out) for index, out in translated.items()
+                    if units[index] in needed[lang]
+                )
+            done += 1
+            if progress_callback:
+                progress_callback(done / len(batches) * 100,
+                                  f"多语言合并 {label}: 批次 {done}/{len(batches)}")
+    return prefetched
+
+
 # ---------- D.7 QA 回灌重译闭环 ----------
 
 def _detect_flagged(translated_data, target_language):
-    """用确定性检测器找需重译的 key。返回 [(key, reason)]。"""
-    from translation_postprocess import contains_english, contains_simplified
-    is_zh_hant = target_language in ('zh-TW', 'zh-Hant')
-    flagged = []
-    for key, value in translated_data.items():
-        if not isinstance(value, str):
-            continue
-        if target_language != 'en' and contains_english(value):
-            flagged.append((key, '英文未翻译'))
-        elif is_zh_hant and contains_simplified(value):
-            flagged.append((key, '简体残留'))
-    return flagged
+    """用确定性检测器找需重译的 key。返回 [(key, reason)]。
+
+    判定与 strict 验证共用 translation_postprocess.flag_reasons（按值记忆的单遍 QA 标记，
+    post_process_translation 刚扫过的译文这里不再重扫）。
+    """
+    from translation_postprocess import flag_reasons
+    return flag_reasons(translated_data, target_language)
+
+
+# QA 重译结果缓存（进程级，跨文件 / 任务共享）：(目标语言, 模型, prompt 指纹, 原因, 原文) → 通过 QA 的重译结果
+# （指纹同 TM：prompt / 术语表 / 温度变了旧修复不再命中）
+_qa_cache = collections.OrderedDict()
+_qa_cache_lock = threading.Lock()
+
+
+def _qa_cache_get(key):
+    with _qa_cache_lock:
+        value = _qa_cache.get(key)
+        if value is not None:
+            _qa_cache.move_to_end(key)
+        return value
+
+
+def _qa_cache_put(key, value):
+    limit = BATCH_CONFIG.get('qa_cache_size', 10000) if USE_ADVANCED_CONFIG else 10000
+    with _qa_cache_lock:
+        _qa_cache[key] = value
+        _qa_cache.move_to_end(key)
+        while len(_qa_cache) > max(0, limit):
+            _qa_cache.popitem(last=False)
+
+
+def _qa_fix(sources, reason, target_language, model, extra):
+    """一种检出原因下的一组 {原文: 被驳回的译文} → {原文: 重译结果}。
+
+    缓存命中且与被驳回的不同 → 直接用；否则（未命中 / 缓存的正是被驳回的那版）用纠错 prompt 请求，
+    复检通过的结果才写回缓存（仍不合格的不扩散到其他文件 / 任务）。请求失败向上抛。
+    """
+    from translation_postprocess import flag_reasons
+    fingerprint = _prompt_fingerprint(target_language)
+    fixed, request = {}, {}
+    for source, rejected in sources.items():
+        cached = _qa_cache_get((target_language, model, fingerprint, reason, source))
+        if cached is not None and cached != rejected:
+            fixed[source] = cached
+        else:
+            request[source] = rejected
+    if fixed:
+        logger.info(f"[{target_language}] QA 重译缓存命中 {len(fixed)} 项（{reason}）")
+    if request:
+        # key 用序号而非原文：post_process 的术语表按 key 整串匹配，原文作 key 会误触发
+        order = list(request)
+        retranslated = translate_with_llm(
+            dict(enumerate(order)), target_language, model,
+            qa_reason=reason, rejected=[request[source] for source in order], **extra,
+        )
+        passed = {
+            index for index in retranslated
+            if not flag_reasons({index: retranslated[index]}, target_language)
+        }
+        for index, source in enumerate(order):
+            fixed[source] = retranslated[index]
+            if index in passed:
+                _qa_cache_put((target_language, model, fingerprint, reason, source), retranslated[index])
+    return fixed
 
 
 def qa_retranslate(translated_data, source_data, target_language, model,
-                   max_rounds=1, progress_callback=None):
-    """QA 回灌重译闭环：检测 flagged → 用原文重译 → 复检；剩余的返回供人工队列。
+                   max_rounds=1, progress_callback=None, usage=None):
+    """QA 回灌重译闭环：检测 flagged → 按原因用纠错 prompt 重译原文 → 复检；剩余的返回供人工队列。
 
     复用 translation_postprocess 的确定性检测器(contains_english / contains_simplified)。
     只对 strict 语言(zh-TW/zh-Hant/ar)有意义。受 max_rounds 限制防 token 失控。
+    同一原文只重译一次（扇出到所有同值 key）；通过复检的结果按 (语言, 模型, prompt 指纹, 原因, 原文)
+    进程级缓存，跨文件 / 任务的同一修复不再请求。某 key 重译结果与上一版相同即不再参与后续轮次；
+    整轮无任何变化提前结束。
+
+    usage: 用量记录（usage_report.UsageScope），重译请求记在 QA_BATCH 批次名下。
 
     Returns: (translated_data, remaining_flagged)；remaining_flagged: [(key, value, reason)]
     """
+    extra = {}
+    if usage is not None:
+        extra["on_usage"] = lambda call: usage.record_call(QA_BATCH, call)
     flagged = _detect_flagged(translated_data, target_language)
+    stalled = set()
     rounds = 0
     while flagged and rounds < max_rounds:
         rounds += 1
-        to_fix = {k: source_data[k] for k, _ in flagged if k in source_data}
-        if not to_fix:
+        by_reason = {}  # 原因 → {原文: [key]}
+        for key, reason in flagged:
+            if key in source_data and key not in stalled:
+                by_reason.setdefault(reason, {}).setdefault(source_data[key], []).append(key)
+        if not by_reason:
             break
         if progress_callback:
-            progress_callback(100, f"QA 回灌重译 {len(to_fix)} 项（第 {rounds}/{max_rounds} 轮）")
+            count = sum(len(keys) for groups in by_reason.values() for keys in groups.values())
+            progress_callback(100, f"QA 回灌重译 {count} 项（第 {rounds}/{max_rounds} 轮）")
+        changed = False
         try:
-            retranslated = translate_with_llm(to_fix, target_language, model)
-            translated_data.update(retranslated)
+            for reason, groups in by_reason.items():
+                fixed = _qa_fix(
+                    {source: translated_data[keys[0]] for source, keys in groups.items()},
+                    reason, target_language, model, extra,
+                )
+                for source, keys in groups.items():
+                    for key in keys:
+                        if fixed[source] == translated_data[key]:
+                            stalled.add(key)
+                        else:
+                            translated_data[key] = fixed[source]
+                            changed = True
         except Exception as e:
             logger.error(f"QA 回灌重译失败: {e}")
+            flagged = _detect_flagged(translated_data, target_language)
             break
         flagged = _detect_flagged(translated_data, target_language)
+        if not changed:
+            logger.info(f"[{target_language}] QA 重译结果与上一轮相同，提前结束")
+            break
     remaining = [(k, translated_data.get(k), reason) for k, reason in flagged]
     return translated_data, remaining
 
@@ -356,83 +937,207 @@ def _apply_glossary(translations_by_path, target_language):
                 translations_by_path[path] = expected
 
 
-# ---------- JSON 文件翻译 ----------
+# ---------- 翻译记忆（TM）接入 ----------
 
-def translate_json_file_llm(
-    source_file_path, target_language,
-    progress_callback=None, model=None, output_dir="output",
-):
-    """翻译 JSON 语言包文件（支持任意嵌套 dict/list，顶层可为 dict 或 list）。"""
-    selected_model = model or DEFAULT_MODEL
-    logger.info(f"翻译 JSON → {target_language} 使用 {selected_model}")
+def _prompt_fingerprint(target_language):
+    """TM 失效键：prompt 模板 + 大写规则 + 术语表 + 温度，任一变化旧条目即不再命中。"""
+    target_lang_name, temperature, cap_rule = _language_params(target_language)
+    glossary = TERM_GLOSSARY.get(target_language, {}) if USE_ADVANCED_CONFIG else {}
+    return prompt_fingerprint(target_lang_name, target_language, cap_rule, glossary, temperature)
 
-    source_base = os.path.splitext(os.path.basename(source_file_path))[0]
 
-    with open(source_file_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def _memory_lookup(leaves, target_language, model, progress_callback=None):
+    """查 TM，返回 (cached_by_path, pending_leaves, memory_ctx)。
 
-    # 递归展平：只取非空字符串叶子送翻译；嵌套结构 / 非字符串叶子在重建时原样保留。
-    # 内部一律以 path 元组为 key（唯一，避免不同路径同叶子 key 撞车）。
-    leaves = _flatten(data)
-    source_by_path = dict(leaves)          # path → 原文，供 QA 回灌取原文
-    total_items = len(leaves)
-    use_dynamic = USE_ADVANCED_CONFIG and BATCH_CONFIG.get('dynamic_batching', False)
-    batches = _create_dynamic_batches(leaves, use_dynamic)
-    total_batches = len(batches)
+    TM 关闭时 cached 为空、pending 即全部 leaves、memory_ctx 为 None。
+    """
+    memory = get_translation_memory()
+    if memory is None or not leaves:
+        return {}, list(leaves), None
+    fingerprint = _prompt_fingerprint(target_language)
+    memory.invalidate_stale(target_language, model, fingerprint)
+    hits = memory.lookup([v for _, v in leaves], target_language, model, fingerprint)
+    cached = {p: hits[v] for p, v in leaves if v in hits}
+    pending = [(p, v) for p, v in leaves if p not in cached]
+    if cached:
+        logger.info(f"[TM] {target_language} 命中 {len(cached)}/{len(leaves)} 项")
+        if progress_callback:
+            progress_callback(0, f"翻译记忆命中 {len(cached)}/{len(leaves)} 项，"
+                                 f"待翻译 {len(pending)} 项")
+    return cached, pending, (memory, fingerprint)
 
-    translations_by_path = {}
-    failed_batches = []
-    processed = 0
-    max_retries = BATCH_CONFIG.get('max_retries', MAX_RETRIES) if USE_ADVANCED_CONFIG else MAX_RETRIES
 
-    for batch_num, batch_items in enumerate(batches, 1):
-        batch_size = len(batch_items)
-        if progress_callback:
-            progress_callback((processed / total_items) * 100,
-                              f"批次 {batch_num}/{total_batches} ({batch_size} 项)")
+def _memory_store(memory_ctx, translations_by_path, source_by_path, fresh_paths,
+                  target_language, model, exclude_paths=()):
+    """把本轮 LLM 新译、且可信的条目写回 TM。
 
-        attempt = 0
-        success = False
-        while attempt <= max_retries and not success:
-            try:
-                translated = translate_with_llm(batch_items, target_language, selected_model)
-
-                # 非英语目标：检测英文混入
-                if target_language != "en" and _contains_too_much_english(translated):
-                    attempt += 1
-                    logger.warning(f"批次 {batch_num} 英文混入过多，重试 {attempt}/{max_retries}")
-                    if attempt > max_retries:
-                        # 保留最后一次结果（部分翻译总比无翻译好）
-                        translations_by_path.update(translated)
-                        processed += batch_size
-                        break
-                    time.sleep(_get_retry_delay(attempt))
-                    continue
+    排除：失败批（保留原文）/ QA 仍未过（exclude_paths）/ 叶子 key 命中术语表的路径
+    （术语表按 key 改写，值不属于"原文 → 译文"的通用映射）/ 非英语目标仍含英文 UI 词。
+    """
+    if memory_ctx is None:
+        return
+    memory, fingerprint = memory_ctx
+    glossary = TERM_GLOSSARY.get(target_language, {}) if USE_ADVANCED_CONFIG else {}
+    exclude = set(exclude_paths)
+    pairs = {}
+    for path in fresh_paths:
+        if path in exclude or (path and path[-1] in glossary):
+            continue
+        value = translations_by_path.get(path)
+        source = source_by_path.get(path)
+        if not isinstance(value, str) or value == source:
+            continue
+        if target_language != "en" and contains_english_keywords(value):
+            continue
+        pairs[source] = value
+    stored = memory.store(pairs, target_language, model, fingerprint)
+    if stored:
+        logger.info(f"[TM] {target_language} 写入 {stored} 条")
 
-                translations_by_path.update(translated)
-                processed += batch_size
-                success = True
 
-            except Exception as e:
-                attempt += 1
-                logger.error(f"批次 {batch_num} 失败 ({attempt}/{max_retries}): {e}")
-                if attempt > max_retries:
-                    failed_batches.append({
-                        'batch_num': batch_num, 'error': str(e), 'item_count': batch_size,
-                    })
-                    translations_by_path.update(batch_items)  # 保留原文（path → 原文）
-                    processed += batch_size
-                    if progress_callback:
-                        progress_callback((processed / total_items) * 100,
-                                          f"⚠️ 批次 {batch_num} 失败，保留原文")
-                    break
-                time.sleep(_get_retry_delay(attempt))
+# ---------- 文件级管线（JSON / JS 共用） ----------
 
-        # 批次间延迟
-        if batch_num < total_batches:
-            delay = BATCH_CONFIG.get('request_delay', REQUEST_DELAY) if USE_ADVANCED_CONFIG else REQUEST_DELAY
-            time.sleep(delay)
+def _dedupe_leaves(leaves):
+    """相同原文只留首个路径作翻译单元。返回 (units, members)。
 
+    units: [(代表 path, 原文)]，保持首次出现的文档序；
+    members: {代表 path: [同原文的全部 path]}（含代表自身）。
+    """
+    first_path = {}
+    members = {}
+    units = []
+    for path, value in leaves:
+        rep = first_path.get(value)
+        if rep is None:
+            first_path[value] = path
+            members[path] = [path]
+            units.append((path, value))
+        else:
+            members[rep].append(path)
+    return units, members
+
+
+def _report_dedupe(progress_callback, target_language, total, units, members):
+    """去重统计：唯一 / 总叶子数与省下的 token（重复项的输入 + 输出，粗估）。"""
+    duplicates = total - len(units)
+    saved_tokens = 2 * sum(
+        estimate_tokens(value) * (len(members[path]) - 1) for path, value in units
+    )
+    message = f"去重: 唯一 {len(units)} / 共 {total} 项，省约 {saved_tokens:,} tokens"
+    if duplicates:
+        logger.info(f"[{target_language}] {message}")
+    if progress_callback:
+        progress_callback(0, message)
+
+
+def _carry_over(leaves, previous, target_language, progress_callback=None):
+    """增量模式：与上一版源文件逐路径比对，沿用未变叶子的旧译文。
+
+    previous: (上一版源 {path: 原文}, 上一版译文 {path: 译文})。路径原文未变且旧译文存在、
+    且旧译文 != 原文（== 原文多半是上次失败保留的原文）才沿用；新增 / 改动的叶子照常翻译；
+    已删除的路径不在 leaves 里，自然被丢弃。返回 {path: 旧译文}。
+    """
+    if not previous:
+        return {}
+    prev_source, prev_output = previous
+    carried = {}
+    for path, value in leaves:
+        old = prev_output.get(path)
+        if prev_source.get(path) == value and isinstance(old, str) and old != value:
+            carried[path] = old
+    logger.info(f"[{target_language}] 增量: 沿用 {len(carried)} 项，"
+                f"需翻译 {len(leaves) - len(carried)} 项")
+    if progress_callback:
+        progress_callback(0, f"增量: 沿用旧译文 {len(carried)} 项，"
+                             f"新增/改动 {len(leaves) - len(carried)} 项")
+    return carried
+
+
+def _translate_leaves(leaves, target_language, model, progress_callback=None, carried=None,
+                     checkpoint=None, restored=None, usage=None, prefetched=None):
+    """[(path, 原文)] → 翻译结果。TM 查询 → 同值去重 → 分批 → 调度 → 扇出回全部路径。
+
+    carried: 增量模式沿用的 {path: 旧译文}（见 _carry_over），这些路径不再查 TM / 送 LLM。
+    checkpoint / restored: 断点续传 —— restored 为检查点里已完成的 {原文: 译文}，对应翻译单元
+        不再送 LLM；本轮每批完成即写入 checkpoint。
+    usage: 用量记录（usage_report.UsageScope），透传给 _run_batches。
+    prefetched: 多语言单次调用已译好的 {原文: 译文}（见 prefetch_multi_language），
+        对应翻译单元不再单独送 LLM，按本轮新译处理（同样回写 TM）。
+
+    Returns:
+        (translations_by_path, failed_batches, fresh_paths, memory_ctx)
+        translations_by_path 按 leaves 文档序；fresh_paths 为本轮经 LLM 成功翻译的路径
+        （不含沿用 / TM 命中与失败批），供 TM 回写。
+    """
+    carried = carried or {}
+    todo = [(p, v) for p, v in leaves if p not in carried] if carried else leaves
+    cached, pending, memory_ctx = _memory_lookup(todo, target_language, model, progress_callback)
+    cached.update(carried)
+
+    # 同值去重：每个唯一原文只送一次，译文再扇出到所有同值路径（先于术语表 / QA）
+    units, members = _dedupe_leaves(pending)
+    if pending:
+        _report_dedupe(progress_callback, target_language, len(pending), units, members)
+
+    # 断点续传：检查点里已完成的原文直接复用，只把剩余单元分批
+    fresh = {}
+    if restored:
+        fresh = {path: restored[value] for path, value in units if value in restored}
+        units = [(path, value) for path, value in units if path not in fresh]
+        if progress_callback:
+            progress_callback(0, f"断点续传: 恢复 {len(fresh)} 项，待翻译 {len(units)} 项")
+    if prefetched:
+        merged = {path: prefetched[value] for path, value in units if value in prefetched}
+        fresh.update(merged)
+        units = [(path, value) for path, value in units if path not in merged]
+        if progress_callback:
+            progress_callback(0, f"多语言合并请求已译 {len(merged)} 项，单独翻译 {len(units)} 项")
+
+    batches = _create_dynamic_batches(units, _use_dynamic_batching(), target_language, model)
+    if usage is not None and units:
+        usage.record_source(value for _path, value in units)
+
+    on_batch_done = None
+    if checkpoint is not None:
+        def on_batch_done(batch_num, translated, failure):
+            failed = set(failure['paths']) if failure else ()
+            checkpoint.record_batch(batch_num, {
+                value: translated[path]
+                for path, value in batches[batch_num - 1].items() if path not in failed
+            })
+
+    translated, failed_batches = _run_batches(
+        batches, target_language, model, len(units), progress_callback, on_batch_done, usage,
+    )
+    fresh.update(translated)
+
+    failed_reps = {path for failure in failed_batches for path in failure['paths']}
+    fanned = {}
+    for rep, paths in members.items():
+        for path in paths:
+            fanned[path] = fresh[rep]
+    for failure in failed_batches:
+        failure['item_count'] = sum(len(members[rep]) for rep in failure['paths'])
+
+    # 按文档序合并（插入序决定 QA 检出 / sidecar 顺序，与 TM 命中 / 去重无关）
+    translations_by_path = {
+        path: cached[path] if path in cached else fanned[path] for path, _ in leaves
+    }
+    fresh_paths = [
+        path for rep, paths in members.items() if rep not in failed_reps for path in paths
+    ]
+    return translations_by_path, failed_batches, fresh_paths, memory_ctx
+
+
+def _finalize_translations(translations_by_path, source_by_path, target_language, model,
+                           fresh_paths, memory_ctx, progress_callback=None, carried=None,
+                           usage=None):
+    """术语表兜底 → QA 回灌 → TM 回写。返回 (translations_by_path, needs_review)。
+
+    carried: 增量模式沿用的路径 —— 只做检测、不回灌重译（否则每次增量都会重译上次已进
+    复审队列的旧条目），检出项照常进 needs_review，保证 sidecar 完整。
+    usage: 用量记录（QA 回灌重译的请求）。
+    """
     # 术语表兜底（整 key 精确匹配，用叶子 key）——post_process 对 path 元组 key 不命中，
     # 这里显式补；放在 QA 之前，保持原"glossary 先于 QA"的顺序。
     _apply_glossary(translations_by_path, target_language)
@@ -443,33 +1148,234 @@ def translate_json_file_llm(
     if (USE_ADVANCED_CONFIG and BATCH_CONFIG.get('qa_retranslate', True)
             and VALIDATION_STRENGTH.get(target_language) == 'strict'):
         max_rounds = BATCH_CONFIG.get('qa_max_rounds', 1)
-        translations_by_path, needs_review = qa_retranslate(
-            translations_by_path, source_by_path, target_language, selected_model,
-            max_rounds=max_rounds, progress_callback=progress_callback,
+        carried = carried or {}
+        scope = {p: v for p, v in translations_by_path.items() if p not in carried}
+        scope, needs_review = qa_retranslate(
+            scope, source_by_path, target_language, model,
+            max_rounds=max_rounds, progress_callback=progress_callback, usage=usage,
+        )
+        translations_by_path.update(scope)
+        if carried:
+            kept = {p: translations_by_path[p] for p in carried}
+            needs_review += [(p, kept[p], r) for p, r in _detect_flagged(kept, target_language)]
+            order = {p: i for i, p in enumerate(translations_by_path)}
+            needs_review.sort(key=lambda item: order[item[0]])
+
+    _memory_store(
+        memory_ctx, translations_by_path, source_by_path, fresh_paths,
+        target_language, model, exclude_paths=[p for p, _v, _r in needs_review],
+    )
+    return translations_by_path, needs_review
+
+
+def _write_needs_review(output_dir, source_base, target_language, needs_review):
+    """D.7 人工复审队列：QA 回灌后仍未过的写 sidecar（非阻塞，交付物不受影响）。
+
+    key 用点号路径字符串（数组下标 [i]），便于人工定位嵌套位置。
+    """
+    if not needs_review:
+        return
+    review_path = os.path.join(
+        output_dir, f"{source_base}_{target_language}.needs_review.json"
+    )
+    with open(review_path, "w", encoding="utf-8") as f:
+        json.dump(
+            [{"key": _path_to_str(p), "value": v, "reason": r} for p, v, r in needs_review],
+            f, ensure_ascii=False, indent=2,
         )
+    logger.warning(f"[{target_language}] {len(needs_review)} 项 QA 未过，写入 {review_path}")
+
+
+def _checkpoint_fingerprint(target_language, model):
+    """检查点指纹：模型 + prompt 指纹；任一变化则旧检查点作废（译文不再可比）。"""
+    return f"{model}:{_prompt_fingerprint(target_language)}"
+
+
+def _translate_document(leaves, source_by_path, target_language, model,
+                        progress_callback=None, carried=None, checkpoint=None, usage=None,
+                        prefetched=None):
+    """文档级管线（JSON / JS 共用）：翻译叶子 → 术语表 / QA / TM。
+
+    checkpoint: 断点续传检查点（见 checkpoint.py）。已有完整 final 且原文未变 → 直接返回；
+    否则复用已完成批次，只翻译剩余部分，结束（无失败批）时写入 final。
+    usage: 用量记录（usage_report.UsageScope）；None 不记录。
+    prefetched: 多语言单次调用的 {原文: 译文}（见 _translate_leaves）。
+
+    Returns: (translations_by_path, needs_review, failed_batches)
+    """
+    restored = None
+    if checkpoint is not None:
+        restored, final = checkpoint.restore(_checkpoint_fingerprint(target_language, model))
+        if final is not None and final["sources"] == source_by_path:
+            logger.info(f"[{target_language}] 检查点已含完整结果，跳过翻译")
+            if progress_callback:
+                progress_callback(100, "断点续传: 已完成，直接复用检查点")
+            return final["translations"], final["needs_review"], []
+
+    translations_by_path, failed_batches, fresh_paths, memory_ctx = _translate_leaves(
+        leaves, target_language, model, progress_callback, carried, checkpoint, restored, usage,
+        prefetched,
+    )
+    extra = {"usage": usage} if usage is not None else {}
+    translations_by_path, needs_review = _finalize_translations(
+        translations_by_path, source_by_path, target_language, model,
+        fresh_paths, memory_ctx, progress_callback, carried, **extra,
+    )
+    if checkpoint is not None and not failed_batches:
+        checkpoint.record_final(translations_by_path, source_by_path, needs_review)
+    return translations_by_path, needs_review, failed_batches
+
+
+def plan_translation(leaves, target_language, model):
+    """费用估算 dry-run：与 _translate_leaves 同样走 TM 查询（只读）→ 同值去重 → 分批，不调 API。
+
+    Returns:
+        {"memory_hits": TM 命中叶子数, "units": 去重后待译单元数,
+         "system_tokens": 每批固定的 system 前缀 tokens,
+         "batches": [{"values": [原文, ...], "prompt_tokens": 该批输入 tokens}]}
+    """
+    hits = _memory_peek([v for _, v in leaves], target_language, model)
+    pending = [(p, v) for p, v in leaves if v not in hits]
+    units, _members = _dedupe_leaves(pending)
+    batches = _create_dynamic_batches(units, _use_dynamic_batching(), target_language, model)
+
+    target_lang_name, _temperature, cap_rule = _language_params(target_language)
+    system_tokens = estimate_request_tokens([], target_lang_name, target_language, cap_rule)[0]
+    planned = []
+    for batch in batches:
+        values = list(batch.values())
+        _system, prompt_tokens = estimate_request_tokens(
+            values, target_lang_name, target_language, cap_rule
+        )
+        planned.append({"values": values, "prompt_tokens": prompt_tokens})
+    return {
+        "memory_hits": len(leaves) - len(pending),
+        "units": len(units),
+        "system_tokens": system_tokens,
+        "batches": planned,
+    }
+
+
+def pending_sources(leaves, target_language, model, checkpoint=None):
+    """该语言仍需送 LLM 的唯一原文（文档序）：去掉 TM 命中与检查点已完成的部分。只读，不调 API。
+
+    供 translation_runner 在多语言单次调用前汇总一组语言的待译原文。
+    """
+    if checkpoint is not None:
+        restored, final = checkpoint.restore(_checkpoint_fingerprint(target_language, model))
+        if final is not None and final["sources"] == dict(leaves):
+            return []
+    else:
+        restored = {}
+    values = list(dict.fromkeys(v for _, v in leaves))
+    hits = _memory_peek(values, target_language, model)
+    return [v for v in values if v not in hits and v not in restored]
+
+
+def _memory_peek(values, target_language, model):
+    """只读查 TM（不清理过期条目）。TM 关闭时返回空 dict。"""
+    memory = get_translation_memory()
+    if memory is None or not values:
+        return {}
+    return memory.lookup(values, target_language, model, _prompt_fingerprint(target_language))
+
+
+def document_leaves(source_file_path, data):
+    """已解析的源文档 → [(path, 原文)]：JSON 递归展平，JS 扁平 {key: value} 视为单层路径。"""
+    extension = os.path.splitext(source_file_path)[1].lower()
+    if extension == ".json":
+        return _flatten(data)
+    if extension == ".js":
+        return [((key,), value) for key, value in data.items()]
+    raise ValueError(f"不支持的文件类型: {extension}")
+
+
+# ---------- JSON 文件翻译 ----------
+
+def load_json_source(source_file_path):
+    """读取 JSON 语言包。多语言调度时只读一次，结果以 source_data 传给各语言（只读共享）。"""
+    with open(source_file_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_js_source(source_file_path):
+    """读取并解析 JS 语言包为 {key: value}；提取不到键值对时抛 ValueError。"""
+    with open(source_file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+    translation_dict = parse_js_locale(content)
+    if not translation_dict:
+        raise ValueError("无法从 JS 文件提取键值对，请检查格式")
+    return translation_dict
+
 
-    # 按原结构重建（保留键序、嵌套 dict/list、非字符串叶子、空串、未翻译原文）
+def _write_json_output(data, translations_by_path, source_base, target_language, output_dir):
+    """按原结构重建并保存，返回输出文件名（保留键序、嵌套 dict/list、非字符串叶子、空串、未翻译原文）。"""
     translated_data = _rebuild(data, translations_by_path)
 
-    # 保存
     output_file = f"{source_base}_{target_language}.json"
     output_path = os.path.join(output_dir, output_file)
     os.makedirs(output_dir, exist_ok=True)
     with open(output_path, "w", encoding="utf-8") as f:
         json.dump(translated_data, f, ensure_ascii=False, indent=2)
+    return output_file
+
+
+def _write_js_output(translations_by_path, source_base, target_language, output_dir):
+    """组装 `export default {...}` 并保存，返回输出文件名。路径均为单层 (key,)。"""
+    translated_data = {path[0]: value for path, value in translations_by_path.items()}
 
-    # D.7 人工复审队列：QA 回灌后仍未过的写 sidecar（非阻塞，交付物不受影响）
-    # key 用点号路径字符串（数组下标 [i]），便于人工定位嵌套位置。
-    if needs_review:
-        review_path = os.path.join(
-            output_dir, f"{source_base}_{target_language}.needs_review.json"
+    output_file = f"{source_base}_{target_language}.js"
+    output_path = os.path.join(output_dir, output_file)
+    os.makedirs(output_dir, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(dump_js_locale(translated_data))
+    return output_file
+
+
+def translate_json_file_llm(
+    source_file_path, target_language,
+    progress_callback=None, model=None, output_dir="output", source_data=None,
+    previous=None, checkpoint=None, usage=None, prefetched=None,
+):
+    """翻译 JSON 语言包文件（支持任意嵌套 dict/list，顶层可为 dict 或 list）。
+
+    source_data: 已解析的源文档（多语言调度共用一份，只读）；None 则从 source_file_path 读。
+    source_file_path 始终用于决定输出文件名。
+    previous: 增量模式 (上一版源文档, 上一版该语言译文)，按 _flatten 路径比对，
+        只重译新增 / 改动的叶子，未变叶子沿用旧译文，已删路径丢弃。
+    checkpoint: 断点续传检查点（checkpoint.open_checkpoint），每批完成即落盘。
+    usage: 用量记录（usage_report.UsageScope），记录本文件本语言的每次请求。
+    prefetched: 多语言单次调用已译好的 {原文: 译文}（见 prefetch_multi_language）。
+    """
+    selected_model = model or DEFAULT_MODEL
+    logger.info(f"翻译 JSON → {target_language} 使用 {selected_model}")
+
+    source_base = os.path.splitext(os.path.basename(source_file_path))[0]
+
+    data = source_data if source_data is not None else load_json_source(source_file_path)
+
+    # 递归展平：只取非空字符串叶子送翻译；嵌套结构 / 非字符串叶子在重建时原样保留。
+    # 内部一律以 path 元组为 key（唯一，避免不同路径同叶子 key 撞车）。
+    leaves = _flatten(data)
+    source_by_path = dict(leaves)          # path → 原文，供 QA 回灌取原文
+
+    carried = {}
+    if previous is not None:
+        prev_source, prev_output = previous
+        carried = _carry_over(
+            leaves, (dict(_flatten(prev_source)), dict(_flatten(prev_output))),
+            target_language, progress_callback,
         )
-        with open(review_path, "w", encoding="utf-8") as f:
-            json.dump(
-                [{"key": _path_to_str(p), "value": v, "reason": r} for p, v, r in needs_review],
-                f, ensure_ascii=False, indent=2,
-            )
-        logger.warning(f"[{target_language}] {len(needs_review)} 项 QA 未过，写入 {review_path}")
+
+    translations_by_path, needs_review, failed_batches = _translate_document(
+        leaves, source_by_path, target_language, selected_model,
+        progress_callback, carried, checkpoint, usage, prefetched,
+    )
+
+    output_file = _write_json_output(
+        data, translations_by_path, source_base, target_language, output_dir
+    )
+    _write_needs_review(output_dir, source_base, target_language, needs_review)
 
     _report_completion(progress_callback, selected_model, failed_batches)
     return output_file
@@ -480,64 +1386,132 @@ def translate_json_file_llm(
 
 def translate_js_file_llm(
     source_file_path, target_language,
-    progress_callback=None, model=None, output_dir="output",
+    progress_callback=None, model=None, output_dir="output", source_data=None,
+    previous=None, checkpoint=None, usage=None, prefetched=None,
 ):
-    """翻译 `export default {...}` 形式的 JS 语言包。"""
+    """翻译 `export default {...}` 形式的 JS 语言包。
+
+    与 JSON 走同一条管线：扁平 {key: value} 视为单层路径 (key,)，故 TM / 去重 / 并发批次 /
+    术语表（整 key 匹配，等价原 ensure_term_consistency）/ QA sidecar 行为一致。
+
+    source_data: 已解析的 {key: value}（见 load_js_source）；None 则从文件读。
+    previous: 增量模式 (上一版源 {key: value}, 上一版该语言译文 {key: value})，按 key 比对。
+    checkpoint: 断点续传检查点（同 JSON）。
+    usage: 用量记录（同 JSON）。
+    prefetched: 多语言单次调用的 {原文: 译文}（同 JSON）。
+    """
     selected_model = model or DEFAULT_MODEL
     logger.info(f"翻译 JS → {target_language} 使用 {selected_model}")
 
     source_base = os.path.splitext(os.path.basename(source_file_path))[0]
 
-    with open(source_file_path, "r", encoding="utf-8") as f:
-        content = f.read()
+    translation_dict = source_data if source_data is not None else load_js_source(source_file_path)
 
-    translation_dict = parse_js_locale(content)
-    if not translation_dict:
-        raise ValueError("无法从 JS 文件提取键值对，请检查格式")
+    leaves = [((key,), value) for key, value in translation_dict.items()]
+    source_by_path = dict(leaves)
 
-    items = list(translation_dict.items())
-    total_items = len(translation_dict)
-    total_batches = (total_items + BATCH_SIZE - 1) // BATCH_SIZE
+    carried = {}
+    if previous is not None:
+        prev_source, prev_output = previous
+        carried = _carry_over(
+            leaves,
+            ({(k,): v for k, v in prev_source.items()}, {(k,): v for k, v in prev_output.items()}),
+            target_language, progress_callback,
+        )
 
-    translated_data = {}
-    failed_batches = []
+    translations_by_path, needs_review, failed_batches = _translate_document(
+        leaves, source_by_path, target_language, selected_model,
+        progress_callback, carried, checkpoint, usage, prefetched,
+    )
+    output_file = _write_js_output(
+        translations_by_path, source_base, target_language, output_dir
+    )
+    _write_needs_review(output_dir, source_base, target_language, needs_review)
 
-    for i in range(0, total_items, BATCH_SIZE):
-        batch_items = dict(items[i:i + BATCH_SIZE])
-        batch_num = i // BATCH_SIZE + 1
+    _report_completion(progress_callback, selected_model, failed_batches)
+    return output_file
 
-        if progress_callback:
-            progress_callback((i / total_items) * 100, f"JS 批次 {batch_num}/{total_batches}")
 
-        attempt = 0
-        while attempt <= MAX_RETRIES:
-            try:
-                translated = translate_with_llm(batch_items, target_language, selected_model)
-                translated_data.update(translated)
-                break
-            except Exception as e:
-                attempt += 1
-                logger.error(f"JS 批次 {batch_num} 失败 ({attempt}/{MAX_RETRIES}): {e}")
-                if attempt > MAX_RETRIES:
-                    failed_batches.append({
-                        'batch_num': batch_num, 'error': str(e), 'item_count': len(batch_items),
-                    })
-                    translated_data.update(batch_items)
-                    break
-                time.sleep(REQUEST_DELAY * 2)
-
-        if i + BATCH_SIZE < total_items:
-            time.sleep(REQUEST_DELAY)
-
-    # 组装 JS 输出
-    output_file = f"{source_base}_{target_language}.js"
-    output_path = os.path.join(output_dir, output_file)
-    os.makedirs(output_dir, exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(dump_js_locale(translated_data))
+# ---------- 跨文件合并翻译（碎片化 ZIP） ----------
+
+def translate_files_llm(
+    sources, target_language, progress_callback=None, model=None, checkpoint=None, usage=None,
+):
+    """多个 JSON / JS 文件 → 同一语言，叶子合并成一个池翻译，再拆回各文件输出。
+
+    碎片化语言包（几百个模块文件、每个 5–20 条）逐文件翻译时每个文件至少一次请求、
+    每次都带完整 prompt 开销；合并后各文件叶子以 (文件序号,) + path 标记，统一走
+    _translate_document（TM / 跨文件同值去重 / 按 token 预算分批 / QA），请求数按总量计。
+
+    sources: [(source_file_path, output_dir, source_data | None)]；source_data 为 None 时按扩展名读文件。
+    checkpoint: 整个池一个检查点（按原文记录，与单文件同格式）。
+    usage: 整个池一个用量记录入口（批次跨文件，无法按文件拆分）。
+
+    Returns:
+        [(输出文件名 | None, Exception | None)]，顺序同 sources。单个文件解析失败只影响该文件；
+        失败批的叶子保留原文（与单文件一致，不算文件失败）。
+    """
+    selected_model = model or DEFAULT_MODEL
+    results = [(None, None)] * len(sources)
+    documents = []  # (序号, 扩展名, 源文档, source_base, output_dir)
+    leaves = []
+    for index, (source_file_path, output_dir, source_data) in enumerate(sources):
+        extension = os.path.splitext(source_file_path)[1].lower()
+        try:
+            if source_data is not None:
+                data = source_data
+            elif extension == ".json":
+                data = load_json_source(source_file_path)
+            elif extension == ".js":
+                data = load_js_source(source_file_path)
+            else:
+                raise ValueError(f"不支持的文件类型: {extension}")
+            doc_leaves = document_leaves(source_file_path, data)
+        except Exception as e:
+            logger.error(f"源文件解析失败 {source_file_path}: {e}")
+            results[index] = (None, e)
+            continue
+        source_base = os.path.splitext(os.path.basename(source_file_path))[0]
+        documents.append((index, extension, data, source_base, output_dir))
+        leaves.extend(((index,) + path, value) for path, value in doc_leaves)
+
+    if not documents:
+        return results
+    logger.info(
+        f"合并翻译 {len(documents)} 个文件 / {len(leaves)} 项 → {target_language} 使用 {selected_model}"
+    )
+    source_by_path = dict(leaves)
+    translations_by_path, needs_review, failed_batches = _translate_document(
+        leaves, source_by_path, target_language, selected_model,
+        progress_callback, checkpoint=checkpoint, usage=usage,
+    )
+
+    # 按文件序号拆回（各自保持文档序）
+    per_file = {index: {} for index, *_rest in documents}
+    for path, value in translations_by_path.items():
+        per_file[path[0]][path[1:]] = value
+    review_by_file = {index: [] for index, *_rest in documents}
+    for path, value, reason in needs_review:
+        review_by_file[path[0]].append((path[1:], value, reason))
+
+    for index, extension, data, source_base, output_dir in documents:
+        try:
+            if extension == ".json":
+                output_file = _write_json_output(
+                    data, per_file[index], source_base, target_language, output_dir
+                )
+            else:
+                output_file = _write_js_output(
+                    per_file[index], source_base, target_language, output_dir
+                )
+            _write_needs_review(output_dir, source_base, target_language, review_by_file[index])
+            results[index] = (output_file, None)
+        except Exception as e:
+            logger.error(f"写出译文失败 {source_base} ({target_language}): {e}")
+            results[index] = (None, e)
 
     _report_completion(progress_callback, selected_model, failed_batches)
-    return output_file
+    return results
 
 
 def _report_completion(progress_callback, model, failed_batches):
@@ -7,19 +7,68 @@
 # 批处理优化参数
 BATCH_CONFIG = {
     "size": 15,  # 默认批次大小（适合大多数短文本）
-    "request_delay": 0.3,  # 减少请求间隔（Claude API 速率限制很高）
+    "request_delay": 0.3,  # 仅作重试延迟兜底；LLM 批间节奏已由 rate_limiter 自适应控制
     "max_retries": 3,  # 最大重试次数
-    "retry_delays": [1.0, 2.0, 4.0],  # 渐进式重试延迟
+    "retry_delays": [1.0, 2.0, 4.0],  # 非限流错误（5xx / 网络）的渐进式重试延迟；429 的等待由 rate_limiter 负责
 
     # 智能批处理：根据内容长度动态调整
     "dynamic_batching": True,
-    "max_chars_per_batch": 3000,  # 每批最大字符数（避免超过 token 限制）
-    "min_batch_size": 2,  # 最小批次大小（长文本保护）
-    "max_batch_size": 25,  # 最大批次大小
+    # 分批策略: "tokens" = 按估算 token 装箱（只算值、按文字系统估算、含每批 prompt 开销），
+    #           "chars"  = 旧的 len(key)+len(value) 字符数分批
+    "batch_strategy": "tokens",
+    "batch_token_budget": 6000,  # 每批 prompt+completion 估算 token 目标（另受模型 context_length 约束）
+    "batch_output_fill": 0.7,    # completion 估算最多占输出上限（max_tokens=8192）的比例，留余量防截断
+    "max_chars_per_batch": 3000,  # chars 策略：每批最大字符数（避免超过 token 限制）
+    "min_batch_size": 2,  # chars 策略：最小批次大小（长文本保护）
+    "max_batch_size": 25,  # chars 策略：单批条数硬上限
+    "token_max_batch_size": 80,  # tokens 策略：单批条数硬上限（越大数量不匹配时重试代价越高）
+
+    # 并发批次窗口：单文件单语言内最多 N 批同时在途（1 = 逐批顺序；批间节奏由 rate_limiter 控制）
+    # 结果按批次序合并，输出与顺序模式逐字节一致
+    "max_in_flight": 4,
+    # 多语言并发：同时翻译的语言数（cli --jobs 默认值）；全进程在途 LLM 请求总上限
+    "language_jobs": 4,
+    "max_concurrent_requests": 8,
+    # ZIP 内 (文件, 语言) 任务并发数（单个上传任务内）
+    "zip_task_jobs": 4,
+    # ZIP 跨文件合并翻译（仅 LLM，opt-in）：同语言全部文件叶子合并分批，碎片化语言包请求数降一个量级；
+    # 开启后每种语言只有一个任务（不再按文件并行）
+    "zip_cross_file_batching": False,
+    # Web 后台任务工作线程数（同时执行的上传任务数；其余排队，按提交方公平调度）
+    "job_workers": 2,
+    # 共享 HTTP 连接池（AsyncOpenAI + httpx）：连接总数 / keep-alive 连接数，应 ≥ max_concurrent_requests
+    "http_max_connections": 16,
+    "http_max_keepalive": 16,
+    # 自适应限流（按模型共享，见 rate_limiter.py）：起步 / 上限速率（请求/秒）
+    "rate_limit_initial_rps": 2.0,
+    "rate_limit_max_rps": 20.0,
+    # 流式响应：批内逐项进度 + 断流只重请求剩余项（opt-in，见 llm_client）
+    "stream_responses": False,
+    # 多语言单次调用：相近语言（见 MULTI_LANGUAGE_GROUPS）共用一批原文、一次请求译成多种语言（opt-in）
+    "multi_language_calls": False,
+    "multi_language_max_group": 4,  # 每次调用最多几种语言（另受模型输出上限约束）
+    "multi_language_min_batch": 10,  # 合并后一批至少装得下的条数，装不下就拆小组 / 逐语言
+    # 模型故障转移：一批在当前模型上失败 N 次后换链上的下一个模型（opt-in）；
+    # 链为空 = 请求的模型之后按 llm_models 档位 质量 → 备选 → 经济
+    "model_failover": False,
+    "model_failover_after": 2,
+    "model_failover_chain": [],  # 例: ["anthropic/claude-sonnet-5", "openai/gpt-5.4", "google/gemini-3.1-flash-lite-preview"]
+    # 对冲请求：超过该模型近期批次 p95 耗时仍未返回 → 向链上下一个模型发同一批，先到先用（opt-in）
+    "hedge_requests": False,
+    "hedge_percentile": 95,
+    "hedge_min_samples": 20,  # 样本不足时不对冲（p95 不可信）
+    # 熔断（按模型全进程共享，见 circuit_breaker.py）：窗口内失败率过高即断开，冷却后半开探测（opt-in）
+    "circuit_breaker": False,
+    "circuit_breaker_window": 60.0,       # 秒：失败率统计窗口
+    "circuit_breaker_min_requests": 10,   # 窗口内请求数不足时不判定
+    "circuit_breaker_failure_rate": 0.5,
+    "circuit_breaker_cooldown": 30.0,     # 秒：断开后多久放探测请求
 
     # D.7 QA 回灌重译闭环（仅 strict 语言 zh-TW/zh-Hant/ar）
     "qa_retranslate": True,  # 译后检测残留(英文/简体)并自动重译 flagged
     "qa_max_rounds": 1,      # 每文件最多回灌轮数（防 token 失控）
+    "qa_temperature": 0.3,   # 纠错 prompt 的最低温度（同温度重发大概率得到同样的错误；不支持 temperature 的模型忽略）
+    "qa_cache_size": 10000,  # 进程级 QA 重译缓存条数上限（(语言, 模型, 原因, 原文) → 重译结果）
 }
 
 # 语言代码映射（解决API兼容性问题）
@@ -29,6 +78,16 @@ LANGUAGE_CODE_MAPPING = {
     'zh': 'zh-Hans',     # 简体中文简写
 }
 
+# 多语言单次调用的候选分组：同组语言可共用一批原文一次译出（共享词汇 / 书写系统，合译质量稳定）。
+# 不在任何组内的语言照常逐语言翻译
+MULTI_LANGUAGE_GROUPS = [
+    ['es', 'pt', 'it', 'fr', 'ro'],
+    ['zh-TW', 'zh-Hant'],
+    ['de', 'nl', 'sv', 'da', 'nb'],
+    ['ru', 'uk', 'pl', 'cs'],
+    ['id', 'ms'],
+]
+
 # 语言特定的 temperature 设置
 TEMPERATURE_BY_LANGUAGE = {
     'zh-TW': 0.05,     # 极低，确保繁体中文准确性
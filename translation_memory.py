@@ -0,0 +1,120 @@
+"""
+翻译记忆（Translation Memory）—— 跨运行持久复用已翻译字符串
+
+设计:
+- SQLite 单文件（stdlib，无新依赖），位于 config.TRANSLATION_MEMORY_DIR；目录为空 = 关闭
+- 键 = (原文, 目标语言, 模型, prompt 指纹)。指纹由调用方（translate_llm._prompt_fingerprint）
+  对 prompt 模板 / 大写规则 / 术语表 / 温度 取哈希 —— 任一变化即指纹变化，旧条目不再命中
+- 只存"可信"译文（调用方负责过滤失败批 / QA 未过 / 术语表按 key 改写的条目）
+- 多线程共享一个连接，读写用锁串行（多语言并发时各语言线程共用同一个 TM）
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+
+logger = logging.getLogger(__name__)
+
+DB_FILENAME = "translation_memory.sqlite3"
+
+# SQLite 单条语句的绑定参数上限（旧版本 999），lookup 按此分块
+_LOOKUP_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source          TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    model           TEXT NOT NULL,
+    fingerprint     TEXT NOT NULL,
+    translation     TEXT NOT NULL,
+    updated_at      REAL NOT NULL,
+    PRIMARY KEY (source, target_language, model, fingerprint)
+)
+"""
+
+
+class TranslationMemory:
+    """持久翻译记忆。线程安全；lookup/store 以"原文字符串"为单位。"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, DB_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def lookup(self, sources, target_language, model, fingerprint):
+        """批量查询，返回 {原文: 译文}（只含命中项）。"""
+        unique = list(dict.fromkeys(sources))
+        hits = {}
+        with self._lock:
+            for i in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[i:i + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT source, translation FROM translations "
+                    f"WHERE target_language = ? AND model = ? AND fingerprint = ? "
+                    f"AND source IN ({placeholders})",
+                    (target_language, model, fingerprint, *chunk),
+                ).fetchall()
+                hits.update(rows)
+        return hits
+
+    def store(self, pairs, target_language, model, fingerprint):
+        """写入 {原文: 译文}；同键覆盖。返回写入条数。"""
+        if not pairs:
+            return 0
+        now = time.time()
+        rows = [
+            (src, target_language, model, fingerprint, dst, now)
+            for src, dst in pairs.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations "
+                "(source, target_language, model, fingerprint, translation, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def invalidate_stale(self, target_language, model, fingerprint):
+        """删除同 (语言, 模型) 下指纹不同的旧条目（prompt/规则/术语表已变，永不会再命中）。"""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "DELETE FROM translations "
+                "WHERE target_language = ? AND model = ? AND fingerprint != ?",
+                (target_language, model, fingerprint),
+            )
+        if cur.rowcount:
+            logger.info(f"[TM] 清理 {cur.rowcount} 条过期条目 ({target_language}/{model})")
+        return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# 懒加载单例：按目录缓存（测试 / CLI 可切换目录）
+_memory = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory():
+    """返回进程级 TranslationMemory；config.TRANSLATION_MEMORY_DIR 为空时返回 None（关闭）。"""
+    global _memory
+    directory = config.TRANSLATION_MEMORY_DIR
+    if not directory:
+        return None
+    with _memory_lock:
+        if _memory is None or _memory.path != os.path.join(directory, DB_FILENAME):
+            if _memory is not None:
+                _memory.close()
+            _memory = TranslationMemory(directory)
+            logger.info(f"[TM] 翻译记忆: {_memory.path}")
+        return _memory
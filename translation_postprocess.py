@@ -2,10 +2,16 @@
 """
 翻译后处理模块
 用于验证和修正翻译结果
+
+QA 检测标记（英文关键词 / 可疑未翻译拉丁 / 简体残留，位掩码，见 qa_flags）按需计算、逐位按值记忆：
+调用方只算自己要的位（关键词闸不付 OpenCC 转换的代价），post_process_translation、translate_llm
+的批级英文闸 / QA 回灌检出 / TM 回写过滤、validate_translation_quality 读同一份记忆，不再各自重扫。
 """
 
+import functools
 import re
 import logging
+from array import array
 from translation_config import (
     VALIDATION_STRENGTH,
     QUALITY_CHECK_RULES,
@@ -52,15 +58,10 @@ def strict_validation(data, target_lang):
     logger.warning 暴露，供上游 pipeline 决定是否回灌 LLM 重译（OpenCC 只当检测闸，
     不当翻译器）。返回的 data 内容不变。
     """
-    is_zh_hant = target_lang in ('zh-TW', 'zh-Hant')
-    flagged = []
-    for key, value in data.items():
-        if not isinstance(value, str):
-            continue
-        if contains_english(value):
-            flagged.append((key, value, '英文未翻译'))
-        elif is_zh_hant and contains_simplified(value):
-            flagged.append((key, value, '简体残留'))
+    flagged = [
+        (key, data[key], reason)
+        for key, reason in flag_reasons(data, target_lang, check_english=True)
+    ]
 
     for key, value, reason in flagged:
         logger.warning(f"[{target_lang}] {reason} ({key}): {value}")
@@ -79,10 +80,10 @@ def moderate_validation(data, target_lang):
     english_count = 0
     total_count = len(data)
     
-    for key, value in data.items():
-        if isinstance(value, str) and contains_english_keywords(value):
+    for key, flags in zip(data, scan_flags(data.values(), FLAG_ENGLISH_KEYWORD)):
+        if flags:
             english_count += 1
-            logger.warning(f"可能的英文混入 ({key}): {value}")
+            logger.warning(f"可能的英文混入 ({key}): {data[key]}")
     
     if total_count > 0 and english_count / total_count > max_ratio:
         logger.error(f"{target_lang} 翻译中英文比例过高: {english_count}/{total_count}")
@@ -141,6 +142,21 @@ _LATIN_ALLOW = {
 _CJK_RE = re.compile(r'[一-鿿㐀-䶿豈-﫿]')
 
 
+# i18n 占位符 {x} / ${x}；紧邻数字的字母（型号/单位/规格：H5 / 2MB / 75px / 1920x1080）；拉丁词
+_PLACEHOLDER_RE = re.compile(r'\$?\{[^}]*\}')
+_DIGIT_ADJACENT_RE = re.compile(r'(?<=\d)[A-Za-z]+|[A-Za-z]+(?=\d)')
+_LATIN_WORD_RE = re.compile(r'[A-Za-z]+')
+
+# ── QA 标记 ──
+FLAG_ENGLISH_KEYWORD = 1   # 含英文 UI 关键词（contains_english_keywords：批级英文闸 / 中度验证 / TM 过滤）
+FLAG_SUSPECT_LATIN = 2     # 可疑的未翻译拉丁（contains_english：strict 验证 / QA 回灌）
+FLAG_SIMPLIFIED = 4        # 简体残留（contains_simplified：仅 zh-TW / zh-Hant 需要）
+FLAG_ALL = FLAG_ENGLISH_KEYWORD | FLAG_SUSPECT_LATIN | FLAG_SIMPLIFIED
+
+# 每种标记按值记忆的条数上限：同一译文在后处理、批级闸、QA 检出、TM 回写间只算一次
+QA_FLAG_CACHE_SIZE = 1 << 16
+
+
 def contains_english(text):
     """检查中文译文里是否【真的混入了未翻译的英文 UI 串】。
 
@@ -154,14 +170,23 @@ def contains_english(text):
     （CJK-为主放行规则 2026-06-20 加：real-data e2e 显示品牌 Oracle / 术语括注被误判，
     旧"任一小写非白名单词即判"会把长句嵌入的品牌/术语误杀。）
     """
+    return bool(qa_flags(text, FLAG_SUSPECT_LATIN))
+
+
+@functools.lru_cache(maxsize=QA_FLAG_CACHE_SIZE)
+def _suspect_latin(text):
+    """contains_english 的判定本体（经 qa_flags 调用，按值记忆）。"""
+    # 纯 CJK / 无拉丁字母的串（译文的大多数）无需走下面的替换与分词
+    if not _LATIN_WORD_RE.search(text):
+        return False
     # 1) 去掉 i18n 占位符
-    t = re.sub(r'\$?\{[^}]*\}', '', text)
-    # 2) 去掉紧邻数字的字母（型号/单位/规格：H5 / 2MB / 75px / 1920x1080）
-    t = re.sub(r'(?<=\d)[A-Za-z]+|[A-Za-z]+(?=\d)', '', t)
+    t = _PLACEHOLDER_RE.sub('', text)
+    # 2) 去掉紧邻数字的字母
+    t = _DIGIT_ADJACENT_RE.sub('', t)
     # 3) 收集"含小写且不在白名单"的可疑词
     suspects = [
-        tok for tok in re.findall(r'[A-Za-z]+', t)
-        if any(c.islower() for c in tok) and tok.lower() not in _LATIN_ALLOW
+        tok for tok in _LATIN_WORD_RE.findall(t)
+        if not tok.isupper() and tok.lower() not in _LATIN_ALLOW
     ]
     if not suspects:
         return False
@@ -191,7 +216,13 @@ def contains_simplified(text):
     用作 LLM 漏翻的 QA 闸：命中即"这条该是繁体却还有简体"。注意只用来【检测】，
     不要拿 OpenCC 输出直接当译文（字形映射给不出地道台湾用语，且有 才/纔 古字坑）。
     """
-    if _S2TW is None:
+    return bool(qa_flags(text, FLAG_SIMPLIFIED))
+
+
+@functools.lru_cache(maxsize=QA_FLAG_CACHE_SIZE)
+def _has_simplified(text):
+    """contains_simplified 的判定本体；不含 CJK 的串 s2tw 不会改，直接跳过转换。"""
+    if _S2TW is None or not _CJK_RE.search(text):
         return False
     converted = _S2TW.convert(text)
     if converted == text:
@@ -201,18 +232,70 @@ def contains_simplified(text):
     return any(a != b and a not in _TRAD_VARIANT_OK for a, b in zip(text, converted))
 
 
-_ENGLISH_KEYWORD_PATTERNS = [
-    re.compile(rf'\b{re.escape(k)}\b', re.IGNORECASE)
-    for k in QUALITY_CHECK_RULES['english_keywords']
-]
+# 全部英文关键词编译成一个交替式（长词优先），一次 search 代替逐词正则
+_ENGLISH_KEYWORD_RE = re.compile(
+    r'\b(?:' + '|'.join(
+        re.escape(k) for k in sorted(QUALITY_CHECK_RULES['english_keywords'], key=len, reverse=True)
+    ) + r')\b',
+    re.IGNORECASE,
+)
 
 
 def contains_english_keywords(text):
     """检查是否包含常见的英文关键词（词边界匹配，避免把罗曼语系同源词误判）。"""
-    for pattern in _ENGLISH_KEYWORD_PATTERNS:
-        if pattern.search(text):
-            return True
-    return False
+    return bool(qa_flags(text, FLAG_ENGLISH_KEYWORD))
+
+
+@functools.lru_cache(maxsize=QA_FLAG_CACHE_SIZE)
+def _has_english_keyword(text):
+    """contains_english_keywords 的判定本体（经 qa_flags 调用，按值记忆）。"""
+    return _ENGLISH_KEYWORD_RE.search(text) is not None
+
+
+_DETECTORS = (
+    (FLAG_ENGLISH_KEYWORD, _has_english_keyword),
+    (FLAG_SUSPECT_LATIN, _suspect_latin),
+    (FLAG_SIMPLIFIED, _has_simplified),
+)
+
+
+def qa_flags(text, wanted=FLAG_ALL):
+    """一个字符串的 QA 标记（FLAG_* 位掩码）；只计算 wanted 里的位，每位各自按值记忆。"""
+    flags = 0
+    for flag, detect in _DETECTORS:
+        if wanted & flag and detect(text):
+            flags |= flag
+    return flags
+
+
+def clear_qa_cache():
+    """清空各标记的按值记忆（基准冷启动 / 测试用）。"""
+    for _flag, detect in _DETECTORS:
+        detect.cache_clear()
+
+
+def scan_flags(values, wanted=FLAG_ALL):
+    """一组值的 QA 标记（只算 wanted 里的位），与 values 同序的紧凑数组（array('B')）；非字符串记 0。"""
+    return array('B', (qa_flags(v, wanted) if isinstance(v, str) else 0 for v in values))
+
+
+def flag_reasons(data, target_lang, check_english=None):
+    """{key: 译文} 中需重译的 key 与原因 [(key, reason)]（strict 验证与 QA 回灌共用的判定）。
+
+    英文未翻译优先于简体残留；check_english 默认对非英语目标开启，简体残留只查 zh-TW / zh-Hant。
+    """
+    if check_english is None:
+        check_english = target_lang != 'en'
+    is_zh_hant = target_lang in ('zh-TW', 'zh-Hant')
+    # 简体残留只对繁中目标有意义：其他语言（ja/ko/zh-CN…）不跑 OpenCC 转换
+    wanted = (FLAG_SUSPECT_LATIN if check_english else 0) | (FLAG_SIMPLIFIED if is_zh_hant else 0)
+    flagged = []
+    for key, flags in zip(data, scan_flags(data.values(), wanted)):
+        if check_english and flags & FLAG_SUSPECT_LATIN:
+            flagged.append((key, '英文未翻译'))
+        elif is_zh_hant and flags & FLAG_SIMPLIFIED:
+            flagged.append((key, '简体残留'))
+    return flagged
 
 
 def should_preserve_case(word):
@@ -4,15 +4,54 @@
 避免分发逻辑出现多副本（SoT）。具体翻译器（Google 递归 / LLM 批处理）结构不同，
 不在此强行抽象，仅做分发。
 """
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import config
+from checkpoint import open_checkpoint
+from config import LANGUAGE_JOBS
 from translate import translate_file
-from translate_llm import translate_json_file_llm, translate_js_file_llm
+from translate_llm import (
+    translate_json_file_llm, translate_js_file_llm, translate_files_llm,
+    load_json_source, load_js_source, document_leaves, pending_sources,
+    prefetch_multi_language, multi_language_fits,
+)
+
+try:
+    from translation_config import MULTI_LANGUAGE_GROUPS
+except ImportError:
+    MULTI_LANGUAGE_GROUPS = []
+
+logger = logging.getLogger(__name__)
+
+# 多语言单次调用时，预翻译阶段占组内语言进度的比例（其余留给各语言的补译 / QA / 写出）
+_PREFETCH_PROGRESS_SHARE = 80.0
+
+
+def load_source(file_path, translation_engine):
+    """预解析源文件，供多语言共用（只读）。Google 引擎逐语言自行读文件，返回 None。"""
+    if translation_engine != "openrouter":
+        return None
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == ".json":
+        return load_json_source(file_path)
+    if file_extension == ".js":
+        return load_js_source(file_path)
+    raise ValueError(f"不支持的文件类型: {file_extension}")
+
+
+def previous_output_path(previous_output_dir, file_path, target_language):
+    """上一版该语言译文的路径：沿用翻译器的输出命名 `<源文件名>_<语言><扩展名>`。"""
+    base, ext = os.path.splitext(os.path.basename(file_path))
+    return os.path.join(previous_output_dir, f"{base}_{target_language}{ext.lower()}")
 
 
 def translate_single_file(
     file_path, target_language, translation_engine, ai_model, output_dir,
-    progress_callback=None,
+    progress_callback=None, source_data=None, previous=None,
+    job_id=None, checkpoint_name=None, usage=None, prefetched=None,
 ):
     """翻译单个文件，返回 (输出文件名, 输出文件完整路径)。
 
@@ -23,17 +62,39 @@ def translate_single_file(
         ai_model: OpenRouter 模型 slug（google 引擎忽略）
         output_dir: 输出目录
         progress_callback: 进度回调 (pct: float, message: str)
+        source_data: load_source 的预解析结果（可选；None 则由翻译器自行读文件）
+        previous: 增量模式 (上一版源, 上一版该语言译文)，均为 load_source 格式；仅 LLM 引擎
+        job_id: 断点续传任务 ID（见 checkpoint.py）；仅 LLM 引擎，Google 引擎忽略
+        checkpoint_name: 任务内稳定的文件标识（默认源文件名；ZIP 用包内相对路径）
+        usage: 任务的用量记录（usage_report.UsageRecorder），按 checkpoint_name 记文件；仅 LLM 引擎
+        prefetched: 多语言单次调用已译好的 {原文: 译文}（见 translate_single_file_multi）；仅 LLM 引擎
     """
     file_extension = os.path.splitext(file_path)[1].lower()
+    # 只在确有预解析数据 / 增量基线时才传，单文件调用的签名保持不变
+    extra = {"source_data": source_data} if source_data is not None else {}
+    if previous is not None:
+        if translation_engine != "openrouter":
+            raise ValueError("增量翻译（previous）仅支持 openrouter 引擎")
+        extra["previous"] = previous
+    if job_id is not None and translation_engine == "openrouter":
+        extra["checkpoint"] = open_checkpoint(
+            job_id, checkpoint_name or os.path.basename(file_path), target_language
+        )
+    if prefetched and translation_engine == "openrouter":
+        extra["prefetched"] = prefetched
+    if usage is not None and translation_engine == "openrouter":
+        extra["usage"] = usage.scope(
+            checkpoint_name or os.path.basename(file_path), target_language, ai_model
+        )
 
     if translation_engine == "openrouter":
         if file_extension == ".json":
             output_file_name = translate_json_file_llm(
-                file_path, target_language, progress_callback, ai_model, output_dir
+                file_path, target_language, progress_callback, ai_model, output_dir, **extra
             )
         elif file_extension == ".js":
             output_file_name = translate_js_file_llm(
-                file_path, target_language, progress_callback, ai_model, output_dir
+                file_path, target_language, progress_callback, ai_model, output_dir, **extra
             )
         else:
             raise ValueError(f"不支持的文件类型: {file_extension}")
@@ -43,3 +104,214 @@ def translate_single_file(
         )
 
     return output_file_name, os.path.join(output_dir, output_file_name)
+
+
+def translate_file_group(
+    files, target_language, ai_model, progress_callback=None,
+    job_id=None, checkpoint_name=None, usage=None,
+):
+    """多个小文件 → 同一语言合并翻译（仅 LLM 引擎）：全部叶子进一个池统一去重 / 分批，
+    请求数按总量而非文件数计（见 translate_llm.translate_files_llm）。
+
+    Args:
+        files: [(源文件路径, 输出目录)]
+        progress_callback: (pct, message) —— 整组进度
+        job_id / checkpoint_name: 断点续传；整组一个检查点，checkpoint_name 为组内稳定标识
+        usage: 任务的用量记录（usage_report.UsageRecorder）；整组记为一个文件（checkpoint_name）
+
+    Returns:
+        [((输出文件名, 输出完整路径) | None, Exception | None)]，顺序同 files。
+    """
+    checkpoint = None
+    if job_id is not None:
+        checkpoint = open_checkpoint(job_id, checkpoint_name or "group", target_language)
+    scope = None
+    if usage is not None:
+        scope = usage.scope(checkpoint_name or "group", target_language, ai_model)
+    outputs = translate_files_llm(
+        [(file_path, output_dir, None) for file_path, output_dir in files],
+        target_language, progress_callback, ai_model, checkpoint=checkpoint, usage=scope,
+    )
+    return [
+        ((name, os.path.join(output_dir, name)) if error is None else None, error)
+        for (name, error), (_file_path, output_dir) in zip(outputs, files)
+    ]
+
+
+def group_languages(target_languages, model, values):
+    """多语言单次调用的分组：同属 MULTI_LANGUAGE_GROUPS 一组的目标语言按请求顺序贪心合并。
+
+    每组不超过 config.MULTI_LANGUAGE_MAX_GROUP 种，且须 multi_language_fits —— 按 values 的
+    平均长度，合并后一批仍装得下足够条数（completion 受模型输出上限、总量受 context_length 约束；
+    长文本语言包自然退化为小组或逐语言）。只返回 ≥2 种语言的组，其余语言照常逐语言翻译。
+    """
+    groups, assigned = [], set()
+    for family in MULTI_LANGUAGE_GROUPS:
+        current = []
+        for lang in target_languages:
+            if lang not in family or lang in assigned:
+                continue
+            candidate = current + [lang]
+            if (len(candidate) <= config.MULTI_LANGUAGE_MAX_GROUP
+                    and multi_language_fits(candidate, model, values)):
+                current = candidate
+                continue
+            if len(current) > 1:
+                groups.append(current)
+                assigned.update(current)
+            current = [lang]
+        if len(current) > 1:
+            groups.append(current)
+            assigned.update(current)
+    return groups
+
+
+def _prefetch_groups(file_path, source_data, langs, ai_model, report, job_id, name, usage):
+    """按 group_languages 分组做多语言单次调用，返回 {语言: {原文: 译文}}。
+
+    report(lang, pct, message): 组内各语言的进度回报。这只是省请求的优化：
+    任何异常都只记日志，退回逐语言翻译。
+    """
+    prefetched = {}
+    try:
+        leaves = document_leaves(file_path, source_data)
+        groups = group_languages(langs, ai_model, list(dict.fromkeys(v for _p, v in leaves)))
+        for group in groups:
+            pending = {
+                lang: pending_sources(
+                    leaves, lang, ai_model,
+                    open_checkpoint(job_id, name, lang) if job_id is not None else None,
+                )
+                for lang in group
+            }
+            scope = (
+                usage.scope(name, "+".join(group), ai_model, multi_language=True)
+                if usage is not None else None
+            )
+
+            def callback(pct, message, group=group):
+                for lang in group:
+                    report(lang, pct, message)
+
+            prefetched.update(prefetch_multi_language(pending, ai_model, callback, scope))
+    except Exception as e:
+        logger.warning(f"多语言单次调用失败，退回逐语言翻译: {e}")
+    return prefetched
+
+
+def translate_single_file_multi(
+    file_path, target_languages, translation_engine, ai_model, output_dir,
+    progress_callback=None, max_workers=None, on_result=None,
+    previous_source=None, previous_output_dir=None, job_id=None, checkpoint_name=None,
+    usage=None,
+):
+    """一个源文件 → 多语言并发翻译。源文件只解析一次，各语言共享（只读）。
+
+    同时翻译的语言数受 max_workers（默认 config.LANGUAGE_JOBS）限制；所有语言的
+    LLM 请求另受 llm_client 的全进程在途上限约束，语言开得再多也不会冲垮 provider。
+
+    Args:
+        progress_callback: (pct, message) —— 与单文件同一契约。pct 为全部语言的平均进度，
+            message 前缀 "<语言>: "。回调可能来自工作线程。
+        max_workers: 同时翻译的语言数；1 即逐语言顺序
+        on_result: 可选 (lang, result, error) 回调，每种语言结束时立即调用（工作线程内）
+        previous_source / previous_output_dir: 增量模式 —— 上一版源文件路径 + 上一版译文目录
+            （内含 `<源文件名>_<语言>.<ext>`）。某语言缺旧译文时该语言退回全量翻译。
+        job_id / checkpoint_name: 断点续传（见 translate_single_file）。
+        usage: 任务的用量记录（见 translate_single_file），各语言共用一个；多语言单次调用的请求
+            记在 "es+fr+it" 这样的组名下。
+
+    config.MULTI_LANGUAGE_CALLS 开启（仅 LLM 引擎、非增量模式）时，先把相近语言分组（见
+    group_languages），每组的待译原文一个请求同时译成组内语言；各语言再走常规管线，
+    只补译合并请求没拿到的项，术语表 / QA / TM 仍按语言各自做。
+
+    Returns:
+        [(lang, (输出文件名, 输出完整路径) | None, Exception | None)]，顺序同 target_languages。
+        单语言失败不影响其它语言；源文件本身解析失败则每种语言都带同一个异常。
+    """
+    langs = list(target_languages)
+    if not langs:
+        return []
+
+    try:
+        source_data = load_source(file_path, translation_engine)
+        previous_data = None
+        if previous_source and previous_output_dir:
+            previous_data = load_source(previous_source, translation_engine)
+    except Exception as e:
+        logger.error(f"源文件解析失败 {file_path}: {e}")
+        results = [(lang, None, e) for lang in langs]
+        if on_result:
+            for lang, _res, err in results:
+                on_result(lang, None, err)
+        return results
+
+    lock = threading.Lock()
+    pct_by_lang = {lang: 0.0 for lang in langs}
+
+    def _report(lang, pct, message):
+        with lock:
+            pct_by_lang[lang] = pct
+            overall = sum(pct_by_lang.values()) / len(langs)
+        if progress_callback:
+            progress_callback(overall, f"{lang}: {message}")
+
+    prefetched = {}
+    if (translation_engine == "openrouter" and config.MULTI_LANGUAGE_CALLS
+            and previous_data is None and len(langs) > 1):
+        prefetched = _prefetch_groups(
+            file_path, source_data, langs, ai_model,
+            lambda lang, pct, message: _report(lang, pct * _PREFETCH_PROGRESS_SHARE / 100, message),
+            job_id, checkpoint_name or os.path.basename(file_path), usage,
+        )
+
+    def _make_callback(lang):
+        # 已做过合并预翻译的语言：单语言阶段的进度接在预翻译之后
+        start = _PREFETCH_PROGRESS_SHARE if lang in prefetched else 0.0
+
+        def callback(pct, message):
+            _report(lang, start + (100 - start) * pct / 100, message)
+        return callback
+
+    def _previous_for(lang):
+        if previous_data is None:
+            return None
+        path = previous_output_path(previous_output_dir, file_path, lang)
+        if not os.path.isfile(path):
+            logger.info(f"[{lang}] 无旧译文 {path}，全量翻译")
+            return None
+        return previous_data, load_source(path, translation_engine)
+
+    def _run(lang):
+        callback = _make_callback(lang)
+        try:
+            previous = _previous_for(lang)
+            extra = {"previous": previous} if previous is not None else {}
+            if job_id is not None:
+                extra.update(job_id=job_id, checkpoint_name=checkpoint_name)
+            if usage is not None:
+                extra.update(usage=usage, checkpoint_name=checkpoint_name)
+            if prefetched.get(lang):
+                extra["prefetched"] = prefetched[lang]
+            result = translate_single_file(
+                file_path, lang, translation_engine, ai_model, output_dir,
+                callback, source_data=source_data, **extra,
+            )
+            error = None
+        except Exception as e:
+            logger.error(f"Translation failed for {lang}: {e}")
+            result, error = None, e
+        if error is not None:
+            callback(100, f"⚠️ 翻译失败: {error}")
+        else:
+            with lock:
+                pct_by_lang[lang] = 100.0
+        if on_result:
+            on_result(lang, result, error)
+        return lang, result, error
+
+    workers = max(1, min(max_workers or LANGUAGE_JOBS, len(langs)))
+    if workers == 1:
+        return [_run(lang) for lang in langs]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_run, langs))
@@ -0,0 +1,210 @@
+"""
+实际用量记录 —— 每次 LLM 请求的 tokens / 耗时 / 重试，按 批次 → 文件 → 语言 → 任务 汇总并计价
+
+设计:
+- 一个任务一个 UsageRecorder（线程安全；多语言 / 多批并发写同一个）
+- 翻译器拿到的是绑定了 (文件, 语言, 模型) 的 UsageScope，只需报批次号：
+  record_call（llm_client 的 on_usage 回调，每个成功的 HTTP 请求一次）/ record_retry（translate_llm 每次重试一次）
+- 计价用 llm_models.get_model_info：未命中缓存的输入按输入价、命中部分按 cache_read 价、输出按输出价；
+  目录外的模型 cost_usd 为 None（tokens 照记）
+- 报告写成 JSON（write），Web 打进交付 ZIP、CLI 放在输出目录 —— 供调批次大小 / 并发度用
+- 每个 (文件, 语言) 另记实际送 LLM 的原文字符数与主要文字系统（record_source），
+  cost_calibration 据此学习每字符 token 系数
+- 故障转移 / 对冲时请求按实际模型（on_usage 的 model 字段）另记一个条目、按该模型计价；
+  不是请求的模型产出的译文记入报告的 rerouted（record_output），未列出的都由请求的模型产出，
+  这些原文的字符数也随之转记到实际模型的条目下（校准样本的 tokens 与字符数出自同一模型）
+- 多语言单次调用的组（language 为 "es+fr" 这类组合）条目标 multi_language：tokens 无法按语言拆分，
+  只计费、不作校准样本
+"""
+
+import json
+import os
+import threading
+import time
+
+from llm_models import get_model_info
+from token_estimator import dominant_script_of, script_counts
+
+QA_BATCH = "qa"  # QA 回灌重译的请求记在这个批次名下
+
+_COUNTERS = (
+    "requests", "retries", "prompt_tokens", "completion_tokens", "cached_tokens",
+    "latency_seconds",
+)
+
+
+def usage_report_name(source_base):
+    """报告文件名：与 needs_review sidecar 同样以源文件名为前缀。"""
+    return f"{source_base}.usage.json"
+
+
+def _empty():
+    return {**{name: 0 for name in _COUNTERS}, "cost_usd": 0.0}
+
+
+def _cost_usd(stats, model):
+    info = get_model_info(model)
+    if info is None:
+        return None
+    uncached = stats["prompt_tokens"] - stats["cached_tokens"]
+    return (
+        uncached * info["input_price_per_m"]
+        + stats["cached_tokens"] * info["cache_read_price_per_m"]
+        + stats["completion_tokens"] * info["output_price_per_m"]
+    ) / 1_000_000
+
+
+def _merge(total, stats):
+    """累加计数；任一部分无法计价（目录外模型）则合计 cost_usd 为 None。"""
+    for name in _COUNTERS:
+        total[name] += stats[name]
+    if total["cost_usd"] is None or stats["cost_usd"] is None:
+        total["cost_usd"] = None
+    else:
+        total["cost_usd"] += stats["cost_usd"]
+    return total
+
+
+def _batch_order(item):
+    """批次号按数字序，QA_BATCH 等命名批次排在最后。"""
+    batch = item[0]
+    return (isinstance(batch, str), batch if isinstance(batch, int) else 0, str(batch))
+
+
+def _rounded(stats):
+    out = dict(stats)
+    out["latency_seconds"] = round(out["latency_seconds"], 3)
+    if out.get("cost_usd") is not None:
+        out["cost_usd"] = round(out["cost_usd"], 6)
+    return out
+
+
+class UsageScope:
+    """绑定到 (文件, 语言, 模型) 的记录入口，翻译管线一路透传。
+
+    合并翻译（translate_file_group）时整组叶子混在同一批里，整组记为一个"文件"。
+    """
+
+    def __init__(self, recorder, file, language, model):
+        self._recorder = recorder
+        self._key = (file, language, model)
+
+    def record_call(self, batch, call):
+        """一次成功的请求：call 为 llm_client on_usage 的 dict（其 model 与请求的不同时另记条目）。"""
+        file, language, model = self._key
+        self._recorder._add((file, language, call.get("model") or model), batch, call, requests=1)
+
+    def record_retry(self, batch):
+        """一次重试（失败 / 英文混入后重发）。"""
+        self._recorder._add(self._key, batch, {}, retries=1)
+
+    def record_source(self, texts):
+        """本轮实际送 LLM 的原文（去重 / TM / 断点续传之后的翻译单元）。"""
+        self._recorder._add_source(self._key, texts)
+
+    def record_output(self, model, texts):
+        """一批译文实际由 model 产出（不是请求的模型：故障转移 / 对冲胜出），texts 为原文。"""
+        self._recorder._add_output(self._key, model, texts)
+
+
+class UsageRecorder:
+    """一个任务的用量记录。"""
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._batches = {}  # (file, language, model) → {batch: 计数}
+        # (file, language, model) → [原文字符数, 拉丁, 其它, CJK]：只留计数，不留原文（大 ZIP × 多语言不占内存）
+        self._sources = {}
+        self._rerouted = []  # [(file, language, 请求的模型, 实际模型, 原文)]
+        self._multi_language = set()  # 多语言单次调用组的 (file, language)
+
+    def scope(self, file, language, model, multi_language=False):
+        """multi_language: language 是一组语言（多语言单次调用），报告条目据此标记、不进校准。"""
+        if multi_language:
+            with self._lock:
+                self._multi_language.add((file, language))
+        return UsageScope(self, file, language, model)
+
+    def _add(self, key, batch, call, requests=0, retries=0):
+        with self._lock:
+            stats = self._batches.setdefault(key, {}).setdefault(batch, _empty())
+            stats["requests"] += requests
+            stats["retries"] += retries
+            for name in ("prompt_tokens", "completion_tokens", "cached_tokens", "latency_seconds"):
+                stats[name] += call.get(name, 0)
+
+    def _add_source(self, key, texts):
+        texts = list(texts)
+        chars = sum(len(text) for text in texts)
+        counts = script_counts(texts)
+        with self._lock:
+            source = self._sources.setdefault(key, [0, 0, 0, 0])
+            source[0] += chars
+            for i, count in enumerate(counts, 1):
+                source[i] += count
+
+    def _add_output(self, key, model, texts):
+        texts = list(texts)
+        rows = [(*key, model, text) for text in texts]
+        moved = [sum(len(text) for text in texts), *script_counts(texts)]
+        file, language, _requested = key
+        with self._lock:
+            self._rerouted.extend(rows)
+            # 原文字符数从请求的模型转到实际产出的模型
+            source = self._sources.get(key)
+            target = self._sources.setdefault((file, language, model), [0, 0, 0, 0])
+            for i, count in enumerate(moved):
+                target[i] += count
+                if source is not None:
+                    source[i] = max(0, source[i] - count)
+
+    def report(self):
+        """汇总成报告 dict：totals / by_language / by_file / files（含逐批明细）/ rerouted。"""
+        with self._lock:
+            snapshot = {
+                key: {batch: dict(stats) for batch, stats in batches.items()}
+                for key, batches in self._batches.items()
+            }
+            sources = {key: tuple(source) for key, source in self._sources.items()}
+            rerouted = list(self._rerouted)
+            multi_language = set(self._multi_language)
+        totals, by_language, by_file, files = _empty(), {}, {}, []
+        for (file, language, model), batches in snapshot.items():
+            file_stats = _empty()
+            batch_rows = []
+            for batch, stats in sorted(batches.items(), key=_batch_order):
+                stats["cost_usd"] = _cost_usd(stats, model)
+                _merge(file_stats, stats)
+                batch_rows.append({"batch": batch, **_rounded(stats)})
+            source_chars, *counts = sources.get((file, language, model), (0, 0, 0, 0))
+            files.append({
+                "file": file, "language": language, "model": model,
+                "source_chars": source_chars, "source_script": dominant_script_of(counts),
+                "multi_language": (file, language) in multi_language,
+                **_rounded(file_stats), "batches": batch_rows,
+            })
+            _merge(by_language.setdefault(language, _empty()), file_stats)
+            _merge(by_file.setdefault(file, _empty()), file_stats)
+            _merge(totals, file_stats)
+        return {
+            "job_id": self.job_id,
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "totals": _rounded(totals),
+            "by_language": {lang: _rounded(stats) for lang, stats in by_language.items()},
+            "by_file": {file: _rounded(stats) for file, stats in by_file.items()},
+            "files": files,
+            "rerouted": [
+                {"file": file, "language": language, "requested_model": requested,
+                 "model": model, "source": text}
+                for file, language, requested, model, text in rerouted
+            ],
+        }
+
+    def write(self, output_dir, source_base):
+        """写 JSON 报告到 output_dir，返回完整路径。"""
+        path = os.path.join(output_dir, usage_report_name(source_base))
+        os.makedirs(output_dir, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        return path